@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+"""Benchmark shared memory against UDP loopback for same-host pub/sub.
+
+Messages are published to a listener in another process using the shared
+memory transport (see :class:`~mcl.network.shm.Connection`) and the UDP
+transport over the loopback interface (multicast groups are delivered to
+listeners on the same host; see :class:`~mcl.network.udp.Connection`).
+
+Latency: messages are published at a fixed rate and the listener echoes each
+message back to the publisher. The table reports the mean and 99th percentile
+round trip time.
+
+Throughput: messages are published as fast as possible. The table reports the
+number of messages and bytes received per second and the fraction of messages
+received.
+
+Example usage:
+
+    python benchmark/shm_latency.py --sizes 100,10000,1000000
+
+"""
+import os
+import time
+import argparse
+import threading
+import multiprocessing
+
+import mcl.network.shm
+import mcl.network.udp
+
+GROUP = 'ff15::c75d:ce41:ea8e:00f7'
+ECHO_GROUP = 'ff15::c75d:ce41:ea8e:00f8'
+PORT = 26120
+
+
+def connections(transport, size):
+    """Return the forward and echo connections of a transport."""
+
+    if transport == 'shm':
+        ring = max(mcl.network.shm.RING_SIZE, 16 * size)
+        return (mcl.network.shm.Connection('bench-%i' % os.getpid(),
+                                           size=ring),
+                mcl.network.shm.Connection('bench-echo-%i' % os.getpid(),
+                                           size=ring))
+    else:
+        rcvbuf = 16 * 1024 * 1024
+        return (mcl.network.udp.Connection(GROUP, port=PORT, rcvbuf=rcvbuf),
+                mcl.network.udp.Connection(ECHO_GROUP, port=PORT,
+                                           rcvbuf=rcvbuf))
+
+
+def remove(connection):
+    """Remove the memory mapped file of a shared memory connection."""
+
+    if isinstance(connection, mcl.network.shm.Connection):
+        os.remove(mcl.network.shm._path(connection))
+
+
+def echo(connection, echo_connection, ready, stop):
+    """Echo received messages (run in another process)."""
+
+    broadcaster = echo_connection.broadcaster(echo_connection)
+    listener = connection.listener(connection)
+    listener.subscribe(lambda data: broadcaster.publish(data['payload']))
+    ready.set()
+    stop.wait()
+    listener.close()
+    broadcaster.close()
+
+
+def count(connection, counts, ready, stop):
+    """Count received messages and bytes (run in another process)."""
+
+    listener = connection.listener(connection)
+    received = [0, 0]
+
+    def callback(data):
+        received[0] += 1
+        received[1] += len(data['payload'])
+    listener.subscribe(callback)
+    ready.set()
+    stop.wait()
+    listener.close()
+    counts.put(received)
+
+
+def bench_latency(transport, size, messages, rate):
+    """Return round trip statistics for one message size."""
+
+    connection, echo_connection = connections(transport, size)
+    ready = multiprocessing.Event()
+    stop = multiprocessing.Event()
+    process = multiprocessing.Process(target=echo,
+                                      args=(connection, echo_connection,
+                                            ready, stop))
+    process.start()
+    ready.wait()
+
+    # Record the round trip time of each message.
+    received = threading.Event()
+    latency = list()
+
+    def callback(data):
+        latency.append(time.time() - data['payload'][0])
+        received.set()
+
+    listener = echo_connection.listener(echo_connection)
+    listener.subscribe(callback)
+    broadcaster = connection.broadcaster(connection)
+    time.sleep(0.1)
+
+    data = 'x' * size
+    for i in range(messages):
+        received.clear()
+        broadcaster.publish((time.time(), data))
+        received.wait(1.0)
+        time.sleep(1.0 / rate)
+
+    broadcaster.close()
+    listener.close()
+    stop.set()
+    process.join()
+    remove(connection)
+    remove(echo_connection)
+
+    latency.sort()
+    return {'received': len(latency) / float(messages),
+            'mean': sum(latency) / max(1, len(latency)),
+            'p99': latency[int(0.99 * (len(latency) - 1))] if latency else 0}
+
+
+def bench_throughput(transport, size, duration):
+    """Return throughput statistics for one message size."""
+
+    connection = connections(transport, size)[0]
+    ready = multiprocessing.Event()
+    stop = multiprocessing.Event()
+    counts = multiprocessing.Queue()
+    process = multiprocessing.Process(target=count,
+                                      args=(connection, counts, ready, stop))
+    process.start()
+    ready.wait()
+    broadcaster = connection.broadcaster(connection)
+
+    # Publish messages as fast as possible.
+    data = 'x' * size
+    sent = 0
+    start = time.time()
+    while time.time() - start < duration:
+        broadcaster.publish(data)
+        sent += 1
+    elapsed = time.time() - start
+
+    time.sleep(0.5)
+    broadcaster.close()
+    stop.set()
+    received, received_bytes = counts.get()
+    process.join()
+    remove(connection)
+
+    return {'messages': received / elapsed,
+            'bytes': received_bytes / elapsed,
+            'received': received / float(max(1, sent))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--rate', type=float, default=200)
+    parser.add_argument('--duration', type=float, default=2.0)
+    parser.add_argument('--sizes', type=str, default='100,10000,1000000')
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    print 'Round trip, messages: %i, rate: %.0f Hz' % (args.messages,
+                                                       args.rate)
+    print '%10s %10s %10s %12s %12s' % ('size (B)', 'transport', 'received',
+                                        'mean (ms)', 'p99 (ms)')
+    for size in sizes:
+        for transport in ('udp', 'shm'):
+            result = bench_latency(transport, size, args.messages, args.rate)
+            print '%10i %10s %9.1f%% %12.3f %12.3f' % \
+                (size, transport, 100 * result['received'],
+                 1000 * result['mean'], 1000 * result['p99'])
+
+    print
+    print 'Throughput, duration: %.1f s' % args.duration
+    print '%10s %10s %14s %10s %10s' % ('size (B)', 'transport',
+                                        'messages/s', 'MB/s', 'received')
+    for size in sizes:
+        for transport in ('udp', 'shm'):
+            result = bench_throughput(transport, size, args.duration)
+            print '%10i %10s %14.0f %10.1f %9.1f%%' % \
+                (size, transport, result['messages'],
+                 result['bytes'] / 1e6, 100 * result['received'])
+
+
+if __name__ == '__main__':
+    main()
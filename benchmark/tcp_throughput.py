@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""Benchmark TCP against UDP for large messages.
+
+Large messages (e.g. maps and images) are published to a listener in another
+process using the TCP transport (see :class:`~mcl.network.tcp.Connection`) and
+the fragmented UDP transport (see :class:`~mcl.network.udp.Connection`), with
+and without reliable delivery. Messages are published as fast as the
+broadcaster allows. The table reports the number of messages and bytes
+received per second and the fraction of messages received.
+
+Example usage:
+
+    python benchmark/tcp_throughput.py --sizes 1000000,10000000 --messages 50
+
+"""
+import time
+import argparse
+import multiprocessing
+
+import mcl.network.tcp
+import mcl.network.udp
+
+HOST = '::1'
+GROUP = 'ff15::c75d:ce41:ea8e:00f9'
+PORT = 26130
+
+
+def connection(transport):
+    """Return the connection of a transport."""
+
+    if transport == 'tcp':
+        return mcl.network.tcp.Connection(HOST, port=PORT)
+    else:
+        return mcl.network.udp.Connection(GROUP, port=PORT,
+                                          rcvbuf=32 * 1024 * 1024,
+                                          reliable=transport == 'udp reliable')
+
+
+def count(connection, messages, counts, ready):
+    """Count received messages (run in another process)."""
+
+    listener = connection.listener(connection)
+    received = [0, 0, None]
+
+    def callback(data):
+        received[0] += 1
+        received[1] += len(data['payload'])
+        received[2] = time.time()
+    listener.subscribe(callback)
+    ready.set()
+
+    # Wait until all messages were received or no message was received for a
+    # second.
+    last = time.time()
+    while received[0] < messages and time.time() - (received[2] or last) < 1:
+        time.sleep(0.01)
+    listener.close()
+    counts.put(received)
+
+
+def bench(transport, size, messages):
+    """Return throughput statistics for one message size."""
+
+    # Open the listener process before the broadcaster (see tcp module).
+    ready = multiprocessing.Event()
+    counts = multiprocessing.Queue()
+    process = multiprocessing.Process(target=count,
+                                      args=(connection(transport), messages,
+                                            counts, ready))
+    process.start()
+    ready.wait()
+    broadcaster = connection(transport).broadcaster(connection(transport))
+    time.sleep(0.5)
+
+    data = 'x' * size
+    start = time.time()
+    for i in range(messages):
+        broadcaster.publish(data)
+
+    received, received_bytes, finished = counts.get()
+    process.join()
+    broadcaster.close()
+
+    elapsed = (finished or time.time()) - start
+    return {'messages': received / elapsed,
+            'bytes': received_bytes / elapsed,
+            'received': received / float(messages)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--messages', type=int, default=50)
+    parser.add_argument('--sizes', type=str, default='1000000,10000000')
+    args = parser.parse_args()
+
+    print 'Messages: %i' % args.messages
+    print '%10s %14s %12s %10s %10s' % ('size (B)', 'transport',
+                                        'messages/s', 'MB/s', 'received')
+    for size in [int(size) for size in args.sizes.split(',')]:
+        for transport in ('udp', 'udp reliable', 'tcp'):
+            result = bench(transport, size, args.messages)
+            print '%10i %14s %12.1f %10.1f %9.1f%%' % \
+                (size, transport, result['messages'],
+                 result['bytes'] / 1e6, 100 * result['received'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""Benchmark coalescing of small UDP messages.
+
+Small messages are published at a fixed rate by a
+:class:`~mcl.network.udp.RawBroadcaster` and received by a
+:class:`~mcl.network.udp.RawListener`. Messages are published with coalescing
+disabled and with increasing maximum delays (see
+:class:`~mcl.network.udp.Connection`). The table reports the number of
+datagrams sent per second and the mean and 99th percentile latency between
+publishing and receiving each message. Coalescing reduces the datagram rate
+(and the cost of the system calls) at the expense of added latency.
+
+Example usage:
+
+    python benchmark/udp_coalesce.py --rate 5000 --delays 0.0005,0.001,0.005
+
+"""
+import time
+import socket
+import struct
+import argparse
+
+from mcl.network.udp import Connection
+from mcl.network.udp import RawBroadcaster
+from mcl.network.udp import RawListener
+
+URL = 'ff15::c75d:ce41:ea8e:00f3'
+PORT = 26020
+
+
+def counter():
+    """Return a socket receiving a copy of every datagram in the group."""
+
+    sock = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16 * 1024 * 1024)
+    group = socket.inet_pton(socket.AF_INET6, URL) + struct.pack('@I', 0)
+    sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_JOIN_GROUP, group)
+    sock.bind((URL, PORT))
+    sock.setblocking(False)
+    return sock
+
+
+def bench(rate, duration, delay):
+    """Return datagram rate and latency for one maximum delay."""
+
+    connection = Connection(URL, port=PORT, coalesce=delay)
+    sock = counter()
+    broadcaster = RawBroadcaster(connection)
+    listener = RawListener(connection)
+    latency = list()
+    listener.subscribe(lambda data: latency.append(time.time() -
+                                                   data['payload'][0]))
+
+    # Publish telemetry-sized messages at a fixed rate.
+    messages = int(rate * duration)
+    start = time.time()
+    for i in range(messages):
+        while time.time() < start + i / float(rate):
+            pass
+        broadcaster.publish((time.time(), i, 1.5, 2.5, 3.5), topic='telemetry')
+    time.sleep(0.1 + (delay or 0))
+    broadcaster.close()
+    listener.close()
+
+    # Count datagrams.
+    datagrams = 0
+    try:
+        while True:
+            sock.recv(65536)
+            datagrams += 1
+    except socket.error:
+        sock.close()
+
+    latency.sort()
+    return {'datagrams': datagrams / duration,
+            'received': len(latency) / float(messages),
+            'mean': sum(latency) / max(1, len(latency)),
+            'p99': latency[int(0.99 * (len(latency) - 1))] if latency else 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rate', type=int, default=5000)
+    parser.add_argument('--duration', type=float, default=2.0)
+    parser.add_argument('--delays', type=str, default='0.0005,0.001,0.005')
+    args = parser.parse_args()
+
+    print 'Message rate: %i Hz, duration: %.1f s' % (args.rate, args.duration)
+    print '%10s %14s %10s %12s %12s' % ('delay (s)', 'datagrams/s',
+                                        'received', 'mean (ms)', 'p99 (ms)')
+    delays = [None] + [float(delay) for delay in args.delays.split(',')]
+    for delay in delays:
+        result = bench(args.rate, args.duration, delay)
+        print '%10s %14.0f %9.1f%% %12.3f %12.3f' % \
+            (delay, result['datagrams'], 100 * result['received'],
+             1000 * result['mean'], 1000 * result['p99'])
+
+
+if __name__ == '__main__':
+    main()
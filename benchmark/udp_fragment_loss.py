@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+"""Benchmark UDP message delivery over a lossy link with IP fragmentation.
+
+Messages are published through a local relay which stands in for a lossy
+network link. The relay forwards datagrams from a
+:class:`~mcl.network.udp.RawBroadcaster` to a
+:class:`~mcl.network.udp.RawListener` and drops datagrams as a link with the
+given MTU and per-packet loss probability would:
+
+    - datagrams larger than the link MTU are fragmented at the IP level into
+      several packets
+    - each packet on the link is lost independently
+    - if any packet of an IP-fragmented datagram is lost, the whole datagram
+      is lost
+
+For each message size, delivery is compared between datagrams sized to the
+legacy MTU (IP-level fragmentation), datagrams sized to the link MTU (MCL
+fragmentation only) and datagrams sized to the link MTU with parity
+fragments (see :class:`~mcl.network.udp.Connection`). The table reports the
+fraction of messages delivered, the fraction of datagrams delivered, the
+average number of bytes discarded by the link for each lost packet and the
+overhead (bytes sent in excess of the message size).
+
+Example usage:
+
+    python benchmark/udp_fragment_loss.py --loss 0.01 --mtu 1500 --parity 2,8
+
+"""
+import math
+import time
+import random
+import socket
+import argparse
+import threading
+
+from mcl.network.udp import MTU
+from mcl.network.udp import IPV6_HEADER
+from mcl.network.udp import UDP_HEADER
+from mcl.network.udp import Connection
+from mcl.network.udp import RawBroadcaster
+from mcl.network.udp import RawListener
+
+HOST = '::1'
+GROUP = 'ff15::c75d:ce41:ea8e:00f0'
+RELAY_PORT = 26100
+LISTEN_PORT = 26101
+
+# Size of the IPv6 fragment header. Fragment payloads are a multiple of eight
+# bytes.
+FRAGMENT_HEADER = 8
+
+
+def ip_packets(length, mtu):
+    """Return the number of IP packets used to send a UDP datagram."""
+
+    if length + IPV6_HEADER + UDP_HEADER <= mtu:
+        return 1
+    else:
+        payload = (mtu - IPV6_HEADER - FRAGMENT_HEADER) & ~7
+        return int(math.ceil(float(length + UDP_HEADER) / payload))
+
+
+class LossyRelay(threading.Thread):
+    """Forward datagrams, dropping them as a lossy link would."""
+
+    def __init__(self, mtu, loss, seed):
+        super(LossyRelay, self).__init__()
+        self.daemon = True
+        self.mtu = mtu
+        self.loss = loss
+        self.random = random.Random(seed)
+        self.datagrams = 0
+        self.dropped = 0
+        self.packets = 0
+        self.packets_lost = 0
+        self.bytes_discarded = 0
+        self.bytes = 0
+        self.stop_event = threading.Event()
+
+        self.receiver = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+        self.receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF,
+                                 16 * 1024 * 1024)
+        self.receiver.settimeout(0.1)
+        self.receiver.bind((HOST, RELAY_PORT))
+        self.sender = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+
+    def run(self):
+        buf = bytearray(65536)
+        while not self.stop_event.is_set():
+            try:
+                length = self.receiver.recv_into(buf)
+            except socket.timeout:
+                continue
+
+            # Lose each packet of the datagram independently.
+            packets = ip_packets(length, self.mtu)
+            lost = sum(self.random.random() < self.loss
+                       for i in range(packets))
+            self.datagrams += 1
+            self.bytes += length
+            self.packets += packets
+            self.packets_lost += lost
+            if lost:
+                self.dropped += 1
+                self.bytes_discarded += length
+            else:
+                self.sender.sendto(buffer(buf, 0, length),
+                                   (GROUP, LISTEN_PORT))
+
+            # Avoid overflowing the listener.
+            if self.datagrams % 64 == 0:
+                time.sleep(0.001)
+
+    def close(self):
+        self.stop_event.set()
+        self.join()
+        self.receiver.close()
+        self.sender.close()
+
+
+def bench(size, messages, fragment_size, parity, mtu, loss, seed):
+    """Return delivery statistics for one message size and fragment size."""
+
+    relay = LossyRelay(mtu, loss, seed)
+    relay.start()
+
+    broadcaster = RawBroadcaster(Connection(HOST, port=RELAY_PORT,
+                                            fragment_size=fragment_size,
+                                            parity=parity))
+    listener = RawListener(Connection(GROUP, port=LISTEN_PORT))
+    received = list()
+    listener.subscribe(lambda data: received.append(data['payload']))
+
+    # Publish messages.
+    data = 'x' * size
+    for i in range(messages):
+        broadcaster.publish(data)
+        time.sleep(0.002)
+
+    # Wait for delivery.
+    time.sleep(0.5)
+    broadcaster.close()
+    listener.close()
+    relay.close()
+
+    return {'messages': len(received) / float(messages),
+            'datagrams': 1.0 - relay.dropped / float(relay.datagrams),
+            'discarded': relay.bytes_discarded / max(1.0, relay.packets_lost),
+            'overhead': relay.bytes / float(size * messages) - 1.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--sizes', type=str, default='1000,4000,20000,100000')
+    parser.add_argument('--mtu', type=int, default=1500)
+    parser.add_argument('--loss', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--parity', type=str, default='1,2,4,8')
+    args = parser.parse_args()
+
+    link_size = args.mtu - IPV6_HEADER - UDP_HEADER
+    print 'Messages: %i, link MTU: %i, packet loss: %.2f%%' % \
+        (args.messages, args.mtu, 100 * args.loss)
+    print '%10s %14s %8s %12s %12s %16s %10s' % ('size (B)', 'fragment (B)',
+                                                 'parity', 'messages',
+                                                 'datagrams', 'discarded (B)',
+                                                 'overhead')
+    configurations = [(MTU, None), (link_size, None)]
+    configurations += [(link_size, int(parity))
+                       for parity in args.parity.split(',') if parity]
+    for size in [int(size) for size in args.sizes.split(',')]:
+        for fragment_size, parity in configurations:
+            result = bench(size, args.messages, fragment_size, parity,
+                           args.mtu, args.loss, args.seed)
+            print '%10i %14i %8s %11.1f%% %11.1f%% %16.0f %9.1f%%' % \
+                (size, fragment_size, parity, 100 * result['messages'],
+                 100 * result['datagrams'], result['discarded'],
+                 100 * result['overhead'])
+
+
+if __name__ == '__main__':
+    main()
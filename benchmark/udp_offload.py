@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""Benchmark publishing large UDP messages with segmentation offload.
+
+Large messages are published by a :class:`~mcl.network.udp.RawBroadcaster`
+with and without segmentation offload (see
+:class:`~mcl.network.udp.Connection`) and received by a
+:class:`~mcl.network.udp.RawListener`. Without offload, each fragment is a
+separate datagram passed to the kernel. With offload, up to 64
+fragments are passed to the kernel in one buffer and split into datagrams by
+the kernel. The table reports the number of buffers passed to the kernel per
+message, the time spent publishing each message, the publishing throughput and
+the fraction of messages received.
+
+Example usage:
+
+    python benchmark/udp_offload.py --sizes 1000000,4000000 --fragment 1400
+
+"""
+import time
+import argparse
+
+from mcl.network.udp import MTU_MAX
+from mcl.network.udp import HEADER
+from mcl.network.udp import Connection
+from mcl.network.udp import RawBroadcaster
+from mcl.network.udp import RawListener
+
+URL = 'ff15::c75d:ce41:ea8e:00f2'
+
+
+def bench(size, messages, fragment_size, offload):
+    """Return publishing statistics for one message size."""
+
+    connection = Connection(URL, rcvbuf=32 * 1024 * 1024,
+                            fragment_size=fragment_size, offload=offload)
+    broadcaster = RawBroadcaster(connection)
+    listener = RawListener(connection)
+    received = list()
+    listener.subscribe(lambda data: received.append(len(data['payload'])))
+
+    # Publish messages. Allow the listener to drain the socket between
+    # messages.
+    data = 'x' * size
+    elapsed = 0.0
+    for i in range(messages):
+        start = time.time()
+        broadcaster.publish(data)
+        elapsed += time.time() - start
+        time.sleep(0.05)
+
+    # Wait for delivery.
+    time.sleep(0.5)
+    enabled = broadcaster.socket_options['offload']
+    broadcaster.close()
+    listener.close()
+
+    # Number of buffers passed to the kernel.
+    fragments = -(-size // (fragment_size - HEADER.size))
+    if enabled:
+        buffers = -(-fragments // min(64, MTU_MAX // fragment_size))
+    else:
+        buffers = fragments
+
+    return {'offload': enabled,
+            'buffers': buffers,
+            'time': elapsed / messages,
+            'throughput': size * messages / elapsed / 1e6,
+            'received': len(received) / float(messages)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--messages', type=int, default=20)
+    parser.add_argument('--sizes', type=str, default='100000,1000000,4000000')
+    parser.add_argument('--fragment', type=int, default=1400)
+    args = parser.parse_args()
+
+    print 'Messages: %i, fragment size: %i' % (args.messages, args.fragment)
+    print '%10s %8s %8s %10s %10s %10s' % ('size (B)', 'offload', 'buffers',
+                                          'time (ms)', 'MB/s', 'received')
+    for size in [int(size) for size in args.sizes.split(',')]:
+        for offload in (False, True):
+            result = bench(size, args.messages, args.fragment, offload)
+            print '%10i %8s %8i %10.2f %10.1f %9.1f%%' % \
+                (size, result['offload'], result['buffers'],
+                 1000 * result['time'], result['throughput'],
+                 100 * result['received'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Benchmark delivery of large UDP messages with paced fragments.
+
+Large messages are published by a :class:`~mcl.network.udp.RawBroadcaster` to
+a :class:`~mcl.network.udp.RawListener` with a small socket receive buffer.
+Without pacing, the fragments of a message are sent back-to-back and overrun
+the receive buffer, losing the message. With pacing (see
+:class:`~mcl.network.udp.Connection`), fragments are sent no faster than the
+requested rate. The table reports the fraction of messages delivered, the
+achieved throughput of the broadcaster and the pacing accuracy (time slept in
+excess of the requested time, as a fraction of the requested time).
+
+Example usage:
+
+    python benchmark/udp_pacing.py --size 5000000 --rates 20000000,50000000
+
+"""
+import time
+import argparse
+
+from mcl.network.udp import Connection
+from mcl.network.udp import RawBroadcaster
+from mcl.network.udp import RawListener
+
+URL = 'ff15::c75d:ce41:ea8e:00f5'
+
+
+def bench(size, messages, rate, rcvbuf):
+    """Return delivery and pacing statistics for one rate."""
+
+    broadcaster = RawBroadcaster(Connection(URL, rate=rate))
+    listener = RawListener(Connection(URL, rcvbuf=rcvbuf))
+    received = list()
+    listener.subscribe(lambda data: received.append(len(data['payload'])))
+
+    # Publish messages. Allow the listener to drain the socket between
+    # messages.
+    data = 'x' * size
+    elapsed = 0.0
+    for i in range(messages):
+        start = time.time()
+        broadcaster.publish(data)
+        elapsed += time.time() - start
+        time.sleep(0.2)
+
+    stats = broadcaster.stats['pacing']
+    broadcaster.close()
+    listener.close()
+
+    if stats and stats['wait_time'] > 0:
+        accuracy = stats['oversleep'] / stats['wait_time']
+    else:
+        accuracy = 0.0
+    return {'received': len(received) / float(messages),
+            'throughput': size * messages / elapsed,
+            'oversleep': accuracy}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--messages', type=int, default=10)
+    parser.add_argument('--size', type=int, default=5000000)
+    parser.add_argument('--rcvbuf', type=int, default=256 * 1024)
+    parser.add_argument('--rates', type=str,
+                        default='10000000,20000000,50000000,100000000')
+    args = parser.parse_args()
+
+    print 'Messages: %i, size: %i B, receive buffer: %i B' % \
+        (args.messages, args.size, args.rcvbuf)
+    print '%14s %10s %18s %12s' % ('rate (MB/s)', 'received',
+                                   'throughput (MB/s)', 'oversleep')
+    rates = [None] + [int(rate) for rate in args.rates.split(',')]
+    for rate in rates:
+        result = bench(args.size, args.messages, rate, args.rcvbuf)
+        print '%14s %9.1f%% %18.1f %11.1f%%' % \
+            ('%.0f' % (rate / 1e6) if rate else 'None',
+             100 * result['received'], result['throughput'] / 1e6,
+             100 * result['oversleep'])
+
+
+if __name__ == '__main__':
+    main()
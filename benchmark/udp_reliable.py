@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+"""Benchmark reliable UDP delivery over a lossy link and against TCP fan-out.
+
+Delivery over a lossy link: messages are published through a local relay
+which stands in for a lossy network link. The relay forwards datagrams from a
+:class:`~mcl.network.udp.RawBroadcaster` to a
+:class:`~mcl.network.udp.RawListener` and negative acknowledgements (NACKs)
+from the listener back to the broadcaster. Each datagram is lost
+independently in both directions. Delivery is compared with and without
+reliable delivery (see :class:`~mcl.network.udp.Connection`). The table reports
+the fraction of messages delivered, the mean and 99th percentile latency
+between publishing and receiving each message and the overhead (bytes sent in
+excess of the message size, including retransmissions).
+
+Fan-out: messages are published to several receivers using one reliable
+multicast broadcaster and using one TCP connection per receiver (messages are
+serialised and length prefixed). The table reports the time spent sending each
+message (for TCP, writing the message to every connection), the mean latency
+until the message was received by all receivers and the bytes sent for each
+message. Over the loopback interface the cost of sending each copy is small;
+on a network link, TCP sends one copy of each message per receiver.
+
+Example usage:
+
+    python benchmark/udp_reliable.py --loss 0.01 --sizes 1000,100000
+
+"""
+import time
+import random
+import select
+import socket
+import struct
+import msgpack
+import argparse
+import threading
+
+from mcl.network.udp import Connection
+from mcl.network.udp import RawBroadcaster
+from mcl.network.udp import RawListener
+
+HOST = '::1'
+GROUP = 'ff15::c75d:ce41:ea8e:00f6'
+RELAY_PORT = 26110
+LISTEN_PORT = 26111
+FANOUT_PORT = 26112
+TCP_PORT = 26113
+
+# Length prefix of serialised messages sent over TCP.
+PREFIX = struct.Struct('!I')
+
+
+class LossyRelay(threading.Thread):
+    """Forward datagrams and NACKs, dropping them as a lossy link would."""
+
+    def __init__(self, loss, seed):
+        super(LossyRelay, self).__init__()
+        self.daemon = True
+        self.loss = loss
+        self.random = random.Random(seed)
+        self.bytes = 0
+        self.stop_event = threading.Event()
+
+        # Datagrams from the broadcaster are received on one socket and
+        # forwarded from another. NACKs from the listener are sent to the
+        # forwarding socket.
+        self.receiver = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+        self.receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF,
+                                 16 * 1024 * 1024)
+        self.receiver.bind((HOST, RELAY_PORT))
+        self.sender = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+        self.sender.bind(('::', 0))
+        self.broadcaster = None
+
+    def run(self):
+        buf = bytearray(65536)
+        while not self.stop_event.is_set():
+            readable = select.select([self.receiver, self.sender], [], [],
+                                     0.1)[0]
+            for sock in readable:
+                length, address = sock.recvfrom_into(buf)
+                if self.random.random() < self.loss:
+                    continue
+                if sock is self.receiver:
+                    self.broadcaster = address
+                    self.bytes += length
+                    self.sender.sendto(buffer(buf, 0, length),
+                                       (GROUP, LISTEN_PORT))
+                elif self.broadcaster:
+                    self.receiver.sendto(buffer(buf, 0, length),
+                                         self.broadcaster)
+
+    def close(self):
+        self.stop_event.set()
+        self.join()
+        self.receiver.close()
+        self.sender.close()
+
+
+def bench_loss(size, messages, rate, loss, reliable, seed):
+    """Return delivery statistics for one message size."""
+
+    relay = LossyRelay(loss, seed)
+    relay.start()
+
+    broadcaster = RawBroadcaster(Connection(HOST, port=RELAY_PORT,
+                                            reliable=reliable))
+    listener = RawListener(Connection(GROUP, port=LISTEN_PORT))
+    latency = list()
+    listener.subscribe(lambda data: latency.append(time.time() -
+                                                   data['payload'][0]))
+
+    # Publish messages at a fixed rate.
+    data = 'x' * size
+    for i in range(messages):
+        broadcaster.publish((time.time(), data))
+        time.sleep(1.0 / rate)
+
+    # Wait for delivery (and retransmission of the last messages).
+    time.sleep(1.0)
+    broadcaster.close()
+    listener.close()
+    relay.close()
+
+    latency.sort()
+    return {'received': len(latency) / float(messages),
+            'mean': sum(latency) / max(1, len(latency)),
+            'p99': latency[int(0.99 * (len(latency) - 1))] if latency else 0,
+            'overhead': relay.bytes / float(size * messages) - 1.0}
+
+
+def bench_udp_fanout(size, messages, receivers):
+    """Return fan-out statistics of reliable multicast."""
+
+    connection = Connection(GROUP, port=FANOUT_PORT, reliable=True,
+                            rcvbuf=16 * 1024 * 1024)
+    received = dict()
+    lock = threading.Lock()
+
+    def callback(data):
+        with lock:
+            received.setdefault(data['payload'][0], list()).append(time.time())
+
+    listeners = [RawListener(connection) for i in range(receivers)]
+    for listener in listeners:
+        listener.subscribe(callback)
+    broadcaster = RawBroadcaster(connection)
+
+    data = 'x' * size
+    sent = dict()
+    elapsed = 0.0
+    for i in range(messages):
+        start = time.time()
+        broadcaster.publish((i, data))
+        elapsed += time.time() - start
+        sent[i] = start
+        time.sleep(0.002)
+
+    time.sleep(0.5)
+    broadcaster.close()
+    for listener in listeners:
+        listener.close()
+
+    return fanout_result(sent, received, receivers, elapsed, 1)
+
+
+def bench_tcp_fanout(size, messages, receivers):
+    """Return fan-out statistics of one TCP connection per receiver."""
+
+    server = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind((HOST, TCP_PORT))
+    server.listen(receivers)
+
+    received = dict()
+    lock = threading.Lock()
+
+    def receive():
+        sock = socket.create_connection((HOST, TCP_PORT))
+        stream = sock.makefile('rb')
+        while True:
+            prefix = stream.read(PREFIX.size)
+            if len(prefix) < PREFIX.size:
+                break
+            length, = PREFIX.unpack(prefix)
+            index, payload = msgpack.loads(stream.read(length))
+            with lock:
+                received.setdefault(index, list()).append(time.time())
+        sock.close()
+
+    threads = [threading.Thread(target=receive) for i in range(receivers)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    connections = [server.accept()[0] for i in range(receivers)]
+
+    data = 'x' * size
+    sent = dict()
+    elapsed = 0.0
+    for i in range(messages):
+        start = time.time()
+        packet = msgpack.dumps((i, data))
+        frame = PREFIX.pack(len(packet)) + packet
+        for sock in connections:
+            sock.sendall(frame)
+        elapsed += time.time() - start
+        sent[i] = start
+        time.sleep(0.002)
+
+    for sock in connections:
+        sock.close()
+    for thread in threads:
+        thread.join()
+    server.close()
+
+    return fanout_result(sent, received, receivers, elapsed, receivers)
+
+
+def fanout_result(sent, received, receivers, elapsed, copies):
+    """Return the send time and the latency until all receivers received.
+
+    Each message is sent ``copies`` times by the sender.
+
+    """
+
+    latency = [max(received[i]) - sent[i] for i in sent
+               if len(received.get(i, ())) == receivers]
+    return {'send': elapsed / len(sent),
+            'copies': copies,
+            'latency': sum(latency) / max(1, len(latency)),
+            'received': len(latency) / float(len(sent))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=100)
+    parser.add_argument('--sizes', type=str, default='1000,20000,100000')
+    parser.add_argument('--loss', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--receivers', type=str, default='1,2,4,8')
+    args = parser.parse_args()
+
+    print 'Messages: %i, rate: %.0f Hz, datagram loss: %.2f%%' % \
+        (args.messages, args.rate, 100 * args.loss)
+    print '%10s %10s %10s %12s %12s %10s' % ('size (B)', 'reliable',
+                                             'received', 'mean (ms)',
+                                             'p99 (ms)', 'overhead')
+    sizes = [int(size) for size in args.sizes.split(',')]
+    for size in sizes:
+        for reliable in (False, True):
+            result = bench_loss(size, args.messages, args.rate, args.loss,
+                                reliable, args.seed)
+            print '%10i %10s %9.1f%% %12.3f %12.3f %9.1f%%' % \
+                (size, reliable, 100 * result['received'],
+                 1000 * result['mean'], 1000 * result['p99'],
+                 100 * result['overhead'])
+
+    print
+    print 'Fan-out, messages: %i' % args.messages
+    print '%10s %10s %10s %12s %14s %10s %10s' % ('size (B)', 'receivers',
+                                                  'transport', 'send (ms)',
+                                                  'latency (ms)', 'received',
+                                                  'sent (kB)')
+    for size in sizes:
+        for receivers in [int(n) for n in args.receivers.split(',')]:
+            for name, bench in (('udp', bench_udp_fanout),
+                                ('tcp', bench_tcp_fanout)):
+                result = bench(size, args.messages, receivers)
+                print '%10i %10i %10s %12.3f %14.3f %9.1f%% %10.1f' % \
+                    (size, receivers, name, 1000 * result['send'],
+                     1000 * result['latency'], 100 * result['received'],
+                     result['copies'] * size / 1000.0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""Benchmark the time publishing UDP messages blocks the caller.
+
+Large messages are published by a :class:`~mcl.network.udp.RawBroadcaster`
+with and without a send queue (see :class:`~mcl.network.udp.Connection`).
+Without a send queue, the caller is blocked while the message is fragmented
+and sent. With a send queue, the caller is only blocked while the message is
+serialised. The table reports the mean and maximum time spent in
+:meth:`~mcl.network.udp.RawBroadcaster.publish` and the mean time from
+publishing each message to passing it to the kernel.
+
+Example usage:
+
+    python benchmark/udp_send_queue.py --sizes 100000,1000000 --rate 20
+
+"""
+import time
+import argparse
+
+from mcl.network.udp import Connection
+from mcl.network.udp import RawBroadcaster
+
+URL = 'ff15::c75d:ce41:ea8e:00f4'
+
+
+def bench(size, messages, rate, send_queue):
+    """Return publishing statistics for one message size."""
+
+    broadcaster = RawBroadcaster(Connection(URL, send_queue=send_queue))
+
+    # Publish messages at a fixed rate, as a control loop would.
+    data = 'x' * size
+    blocked = list()
+    for i in range(messages):
+        start = time.time()
+        broadcaster.publish(data)
+        blocked.append(time.time() - start)
+        time.sleep(max(0, 1.0 / rate - blocked[-1]))
+
+    broadcaster.flush()
+    stats = broadcaster.stats
+    broadcaster.close()
+
+    return {'mean': sum(blocked) / len(blocked),
+            'max': max(blocked),
+            'latency': stats['latency_mean']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--messages', type=int, default=50)
+    parser.add_argument('--sizes', type=str, default='100000,1000000,4000000')
+    parser.add_argument('--rate', type=float, default=20)
+    args = parser.parse_args()
+
+    print 'Messages: %i, rate: %.0f Hz' % (args.messages, args.rate)
+    print '%10s %8s %16s %15s %14s' % ('size (B)', 'queue', 'publish (ms)',
+                                       'max (ms)', 'latency (ms)')
+    for size in [int(size) for size in args.sizes.split(',')]:
+        for send_queue in (None, 16):
+            result = bench(size, args.messages, args.rate, send_queue)
+            print '%10i %8s %16.3f %15.3f %14.3f' % \
+                (size, send_queue, 1000 * result['mean'],
+                 1000 * result['max'], 1000 * result['latency'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""Benchmark receive throughput of sharded UDP listeners.
+
+Messages are published to a :class:`~mcl.network.udp.ShardedListener` with an
+increasing number of worker processes. Each message is handled by a stateless,
+CPU-bound callback. The table reports the number of messages handled per
+second. For stateless consumers, throughput is expected to scale with the
+number of workers up to the number of available cores.
+
+Example usage:
+
+    python benchmark/udp_sharding.py --messages 2000 --work 20000
+
+"""
+import time
+import argparse
+import multiprocessing
+
+from mcl.network.udp import Connection
+from mcl.network.udp import RawBroadcaster
+from mcl.network.udp import ShardedListener
+
+URL = 'ff15::c75d:ce41:ea8e:00f1'
+
+
+def bench(messages, work, workers, affinity):
+    """Return the number of messages handled per second."""
+
+    handled = multiprocessing.Value('i', 0)
+    finished = multiprocessing.Event()
+
+    def callback(data):
+        total = 0
+        for i in xrange(work):
+            total += i
+        with handled.get_lock():
+            handled.value += 1
+            if handled.value == messages:
+                finished.set()
+
+    connection = Connection(URL, rcvbuf=32 * 1024 * 1024)
+    listener = ShardedListener(connection, callback, workers=workers,
+                               affinity=affinity)
+    broadcaster = RawBroadcaster(connection)
+
+    # Publish messages on several topics.
+    start = time.time()
+    for i in xrange(messages):
+        broadcaster.publish(i, topic='topic %i' % (i % 16))
+    finished.wait(60)
+    elapsed = time.time() - start
+
+    broadcaster.close()
+    listener.close()
+    return handled.value / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--work', type=int, default=20000)
+    parser.add_argument('--workers', type=str, default='1,2,4')
+    parser.add_argument('--affinity', action='store_true')
+    args = parser.parse_args()
+
+    print 'Messages: %i, cores: %i, affinity: %s' % \
+        (args.messages, multiprocessing.cpu_count(), args.affinity)
+    print '%10s %15s' % ('workers', 'msg/s')
+    for workers in [int(workers) for workers in args.workers.split(',')]:
+        rate = bench(args.messages, args.work, workers, args.affinity)
+        print '%10i %15.0f' % (workers, rate)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""Benchmark batched UDP system calls against per-packet system calls.
+
+Measures the number of packets per second that can be sent and received over
+an IPv6 loopback socket using:
+
+    - one ``sendto``/``recvfrom`` call per packet (the standard socket
+      interface)
+    - one ``recvfrom_into`` call per packet into a pool of preallocated
+      buffers
+    - ``sendmmsg``/``recvmmsg`` via :mod:`mcl.network.linux`
+
+Example usage:
+
+    python benchmark/udp_syscalls.py --packets 200000 --size 64
+
+"""
+import time
+import socket
+import argparse
+
+import mcl.network.linux
+from mcl.network.linux import BatchSender
+from mcl.network.linux import BatchReceiver
+
+HOST = '::1'
+MTU_MAX = 65000
+
+
+def create_sockets():
+    """Create a bound receive socket and a send socket on the loopback."""
+
+    receiver = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 32 * 1024 * 1024)
+    receiver.setblocking(False)
+    receiver.bind((HOST, 0))
+    sender = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+    return sender, receiver
+
+
+def bench_send(packets, size, batch):
+    """Return the packets/sec achieved when sending."""
+
+    sender, receiver = create_sockets()
+    sockaddr = receiver.getsockname()
+    datagrams = ['x' * size] * batch
+
+    start = time.time()
+    if batch == 1:
+        datagram = datagrams[0]
+        for i in xrange(packets):
+            sender.sendto(datagram, sockaddr)
+    else:
+        batch_sender = BatchSender(sender, sockaddr, batch)
+        for i in xrange(packets / batch):
+            batch_sender.send(datagrams)
+    elapsed = time.time() - start
+
+    sender.close()
+    receiver.close()
+    return packets / elapsed
+
+
+def bench_receive(packets, size, batch, chunk=1000, into=False):
+    """Return the packets/sec achieved when receiving."""
+
+    sender, receiver = create_sockets()
+    sockaddr = receiver.getsockname()
+    datagram = 'x' * size
+    pool = [bytearray(MTU_MAX) for i in range(batch)]
+    if batch > 1 and not into:
+        batch_receiver = BatchReceiver(receiver, batch, MTU_MAX)
+
+    # Fill the socket buffer in chunks and time draining it.
+    received = 0
+    elapsed = 0.0
+    while received < packets:
+        for i in xrange(chunk):
+            sender.sendto(datagram, sockaddr)
+
+        start = time.time()
+        if batch == 1:
+            while True:
+                try:
+                    receiver.recvfrom(MTU_MAX)
+                    received += 1
+                except socket.error:
+                    break
+        elif into:
+            drained = False
+            while not drained:
+                for buf in pool:
+                    try:
+                        receiver.recvfrom_into(buf)
+                        received += 1
+                    except socket.error:
+                        drained = True
+                        break
+        else:
+            while True:
+                count = len(batch_receiver.recv())
+                received += count
+                if count < batch:
+                    break
+        elapsed += time.time() - start
+
+    sender.close()
+    receiver.close()
+    return received / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--packets', type=int, default=100000)
+    parser.add_argument('--size', type=int, default=64)
+    parser.add_argument('--batch', type=int, default=32)
+    args = parser.parse_args()
+
+    if not mcl.network.linux.HAS_MMSG:
+        print 'sendmmsg()/recvmmsg() are not available on this system.'
+        return
+
+    print 'Packets: %i, size: %i bytes' % (args.packets, args.size)
+    print '%-10s %15s %15s' % ('', 'send (pkt/s)', 'recv (pkt/s)')
+    for name, batch in [('loop', 1), ('mmsg', args.batch)]:
+        send_rate = bench_send(args.packets, args.size, batch)
+        recv_rate = bench_receive(args.packets, args.size, batch)
+        print '%-10s %15.0f %15.0f' % (name, send_rate, recv_rate)
+
+    recv_rate = bench_receive(args.packets, args.size, args.batch, into=True)
+    print '%-10s %15s %15.0f' % ('recv_into', '-', recv_rate)
+
+
+if __name__ == '__main__':
+    main()
@@ -39,6 +39,8 @@ following sections.
 +----------------------------------------+-------------------------------------------------+
 | ``from mcl import QueuedListener``     | :class:`mcl.network.network.QueuedListener`     |
 +----------------------------------------+-------------------------------------------------+
+| ``from mcl import SharedListener``     | :class:`mcl.network.network.SharedListener`     |
++----------------------------------------+-------------------------------------------------+
 
 .. raw:: html
 
@@ -80,6 +82,7 @@ from mcl.network.network import RawBroadcaster
 from mcl.network.network import MessageListener
 from mcl.network.network import MessageBroadcaster
 from mcl.network.network import QueuedListener
+from mcl.network.network import SharedListener
 
 # Import core logging objects into root namespace.
 from mcl.logging.file import ReadFile
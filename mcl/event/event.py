@@ -8,6 +8,12 @@ via the :meth:`.__trigger__` method. Callback methods can un/subscribe to the
 :class:`.Event` object via the :meth:`.unsubscribe` and :meth:`.subscribe`
 methods.
 
+In addition to callable objects, generator-based coroutines can be subscribed
+to an :class:`.Event`. Data is delivered to coroutines using the generator
+``send()`` method. Coroutines must be primed (advanced to their first
+``yield``) before they are subscribed. A coroutine that terminates (raises
+:exc:`StopIteration`) is automatically unsubscribed.
+
 Example usage:
 
 .. testcode::
@@ -24,12 +30,43 @@ Example usage:
 
    hello world
 
+Example usage with a coroutine subscriber:
+
+.. testcode::
+
+    import os
+    from mcl import Event
+
+    def printer():
+        while True:
+            data = yield
+            os.sys.stdout.write(data)
+
+    # Prime coroutine before subscribing.
+    coroutine = printer()
+    coroutine.next()
+
+    pub = Event()
+    pub.subscribe(coroutine)
+    pub.__trigger__('hello world')
+
+.. testoutput::
+   :hide:
+
+   hello world
+
 .. codeauthor:: Asher Bender <a.bender@acfr.usyd.edu.au>
 .. codeauthor:: James Ward <j.ward@acfr.usyd.edu.au>
 
 """
 
 
+def _is_coroutine(obj):
+    """Return whether an object is a generator-based coroutine."""
+
+    return hasattr(obj, 'send') and hasattr(obj, 'next')
+
+
 class Event(object):
     """Class for issuing events and triggering callback functions."""
 
@@ -59,7 +96,8 @@ class Event(object):
         """Subscribe a callback to events.
 
         Args:
-            callback (function): The callback to execute on a event.
+            callback (function): The callback to execute on a event. The
+                callback may also be a primed generator-based coroutine.
 
         Returns:
             bool: Returns :data:`.True` if the callback was successfully
@@ -68,14 +106,16 @@ class Event(object):
                 will be returned.
 
         Raises:
-            TypeError: If the input callback does not have a '__call__' method,
-                a :exc:`.TypeError` is raised.
+            TypeError: If the input callback does not have a '__call__' or a
+                'send' method, a :exc:`.TypeError` is raised.
 
         """
 
-        # Check that we can actually call this callback.
-        if not hasattr(callback, '__call__'):
-            raise TypeError("Callback must contain a '__call__' method.")
+        # Check that we can actually call this callback (or send data to this
+        # coroutine).
+        if not hasattr(callback, '__call__') and not _is_coroutine(callback):
+            msg = "Callback must contain a '__call__' or 'send' method."
+            raise TypeError(msg)
 
         # Add callback if it does not exist and start processing callback data
         # on a thread.
@@ -145,4 +185,14 @@ class Event(object):
         #     https://docs.python.org/2/tutorial/controlflow.html#for-statements
         #
         for callback in self.__callbacks[:]:
-            callback(*args, **kwargs)
+            if not _is_coroutine(callback):
+                callback(*args, **kwargs)
+
+            # Coroutines only accept a single value through 'send()'. Multiple
+            # arguments are sent as a tuple. Terminated coroutines are
+            # unsubscribed.
+            else:
+                try:
+                    callback.send(args[0] if len(args) == 1 else args)
+                except StopIteration:
+                    self.unsubscribe(callback)
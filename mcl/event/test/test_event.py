@@ -165,3 +165,32 @@ class EventTests(unittest.TestCase):
         # Trigger event and ensure function unsubscribed itself.
         event.__trigger__()
         self.assertFalse(event.is_subscribed(unsubscriber))
+
+    def test_coroutine(self):
+        """Test Event() can send data to coroutines."""
+
+        # Create coroutine for capturing event data.
+        event_data = list()
+        def coroutine(num_items):
+            for i in range(num_items):
+                data = yield
+                event_data.append(data)
+
+        # Coroutines must be primed before subscribing.
+        receiver = coroutine(2)
+        receiver.next()
+
+        # Subscribe coroutine.
+        event = Event()
+        self.assertTrue(event.subscribe(receiver))
+        self.assertTrue(event.is_subscribed(receiver))
+
+        # Trigger events and ensure data was sent to the coroutine.
+        event.__trigger__('A')
+        self.assertEqual(event_data, ['A'])
+        self.assertTrue(event.is_subscribed(receiver))
+
+        # Ensure coroutines are unsubscribed after they terminate.
+        event.__trigger__('B')
+        self.assertEqual(event_data, ['A', 'B'])
+        self.assertFalse(event.is_subscribed(receiver))
@@ -388,6 +388,7 @@ class TestScheduleBroadcasts(unittest.TestCase):
                  speed)
         self.assertEqual(len(data_buffer), 1)
         self.assertDictEqual(data['payload'], data_buffer[0]['payload'])
+        listener.close()
 
     def test_init_speed(self):
         """Test ScheduleBroadcasts() speed instantiation."""
@@ -488,6 +489,8 @@ class TestScheduleBroadcasts(unittest.TestCase):
         # Ensure timing is approximately correct.
         self.assertGreaterEqual(duration, 0.5 * run_time)
         self.assertLessEqual(duration, 2.0 * run_time)
+        listener_A.close()
+        listener_B.close()
 
     def test_schedule(self):
         """Test ScheduleBroadcasts() at normal speed."""
@@ -601,6 +604,8 @@ class TestReplay(unittest.TestCase):
         time.sleep(0.05)
         self.assertTrue(replay.is_alive())
         self.assertTrue(replay.stop())
+        listener_A.close()
+        listener_B.close()
 
     def test_replay(self):
         """Test Replay() at normal speed."""
@@ -5,7 +5,11 @@
     :template: detailed.tpl
 
     abstract
+    inproc
+    linux
     network
+    shm
+    tcp
     udp
 
 .. sectionauthor:: Asher Bender <a.bender@acfr.usyd.edu.au>
@@ -20,6 +20,7 @@ interface into MCL see :mod:`.network.udp`.
 """
 import abc
 import sys
+import Queue
 import keyword
 import operator
 import textwrap
@@ -565,6 +566,34 @@ class RawListener(mcl.event.event.Event):
         *developers* can call the '__trigger__' method in I/O loops when
         network data is available.
 
+    Callbacks can be subscribed to a single topic or to all topics starting
+    with a prefix. A topic ending with ``*`` subscribes to the topics starting
+    with the preceding characters::
+
+        listener.subscribe(callback)                       # all topics
+        listener.subscribe(callback, topic='camera/left')  # one topic
+        listener.subscribe(callback, topic='camera/*')     # topic prefix
+
+    Callbacks of a topic are found by a dictionary look-up and callbacks of
+    prefixes by walking a trie of prefixes (see :class:`._TopicTrie`). The
+    cost of issuing data does not grow with the number of topics and
+    callbacks subscribed.
+
+    As an alternative to callbacks, network data can be consumed by iterating
+    over a :class:`.RawListener`. Iteration blocks until data arrives and stops
+    when the listener is closed::
+
+        for data in listener:
+            print data['payload']
+
+    Data is buffered from the moment the iterator is created (i.e. when
+    :func:`iter` is called or the ``for`` loop is entered) until the iterator
+    is closed or garbage collected (e.g. after breaking out of the ``for``
+    loop). Iterators can also be used as context managers::
+
+        with iter(listener) as iterator:
+            data = iterator.next()
+
     Args:
         connection (:class:`~.abstract.Connection`): Connection object.
         topics (str or list): Topics associated with the network interface
@@ -602,6 +631,10 @@ class RawListener(mcl.event.event.Event):
         self.__connection = connection
         self.__topics = topics
 
+        # Create events of callbacks subscribed to topics and prefixes.
+        self.__topic_events = dict()
+        self.__prefix_events = _TopicTrie()
+
         # Initialise Event() object.
         super(RawListener, self).__init__()
 
@@ -613,6 +646,152 @@ class RawListener(mcl.event.event.Event):
     def topics(self):
         return self.__topics
 
+    def __iter__(self):
+        """Return an iterator over data received by the listener."""
+
+        return _ListenerIterator(self)
+
+    def __event(self, topic, create=False):
+        """Return the event of a topic or prefix subscription."""
+
+        if not isinstance(topic, basestring):
+            msg = "The argument 'topic' must be None or a string."
+            raise TypeError(msg)
+
+        # Topic is a prefix.
+        if topic.endswith('*'):
+            return self.__prefix_events.get(topic[:-1], create=create)
+
+        # Topic is a single topic.
+        event = self.__topic_events.get(topic)
+        if event is None and create:
+            event = mcl.event.event.Event()
+            self.__topic_events[topic] = event
+        return event
+
+    def is_subscribed(self, callback, topic=None):
+        """Return whether a callback is registered with this object.
+
+        Args:
+            callback (function): The callback to test for registration.
+            topic (str): Topic or prefix (ending with ``*``) the callback was
+                subscribed to. If :data:`None`, test whether the callback is
+                subscribed to all topics.
+
+        Returns:
+            bool: Returns :data:`.True` if the callback has been registered
+                with this object. Returns :data:`.False` if the callback has
+                NOT been registered with this object.
+
+        """
+
+        if topic is None:
+            return super(RawListener, self).is_subscribed(callback)
+
+        event = self.__event(topic)
+        return event is not None and event.is_subscribed(callback)
+
+    def subscribe(self, callback, topic=None):
+        """Subscribe a callback to received data.
+
+        Args:
+            callback (function): The callback to execute when data is
+                received. The callback may also be a primed generator-based
+                coroutine.
+            topic (str): Only issue data with this topic to the callback. If
+                the topic ends with ``*``, issue data with topics starting
+                with the preceding characters. If :data:`None`, data of all
+                topics is issued to the callback.
+
+        Returns:
+            bool: Returns :data:`.True` if the callback was successfully
+                registered. If the callback is already subscribed to the
+                topic, it will not be registered again and :data:`.False`
+                will be returned.
+
+        Raises:
+            TypeError: If the callback does not have a '__call__' or a 'send'
+                method or the topic is not a string.
+
+        """
+
+        if topic is None:
+            return super(RawListener, self).subscribe(callback)
+
+        # Check the callback before creating an event for the topic.
+        if not hasattr(callback, '__call__') and \
+           not mcl.event.event._is_coroutine(callback):
+            msg = "Callback must contain a '__call__' or 'send' method."
+            raise TypeError(msg)
+
+        return self.__event(topic, create=True).subscribe(callback)
+
+    def unsubscribe(self, callback, topic=None):
+        """Unsubscribe a callback from received data.
+
+        Args:
+            callback (function): The callback to be removed from event
+                notifications.
+            topic (str): Topic or prefix (ending with ``*``) the callback was
+                subscribed to. If :data:`None`, the callback is removed from
+                the callbacks of all topics.
+
+        Returns:
+            bool: Returns :data:`.True` if the callback was successfully
+                removed. If the callback does not exist in the list of
+                callbacks, it will not be removed and :data:`.False` will be
+                returned.
+
+        """
+
+        if topic is None:
+            return super(RawListener, self).unsubscribe(callback)
+
+        event = self.__event(topic)
+        if event is None or not event.unsubscribe(callback):
+            return False
+
+        # Forget topics and prefixes without callbacks.
+        if not event.num_subscriptions():
+            if topic.endswith('*'):
+                self.__prefix_events.remove(topic[:-1])
+            else:
+                del self.__topic_events[topic]
+        return True
+
+    def num_subscriptions(self):
+        """Return the number of registered callbacks.
+
+        Callbacks subscribed to several topics are counted once per topic.
+
+        Returns:
+            int: number of registered callbacks.
+
+        """
+
+        count = super(RawListener, self).num_subscriptions()
+        count += sum(event.num_subscriptions() for event in
+                     self.__topic_events.values())
+        count += sum(event.num_subscriptions() for event in
+                     self.__prefix_events.events())
+        return count
+
+    def __trigger__(self, data):
+        """Issue data to callbacks of all topics, its topic and prefixes."""
+
+        super(RawListener, self).__trigger__(data)
+
+        topic = data['topic']
+        if topic is not None:
+            if self.__topic_events:
+                event = self.__topic_events.get(topic)
+                if event is not None:
+                    event.__trigger__(data)
+
+            if self.__prefix_events:
+                for event in self.__prefix_events.match(topic):
+                    event.__trigger__(data)
+
     @abc.abstractproperty
     def is_open(self):
         pass                                                 # pragma: no cover
@@ -640,3 +819,175 @@ class RawListener(mcl.event.event.Event):
 
         """
         pass                                                 # pragma: no cover
+
+
+class _TopicTrie(object):
+    """Map topic prefixes to events.
+
+    Prefixes are stored in a trie: each node is a list containing the event
+    of the prefix ending at the node (or :data:`None`) and a dictionary
+    mapping the next character to a child node. The events of the prefixes of
+    a topic are found by walking the characters of the topic, regardless of
+    the number of prefixes stored.
+
+    """
+
+    def __init__(self):
+        """Document the __init__ method at the class level."""
+
+        self.__root = [None, dict()]
+        self.__count = 0
+
+    def __len__(self):
+        return self.__count
+
+    def get(self, prefix, create=False):
+        """Return the event of a prefix.
+
+        Args:
+            prefix (str): Topic prefix.
+            create (bool): If :data:`True`, create the event if it does not
+                exist.
+
+        Returns:
+            :class:`.Event`: Event of the prefix or :data:`None` if the prefix
+                does not exist.
+
+        """
+
+        node = self.__root
+        for character in prefix:
+            child = node[1].get(character)
+            if child is None:
+                if not create:
+                    return None
+                child = [None, dict()]
+                node[1][character] = child
+            node = child
+
+        if node[0] is None and create:
+            node[0] = mcl.event.event.Event()
+            self.__count += 1
+        return node[0]
+
+    def remove(self, prefix):
+        """Remove the event of a prefix and prune unused nodes.
+
+        Args:
+            prefix (str): Topic prefix.
+
+        """
+
+        path = [self.__root]
+        for character in prefix:
+            node = path[-1][1].get(character)
+            if node is None:
+                return
+            path.append(node)
+
+        if path[-1][0] is not None:
+            path[-1][0] = None
+            self.__count -= 1
+
+        # Remove nodes, from the end of the prefix, which have no event and
+        # no children.
+        for character, parent, node in reversed(zip(prefix, path, path[1:])):
+            if node[0] is not None or node[1]:
+                break
+            del parent[1][character]
+
+    def events(self):
+        """Return the events of all prefixes."""
+
+        events = list()
+        nodes = [self.__root]
+        while nodes:
+            node = nodes.pop()
+            if node[0] is not None:
+                events.append(node[0])
+            nodes.extend(node[1].values())
+        return events
+
+    def match(self, topic):
+        """Return the events of the prefixes of a topic.
+
+        Args:
+            topic (str): Topic.
+
+        Returns:
+            list: Events of the stored prefixes of the topic, shortest prefix
+                first.
+
+        """
+
+        node = self.__root
+        events = [node[0]] if node[0] is not None else []
+        for character in topic:
+            node = node[1].get(character)
+            if node is None:
+                break
+            elif node[0] is not None:
+                events.append(node[0])
+        return events
+
+
+class _ListenerIterator(object):
+    """Iterate over data issued by a :class:`.RawListener`.
+
+    The iterator subscribes to the listener on creation and buffers data in a
+    thread-safe queue. Calls to :meth:`.next` block until data is available
+    and raise :exc:`StopIteration` once the listener has been closed and the
+    buffer is empty. The iterator unsubscribes from the listener when it is
+    closed, garbage collected or used as a context manager which exits.
+
+    Args:
+        listener (:class:`.RawListener`): Listener to iterate over.
+
+    """
+
+    # Time in seconds to wait for data before checking whether the listener is
+    # still open.
+    TIMEOUT = 0.1
+
+    def __init__(self, listener):
+        """Document the __init__ method at the class level."""
+
+        self.__listener = listener
+        self.__queue = Queue.Queue()
+        self.__listener.subscribe(self.__queue.put)
+
+    def __iter__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def __is_open(self):
+        """Return whether the listener is open."""
+
+        # Note: some listeners implement 'is_open' as a method rather than a
+        #       property.
+        is_open = self.__listener.is_open
+        return is_open() if callable(is_open) else is_open
+
+    def next(self):
+        """Return the next item of data received by the listener."""
+
+        while True:
+            try:
+                return self.__queue.get(timeout=self.TIMEOUT)
+            except Queue.Empty:
+                if not self.__is_open():
+                    self.close()
+                    raise StopIteration
+
+    def close(self):
+        """Stop buffering data from the listener."""
+
+        self.__listener.unsubscribe(self.__queue.put)
@@ -0,0 +1,379 @@
+"""Publish and receive data within a process.
+
+This module provides an interface for publishing data between objects in the
+same Python process. The main objects responsible for transmitting data
+within a process are:
+
+    - :class:`~.inproc.Connection`
+    - :class:`~.inproc.RawBroadcaster`
+    - :class:`~.inproc.RawListener`
+
+Published data is not serialised and does not pass through the operating
+system. Broadcasters hand published objects directly to the listeners of the
+connection, on the publishing thread. Since the transport shares the interface
+of the network transports, MCL :class:`.Message` objects can be moved into a
+single process by changing the ``connection`` of the message:
+
+.. testcode:: send-receive
+
+    import os
+    from mcl.network.inproc import Connection
+    from mcl.network.inproc import RawListener
+    from mcl.network.inproc import RawBroadcaster
+
+    # Create in-process connection.
+    connection = Connection('example')
+
+    # Create raw listener and broadcaster from the connection.
+    listener = RawListener(connection)
+    broadcaster = RawBroadcaster(connection)
+
+    # Print received data to screen. Data is delivered before publish()
+    # returns.
+    listener.subscribe(lambda d: os.sys.stdout.write(d['payload']))
+    broadcaster.publish('hello world')
+
+    # Close connections.
+    listener.close()
+    broadcaster.close()
+
+.. testoutput:: send-receive
+   :hide:
+
+   hello world
+
+.. note::
+
+    Connections are local to a process. Listeners in other processes, such as
+    :class:`.QueuedListener` and :class:`.LogNetwork`, do not receive data
+    published in this process.
+
+"""
+import msgpack
+import threading
+import collections
+import mcl.network.abstract
+from copy import copy as shallowcopy
+from copy import deepcopy
+
+# Policies for copying published data before it is delivered to listeners (see
+# Connection).
+COPY_POLICIES = (None, 'shallow', 'deep', 'serialise')
+
+# Open listeners of each connection name.
+_LISTENERS = dict()
+_LISTENERS_LOCK = threading.Lock()
+
+
+def _listeners(name):
+    """Return the open listeners of a connection name."""
+
+    with _LISTENERS_LOCK:
+        return list(_LISTENERS.get(name, ()))
+
+
+class RawBroadcaster(mcl.network.abstract.RawBroadcaster):
+    """Send data to listeners in the same process.
+
+    The :class:`~.inproc.RawBroadcaster` object allows data to be published to
+    the :class:`~.inproc.RawListener` objects of a connection in the same
+    process. Published data is delivered to listeners, according to the copy
+    policy of the connection, before :meth:`.publish` returns. Callbacks of the
+    listeners run on the publishing thread; exceptions raised by callbacks are
+    raised by :meth:`.publish`.
+
+    Args:
+        connection (:class:`.Connection`): Connection object.
+        topic (str): Default topic associated with the broadcaster.
+
+    Attributes:
+        connection (:class:`.Connection`): Connection object.
+        topic (str): Default topic associated with the broadcaster.
+        is_open (bool): Return whether the broadcaster is open.
+
+    Raises:
+        TypeError: If any of the inputs are ill-specified.
+        IOError: If the connection does not have a name.
+
+    """
+
+    def __init__(self, connection, topic=None):
+        """Document the __init__ method at the class level."""
+
+        # Ensure the connection object is properly specified.
+        if not isinstance(connection, Connection):
+            msg = "The argument 'connection' must be an instance of an "
+            msg += "in-process Connection()."
+            raise TypeError(msg)
+
+        # Attempt to initialise broadcaster base-class.
+        else:
+            try:
+                super(RawBroadcaster, self).__init__(connection, topic=topic)
+            except:
+                raise
+
+        self.__is_open = False
+
+        # Attempt to connect to the named connection.
+        success = self._open()
+        if not success:
+            msg = "Could not connect to '%s'." % str(self.connection)
+            raise IOError(msg)
+
+    @property
+    def is_open(self):
+        return self.__is_open
+
+    def _open(self):
+        """Open the broadcaster.
+
+        Returns:
+            :class:`bool`: Returns :data:`True` if the broadcaster was opened.
+                If the broadcaster is already open or the connection does not
+                have a name, the request is ignored and the method returns
+                :data:`False`.
+
+        """
+
+        if not self.is_open and self.connection.name:
+            self.__is_open = True
+            return True
+        else:
+            return False
+
+    def publish(self, data, topic=None):
+        """Deliver data to the listeners of the connection.
+
+        Args:
+            data (obj): Object to publish. If the copy policy of the connection
+                is ``'serialise'``, the object must be serialisable.
+            topic (str): Topic associated with published data. This option will
+                temporarily override the topic specified during instantiation.
+
+        """
+
+        if self.is_open:
+
+            # Validate input arguments.
+            try:
+                super(RawBroadcaster, self).publish(data, topic=topic)
+                if topic is None:
+                    topic = self.topic
+            except:
+                raise
+
+            listeners = _listeners(self.connection.name)
+            if not listeners:
+                return
+
+            policy = self.connection.copy
+            if policy == 'serialise':
+                data = msgpack.dumps(data)
+
+            for listener in listeners:
+                if policy is None:
+                    payload = data
+                elif policy == 'shallow':
+                    payload = shallowcopy(data)
+                elif policy == 'deep':
+                    payload = deepcopy(data)
+                else:
+                    payload = msgpack.loads(data)
+                listener._deliver(topic, payload)
+
+        else:
+            msg = 'Connection must be opened before publishing.'
+            raise IOError(msg)
+
+    def close(self):
+        """Close the broadcaster.
+
+        Returns:
+            :class:`bool`: Returns :data:`True` if the broadcaster was closed.
+                If the broadcaster was already closed, the request is ignored
+                and the method returns :data:`False`.
+
+        """
+
+        if self.is_open:
+            self.__is_open = False
+            return True
+        else:
+            return False
+
+
+class RawListener(mcl.network.abstract.RawListener):
+    """Receive data from broadcasters in the same process.
+
+    The :class:`~.inproc.RawListener` object issues publish events in the
+    following format when data is published to the connection::
+
+        {'topic': str(),
+         'payload': obj()}
+
+    where:
+
+        - **<topic>** is a string containing the topic associated with the
+          received data.
+
+        - **<payload>** is the published object (or a copy of the object,
+          see :class:`.Connection`).
+
+    Events are issued on the thread which published the data.
+
+    Args:
+        connection (:class:`.Connection`): Connection object.
+        topics (str or list): Topics associated with the
+            :class:`~.inproc.RawListener` interface.
+
+    Attributes:
+        connection (:class:`.Connection`): Connection object.
+        topics (str or list): Topics associated with the
+            :class:`~.inproc.RawListener` interface.
+        is_open (bool): Return whether the listener is open.
+
+    Raises:
+        TypeError: If any of the inputs are ill-specified.
+        IOError: If the connection does not have a name.
+
+    """
+
+    def __init__(self, connection, topics=None):
+        """Document the __init__ method at the class level."""
+
+        # Ensure the connection object is properly specified.
+        if not isinstance(connection, Connection):
+            msg = "The argument 'connection' must be an instance of an "
+            msg += "in-process Connection()."
+            raise TypeError(msg)
+
+        # Attempt to initialise listener base-class.
+        else:
+            try:
+                super(RawListener, self).__init__(connection, topics=topics)
+            except:
+                raise
+
+        self.__is_open = False
+
+        # Attempt to connect to the named connection.
+        success = self._open()
+        if not success:
+            msg = "Could not connect to '%s'." % str(self.connection)
+            raise IOError(msg)
+
+    @property
+    def is_open(self):
+        return self.__is_open
+
+    def _open(self):
+        """Start receiving data published to the connection.
+
+        Returns:
+            :class:`bool`: Returns :data:`True` if the listener was opened. If
+                the listener is already open or the connection does not have a
+                name, the request is ignored and the method returns
+                :data:`False`.
+
+        """
+
+        if not self.is_open and self.connection.name:
+            with _LISTENERS_LOCK:
+                name = self.connection.name
+                _LISTENERS[name] = _LISTENERS.get(name, ()) + (self,)
+            self.__is_open = True
+            return True
+        else:
+            return False
+
+    def _deliver(self, topic, payload):
+        """Issue data published by a broadcaster to callbacks."""
+
+        # Reject unwanted topics.
+        if self.topics:
+            if isinstance(self.topics, basestring):
+                if topic != self.topics:
+                    return
+            elif topic not in self.topics:
+                return
+
+        self.__trigger__({'topic': topic, 'payload': payload})
+
+    def close(self):
+        """Stop receiving data published to the connection.
+
+        Returns:
+            :class:`bool`: Returns :data:`True` if the listener was closed. If
+                the listener was already closed, the request is ignored and the
+                method returns :data:`False`.
+
+        """
+
+        if self.is_open:
+            with _LISTENERS_LOCK:
+                name = self.connection.name
+                listeners = tuple(listener for listener in _LISTENERS[name]
+                                  if listener is not self)
+                if listeners:
+                    _LISTENERS[name] = listeners
+                else:
+                    del _LISTENERS[name]
+            self.__is_open = False
+            return True
+        else:
+            return False
+
+
+class Connection(mcl.network.abstract.Connection):
+    """Object for encapsulating in-process connection parameters.
+
+    The copy policy determines what listeners receive when an object is
+    published:
+
+        - :data:`None`: listeners receive the published object. Neither the
+          publisher nor the listeners may modify the object after it is
+          published.
+        - ``'shallow'``: each listener receives a shallow copy of the object
+          (see :func:`copy.copy`).
+        - ``'deep'``: each listener receives a deep copy of the object (see
+          :func:`copy.deepcopy`).
+        - ``'serialise'``: the object is serialised once and each listener
+          receives a deserialised copy. Listeners receive the same data they
+          would receive from a network transport (e.g. tuples are received as
+          lists).
+
+    Args:
+        name (str): Name of the connection. Broadcasters and listeners with
+            the same name are connected. Broadcasters and listeners cannot be
+            opened on a connection with an empty name.
+        copy (str): Copy policy for published objects (see above).
+
+    Attributes:
+        name (str): Name of the connection.
+        copy (str): Copy policy for published objects.
+
+    Raises:
+        TypeError: If ``name`` is not a string or ``copy`` is not a copy
+            policy.
+
+    """
+
+    mandatory = ('name',)
+    optional = collections.OrderedDict([('copy', None)])
+    broadcaster = RawBroadcaster
+    listener = RawListener
+
+    def __init__(self, name, copy=None):
+
+        # Check 'name' is a string.
+        if not isinstance(name, basestring):
+            msg = "'name' must be a string."
+            raise TypeError(msg)
+
+        # Check 'copy' is a copy policy.
+        if copy not in COPY_POLICIES:
+            msg = "'copy' must be one of: %s." % str(COPY_POLICIES)
+            raise TypeError(msg)
+
+        super(Connection, self).__init__(name, copy)
@@ -0,0 +1,662 @@
+"""Linux specific socket system calls.
+
+The Python 2.7 :mod:`socket` module does not expose the batched system calls
+`recvmmsg(2) <http://man7.org/linux/man-pages/man2/recvmmsg.2.html>`_ and
+`sendmmsg(2) <http://man7.org/linux/man-pages/man2/sendmmsg.2.html>`_. This
+module provides access to these calls through :mod:`ctypes`. The main objects
+provided are:
+
+    - :class:`~.linux.BatchReceiver`
+    - :class:`~.linux.BatchSender`
+
+Batching allows many datagrams to be moved between user-space and the kernel in
+a single system call. At high packet rates, the per-call overhead of
+``recvfrom`` and ``sendto`` dominates the cost of sending and receiving
+data. The objects in this module operate on preallocated buffers so that no
+memory is allocated by the kernel interface on each call.
+
+If the system calls are not available (non-Linux systems or old C libraries)
+:data:`.HAS_MMSG` is set to :data:`False`. Code using this module is expected
+to fall back to the standard :mod:`socket` interface in this case.
+
+:class:`~.linux.BatchReceiver` can also read ancillary data delivered by the
+kernel with each datagram. If the socket options :data:`.SO_TIMESTAMPNS` and
+:data:`.SO_RXQ_OVFL` are enabled, the kernel reception time of each datagram
+and the number of datagrams the kernel dropped because the socket receive
+buffer was full are returned with the data.
+
+Linux also supports UDP segmentation offload. A socket with the
+:data:`.UDP_SEGMENT` option (level :data:`.SOL_UDP`) set splits each datagram
+sent into segments of the given size, so many datagrams can be passed to the
+kernel as one buffer. A socket with the :data:`.UDP_GRO` option set may
+receive several datagrams from the same sender coalesced into one buffer. The
+segment size is delivered as ancillary data and :class:`~.linux.BatchReceiver`
+splits coalesced buffers back into datagrams.
+
+Processes sharing memory can wait for changes to a 32-bit integer in the
+shared memory using the `futex(2)
+<http://man7.org/linux/man-pages/man2/futex.2.html>`_ system call (see
+:func:`.futex_wait` and :func:`.futex_wake`). If the system call is not
+available, :data:`.HAS_FUTEX` is set to :data:`False` and code is expected to
+poll the shared memory instead.
+
+"""
+import errno
+import struct
+import socket
+import ctypes
+import ctypes.util
+import platform
+
+# Flags used by the batched system calls.
+MSG_DONTWAIT = 0x40
+
+# Socket options (level SOL_SOCKET) requesting ancillary data. SO_TIMESTAMPNS
+# delivers the kernel reception time of each datagram as a 'struct timespec'.
+# SO_RXQ_OVFL delivers the number of datagrams dropped by the socket as an
+# unsigned 32-bit integer.
+SO_TIMESTAMPNS = 35
+SO_RXQ_OVFL = 40
+
+# Socket option (level SOL_SOCKET) setting the time in microseconds to busy
+# poll the device queue when no data is available (see 'net.core.busy_read').
+SO_BUSY_POLL = 46
+
+# Socket option (level IPPROTO_IPV6) which, when cleared, only delivers
+# multicast datagrams to a socket bound to the wildcard address if the socket
+# joined the destination group. By default, datagrams sent to any group joined
+# on the host are delivered.
+IPV6_MULTICAST_ALL = 29
+
+# Socket options (level SOL_UDP) for UDP segmentation offload. UDP_SEGMENT sets
+# the size of the segments a datagram is split into on send. UDP_GRO allows
+# datagrams to be coalesced on receive - the segment size is delivered as an
+# integer in the ancillary data. The kernel limits the number of segments in
+# one send to UDP_MAX_SEGMENTS.
+SOL_UDP = 17
+UDP_SEGMENT = 103
+UDP_GRO = 104
+UDP_MAX_SEGMENTS = 64
+
+# Attempt to load the C library. If the batched calls are not available,
+# disable the fast path.
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    _recvmmsg = _libc.recvmmsg
+    _sendmmsg = _libc.sendmmsg
+    HAS_MMSG = True
+except (OSError, AttributeError, TypeError):                 # pragma: no cover
+    _libc = None
+    HAS_MMSG = False
+
+# Operations of the futex(2) system call. The number of the system call
+# depends on the architecture. If it is not known, the system call is not
+# used.
+FUTEX_WAIT = 0
+FUTEX_WAKE = 1
+_SYS_FUTEX = {'x86_64': 202,
+              'aarch64': 98,
+              'armv7l': 240,
+              'i686': 240,
+              'i386': 240}.get(platform.machine())
+HAS_FUTEX = _libc is not None and _SYS_FUTEX is not None and \
+    hasattr(_libc, 'syscall')
+
+
+class _iovec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p),
+                ('iov_len', ctypes.c_size_t)]
+
+
+class _msghdr(ctypes.Structure):
+    _fields_ = [('msg_name', ctypes.c_void_p),
+                ('msg_namelen', ctypes.c_uint32),
+                ('msg_iov', ctypes.POINTER(_iovec)),
+                ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p),
+                ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int)]
+
+
+class _mmsghdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _msghdr),
+                ('msg_len', ctypes.c_uint)]
+
+
+class _timespec(ctypes.Structure):
+    _fields_ = [('tv_sec', ctypes.c_long),
+                ('tv_nsec', ctypes.c_long)]
+
+
+class _sockaddr_in6(ctypes.Structure):
+    _fields_ = [('sin6_family', ctypes.c_ushort),
+                ('sin6_port', ctypes.c_uint16),
+                ('sin6_flowinfo', ctypes.c_uint32),
+                ('sin6_addr', ctypes.c_ubyte * 16),
+                ('sin6_scope_id', ctypes.c_uint32)]
+
+
+class _sockaddr_in(ctypes.Structure):
+    _fields_ = [('sin_family', ctypes.c_ushort),
+                ('sin_port', ctypes.c_uint16),
+                ('sin_addr', ctypes.c_ubyte * 4),
+                ('sin_zero', ctypes.c_ubyte * 8)]
+
+
+# Size of 'struct sockaddr_storage' and 'struct sockaddr_in6'.
+_SOCKADDR_STORAGE = 128
+_SOCKADDR_IN6 = ctypes.sizeof(_sockaddr_in6)
+
+# Layout of ancillary data. Each control message starts with a 'struct
+# cmsghdr' (length, level, type) and is padded to the size of a 'size_t'.
+_CMSGHDR = struct.Struct('@Pii')
+_CMSG_ALIGN = ctypes.sizeof(ctypes.c_size_t)
+_TIMESPEC = struct.Struct('@ll')
+_OVERFLOW = struct.Struct('@I')
+_SEGMENT = struct.Struct('@i')
+
+# Size of the control buffer allocated for each datagram. Large enough for a
+# timestamp, a drop counter and a segment size.
+_CONTROL_SIZE = 96
+
+if HAS_MMSG:
+    _recvmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_mmsghdr),
+                          ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+    _recvmmsg.restype = ctypes.c_int
+    _sendmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_mmsghdr),
+                          ctypes.c_uint, ctypes.c_int]
+    _sendmmsg.restype = ctypes.c_int
+
+
+def _raise_errno():
+    """Raise the last C library error as a :exc:`socket.error`."""
+
+    error = ctypes.get_errno()
+    raise socket.error(error, errno.errorcode.get(error, str(error)))
+
+
+def _to_sockaddr(sockaddr):
+    """Convert a Python socket address to a C socket address structure."""
+
+    # IPv6 socket address.
+    if len(sockaddr) == 4 or ':' in sockaddr[0]:
+        address = _sockaddr_in6()
+        address.sin6_family = socket.AF_INET6
+        address.sin6_port = socket.htons(sockaddr[1])
+        packed = socket.inet_pton(socket.AF_INET6, sockaddr[0].split('%')[0])
+        ctypes.memmove(address.sin6_addr, packed, 16)
+        if len(sockaddr) == 4:
+            address.sin6_flowinfo = sockaddr[2]
+            address.sin6_scope_id = sockaddr[3]
+
+    # IPv4 socket address.
+    else:
+        address = _sockaddr_in()
+        address.sin_family = socket.AF_INET
+        address.sin_port = socket.htons(sockaddr[1])
+        packed = socket.inet_pton(socket.AF_INET, sockaddr[0])
+        ctypes.memmove(address.sin_addr, packed, 4)
+
+    return address
+
+
+def _from_sockaddr(buf):
+    """Convert a C socket address structure to a Python socket address."""
+
+    family = ctypes.c_ushort.from_buffer(buf).value
+    if family == socket.AF_INET6:
+        address = _sockaddr_in6.from_buffer(buf)
+        host = socket.inet_ntop(socket.AF_INET6,
+                                ctypes.string_at(address.sin6_addr, 16))
+        return (host,
+                socket.ntohs(address.sin6_port),
+                address.sin6_flowinfo,
+                address.sin6_scope_id)
+
+    elif family == socket.AF_INET:
+        address = _sockaddr_in.from_buffer(buf)
+        host = socket.inet_ntop(socket.AF_INET,
+                                ctypes.string_at(address.sin_addr, 4))
+        return (host, socket.ntohs(address.sin_port))
+
+    else:
+        return None                                          # pragma: no cover
+
+
+def _address(buf):
+    """Return the address of a writable Python buffer."""
+
+    return ctypes.addressof((ctypes.c_char * len(buf)).from_buffer(buf))
+
+
+class BatchReceiver(object):
+    """Receive multiple datagrams from a socket in a single system call.
+
+    The :class:`.BatchReceiver` object wraps the ``recvmmsg`` system
+    call. Datagrams are read into a fixed pool of preallocated buffers. The
+    buffers are reused on every call to :meth:`.recv`. Data is returned as
+    views of the buffers to avoid allocating memory for each datagram.
+
+    If ``ancillary`` is set, a control buffer is allocated for each datagram
+    and the kernel reception time and drop counter are parsed from the
+    ancillary data (see :data:`.SO_TIMESTAMPNS` and :data:`.SO_RXQ_OVFL`). The
+    socket options must be enabled on the socket by the caller.
+
+    If ``gro`` is set, buffers coalesced by the kernel (see :data:`.UDP_GRO`)
+    are split into the original datagrams. The receive buffers must be large
+    enough to hold a coalesced buffer (65535 bytes).
+
+    Args:
+        sock (:class:`socket.socket`): Non-blocking datagram socket.
+        batch (int): Maximum number of datagrams to read per system call.
+        size (int): Size of each receive buffer in bytes.
+        ancillary (bool): Read the reception time and drop counter of each
+            datagram.
+        gro (bool): Split buffers coalesced by the kernel into datagrams.
+
+    Attributes:
+        batch (int): Maximum number of datagrams read per system call.
+        size (int): Size of each receive buffer in bytes.
+
+    Raises:
+        IOError: If the batched system calls are not available.
+
+    """
+
+    def __init__(self, sock, batch, size, ancillary=False, gro=False):
+        """Document the __init__ method at the class level."""
+
+        if not HAS_MMSG:
+            raise IOError('recvmmsg() is not available.')    # pragma: no cover
+
+        self.__fileno = sock.fileno()
+        self.__batch = batch
+        self.__size = size
+        self.__ancillary = ancillary
+        self.__gro = gro
+        control = ancillary or gro
+
+        # Preallocate contiguous data buffers, socket address buffers, control
+        # buffers and the message headers describing them.
+        self.__buffer = bytearray(batch * size)
+        self.__names = bytearray(batch * _SOCKADDR_STORAGE)
+        self.__control = bytearray(batch * _CONTROL_SIZE if control else 1)
+        self.__iovecs = (_iovec * batch)()
+        self.__headers = (_mmsghdr * batch)()
+        self.__data_address = _address(self.__buffer)
+        names_address = _address(self.__names)
+        control_address = _address(self.__control)
+        for i in range(batch):
+            self.__iovecs[i].iov_base = self.__data_address + i * size
+            self.__iovecs[i].iov_len = size
+            header = self.__headers[i].msg_hdr
+            header.msg_name = names_address + i * _SOCKADDR_STORAGE
+            header.msg_namelen = _SOCKADDR_STORAGE
+            header.msg_iov = ctypes.pointer(self.__iovecs[i])
+            header.msg_iovlen = 1
+            if control:
+                header.msg_control = control_address + i * _CONTROL_SIZE
+                header.msg_controllen = _CONTROL_SIZE
+
+        # The kernel overwrites the length of the socket addresses on each
+        # call. Store a copy of the initial headers so they can be restored
+        # with a single copy.
+        self.__headers_size = ctypes.sizeof(self.__headers)
+        self.__template = ctypes.string_at(self.__headers, self.__headers_size)
+
+        # Create a structure for extracting the length of every datagram (and
+        # the length of the ancillary data) from the message headers in one
+        # operation.
+        padding = ctypes.sizeof(_mmsghdr) - _mmsghdr.msg_len.offset - 4
+        if control:
+            offset = _msghdr.msg_controllen.offset
+            gap = _mmsghdr.msg_len.offset - offset - _CMSG_ALIGN
+            fmt = '%ixP%ixI%ix' % (offset, gap, padding)
+        else:
+            fmt = '%ixI%ix' % (_mmsghdr.msg_len.offset, padding)
+        self.__lengths = struct.Struct('@' + fmt * batch)
+
+        # Cache of decoded socket addresses. The number of unique senders is
+        # expected to be small.
+        self.__senders = dict()
+
+    @property
+    def batch(self):
+        return self.__batch
+
+    @property
+    def size(self):
+        return self.__size
+
+    @property
+    def gro(self):
+        return self.__gro
+
+    def __sender(self, name):
+        """Return the socket address from a raw C socket address."""
+
+        try:
+            return self.__senders[name]
+        except KeyError:
+            sender = _from_sockaddr(bytearray(name))
+            if len(self.__senders) > 1024:
+                self.__senders.clear()                       # pragma: no cover
+            self.__senders[name] = sender
+            return sender
+
+    def __parse_ancillary(self, offset, length):
+        """Return the reception time, drop counter and segment size."""
+
+        # The kernel only delivers the drop counter once datagrams have been
+        # dropped and the segment size if datagrams were coalesced.
+        timestamp = None
+        dropped = 0
+        segment = None
+        control = self.__control
+        end = offset + length
+        while offset + _CMSGHDR.size <= end:
+            cmsg_len, level, kind = _CMSGHDR.unpack_from(control, offset)
+            if cmsg_len < _CMSGHDR.size:
+                break                                        # pragma: no cover
+
+            if level == socket.SOL_SOCKET:
+                data = offset + _CMSGHDR.size
+                if kind == SO_TIMESTAMPNS:
+                    seconds, nanoseconds = _TIMESPEC.unpack_from(control, data)
+                    timestamp = seconds + nanoseconds * 1e-9
+                elif kind == SO_RXQ_OVFL:
+                    dropped = _OVERFLOW.unpack_from(control, data)[0]
+
+            elif level == SOL_UDP and kind == UDP_GRO:
+                segment = _SEGMENT.unpack_from(control, offset +
+                                               _CMSGHDR.size)[0]
+
+            offset += (cmsg_len + _CMSG_ALIGN - 1) & ~(_CMSG_ALIGN - 1)
+
+        return timestamp, dropped, segment
+
+    def recv(self):
+        """Read a batch of pending datagrams from the socket.
+
+        Datagrams are returned as read-only views of the preallocated receive
+        buffers - no data is copied. The views are only valid until the next
+        call to :meth:`.recv`. If fewer than :attr:`.batch` datagrams are
+        returned, the socket has been drained.
+
+        Returns:
+            list: A list of ``(data, sender)`` tuples where ``data`` is a
+                :func:`buffer` view of the received datagram and ``sender`` is
+                a socket address in the same format returned by
+                :meth:`socket.socket.recvfrom`. If ancillary data is read, a
+                list of ``(data, sender, timestamp, dropped)`` tuples is
+                returned where ``timestamp`` is the kernel reception time in
+                seconds since the epoch (:data:`None` if not delivered by the
+                kernel) and ``dropped`` is the number of datagrams dropped by
+                the socket before the datagram was queued. Buffers coalesced
+                by the kernel are returned as one tuple per datagram.
+
+        Raises:
+            socket.error: If the system call fails for a reason other than no
+                data being available.
+
+        """
+
+        # Restore the message headers.
+        ctypes.memmove(self.__headers, self.__template, self.__headers_size)
+        count = _recvmmsg(self.__fileno, self.__headers, self.__batch,
+                          MSG_DONTWAIT, None)
+
+        if count < 0:
+            if ctypes.get_errno() in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return list()
+            _raise_errno()                                   # pragma: no cover
+
+        # Create views of the received data. Extracting the lengths of all
+        # datagrams in one operation is significantly cheaper than a foreign
+        # function call per datagram.
+        headers = ctypes.string_at(self.__headers, self.__headers_size)
+        lengths = self.__lengths.unpack(headers)
+        received = list()
+        for i in range(count):
+            offset = i * self.__size
+            name = i * _SOCKADDR_STORAGE
+            name = str(self.__names[name:name + _SOCKADDR_IN6])
+            if not (self.__ancillary or self.__gro):
+                received.append((buffer(self.__buffer, offset, lengths[i]),
+                                 self.__sender(name)))
+                continue
+
+            timestamp, dropped, segment = \
+                self.__parse_ancillary(i * _CONTROL_SIZE, lengths[2 * i])
+            length = lengths[2 * i + 1]
+            sender = self.__sender(name)
+
+            # Split coalesced buffers. Every segment except the last is
+            # exactly the segment size.
+            if segment and self.__gro:
+                end = offset + length
+                segments = [buffer(self.__buffer, start,
+                                   min(segment, end - start))
+                            for start in range(offset, end, segment)]
+            else:
+                segments = [buffer(self.__buffer, offset, length)]
+
+            for data in segments:
+                if self.__ancillary:
+                    received.append((data, sender, timestamp, dropped))
+                else:
+                    received.append((data, sender))
+
+                # Datagrams dropped by the socket are only counted once.
+                dropped = 0
+
+        return received
+
+
+class _send_iovec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_char_p),
+                ('iov_len', ctypes.c_size_t)]
+
+
+def address_of(obj):
+    """Return the memory address of the data in a string or bytearray.
+
+    The address is only valid while a reference to ``obj`` is held and, for
+    bytearrays, while the bytearray is not resized.
+
+    Args:
+        obj (str or bytearray): Object to locate in memory.
+
+    Returns:
+        int: Address of the first byte of data in ``obj``.
+
+    """
+
+    if isinstance(obj, bytearray):
+        return _address(obj)
+    else:
+        return ctypes.cast(ctypes.c_char_p(obj), ctypes.c_void_p).value
+
+
+class BatchSender(object):
+    """Send multiple datagrams to an address in a single system call.
+
+    The :class:`.BatchSender` object wraps the ``sendmmsg`` system call. The
+    message headers for up to ``batch`` datagrams are preallocated and reused
+    on every call to :meth:`.send` and :meth:`.sendv`.
+
+    Args:
+        sock (:class:`socket.socket`): Datagram socket.
+        sockaddr (tuple): Destination socket address.
+        batch (int): Maximum number of datagrams sent per system call.
+        vectors (int): Maximum number of I/O vectors gathered into one
+            datagram by :meth:`.sendv`.
+
+    Attributes:
+        batch (int): Maximum number of datagrams sent per system call.
+        vectors (int): Maximum number of I/O vectors gathered into one
+            datagram by :meth:`.sendv`.
+
+    Raises:
+        IOError: If the batched system calls are not available.
+
+    """
+
+    # Default maximum number of I/O vectors which can be gathered into one
+    # datagram by :meth:`.sendv`.
+    MAX_VECTORS = 4
+
+    def __init__(self, sock, sockaddr, batch, vectors=MAX_VECTORS):
+        """Document the __init__ method at the class level."""
+
+        if not HAS_MMSG:
+            raise IOError('sendmmsg() is not available.')    # pragma: no cover
+
+        self.__fileno = sock.fileno()
+        self.__batch = batch
+        self.__max_vectors = vectors
+
+        # Preallocate message headers. All messages share the same destination
+        # address. Each message can gather data from several I/O vectors.
+        self.__name = _to_sockaddr(sockaddr)
+        self.__iovecs = (_send_iovec * batch)()
+        self.__vectors = (_iovec * (batch * vectors))()
+        self.__headers = (_mmsghdr * batch)()
+        self.__gather = (_mmsghdr * batch)()
+        for i in range(batch):
+            for headers in (self.__headers, self.__gather):
+                header = headers[i].msg_hdr
+                header.msg_name = ctypes.addressof(self.__name)
+                header.msg_namelen = ctypes.sizeof(self.__name)
+                header.msg_iovlen = 1
+
+            self.__headers[i].msg_hdr.msg_iov = \
+                ctypes.cast(ctypes.pointer(self.__iovecs[i]),
+                            ctypes.POINTER(_iovec))
+            self.__gather[i].msg_hdr.msg_iov = \
+                ctypes.pointer(self.__vectors[i * vectors])
+
+    @property
+    def batch(self):
+        return self.__batch
+
+    @property
+    def vectors(self):
+        return self.__max_vectors
+
+    def __sendmmsg(self, headers, count):
+        """Send 'count' prepared datagrams."""
+
+        sent = 0
+        while sent < count:
+            result = _sendmmsg(self.__fileno,
+                               ctypes.byref(headers[sent]),
+                               count - sent,
+                               0)
+            if result < 0:
+                if ctypes.get_errno() == errno.EINTR:        # pragma: no cover
+                    continue
+                _raise_errno()
+
+            sent += result
+
+    def send(self, datagrams):
+        """Send datagrams to the destination address.
+
+        Args:
+            datagrams (list): List of strings to send. Each string is sent as
+                one datagram.
+
+        Raises:
+            socket.error: If the system call fails.
+
+        """
+
+        iovecs = self.__iovecs
+        for start in range(0, len(datagrams), self.__batch):
+            batch = datagrams[start:start + self.__batch]
+
+            # Point the I/O vectors at the data to send. The I/O vectors
+            # reference the strings for the duration of the call.
+            for i, datagram in enumerate(batch):
+                iovec = iovecs[i]
+                iovec.iov_base = datagram
+                iovec.iov_len = len(datagram)
+
+            self.__sendmmsg(self.__headers, len(batch))
+
+    def sendv(self, datagrams):
+        """Send datagrams gathered from regions of memory.
+
+        Each datagram is described by a list of ``(address, length)`` pairs
+        (see :func:`.address_of`). The regions are concatenated by the kernel
+        when the datagram is sent, allowing headers and slices of a larger
+        buffer to be sent without copying data in user-space. The caller must
+        ensure the memory remains valid for the duration of the call.
+
+        Args:
+            datagrams (list): List of datagrams to send. Each datagram is a
+                list of up to :attr:`.vectors` ``(address, length)``
+                pairs.
+
+        Raises:
+            socket.error: If the system call fails.
+
+        """
+
+        vectors = self.__vectors
+        gather = self.__gather
+        for start in range(0, len(datagrams), self.__batch):
+            batch = datagrams[start:start + self.__batch]
+
+            for i, regions in enumerate(batch):
+                offset = i * self.__max_vectors
+                for j, (address, length) in enumerate(regions):
+                    vectors[offset + j].iov_base = address
+                    vectors[offset + j].iov_len = length
+                gather[i].msg_hdr.msg_iovlen = len(regions)
+
+            self.__sendmmsg(gather, len(batch))
+
+
+def futex_wait(address, value, timeout):
+    """Wait for a wake-up on a 32-bit integer in shared memory.
+
+    The call returns immediately if the integer does not equal ``value``.
+    Otherwise the call blocks until :func:`.futex_wake` is called on the same
+    address, the timeout expires or a signal is received. Callers must check
+    the state they are waiting for after the call returns.
+
+    Args:
+        address (int): Address of the (aligned) 32-bit integer.
+        value (int): Expected value of the integer.
+        timeout (float): Maximum time to wait in seconds.
+
+    """
+
+    timespec = _timespec(int(timeout), int((timeout % 1) * 1e9))
+    _libc.syscall(ctypes.c_long(_SYS_FUTEX),
+                  ctypes.c_void_p(address),
+                  ctypes.c_long(FUTEX_WAIT),
+                  ctypes.c_long(value),
+                  ctypes.byref(timespec),
+                  ctypes.c_void_p(None),
+                  ctypes.c_long(0))
+
+
+def futex_wake(address, count=2**31 - 1):
+    """Wake processes waiting on a 32-bit integer in shared memory.
+
+    Args:
+        address (int): Address of the (aligned) 32-bit integer.
+        count (int): Maximum number of waiting processes to wake.
+
+    """
+
+    _libc.syscall(ctypes.c_long(_SYS_FUTEX),
+                  ctypes.c_void_p(address),
+                  ctypes.c_long(FUTEX_WAKE),
+                  ctypes.c_long(count),
+                  ctypes.c_void_p(None),
+                  ctypes.c_void_p(None),
+                  ctypes.c_long(0))
@@ -100,6 +100,11 @@ Example usage:
 
    hello world
 
+The object :class:`.SharedListener` can also operate as a :func:`.RawListener`
+or a :class:`.MessageListener`. All :class:`.SharedListener` objects of a
+connection in a process share one network listener, so that data received by
+several listeners is received and decoded once.
+
 The object :class:`.QueuedListener` can operate as a :func:`.RawListener` or a
 :class:`.MessageListener` depending on the input. This object differs from
 other listener objects by receiving network data on a separate process and
@@ -113,6 +118,7 @@ the same interface as other listener objects.
 .. codeauthor:: Asher Bender <a.bender@acfr.usyd.edu.au>
 
 """
+import os
 import time
 import Queue
 import datetime
@@ -128,6 +134,24 @@ import mcl.messages.messages
 # parameter.
 TIMEOUT = 10
 
+# Interval in seconds at which a QueuedListener() process publishes the
+# statistics of its network listener.
+STATS_INTERVAL = 0.25
+
+# Policies for decimating the data received by a QueuedListener() before the
+# data is queued (see _Decimator):
+#
+#     - 'every': queue every n-th item of each topic
+#     - 'rate': queue at most n items per second of each topic
+#     - 'latest': queue the most recent item of each topic every n seconds
+#
+DECIMATION_POLICIES = ('every', 'rate', 'latest')
+
+# Receive paths shared by the SharedListener() objects of this process. Keyed
+# by process, connection type and connection (see _Receiver).
+_RECEIVERS = dict()
+_RECEIVERS_LOCK = threading.Lock()
+
 
 def _set_process_name(name):                                 # pragma: no cover
     """Function for setting the name of new processes."""
@@ -470,6 +494,422 @@ class MessageListener(object):
         return MessageListener(message.connection, topics=topics)
 
 
+class _Receiver(object):
+    """Receive path shared by the SharedListener() objects of a connection.
+
+    The receiver owns one listener of the connection which receives the union
+    of the topics of its subscribers, so that unwanted topics are still
+    rejected by the listener (e.g. from the frame header or by the kernel).
+    Each item of data received is converted into each requested
+    :class:`.Message` type once and issued to every subscribed
+    :class:`.SharedListener` accepting the topic of the data. Data which
+    cannot be converted into a :class:`.Message` type are not issued to the
+    subscribers of that type.
+
+    Listeners are created with a fixed set of topics. When the union of
+    topics changes (a :class:`.SharedListener` with other topics is opened
+    or closed), the listener is replaced by a listener of the new union. Data
+    received while the listeners are exchanged may be lost.
+
+    Args:
+        connection (:class:`~.abstract.Connection`): Connection object.
+
+    Attributes:
+        listener (:class:`~.abstract.RawListener`): Listener of the
+            connection.
+        subscribers (tuple): Each subscriber is a tuple containing the
+            :class:`.SharedListener`, the set of accepted topics (or
+            :data:`None` for all topics) and the :class:`.Message` type (or
+            :data:`None` for raw data).
+        topics (frozenset): Topics received by the listener (:data:`None`
+            for all topics).
+        invalid (int): Number of items of data which could not be converted
+            into a :class:`.Message` type.
+
+    """
+
+    def __init__(self, connection):
+        """Document the __init__ method at the class level."""
+
+        self.connection = connection
+        self.listener = None
+        self.subscribers = tuple()
+        self.topics = None
+        self.invalid = 0
+        self.__lock = threading.Lock()
+
+    def update(self, subscribers):
+        """Replace the subscribers and receive the union of their topics.
+
+        Args:
+            subscribers (tuple): Subscribers of the receiver.
+
+        """
+
+        topics = frozenset()
+        for subscriber in subscribers:
+            if subscriber[1] is None:
+                topics = None
+                break
+            topics |= subscriber[1]
+
+        # Replace the listener if the union of topics changed. The new
+        # listener issues data once the old listener has been closed, so that
+        # data are not issued twice.
+        if self.listener is not None and topics == self.topics:
+            with self.__lock:
+                self.subscribers = subscribers
+            return
+
+        listener = RawListener(self.connection,
+                               topics=sorted(topics) if topics else None)
+        if self.listener is not None:
+            self.listener.unsubscribe(self.__dispatch)
+            self.listener.close()
+        self.listener = listener
+        self.topics = topics
+        with self.__lock:
+            self.subscribers = subscribers
+        self.listener.subscribe(self.__dispatch)
+
+    def close(self):
+        """Close the listener of the connection."""
+
+        with self.__lock:
+            self.subscribers = tuple()
+        if self.listener is not None:
+            self.listener.close()
+
+    def __dispatch(self, data):
+        """Issue received data to subscribed listeners."""
+
+        # Note: the tuple of subscribers is never modified. It is replaced
+        #       under the lock when listeners are opened or closed (copy on
+        #       write) and a snapshot is taken under the lock before
+        #       dispatching. Data are issued to the listeners subscribed when
+        #       the snapshot was taken: a listener closed during dispatch may
+        #       still receive the data being dispatched.
+        with self.__lock:
+            subscribers = self.subscribers
+
+        items = dict()
+        for listener, topics, message_type in subscribers:
+            if topics is not None and data['topic'] not in topics:
+                continue
+
+            # Convert data into each message type once. Listeners of the same
+            # type receive the same object. Data which cannot be converted are
+            # skipped.
+            if message_type not in items:
+                item = dict(data)
+                if message_type is not None:
+                    try:
+                        item['payload'] = message_type(data['payload'])
+                    except Exception:
+                        self.invalid += 1
+                        item = None
+                items[message_type] = item
+
+            item = items[message_type]
+            if item is not None:
+                listener.__trigger__(item)
+
+
+class SharedListener(mcl.network.abstract.RawListener):
+    """Receive data over a network interface shared with other listeners.
+
+    The :class:`.SharedListener` object can operate as a :func:`.RawListener`
+    or a :class:`.MessageListener` depending on the input. Unlike these
+    objects, all :class:`.SharedListener` objects of a connection in a process
+    share one network listener (e.g. one socket and one I/O thread). Data are
+    received and decoded once, converted into each requested
+    :class:`.Message` type once and issued to the subscribers of each
+    :class:`.SharedListener`. The network listener is closed when the last
+    :class:`.SharedListener` of the connection is closed.
+
+    Data are published in the format of the network listener::
+
+        {'topic': str,
+         'payload': obj()}
+
+    .. warning::
+
+        :class:`.SharedListener` objects of the same message type receive the
+        same :class:`.Message` object. Callbacks must not modify received
+        data.
+
+    Example usage:
+
+    .. testcode:: sharedlistener
+
+        from mcl import Message
+        from mcl import SharedListener
+        from mcl.network.udp import Connection
+
+        # Define MCL message.
+        class ExampleMessage(Message):
+            mandatory = ('text',)
+            connection = Connection('ff15::c75d:ce41:ea8e:00d0')
+
+        # Create listeners sharing one socket.
+        listener = SharedListener(ExampleMessage)
+        raw_listener = SharedListener(ExampleMessage.connection,
+                                      topics='topic')
+
+        # Close connections.
+        listener.close()
+        raw_listener.close()
+
+    .. testcleanup:: sharedlistener
+
+        # WARNING: this should not be deployed in production code. It is an
+        #          abuse that has been used for the purposes of doc-testing.
+        import mcl.messages.messages
+        mcl.messages.messages._MESSAGES = list()
+
+    Args:
+        connection: an instance of a MCL connection object
+            (:class:`~.abstract.Connection`) or a reference to a MCL message
+            type (:class:`~.messages.Message`).
+        topics (str or list): Topics associated with the network interface
+            represented as either a string or list of strings.
+
+    Attributes:
+        connection (:class:`~.abstract.Connection`): Connection object.
+        topics (str or list): Topics associated with the network interface.
+        is_open (bool): Returns :data:`True` if the network interface is
+            open. Otherwise returns :data:`False`.
+
+    Raises:
+        TypeError: If any of the inputs are ill-specified.
+        IOError: If the network listener could not be opened.
+
+    """
+
+    def __init__(self, connection, topics=None):
+        """Document the __init__ method at the class level."""
+
+        try:
+            msg = "'connection' must reference a Connection() instance "
+            msg += "or a Message() subclass."
+
+            # 'connection' is a Connection() instance.
+            if isinstance(connection, mcl.network.abstract.Connection):
+                message_type = None
+
+            # 'connection is a reference to a Message() subclass.
+            elif issubclass(connection, mcl.messages.messages.Message):
+                message_type = connection
+                connection = connection.connection
+            else:
+                raise TypeError(msg)
+        except:
+            raise TypeError(msg)
+
+        # Attempt to initialise listener base-class.
+        try:
+            super(SharedListener, self).__init__(connection, topics=topics)
+        except:
+            raise
+
+        # Topics accepted by the listener.
+        if topics is None:
+            accepted = None
+        elif isinstance(topics, basestring):
+            accepted = frozenset([topics])
+        else:
+            accepted = frozenset(topics)
+
+        self.__subscriber = (self, accepted, message_type)
+        self.__key = None
+        self.__is_open = False
+
+        # Attempt to connect to network interface.
+        success = self._open()
+        if not success:
+            msg = "Could not connect to '%s'." % str(connection)
+            raise IOError(msg)
+
+    @property
+    def is_open(self):
+        return self.__is_open
+
+    def _open(self):
+        """Subscribe to the shared network listener of the connection.
+
+        Returns:
+            :class:`bool`: Returns :data:`True` if the listener was
+                subscribed. If the listener is already open, the request is
+                ignored and the method returns :data:`False`.
+
+        """
+
+        if not self.__is_open:
+            self.__key = (os.getpid(), type(self.connection), self.connection)
+            with _RECEIVERS_LOCK:
+                receiver = _RECEIVERS.get(self.__key)
+                if receiver is None:
+                    receiver = _Receiver(self.connection)
+                receiver.update(receiver.subscribers + (self.__subscriber,))
+                _RECEIVERS[self.__key] = receiver
+
+            self.__is_open = True
+            return True
+        else:
+            return False
+
+    def close(self):
+        """Unsubscribe from the shared network listener of the connection.
+
+        The network listener is closed when no other listeners are subscribed.
+
+        Returns:
+            :class:`bool`: Returns :data:`True` if the listener was
+                closed. If the listener was already closed, the request is
+                ignored and the method returns :data:`False`.
+
+        """
+
+        if self.__is_open:
+            with _RECEIVERS_LOCK:
+                receiver = _RECEIVERS[self.__key]
+                subscribers = tuple(subscriber for subscriber in
+                                    receiver.subscribers
+                                    if subscriber[0] is not self)
+                if subscribers:
+                    receiver.update(subscribers)
+                else:
+                    del _RECEIVERS[self.__key]
+                    receiver.close()
+
+            self.__is_open = False
+            return True
+        else:
+            return False
+
+
+def _check_decimation(decimate):
+    """Raise TypeError if a decimation policy is ill-specified."""
+
+    if decimate is None:
+        return
+
+    msg = "'decimate' must be None or a tuple (policy, value) where policy is "
+    msg += "one of: %s." % ', '.join(DECIMATION_POLICIES)
+    try:
+        policy, value = decimate
+    except (TypeError, ValueError):
+        raise TypeError(msg)
+
+    if policy not in DECIMATION_POLICIES:
+        raise TypeError(msg)
+    elif policy == 'every':
+        if not isinstance(value, (int, long)) or isinstance(value, bool) or \
+           value < 1:
+            raise TypeError("'every' decimation must be a positive integer.")
+    elif not isinstance(value, (int, long, float)) or \
+         isinstance(value, bool) or value <= 0:
+        raise TypeError("'%s' decimation must be a positive number." % policy)
+
+
+class _Decimator(object):
+    """Decimate the data of each topic before it is forwarded.
+
+    Data are decimated independently for each topic according to a policy
+    (see :data:`.DECIMATION_POLICIES`). Data of the 'every' and 'rate'
+    policies are forwarded from :meth:`.insert`. Data of the 'latest' policy
+    are held until :meth:`.flush` is called after the end of each interval.
+
+    Args:
+        policy (str): Decimation policy.
+        value (int or float): Decimation factor, rate in items per second or
+            interval in seconds of the policy.
+        forward (function): Function called with each forwarded item.
+
+    Attributes:
+        interval (float): Time in seconds between calls to :meth:`.flush`
+            required by the policy (:data:`None` if not required).
+        stats (dict): Number of items ``received`` and ``forwarded``.
+
+    """
+
+    def __init__(self, policy, value, forward):
+        """Document the __init__ method at the class level."""
+
+        self.__policy = policy
+        self.__value = value
+        self.__forward = forward
+        self.__counts = dict()
+        self.__latest = dict()
+        self.__lock = threading.Lock()
+        self.__deadline = time.time() + value if policy == 'latest' else None
+        self.__stats = {'received': 0, 'forwarded': 0}
+
+    @property
+    def interval(self):
+        return self.__value if self.__policy == 'latest' else None
+
+    @property
+    def stats(self):
+        return dict(self.__stats)
+
+    def insert(self, data):
+        """Forward or hold an item of data according to the policy."""
+
+        topic = data['topic']
+        self.__stats['received'] += 1
+
+        # Forward the first of every n items.
+        if self.__policy == 'every':
+            count = self.__counts.get(topic, 0)
+            self.__counts[topic] = (count + 1) % self.__value
+            if count:
+                return
+
+        # Forward items separated by at least the period of the rate.
+        elif self.__policy == 'rate':
+            now = time.time()
+            if now - self.__counts.get(topic, 0.0) < 1.0 / self.__value:
+                return
+            self.__counts[topic] = now
+
+        # Hold the most recent item until the end of the interval.
+        else:
+            with self.__lock:
+                self.__latest[topic] = data
+            return
+
+        self.__stats['forwarded'] += 1
+        self.__forward(data)
+
+    def flush(self, now=None):
+        """Forward the most recent items if the interval has ended.
+
+        Args:
+            now (float): Current time. If :data:`None`, the system time is
+                used.
+
+        """
+
+        if self.__deadline is None:
+            return
+
+        now = time.time() if now is None else now
+        if now < self.__deadline:
+            return
+
+        # Start the next interval. Intervals missed entirely are skipped.
+        self.__deadline += self.__value * (1 + int((now - self.__deadline) //
+                                                   self.__value))
+        with self.__lock:
+            latest = self.__latest
+            self.__latest = dict()
+
+        for data in latest.itervalues():
+            self.__stats['forwarded'] += 1
+            self.__forward(data)
+
+
 class QueuedListener(mcl.network.abstract.RawListener):
     """Open a broadcast address and listen for data.
 
@@ -527,7 +967,29 @@ class QueuedListener(mcl.network.abstract.RawListener):
         - **<payload>** contains the contents of the data transmission.
 
         - **<time_received>** is a datetime object containing the time the data
-          was received and queued.
+          was received and queued. If the network listener provides the time
+          the data was received (e.g. kernel timestamps on a
+          :class:`.udp.Connection`), that time is used instead.
+
+    If the network listener records reception statistics (e.g.
+    :attr:`.udp.RawListener.stats`), the most recent statistics recorded on
+    the listening process are available from :attr:`.stats`. Statistics are
+    updated periodically and are retained after the connection is closed.
+
+    Consumers which only need a fraction of a high rate stream (e.g. displays
+    and monitors) can request decimation with ``decimate``. Data are decimated
+    for each topic on the listening process, before they are queued, so
+    discarded data are neither copied between processes nor decoded into
+    :class:`.Message` objects. The policies are (see
+    :data:`.DECIMATION_POLICIES`):
+
+        - ``('every', n)``: issue every n-th item of each topic
+        - ``('rate', n)``: issue at most n items per second of each topic
+        - ``('latest', n)``: issue the most recent item of each topic every n
+          seconds
+
+    The number of items ``received`` and ``forwarded`` by the decimator are
+    reported in the ``decimation`` item of :attr:`.stats`.
 
     Example usage emulating objects returned from :func:`.RawListener`:
 
@@ -596,16 +1058,22 @@ class QueuedListener(mcl.network.abstract.RawListener):
        hello world
 
     Args:
-        connection (:class:`~.abstract.Connection` or :class:`~.messages.Message`):
-            an instance of a MCL connection object or a reference to a MCL
-            message type.
+        connection: an instance of a MCL connection object
+            (:class:`~.abstract.Connection`) or a reference to a MCL message
+            type (:class:`~.messages.Message`).
         topics (str or list): Topics associated with the network interface
             represented as either a string or list of strings.
         open_init (bool): open connection immediately after initialisation.
+        decimate (tuple): Decimation policy and value applied to each topic
+            before data is queued. If :data:`None`, all data is queued.
+
+    Raises:
+        TypeError: If any of the inputs are ill-specified.
 
     """
 
-    def __init__(self, connection, topics=None, open_init=True):
+    def __init__(self, connection, topics=None, open_init=True,
+                 decimate=None):
         """Document the __init__ method at the class level."""
 
         try:
@@ -633,17 +1101,25 @@ class QueuedListener(mcl.network.abstract.RawListener):
         except:
             raise
 
+        # Ensure the decimation policy is properly specified.
+        _check_decimation(decimate)
+        self.__decimate = decimate
+
         # To catch errors early, test if the RawListener() object can be
         # opened. RawListener() is created in the __enqueue method which is
         # executed on another thread. Propagating errors from there is more
-        # difficult and occur later in the code execution.
+        # difficult and occur later in the code execution. The test listener
+        # is closed immediately: over connection-oriented transports (e.g.
+        # TCP) it would otherwise remain subscribed to the broadcaster.
         try:
-            RawListener(self.__connection, topics=topics)
+            RawListener(self.__connection, topics=topics).close()
         except:
             raise
 
         # Create objects for inter-process communication.
         self.__queue = None
+        self.__stats_queue = None
+        self.__stats = dict()
         self.__timeout = 0.1
 
         # Asynchronous objects. The process is used to enqueue data and the
@@ -673,6 +1149,31 @@ class QueuedListener(mcl.network.abstract.RawListener):
 
         return self.__is_alive
 
+    @property
+    def decimate(self):
+        return self.__decimate
+
+    @property
+    def stats(self):
+        """Return the most recent statistics recorded by the listener.
+
+        Returns:
+            :class:`dict`: Statistics recorded by the network listener on the
+                listening process. If the listener does not record statistics,
+                an empty dictionary is returned.
+
+        """
+
+        # Fetch latest statistics from listening process.
+        if self.__stats_queue is not None:
+            try:
+                while True:
+                    self.__stats = self.__stats_queue.get_nowait()
+            except Queue.Empty:
+                pass
+
+        return self.__stats
+
     # Note: This method is implemented as a private static method. It is has
     #       been implemented as a static method to reinforce the idea that
     #       operations in this method are performed on a separate process (new
@@ -681,7 +1182,8 @@ class QueuedListener(mcl.network.abstract.RawListener):
     #       functionality that is particular to the class.
     #
     @staticmethod
-    def __enqueue(class_name, run_event, connection, topics, queue):
+    def __enqueue(class_name, run_event, connection, topics, queue,
+                  stats_queue, decimate=None):
         """Light weight service to write incoming data to a queue."""
 
         # Attempt to set process name.
@@ -689,9 +1191,6 @@ class QueuedListener(mcl.network.abstract.RawListener):
         proc_name = proc_name % str(connection)
         _set_process_name(proc_name)
 
-        # Log start of process activity.
-        run_event.set()
-
         # Note: lexical closure is (ab)used to provide non-local access to the
         #       'name', 'connection' and the 'queue' object. This function will
         #       be executed asynchronously from the listener object where the
@@ -707,26 +1206,70 @@ class QueuedListener(mcl.network.abstract.RawListener):
                 # Note: Objects enqueued by the same process will always be in
                 #       the expected order with respect to each other.
                 #
-                data['time_received'] = datetime.datetime.utcnow()
-                queue.put(data)
+                if 'time_received' not in data:
+                    data['time_received'] = datetime.datetime.utcnow()
+                if decimator is None:
+                    queue.put(data)
+                else:
+                    decimator.insert(data)
             except:
                 pass
 
+        # Decimate data before it is written to the queue.
+        decimator = None
+        if decimate is not None:
+            decimator = _Decimator(decimate[0], decimate[1], queue.put)
+
         # Start listening for network broadcasts.
         listener = RawListener(connection, topics=topics)
 
         # Capture broadcast data.
         listener.subscribe(enqueue)
 
-        # Wait for user to terminate listening service.
+        # Log start of process activity. Data published after this point is
+        # received.
+        run_event.set()
+
+        def publish_stats():
+            """Replace statistics in queue with the latest statistics."""
+
+            stats = dict(getattr(listener, 'stats', dict()))
+            if decimator is not None:
+                stats['decimation'] = decimator.stats
+
+            if stats:
+                try:
+                    stats_queue.get_nowait()
+                except Queue.Empty:
+                    pass
+
+                try:
+                    stats_queue.put_nowait(stats)
+                except Queue.Full:                           # pragma: no cover
+                    pass
+
+        # Wait for user to terminate listening service. Queue the most recent
+        # data at the end of each decimation interval.
+        interval = STATS_INTERVAL
+        if decimator is not None and decimator.interval is not None:
+            interval = min(interval, decimator.interval)
+
+        published = time.time()
         while run_event.is_set():
             try:
-                time.sleep(0.25)
+                time.sleep(interval)
+                now = time.time()
+                if decimator is not None:
+                    decimator.flush(now)
+                if now - published >= STATS_INTERVAL:
+                    published = now
+                    publish_stats()
             except KeyboardInterrupt:                        # pragma: no cover
                 break
 
         # Stop listening for data.
         listener.close()
+        publish_stats()
 
     def __dequeue(self):
         """Light weight service to read data from queue and issue callbacks."""
@@ -773,6 +1316,7 @@ class QueuedListener(mcl.network.abstract.RawListener):
 
             # Reset asynchronous objects.
             self.__queue = multiprocessing.Queue()
+            self.__stats_queue = multiprocessing.Queue(maxsize=1)
 
             # Create THREAD for dequeueing and publishing data.
             self.__reader_run_event.clear()
@@ -780,12 +1324,15 @@ class QueuedListener(mcl.network.abstract.RawListener):
 
             # Create PROCESS for enqueueing data.
             self.__writer_run_event.clear()
+            args = (self.__class__.__name__,
+                    self.__writer_run_event,
+                    self.__connection,
+                    self.topics,
+                    self.__queue,
+                    self.__stats_queue,
+                    self.__decimate)
             self.__writer = multiprocessing.Process(target=self.__enqueue,
-                                                    args=(self.__class__.__name__,
-                                                          self.__writer_run_event,
-                                                          self.__connection,
-                                                          self.topics,
-                                                          self.__queue))
+                                                    args=args)
 
             # Start asynchronous objects and wait for them to become alive.
             self.__writer.daemon = True
@@ -861,8 +1408,12 @@ class QueuedListener(mcl.network.abstract.RawListener):
                 msg = msg % str(self.__connection)
                 raise Exception(msg)
 
+            # Retain final statistics.
+            self.__stats = self.stats
+
             # Reset asynchronous objects (Drop data in the queue).
             self.__queue = None
+            self.__stats_queue = None
             self.__reader = None
             self.__writer = None
             self.__is_alive = False
@@ -0,0 +1,714 @@
+"""Publish and receive data using shared memory.
+
+This module provides an interface for publishing data between processes on the
+same host through shared memory. The main objects responsible for transmitting
+data through shared memory are:
+
+    - :class:`~.shm.Connection`
+    - :class:`~.shm.RawBroadcaster`
+    - :class:`~.shm.RawListener`
+
+Each connection is a ring buffer in a memory mapped file (by default in
+``/dev/shm``). Broadcasters append messages to the ring buffer and listeners
+read messages from the ring buffer, each at its own position. Messages are
+copied once into the ring buffer and once out of it; they are not fragmented
+and do not pass through the network stack.
+
+Like UDP, shared memory gives no guarantee of delivery: listeners which fall
+more than the size of the ring buffer behind the broadcasters lose the
+overwritten messages (see the ``stats`` attribute of
+:class:`~.shm.RawListener`). Messages published before a listener was opened
+are not received.
+
+Example usage:
+
+.. testcode:: send-receive
+
+    import os
+    import time
+    from mcl.network.shm import Connection
+    from mcl.network.shm import RawListener
+    from mcl.network.shm import RawBroadcaster
+
+    # Create shared memory connection.
+    connection = Connection('example')
+
+    # Create raw listener and broadcaster from the connection.
+    listener = RawListener(connection)
+    broadcaster = RawBroadcaster(connection)
+
+    # Print received data to screen.
+    listener.subscribe(lambda d: os.sys.stdout.write(d['payload']))
+
+    # Broadcast data.
+    broadcaster.publish('hello world')
+    time.sleep(0.1)
+
+    # Close connections.
+    listener.close()
+    broadcaster.close()
+
+.. testoutput:: send-receive
+   :hide:
+
+   hello world
+
+.. note::
+
+    The memory mapped file of a connection persists after all broadcasters and
+    listeners have been closed (like a POSIX shared memory object) so that
+    processes can be restarted. The file can be removed once it is no longer
+    in use. On Linux, files in ``/dev/shm`` are removed when the system is
+    restarted.
+
+"""
+import os
+import mmap
+import time
+import fcntl
+import ctypes
+import struct
+import msgpack
+import tempfile
+import threading
+import collections
+import mcl.network.linux
+import mcl.network.abstract
+
+# Topics are hashed as in the UDP frame header.
+from mcl.network.udp import _topic_hash
+
+# Directory containing the memory mapped files of connections. If the
+# directory does not exist, the temporary directory is used.
+SHM_DIRECTORY = '/dev/shm'
+
+# Default size of the ring buffer of a connection in bytes (see Connection).
+# The smallest ring buffer is one page.
+RING_SIZE = 4 * 1024 * 1024
+RING_SIZE_MIN = mmap.PAGESIZE
+
+# Time in milliseconds to break out of the I/O loop. This number determines the
+# responsiveness of RawListeners to stop signals.
+READ_TIMEOUT = 200
+
+# Time in seconds between checks of the ring buffer if processes cannot wait
+# for changes to shared memory (see mcl.network.linux.HAS_FUTEX).
+POLL_INTERVAL = 0.001
+
+# Prefix of the memory mapped file name.
+FILE_PREFIX = 'mcl-'
+
+# Fixed size header at the start of the memory mapped file (see _RingHeader).
+# The ring buffer follows the header.
+HEADER_MAGIC = 'MCLR'
+HEADER_VERSION = 1
+HEADER_SIZE = 64
+
+# Each message in the ring buffer is a fixed size record header (RECORD)
+# followed by the serialised message. The record header contains the length of
+# the serialised message and a hash of the topic associated with the message.
+# Records start on ALIGNMENT byte boundaries. A record which does not fit
+# before the end of the ring buffer is written at the start of the ring
+# buffer. The unused space is marked by a record header with the length
+# RECORD_PADDING (unless there is no space for a record header).
+RECORD = struct.Struct('=II')
+RECORD_PADDING = 0xFFFFFFFF
+ALIGNMENT = 8
+
+
+class _RingHeader(ctypes.Structure):
+    """Header of the memory mapped file.
+
+    The ``reserved`` and ``committed`` cursors count the bytes written to the
+    ring buffer since it was created. Writers advance ``reserved`` before
+    writing a record and ``committed`` once the record has been written.
+    Readers read records up to ``committed`` and use ``reserved`` to detect
+    records overwritten while they were being read. ``notify`` is incremented
+    for each record written so that readers can wait for new records.
+
+    """
+
+    _fields_ = [('magic', ctypes.c_char * 4),
+                ('version', ctypes.c_uint32),
+                ('capacity', ctypes.c_uint64),
+                ('reserved', ctypes.c_uint64),
+                ('committed', ctypes.c_uint64),
+                ('notify', ctypes.c_uint32)]
+
+
+class _Ring(object):
+    """Ring buffer of messages in a memory mapped file.
+
+    The file is created, and the ring buffer initialised, by the first process
+    to open it. Writers from several processes are serialised by an exclusive
+    lock on the file (:func:`fcntl.flock`). Readers do not take the lock.
+
+    Args:
+        path (str): Path of the memory mapped file.
+        size (int): Size of the ring buffer in bytes, if the file is created.
+            If the file exists, the size it was created with is used.
+
+    Attributes:
+        capacity (int): Size of the ring buffer in bytes.
+
+    Raises:
+        IOError: If the file could not be opened or is not a ring buffer.
+
+    """
+
+    def __init__(self, path, size):
+        """Document the __init__ method at the class level."""
+
+        self.__file = open(path, 'a+b')
+        self.__lock = threading.Lock()
+        try:
+            fcntl.flock(self.__file, fcntl.LOCK_EX)
+            try:
+                self.__file.seek(0, os.SEEK_END)
+                if self.__file.tell() == 0:
+                    self.__file.truncate(HEADER_SIZE + size)
+                    self.__mmap = mmap.mmap(self.__file.fileno(), 0)
+                    header = _RingHeader.from_buffer(self.__mmap)
+                    header.version = HEADER_VERSION
+                    header.capacity = size
+                    header.magic = HEADER_MAGIC
+                else:
+                    self.__mmap = mmap.mmap(self.__file.fileno(), 0)
+            finally:
+                fcntl.flock(self.__file, fcntl.LOCK_UN)
+
+            self.__header = _RingHeader.from_buffer(self.__mmap)
+            if self.__header.magic != HEADER_MAGIC or \
+               self.__header.version != HEADER_VERSION or \
+               len(self.__mmap) != HEADER_SIZE + self.__header.capacity:
+                msg = "'%s' is not a shared memory ring buffer." % path
+                raise IOError(msg)
+        except:
+            self.__file.close()
+            raise
+
+        self.__capacity = self.__header.capacity
+        self.__notify = ctypes.addressof(self.__header) + \
+            _RingHeader.notify.offset
+
+    @property
+    def capacity(self):
+        return self.__capacity
+
+    @property
+    def cursor(self):
+        """Position after the most recent record written."""
+        return self.__header.committed
+
+    @property
+    def notify(self):
+        """Counter incremented for each record written."""
+        return self.__header.notify
+
+    def write(self, packet, topic_hash):
+        """Append a serialised message to the ring buffer.
+
+        Raises:
+            ValueError: If the message is larger than the ring buffer.
+
+        """
+
+        length = RECORD.size + len(packet)
+        length += -length % ALIGNMENT
+        if length > self.__capacity:
+            msg = 'The message (%i bytes) is larger than the ring buffer '
+            msg += '(%i bytes).'
+            raise ValueError(msg % (len(packet), self.__capacity))
+
+        with self.__lock:
+            fcntl.flock(self.__file, fcntl.LOCK_EX)
+            try:
+                header = self.__header
+                cursor = header.committed
+                offset = cursor % self.__capacity
+
+                # Reserve space before any data is written so that readers
+                # detect the records being overwritten. Skip the end of the
+                # ring buffer if the record does not fit.
+                remaining = self.__capacity - offset
+                if remaining < length:
+                    header.reserved = cursor + remaining + length
+                    if remaining >= RECORD.size:
+                        RECORD.pack_into(self.__mmap, HEADER_SIZE + offset,
+                                         RECORD_PADDING, 0)
+                    cursor += remaining
+                    offset = 0
+                else:
+                    header.reserved = cursor + length
+
+                # Write the record and make it visible to readers.
+                start = HEADER_SIZE + offset
+                RECORD.pack_into(self.__mmap, start, len(packet), topic_hash)
+                start += RECORD.size
+                self.__mmap[start:start + len(packet)] = packet
+                header.committed = cursor + length
+                header.notify = (header.notify + 1) & 0xFFFFFFFF
+            finally:
+                fcntl.flock(self.__file, fcntl.LOCK_UN)
+
+        if mcl.network.linux.HAS_FUTEX:
+            mcl.network.linux.futex_wake(self.__notify)
+
+    def read(self, cursor):
+        """Read the records written after a position.
+
+        Args:
+            cursor (int): Position of the first record to read (see
+                :attr:`.cursor`).
+
+        Returns:
+            tuple: A list of ``(topic_hash, packet)`` records, the position
+                after the last record read and a flag indicating whether
+                records were overwritten before they were read. If records
+                were overwritten, reading resumes at the most recent record.
+
+        """
+
+        header = self.__header
+        capacity = self.__capacity
+        committed = header.committed
+        records = list()
+
+        # The ring buffer was recreated or records were overwritten.
+        if cursor > committed or committed - cursor > capacity:
+            return records, committed, cursor < committed
+
+        while cursor < committed:
+            offset = cursor % capacity
+            remaining = capacity - offset
+            if remaining < RECORD.size:
+                cursor += remaining
+                continue
+
+            start = HEADER_SIZE + offset
+            length, topic_hash = RECORD.unpack_from(self.__mmap, start)
+            if length == RECORD_PADDING:
+                cursor += remaining
+                continue
+
+            start += RECORD.size
+            packet = self.__mmap[start:start + length]
+
+            # Discard the record if it was overwritten while it was read.
+            if header.reserved - cursor > capacity:
+                return records, header.committed, True
+
+            records.append((topic_hash, packet))
+            length += RECORD.size
+            cursor += length + (-length % ALIGNMENT)
+
+        return records, cursor, False
+
+    def wait(self, notify, timeout):
+        """Wait until a record is written after ``notify`` was read."""
+
+        if mcl.network.linux.HAS_FUTEX:
+            mcl.network.linux.futex_wait(self.__notify, notify, timeout)
+        else:
+            time.sleep(POLL_INTERVAL)                        # pragma: no cover
+
+    def wake(self):
+        """Wake readers waiting for records."""
+
+        if mcl.network.linux.HAS_FUTEX:
+            mcl.network.linux.futex_wake(self.__notify)
+
+    def close(self):
+        """Unmap and close the file."""
+
+        self.__header = None
+        self.__mmap.close()
+        self.__file.close()
+
+
+def _path(connection):
+    """Return the path of the memory mapped file of a connection."""
+
+    directory = connection.directory
+    if directory is None:
+        if os.path.isdir(SHM_DIRECTORY):
+            directory = SHM_DIRECTORY
+        else:
+            directory = tempfile.gettempdir()                # pragma: no cover
+
+    return os.path.join(directory, FILE_PREFIX + connection.name)
+
+
+class RawBroadcaster(mcl.network.abstract.RawBroadcaster):
+    """Send data to processes on the same host using shared memory.
+
+    The :class:`~.shm.RawBroadcaster` object allows data to be published to a
+    shared memory ring buffer. Data is serialised as a msgpack ``(topic,
+    payload)`` tuple and copied into the ring buffer. Several broadcasters,
+    in one or several processes, can publish to the same connection.
+
+    Args:
+        connection (:class:`.Connection`): Connection object.
+        topic (str): Default topic associated with the broadcaster.
+
+    Attributes:
+        connection (:class:`.Connection`): Connection object.
+        topic (str): Default topic associated with the broadcaster.
+        is_open (bool): Return whether the ring buffer is open.
+
+    Raises:
+        TypeError: If any of the inputs are ill-specified.
+        IOError: If the ring buffer could not be opened.
+
+    """
+
+    def __init__(self, connection, topic=None):
+        """Document the __init__ method at the class level."""
+
+        # Ensure the connection object is properly specified.
+        if not isinstance(connection, Connection):
+            msg = "The argument 'connection' must be an instance of a "
+            msg += "shared memory Connection()."
+            raise TypeError(msg)
+
+        # Attempt to initialise broadcaster base-class.
+        else:
+            try:
+                super(RawBroadcaster, self).__init__(connection, topic=topic)
+            except:
+                raise
+
+        self.__ring = None
+        self.__is_open = False
+
+        # Attempt to open the ring buffer.
+        success = self._open()
+        if not success:
+            msg = "Could not connect to '%s'." % str(self.connection)
+            raise IOError(msg)
+
+    @property
+    def is_open(self):
+        return self.__is_open
+
+    def _open(self):
+        """Open the shared memory ring buffer.
+
+        Returns:
+            :class:`bool`: Returns :data:`True` if the ring buffer was opened.
+                If the ring buffer is already open, the request is ignored and
+                the method returns :data:`False`.
+
+        """
+
+        if not self.is_open:
+            try:
+                self.__ring = _Ring(_path(self.connection),
+                                    self.connection.size)
+            except (IOError, OSError):
+                return False
+
+            self.__is_open = True
+            return True
+        else:
+            return False
+
+    def publish(self, data, topic=None):
+        """Send data to the shared memory ring buffer.
+
+        Args:
+            data (obj): Serialisable object to publish.
+            topic (str): Topic associated with published data. This option will
+                temporarily override the topic specified during instantiation.
+
+        Raises:
+            ValueError: If the serialised data is larger than the ring
+                buffer.
+
+        """
+
+        if self.is_open:
+
+            # Validate input arguments.
+            try:
+                super(RawBroadcaster, self).publish(data, topic=topic)
+                if topic is None:
+                    topic = self.topic
+            except:
+                raise
+
+            self.__ring.write(msgpack.dumps((topic, data)), _topic_hash(topic))
+
+        else:
+            msg = 'Connection must be opened before publishing.'
+            raise IOError(msg)
+
+    def close(self):
+        """Close the shared memory ring buffer.
+
+        Returns:
+            :class:`bool`: Returns :data:`True` if the ring buffer was closed.
+                If the ring buffer was already closed, the request is ignored
+                and the method returns :data:`False`.
+
+        """
+
+        if self.is_open:
+            self.__ring.close()
+            self.__ring = None
+            self.__is_open = False
+            return True
+        else:
+            return False
+
+
+class RawListener(mcl.network.abstract.RawListener):
+    """Receive data from processes on the same host using shared memory.
+
+    The :class:`~.shm.RawListener` object reads messages from a shared memory
+    ring buffer on a background thread and issues publish events in the
+    following format::
+
+        {'topic': str(),
+         'payload': obj()}
+
+    where:
+
+        - **<topic>** is a string containing the topic associated with the
+          received data.
+
+        - **<payload>** is the received (serialisable) data.
+
+    Messages are filtered by topic before they are decoded. The listener
+    waits for new messages without polling where supported (see
+    :data:`~.linux.HAS_FUTEX`).
+
+    Args:
+        connection (:class:`.Connection`): Connection object.
+        topics (str or list): Topics associated with the
+            :class:`~.shm.RawListener` interface.
+
+    Attributes:
+        connection (:class:`.Connection`): Connection object.
+        topics (str or list): Topics associated with the
+            :class:`~.shm.RawListener` interface.
+        is_open (bool): Return whether the ring buffer is open.
+        stats (dict): Number of messages ``received`` and the number of
+            times messages were ``overwritten`` before they were read.
+
+    Raises:
+        TypeError: If any of the inputs are ill-specified.
+        IOError: If the ring buffer could not be opened.
+
+    """
+
+    def __init__(self, connection, topics=None):
+        """Document the __init__ method at the class level."""
+
+        # Ensure the connection object is properly specified.
+        if not isinstance(connection, Connection):
+            msg = "The argument 'connection' must be an instance of a "
+            msg += "shared memory Connection()."
+            raise TypeError(msg)
+
+        # Attempt to initialise listener base-class.
+        else:
+            try:
+                super(RawListener, self).__init__(connection, topics=topics)
+            except:
+                raise
+
+        # Hash topics to reject unwanted messages from the record header.
+        if not self.topics:
+            self.__topic_hashes = None
+        elif isinstance(self.topics, basestring):
+            self.__topic_hashes = frozenset([_topic_hash(self.topics)])
+        else:
+            self.__topic_hashes = frozenset(_topic_hash(topic)
+                                            for topic in self.topics)
+
+        self.__ring = None
+        self.__stop_event = None
+        self.__listen_thread = None
+        self.__stats = {'received': 0, 'overwritten': 0}
+        self.__is_open = False
+
+        # Attempt to open the ring buffer.
+        success = self._open()
+        if not success:
+            msg = "Could not connect to '%s'." % str(self.connection)
+            raise IOError(msg)
+
+    @property
+    def is_open(self):
+        return self.__is_open
+
+    @property
+    def stats(self):
+        return dict(self.__stats)
+
+    def _open(self):
+        """Open the shared memory ring buffer and start reading messages.
+
+        Returns:
+            :class:`bool`: Returns :data:`True` if the ring buffer was opened.
+                If the ring buffer is already open, the request is ignored and
+                the method returns :data:`False`.
+
+        """
+
+        if not self.__is_open:
+            try:
+                self.__ring = _Ring(_path(self.connection),
+                                    self.connection.size)
+            except (IOError, OSError):
+                return False
+
+            # Start reading messages on a new thread. Messages published
+            # before the listener was opened are not received.
+            self.__stop_event = threading.Event()
+            self.__listen_thread = threading.Thread(target=self.__read,
+                                                    args=(self.__ring.cursor,))
+            self.__listen_thread.daemon = True
+            self.__listen_thread.start()
+
+            self.__is_open = True
+            return True
+
+        else:
+            return False
+
+    def __read(self, cursor):
+        """Read messages from the ring buffer."""
+
+        ring = self.__ring
+        while not self.__stop_event.is_set():
+
+            # Read the counter before the ring buffer so that records written
+            # after the read wake the listener.
+            notify = ring.notify
+            records, cursor, overwritten = ring.read(cursor)
+            if overwritten:
+                self.__stats['overwritten'] += 1
+
+            for topic_hash, packet in records:
+                self.__issue(topic_hash, packet)
+
+            if not records:
+                ring.wait(notify, READ_TIMEOUT / 1000.0)
+
+        # Issue messages written before the listener was closed.
+        records, cursor, overwritten = ring.read(cursor)
+        if overwritten:
+            self.__stats['overwritten'] += 1
+        for topic_hash, packet in records:
+            self.__issue(topic_hash, packet)
+
+    def __issue(self, topic_hash, packet):
+        """Decode a message and issue it to callbacks."""
+
+        # Reject unwanted topics before decoding the message.
+        if self.__topic_hashes and topic_hash not in self.__topic_hashes:
+            return
+
+        try:
+            topic, payload = msgpack.loads(packet)
+        except:
+            return
+
+        # Hash collisions are resolved by comparing topics.
+        if self.topics:
+            if isinstance(self.topics, basestring):
+                if topic != self.topics:
+                    return
+            elif topic not in self.topics:
+                return
+
+        # Publish data.
+        self.__stats['received'] += 1
+        try:
+            self.__trigger__({'topic': topic, 'payload': payload})
+        except Exception as e:
+            msg = '\nCould not service shared memory receive callback. The '
+            msg += 'following exception was raised:\n\n%s\n'
+            raise Exception(msg % e.message)
+
+    def close(self):
+        """Close the shared memory ring buffer.
+
+        Returns:
+            :class:`bool`: Returns :data:`True` if the ring buffer was closed.
+                If the ring buffer was already closed, the request is ignored
+                and the method returns :data:`False`.
+
+        """
+
+        if self.is_open:
+
+            # Stop thread and wait for thread to terminate.
+            self.__stop_event.set()
+            self.__ring.wake()
+            self.__listen_thread.join()
+
+            self.__ring.close()
+            self.__ring = None
+            self.__is_open = False
+            return True
+        else:
+            return False
+
+
+class Connection(mcl.network.abstract.Connection):
+    """Object for encapsulating shared memory connection parameters.
+
+    Args:
+        name (str): Name of the connection. Broadcasters and listeners with
+            the same name share a ring buffer. The name must be a valid file
+            name.
+        size (int): Size of the ring buffer in bytes (at least
+            :data:`.RING_SIZE_MIN`). The size is only used by the first
+            broadcaster or listener to open the connection. Messages larger
+            than the ring buffer cannot be published.
+        directory (str): Directory containing the memory mapped file of the
+            connection. If :data:`None`, :data:`.SHM_DIRECTORY` is used.
+
+    Attributes:
+        name (str): Name of the connection.
+        size (int): Size of the ring buffer in bytes.
+        directory (str): Directory containing the memory mapped file.
+
+    Raises:
+        TypeError: If ``name`` is not a valid file name, ``size`` is not an
+            integer of at least :data:`.RING_SIZE_MIN` or ``directory`` is not
+            a string.
+
+    """
+
+    mandatory = ('name',)
+    optional = collections.OrderedDict([('size', RING_SIZE),
+                                        ('directory', None)])
+    broadcaster = RawBroadcaster
+    listener = RawListener
+
+    def __init__(self, name, size=RING_SIZE, directory=None):
+
+        # Check 'name' is a file name.
+        if not isinstance(name, basestring) or not name or \
+           os.sep in name or name in (os.curdir, os.pardir):
+            msg = "'name' must be a valid file name."
+            raise TypeError(msg)
+
+        # Check 'size' is an integer within range.
+        if not isinstance(size, (int, long)) or isinstance(size, bool):
+            msg = "'size' must be an integer value."
+            raise TypeError(msg)
+        elif size < RING_SIZE_MIN or size > 2**40:
+            msg = "'size' must be an integer between %i and %i."
+            raise TypeError(msg % (RING_SIZE_MIN, 2**40))
+
+        # Check 'directory' is a string (or None).
+        if directory is not None and not isinstance(directory, basestring):
+            msg = "'directory' must be a string."
+            raise TypeError(msg)
+
+        super(Connection, self).__init__(name, size, directory)
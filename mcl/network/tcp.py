@@ -0,0 +1,874 @@
+"""Publish and receive data using TCP streams.
+
+This module provides an interface for publishing data over TCP streams. The
+main objects responsible for transmitting data over TCP streams are:
+
+    - :class:`~.tcp.Connection`
+    - :class:`~.tcp.RawBroadcaster`
+    - :class:`~.tcp.RawListener`
+
+TCP is suited to large payloads which cannot tolerate loss (e.g. maps and
+images). Unlike UDP multicast, each listener (subscriber) connects to the
+broadcaster and the broadcaster sends a copy of each message to each
+subscriber. Messages are delivered in order and are not lost while the
+subscriber is connected, unless the subscriber cannot keep up (see the
+``overflow`` option of :class:`~.tcp.Connection`).
+
+Messages are serialised as a msgpack ``(topic, payload)`` tuple and framed by
+a length prefix (:data:`.FRAME`). When a listener connects, it sends its
+topics to the broadcaster and the broadcaster only sends messages with those
+topics. The broadcaster acknowledges the subscription with an empty frame.
+Listeners reconnect if the connection is lost. Messages published while a
+listener is not connected are not received.
+
+Example usage:
+
+.. testcode:: send-receive
+
+    import os
+    import time
+    from mcl.network.tcp import Connection
+    from mcl.network.tcp import RawListener
+    from mcl.network.tcp import RawBroadcaster
+
+    # Create TCP connection.
+    connection = Connection('::1', port=26001)
+
+    # Create raw broadcaster and listener from TCP connection.
+    broadcaster = RawBroadcaster(connection)
+    listener = RawListener(connection)
+
+    # Print received data to screen.
+    listener.subscribe(lambda d: os.sys.stdout.write(d['payload']))
+
+    # Broadcast data.
+    broadcaster.publish('hello world')
+    time.sleep(0.1)
+
+    # Close connections.
+    listener.close()
+    broadcaster.close()
+
+.. testoutput:: send-receive
+   :hide:
+
+   hello world
+
+.. note::
+
+    Processes forked while a broadcaster is open (e.g. the process of a
+    :class:`.QueuedListener`) inherit the listening socket of the broadcaster
+    and keep the port in use after the broadcaster is closed. Open
+    :class:`.QueuedListener` objects before broadcasters in the same process.
+
+"""
+import time
+import Queue
+import select
+import socket
+import struct
+import msgpack
+import threading
+import collections
+import mcl.network.abstract
+
+# Default port of TCP connections (see Connection).
+TCP_PORT = 26000
+
+# Default number of messages queued for each subscriber (see Connection).
+SEND_QUEUE = 16
+
+# Policies for handling messages published to a full subscriber queue:
+#
+#     - 'block': wait until there is space in the queue
+#     - 'drop_new': discard the published message
+#     - 'drop_old': discard the oldest message in the queue
+#
+OVERFLOW_POLICIES = ('block', 'drop_new', 'drop_old')
+
+# Time in milliseconds to break out of the I/O loop. This number determines the
+# responsiveness of RawListeners and subscriber threads to stop signals.
+READ_TIMEOUT = 200
+
+# Time in seconds listeners wait to connect (and for the broadcaster to
+# acknowledge the subscription) and between attempts to reconnect. Broadcasters
+# wait at most CONNECT_TIMEOUT seconds for the subscription of a listener.
+CONNECT_TIMEOUT = 1.0
+RECONNECT_INTERVAL = 0.1
+
+# Time in seconds the broadcaster waits for queued messages to be sent when
+# closed.
+CLOSE_TIMEOUT = 5.0
+
+# Each frame is a length prefix followed by the frame contents. The first
+# frame sent by listeners is a subscription (SUBSCRIPTION_MAGIC, version,
+# topics). Frames sent by broadcasters are serialised (topic, payload)
+# messages. The empty frame acknowledges a subscription.
+FRAME = struct.Struct('!I')
+FRAME_MAX = 2**32 - 1
+SUBSCRIPTION_MAGIC = 'MCLT'
+SUBSCRIPTION_VERSION = 1
+SUBSCRIPTION_MAX = 64 * 1024
+
+# Default maximum size in bytes of frames accepted by listeners (see
+# Connection). Listeners close the connection when a larger frame is
+# announced, rather than allocating memory for it.
+FRAME_LIMIT = 256 * 1024 * 1024
+
+
+def _address(connection):
+    """Return the address family and socket address of a connection.
+
+    Raises:
+        IOError: If the host cannot be resolved.
+
+    """
+
+    try:
+        info = socket.getaddrinfo(connection.host, connection.port,
+                                  socket.AF_UNSPEC, socket.SOCK_STREAM)
+    except socket.error as e:
+        raise IOError(str(e))
+
+    family, socktype, proto, canonname, sockaddr = info[0]
+    return family, sockaddr
+
+
+def _recv_into(sock, buf, stop_event=None, deadline=None):
+    """Fill a buffer from a socket.
+
+    Returns:
+        bool: :data:`True` if the buffer was filled. :data:`False` if the
+            connection was closed or ``stop_event`` was set.
+
+    Raises:
+        socket.timeout: If the socket timed out and ``stop_event`` is
+            :data:`None` or if the buffer was not filled before ``deadline``
+            (in seconds since the epoch).
+
+    """
+
+    view = memoryview(buf)
+    received = 0
+    while received < len(buf):
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise socket.timeout('timed out')
+            sock.settimeout(remaining)
+
+        try:
+            length = sock.recv_into(view[received:])
+        except socket.timeout:
+            if stop_event is None:
+                raise
+            elif stop_event.is_set():
+                return False
+            continue
+        if length == 0:
+            return False
+        received += length
+
+    return True
+
+
+def _recv_frame(sock, stop_event=None, maximum=FRAME_MAX, deadline=None):
+    """Receive a frame from a socket.
+
+    Returns:
+        bytearray: The contents of the frame or :data:`None` if the connection
+            was closed or ``stop_event`` was set.
+
+    Raises:
+        ValueError: If the frame is larger than ``maximum``. The contents of
+            the frame are not received.
+        socket.timeout: If the socket timed out (see :func:`._recv_into`).
+
+    """
+
+    prefix = bytearray(FRAME.size)
+    if not _recv_into(sock, prefix, stop_event, deadline):
+        return None
+
+    length, = FRAME.unpack_from(buffer(prefix))
+    if length > maximum:
+        raise ValueError('Frame of %i bytes exceeds %i bytes.' %
+                         (length, maximum))
+
+    frame = bytearray(length)
+    if not _recv_into(sock, frame, stop_event, deadline):
+        return None
+
+    return frame
+
+
+def _send_frame(sock, packet):
+    """Send a frame to a socket."""
+
+    # Avoid copying large packets to prepend the length prefix.
+    if len(packet) < 65536:
+        sock.sendall(FRAME.pack(len(packet)) + packet)
+    else:
+        sock.sendall(FRAME.pack(len(packet)))
+        sock.sendall(packet)
+
+
+class _Subscriber(object):
+    """Send messages to a subscriber connected to a broadcaster.
+
+    Messages are sent from a bounded queue on a dedicated thread so that
+    subscribers which cannot keep up do not delay other subscribers (unless
+    the overflow policy is ``'block'``).
+
+    Args:
+        sock (socket.socket): Connected socket.
+        size (int): Maximum number of queued messages.
+        overflow (str): Policy for messages published to a full queue.
+        register (callable): Called with the subscriber once the subscription
+            is received and with :data:`None` when the subscriber is closed.
+        stats (callable): Called with the name of a counter to increment.
+
+    Attributes:
+        topics (frozenset): Topics of the subscriber (or :data:`None` for all
+            topics).
+
+    """
+
+    def __init__(self, sock, size, overflow, register, stats):
+        """Document the __init__ method at the class level."""
+
+        self.topics = None
+        self.__sock = sock
+        self.__queue = Queue.Queue(size)
+        self.__overflow = overflow
+        self.__register = register
+        self.__stats = stats
+        self.__closed = threading.Event()
+        self.__thread = threading.Thread(target=self.__run)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def accepts(self, topic):
+        """Return whether the subscriber receives a topic."""
+
+        return self.topics is None or topic in self.topics
+
+    def put(self, packet):
+        """Queue a serialised message according to the overflow policy."""
+
+        if self.__overflow == 'block':
+            while not self.__closed.is_set():
+                try:
+                    self.__queue.put(packet, timeout=READ_TIMEOUT / 1000.0)
+                    return
+                except Queue.Full:
+                    pass
+            return
+
+        try:
+            self.__queue.put_nowait(packet)
+        except Queue.Full:
+            self.__stats('dropped')
+
+            # Make room for the message by discarding the oldest message.
+            if self.__overflow == 'drop_old':
+                try:
+                    self.__queue.get_nowait()
+                except Queue.Empty:                          # pragma: no cover
+                    pass
+                try:
+                    self.__queue.put_nowait(packet)
+                except Queue.Full:                           # pragma: no cover
+                    self.__stats('dropped')
+
+    def __run(self):
+        """Receive the subscription and send queued messages."""
+
+        sock = self.__sock
+        try:
+            # Receive the topics of the subscriber.
+            frame = _recv_frame(sock, maximum=SUBSCRIPTION_MAX,
+                                deadline=time.time() + CONNECT_TIMEOUT)
+            if frame is None:
+                return
+            magic, version, topics = msgpack.loads(frame)
+            if magic != SUBSCRIPTION_MAGIC or version != SUBSCRIPTION_VERSION:
+                return
+            if topics is not None:
+                self.topics = frozenset(topics)
+
+            # Acknowledge the subscription once the subscriber receives
+            # messages.
+            sock.settimeout(None)
+            self.__register(self)
+            _send_frame(sock, '')
+
+            while not self.__closed.is_set():
+                try:
+                    packet = self.__queue.get(timeout=READ_TIMEOUT / 1000.0)
+                except Queue.Empty:
+                    continue
+                if packet is None:
+                    return
+                _send_frame(sock, packet)
+                self.__stats('sent')
+
+        except (socket.error, ValueError, TypeError):
+            pass
+
+        finally:
+            self.__closed.set()
+            self.__register(None, self)
+            try:
+                sock.close()
+            except socket.error:                             # pragma: no cover
+                pass
+
+    def close(self, timeout=0.0):
+        """Stop sending messages.
+
+        Args:
+            timeout (float): Time in seconds to wait for queued messages to be
+                sent.
+
+        """
+
+        deadline = time.time() + timeout
+        if not self.__closed.is_set():
+            try:
+                self.__queue.put(None, timeout=timeout)
+            except Queue.Full:                               # pragma: no cover
+                pass
+            self.__thread.join(max(0.0, deadline - time.time()))
+
+        # Interrupt sends in progress.
+        self.__closed.set()
+        try:
+            self.__sock.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        self.__thread.join()
+
+
+class RawBroadcaster(mcl.network.abstract.RawBroadcaster):
+    """Send data to subscribers using TCP streams.
+
+    The :class:`~.tcp.RawBroadcaster` object accepts connections from
+    :class:`~.tcp.RawListener` objects (subscribers) on the host address and
+    port of the connection. Published data is serialised once and queued for
+    each subscriber which listens to the topic of the data. Each subscriber is
+    sent messages from its queue on a dedicated thread. Only one broadcaster
+    can be open for each host address and port.
+
+    Args:
+        connection (:class:`.Connection`): Connection object.
+        topic (str): Default topic associated with the broadcaster.
+
+    Attributes:
+        connection (:class:`.Connection`): Connection object.
+        topic (str): Default topic associated with the broadcaster.
+        is_open (bool): Return whether the broadcaster is accepting
+            subscribers.
+        stats (dict): Number of connected ``subscribers``, messages ``sent``
+            (counted once per subscriber) and messages ``dropped`` by the
+            overflow policy.
+
+    Raises:
+        TypeError: If any of the inputs are ill-specified.
+        IOError: If the broadcaster could not listen on the host address and
+            port.
+
+    """
+
+    def __init__(self, connection, topic=None):
+        """Document the __init__ method at the class level."""
+
+        # Ensure the connection object is properly specified.
+        if not isinstance(connection, Connection):
+            msg = "The argument 'connection' must be an instance of a "
+            msg += "TCP Connection()."
+            raise TypeError(msg)
+
+        # Attempt to initialise broadcaster base-class.
+        else:
+            try:
+                super(RawBroadcaster, self).__init__(connection, topic=topic)
+            except:
+                raise
+
+        self.__socket = None
+        self.__subscribers = list()
+        self.__connections = set()
+        self.__lock = threading.Lock()
+        self.__stop_event = threading.Event()
+        self.__accept_thread = None
+        self.__stats = {'sent': 0, 'dropped': 0}
+        self.__is_open = False
+
+        # Attempt to listen for subscribers.
+        success = self._open()
+        if not success:
+            msg = "Could not connect to '%s'." % str(self.connection)
+            raise IOError(msg)
+
+    @property
+    def is_open(self):
+        return self.__is_open
+
+    @property
+    def stats(self):
+        with self.__lock:
+            stats = dict(self.__stats)
+            stats['subscribers'] = len(self.__subscribers)
+        return stats
+
+    def _open(self):
+        """Listen for subscribers on the host address and port.
+
+        Returns:
+            :class:`bool`: Returns :data:`True` if the broadcaster is
+                listening. If the broadcaster is already open, the request is
+                ignored and the method returns :data:`False`.
+
+        """
+
+        if not self.is_open:
+            try:
+                family, sockaddr = _address(self.connection)
+                self.__socket = socket.socket(family, socket.SOCK_STREAM)
+                self.__socket.setsockopt(socket.SOL_SOCKET,
+                                         socket.SO_REUSEADDR, 1)
+                self.__socket.bind(sockaddr)
+                self.__socket.listen(socket.SOMAXCONN)
+            except (IOError, socket.error):
+                if self.__socket:
+                    self.__socket.close()
+                    self.__socket = None
+                return False
+
+            # Accept subscribers on a new thread.
+            self.__stop_event.clear()
+            self.__accept_thread = threading.Thread(target=self.__accept)
+            self.__accept_thread.daemon = True
+            self.__accept_thread.start()
+
+            self.__is_open = True
+            return True
+        else:
+            return False
+
+    def __accept(self):
+        """Accept subscribers until closed."""
+
+        while not self.__stop_event.is_set():
+            try:
+                readable = select.select([self.__socket], [], [],
+                                         READ_TIMEOUT / 1000.0)[0]
+                if not readable:
+                    continue
+                sock = self.__socket.accept()[0]
+            except (select.error, socket.error):             # pragma: no cover
+                continue
+
+            # Track connections before the subscription is received so that
+            # they are closed with the broadcaster. The lock prevents the
+            # connection from being removed before it is added.
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self.__lock:
+                self.__connections.add(_Subscriber(sock,
+                                                   self.connection.send_queue,
+                                                   self.connection.overflow,
+                                                   self.__register,
+                                                   self.__count))
+
+    def __register(self, subscriber, closed=None):
+        """Add a subscriber or remove a closed subscriber."""
+
+        with self.__lock:
+            if subscriber is not None:
+                if self.__stop_event.is_set():
+                    raise socket.error('Broadcaster closed.')
+                self.__subscribers.append(subscriber)
+            else:
+                self.__connections.discard(closed)
+                if closed in self.__subscribers:
+                    self.__subscribers.remove(closed)
+
+    def __count(self, name):
+        """Increment a counter of the broadcaster."""
+
+        with self.__lock:
+            self.__stats[name] += 1
+
+    def publish(self, data, topic=None):
+        """Send data to subscribers.
+
+        Args:
+            data (obj): Serialisable object to publish.
+            topic (str): Topic associated with published data. This option will
+                temporarily override the topic specified during instantiation.
+
+        """
+
+        if self.is_open:
+
+            # Validate input arguments.
+            try:
+                super(RawBroadcaster, self).publish(data, topic=topic)
+                if topic is None:
+                    topic = self.topic
+            except:
+                raise
+
+            with self.__lock:
+                subscribers = [subscriber for subscriber in self.__subscribers
+                               if subscriber.accepts(topic)]
+            if not subscribers:
+                return
+
+            packet = msgpack.dumps((topic, data))
+            for subscriber in subscribers:
+                subscriber.put(packet)
+
+        else:
+            msg = 'Connection must be opened before publishing.'
+            raise IOError(msg)
+
+    def close(self):
+        """Stop accepting subscribers and close connections to subscribers.
+
+        Messages queued for subscribers are sent before the connections are
+        closed (waiting at most :data:`.CLOSE_TIMEOUT` seconds).
+
+        Returns:
+            :class:`bool`: Returns :data:`True` if the broadcaster was closed.
+                If the broadcaster was already closed, the request is ignored
+                and the method returns :data:`False`.
+
+        """
+
+        if self.is_open:
+
+            # Stop accepting subscribers.
+            self.__stop_event.set()
+            self.__accept_thread.join()
+            self.__socket.close()
+            self.__socket = None
+
+            # Send queued messages and close connections. Connections which
+            # have not subscribed are closed immediately.
+            with self.__lock:
+                subscribers = list(self.__subscribers)
+                pending = self.__connections.difference(subscribers)
+            for subscriber in pending:
+                subscriber.close()
+            deadline = time.time() + CLOSE_TIMEOUT
+            for subscriber in subscribers:
+                subscriber.close(max(0.0, deadline - time.time()))
+
+            self.__is_open = False
+            return True
+        else:
+            return False
+
+
+class RawListener(mcl.network.abstract.RawListener):
+    """Receive data from a broadcaster using a TCP stream.
+
+    The :class:`~.tcp.RawListener` object connects to a
+    :class:`~.tcp.RawBroadcaster` and issues publish events in the following
+    format::
+
+        {'topic': str(),
+         'payload': obj()}
+
+    where:
+
+        - **<topic>** is a string containing the topic associated with the
+          received data.
+
+        - **<payload>** is the received (serialisable) data.
+
+    The listener connects to the broadcaster when it is opened. If the
+    broadcaster is not available, or the connection is lost, the listener
+    reconnects on a background thread every :data:`.RECONNECT_INTERVAL`
+    seconds. The listener closes the connection (and reconnects) if the
+    broadcaster sends a frame larger than the ``max_frame`` option of the
+    connection. The frame is not received.
+
+    Args:
+        connection (:class:`.Connection`): Connection object.
+        topics (str or list): Topics associated with the
+            :class:`~.tcp.RawListener` interface.
+
+    Attributes:
+        connection (:class:`.Connection`): Connection object.
+        topics (str or list): Topics associated with the
+            :class:`~.tcp.RawListener` interface.
+        is_open (bool): Return whether the listener is open.
+        is_connected (bool): Return whether the listener is connected to the
+            broadcaster.
+        stats (dict): Number of messages ``received``, the number of times
+            the listener ``connected`` to the broadcaster and the number of
+            connections closed because a frame was ``oversized``.
+
+    Raises:
+        TypeError: If any of the inputs are ill-specified.
+        IOError: If the host address cannot be resolved.
+
+    """
+
+    def __init__(self, connection, topics=None):
+        """Document the __init__ method at the class level."""
+
+        # Ensure the connection object is properly specified.
+        if not isinstance(connection, Connection):
+            msg = "The argument 'connection' must be an instance of a "
+            msg += "TCP Connection()."
+            raise TypeError(msg)
+
+        # Attempt to initialise listener base-class.
+        else:
+            try:
+                super(RawListener, self).__init__(connection, topics=topics)
+            except:
+                raise
+
+        if not self.topics:
+            self.__subscription = None
+        elif isinstance(self.topics, basestring):
+            self.__subscription = [self.topics]
+        else:
+            self.__subscription = list(self.topics)
+
+        self.__address = None
+        self.__stop_event = threading.Event()
+        self.__listen_thread = None
+        self.__is_connected = False
+        self.__stats = {'received': 0, 'connected': 0, 'oversized': 0}
+        self.__is_open = False
+
+        # Attempt to connect to the broadcaster.
+        success = self._open()
+        if not success:
+            msg = "Could not connect to '%s'." % str(self.connection)
+            raise IOError(msg)
+
+    @property
+    def is_open(self):
+        return self.__is_open
+
+    @property
+    def is_connected(self):
+        return self.__is_connected
+
+    @property
+    def stats(self):
+        return dict(self.__stats)
+
+    def _open(self):
+        """Connect to the broadcaster and start receiving data.
+
+        Returns:
+            :class:`bool`: Returns :data:`True` if the listener was opened
+                (whether or not the broadcaster was available). If the
+                listener is already open or the host address cannot be
+                resolved, the method returns :data:`False`.
+
+        """
+
+        if not self.is_open:
+            try:
+                self.__address = _address(self.connection)
+            except IOError:
+                return False
+
+            # Connect on this thread so that the listener is subscribed when
+            # the method returns (if the broadcaster is available).
+            sock = self.__connect()
+
+            self.__stop_event.clear()
+            self.__listen_thread = threading.Thread(target=self.__run,
+                                                    args=(sock,))
+            self.__listen_thread.daemon = True
+            self.__listen_thread.start()
+
+            self.__is_open = True
+            return True
+        else:
+            return False
+
+    def __connect(self):
+        """Connect and subscribe to the broadcaster.
+
+        Returns:
+            socket.socket: The connected socket or :data:`None` if the
+                broadcaster is not available.
+
+        """
+
+        family, sockaddr = self.__address
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(sockaddr)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            _send_frame(sock, msgpack.dumps((SUBSCRIPTION_MAGIC,
+                                             SUBSCRIPTION_VERSION,
+                                             self.__subscription)))
+
+            # Wait for the subscription to be acknowledged.
+            if _recv_frame(sock, maximum=0,
+                           deadline=time.time() + CONNECT_TIMEOUT) is None:
+                raise socket.error('Subscription not acknowledged.')
+
+        except (socket.error, ValueError):
+            sock.close()
+            return None
+
+        sock.settimeout(READ_TIMEOUT / 1000.0)
+        self.__stats['connected'] += 1
+        self.__is_connected = True
+        return sock
+
+    def __run(self, sock):
+        """Receive data from the broadcaster and reconnect until closed."""
+
+        while not self.__stop_event.is_set():
+            if sock is None:
+                sock = self.__connect()
+                if sock is None:
+                    self.__stop_event.wait(RECONNECT_INTERVAL)
+                    continue
+
+            try:
+                while True:
+                    frame = _recv_frame(sock, self.__stop_event,
+                                        self.connection.max_frame)
+                    if frame is None:
+                        break
+                    self.__issue(frame)
+            except socket.error:
+                pass
+            except ValueError:
+                self.__stats['oversized'] += 1
+
+            self.__is_connected = False
+            sock.close()
+            sock = None
+
+    def __issue(self, frame):
+        """Decode a message and issue it to callbacks."""
+
+        try:
+            topic, payload = msgpack.loads(frame)
+        except:
+            return
+
+        # Reject unwanted topics (the broadcaster filters topics as well).
+        if self.topics:
+            if isinstance(self.topics, basestring):
+                if topic != self.topics:
+                    return
+            elif topic not in self.topics:
+                return
+
+        # Publish data.
+        self.__stats['received'] += 1
+        try:
+            self.__trigger__({'topic': topic, 'payload': payload})
+        except Exception as e:
+            msg = '\nCould not service TCP receive callback. The following '
+            msg += 'exception was raised:\n\n%s\n'
+            raise Exception(msg % e.message)
+
+    def close(self):
+        """Close the connection to the broadcaster.
+
+        Returns:
+            :class:`bool`: Returns :data:`True` if the listener was closed. If
+                the listener was already closed, the request is ignored and
+                the method returns :data:`False`.
+
+        """
+
+        if self.is_open:
+
+            # Stop thread and wait for thread to terminate.
+            self.__stop_event.set()
+            self.__listen_thread.join()
+            self.__listen_thread = None
+            self.__is_open = False
+            return True
+        else:
+            return False
+
+
+class Connection(mcl.network.abstract.Connection):
+    """Object for encapsulating TCP connection parameters.
+
+    Args:
+        host (str): Address the broadcaster listens on and listeners connect
+            to (host name, IPv4 or IPv6 address). The address must be an
+            address of the host running the broadcaster.
+        port (int): Port the broadcaster listens on.
+        send_queue (int): Maximum number of messages queued for each
+            subscriber.
+        overflow (str): Policy for messages published to a full subscriber
+            queue (see :data:`.OVERFLOW_POLICIES`). If ``'block'``, publishing
+            waits for the slowest subscriber.
+        max_frame (int): Maximum size in bytes of a serialised message
+            accepted by listeners (at most :data:`.FRAME_MAX`). Listeners
+            close the connection when a larger message is sent.
+
+    Attributes:
+        host (str): Address of the broadcaster.
+        port (int): Port of the broadcaster.
+        send_queue (int): Maximum number of messages queued for each
+            subscriber.
+        overflow (str): Policy for messages published to a full subscriber
+            queue.
+        max_frame (int): Maximum size of messages accepted by listeners.
+
+    Raises:
+        TypeError: If ``host`` is not a string, ``port``, ``send_queue`` or
+            ``max_frame`` are not integers within range or ``overflow`` is not
+            a known policy.
+
+    """
+
+    mandatory = ('host',)
+    optional = collections.OrderedDict([('port', TCP_PORT),
+                                        ('send_queue', SEND_QUEUE),
+                                        ('overflow', 'block'),
+                                        ('max_frame', FRAME_LIMIT)])
+    broadcaster = RawBroadcaster
+    listener = RawListener
+
+    def __init__(self, host, port=TCP_PORT, send_queue=SEND_QUEUE,
+                 overflow='block', max_frame=FRAME_LIMIT):
+
+        # Check 'host' is a string.
+        if not isinstance(host, basestring):
+            msg = "'host' must be a string."
+            raise TypeError(msg)
+
+        # Check 'overflow' is a known policy.
+        if overflow not in OVERFLOW_POLICIES:
+            msg = "'overflow' must be one of: %s."
+            raise TypeError(msg % ', '.join(OVERFLOW_POLICIES))
+
+        # Check integers are within range.
+        limits = (('port', port, 1024, 65535),
+                  ('send_queue', send_queue, 1, 2**31 - 1),
+                  ('max_frame', max_frame, 1, FRAME_MAX))
+        for name, value, minimum, maximum in limits:
+            if not isinstance(value, (int, long)) or isinstance(value, bool):
+                msg = "'%s' must be an integer value." % name
+                raise TypeError(msg)
+            elif (value < minimum) or (value > maximum):
+                msg = "'%s' must be an integer between %i and %i."
+                raise TypeError(msg % (name, minimum, maximum))
+
+        super(Connection, self).__init__(host, port, send_queue, overflow,
+                                         max_frame)
@@ -8,6 +8,9 @@ import mcl.messages.messages
 from mcl.network.network import RawListener
 from mcl.network.network import RawBroadcaster
 from mcl.network.network import QueuedListener
+from mcl.network.network import SharedListener
+from mcl.network.network import _RECEIVERS
+from mcl.network.network import _Decimator
 from mcl.network.network import MessageListener
 from mcl.network.network import MessageBroadcaster
 from mcl.network.abstract import Connection as AbstractConnection
@@ -75,6 +78,30 @@ def compile_docstring(base, name):
     return dct
 
 
+def exclude_tests(dct, method_dct):
+    """Remove standard unit-tests excluded by a sub-class.
+
+    Sub-classes cannot redefine the standard unit-tests. A standard unit-test
+    which does not apply to a sub-class must be listed in the attribute
+    ``excluded_tests`` of the sub-class.
+
+    """
+
+    # Ensure standard unit-tests are not replaced by the sub-class.
+    for item in dct:
+        if item in method_dct:
+            msg = "The attribute '%s' cannot redefine a standard unit-test. "
+            msg += "Add it to 'excluded_tests' and use a different name."
+            raise TypeError(msg % item)
+
+    # Remove excluded unit-tests.
+    for item in dct.get('excluded_tests', ()):
+        if not item.startswith('test_') or item not in method_dct:
+            msg = "The excluded unit-test '%s' is not a standard unit-test."
+            raise TypeError(msg % item)
+        del method_dct[item]
+
+
 # -----------------------------------------------------------------------------
 #                           Raw/Message Broadcaster()
 # -----------------------------------------------------------------------------
@@ -113,6 +140,7 @@ class _BroadcasterTestsMeta(type):
 
         # Rename docstrings of unit-tests and copy into new sub-class.
         method_dct = compile_docstring(bases[0], module_name)
+        exclude_tests(dct, method_dct)
         dct.update(method_dct)
 
         return super(_BroadcasterTestsMeta, cls).__new__(cls,
@@ -356,6 +384,7 @@ class _ListenerTestsMeta(type):
 
         # Rename docstrings of unit-tests and copy into new sub-class.
         method_dct = compile_docstring(bases[0], module_name)
+        exclude_tests(dct, method_dct)
         dct.update(method_dct)
 
         return super(_ListenerTestsMeta, cls).__new__(cls,
@@ -375,6 +404,10 @@ class ListenerTests(object):
         - ``connection`` is the Connection() object associated with the
           listener
 
+    Standard unit-tests which do not apply to the listener (e.g. the
+    transport does not cross processes) can be listed in the optional
+    attribute ``excluded_tests``. They cannot be redefined.
+
     Example usage::
 
         class ConcreteRawListener(ListenerTests):
@@ -456,9 +489,12 @@ class ListenerTests(object):
         listener = self.listener(self.connection, topics=TOPIC)
         self.assertEqual(listener.topics, TOPIC)
 
+        listener.close()
+
         # Create an instance of RawListener() with MULTIPLE topics.
         listener = self.listener(self.connection, topics=TOPICS)
         self.assertEqual(listener.topics, TOPICS)
+        listener.close()
 
     def test_subscriptions(self):
         """Test %s RawListener() can subscribe and unsubscribe callbacks."""
@@ -480,6 +516,7 @@ class ListenerTests(object):
         self.assertTrue(listener.unsubscribe(callback))
         self.assertFalse(listener.is_subscribed(callback))
         self.assertEqual(listener.num_subscriptions(), 0)
+        listener.close()
 
     def test_factory(self):
         """Test %s RawListener() from connection."""
@@ -585,6 +622,8 @@ class ListenerTests(object):
         # Abuse intention of 'private' mangling to get queuing function.
         fcn = QueuedListener._QueuedListener__enqueue
         queue = multiprocessing.Queue()
+        stats_queue = multiprocessing.Queue(maxsize=1)
+        listener = QueuedListener(self.Message.connection)
 
         # The '__enqueue' method does not reference 'self' so it can be tested
         # on this thread. However, it does block so multi-threading must be
@@ -594,11 +633,12 @@ class ListenerTests(object):
 
         # Launch '__enqueue' method on a new thread.
         thread = threading.Thread(target=fcn,
-                                  args=(QueuedListener(self.Message.connection),
+                                  args=(listener,
                                         run_event,
                                         self.Message.connection,
                                         None,
-                                        queue))
+                                        queue,
+                                        stats_queue))
         thread.daemon = True
         thread.start()
         time.sleep(DELAY)
@@ -615,6 +655,15 @@ class ListenerTests(object):
         # Ensure data was processed.
         self.assertEqual(queue.get()['payload'], test_data)
 
+        # Drain the statistics queue before closing it. Otherwise its feeder
+        # thread can write to a closed pipe.
+        while not stats_queue.empty():
+            stats_queue.get()
+        stats_queue.close()
+        stats_queue.join_thread()
+        listener.close()
+        broadcaster.close()
+
     @staticmethod
     def queued_send_receive(self, listener, broadcaster, test_data):
         """Method for testing QueuedListener send-receive facility"""
@@ -651,6 +700,197 @@ class ListenerTests(object):
         data = self.Message(A=1, B=2)
         self.queued_send_receive(listener, broadcaster, data)
 
+    def test_decimator(self):
+        """Test %s QueuedListener() decimation policies."""
+
+        # Ensure every n-th item of each topic is forwarded.
+        data = list()
+        decimator = _Decimator('every', 3, data.append)
+        for i in range(7):
+            for topic in ('A', 'B'):
+                decimator.insert({'topic': topic, 'payload': i})
+        self.assertEqual([(item['topic'], item['payload']) for item in data],
+                         [('A', 0), ('B', 0), ('A', 3), ('B', 3),
+                          ('A', 6), ('B', 6)])
+        self.assertEqual(decimator.stats, {'received': 14, 'forwarded': 6})
+        self.assertEqual(decimator.interval, None)
+
+        # Ensure items of each topic are forwarded at most at the rate.
+        data = list()
+        decimator = _Decimator('rate', 10, data.append)
+        for i in range(5):
+            for topic in ('A', 'B'):
+                decimator.insert({'topic': topic, 'payload': i})
+        time.sleep(0.1)
+        decimator.insert({'topic': 'A', 'payload': 5})
+        self.assertEqual([(item['topic'], item['payload']) for item in data],
+                         [('A', 0), ('B', 0), ('A', 5)])
+
+        # Ensure the most recent item of each topic is forwarded at the end
+        # of each interval.
+        data = list()
+        decimator = _Decimator('latest', 10.0, data.append)
+        self.assertEqual(decimator.interval, 10.0)
+        start = time.time()
+        for i in range(5):
+            for topic in ('A', 'B'):
+                decimator.insert({'topic': topic, 'payload': i})
+        decimator.flush(start + 5.0)
+        self.assertEqual(data, list())
+        decimator.flush(start + 10.0)
+        self.assertEqual(sorted((item['topic'], item['payload'])
+                                for item in data), [('A', 4), ('B', 4)])
+        decimator.flush(start + 20.0)
+        self.assertEqual(len(data), 2)
+
+    def test_queuedlistener_decimate(self):
+        """Test %s QueuedListener() decimates data before it is queued."""
+
+        # Ensure bad policies are caught.
+        for decimate in ('every', ('every', 0), ('every', 1.5), ('rate', 0),
+                         ('latest', 'latest'), ('drop', 1)):
+            with self.assertRaises(TypeError):
+                QueuedListener(self.Message.connection, decimate=decimate,
+                               open_init=False)
+
+        for decimate, received in [(('every', 3), [0, 3, 6]),
+                                   (('latest', 0.5), [8])]:
+            listener = QueuedListener(self.Message.connection,
+                                      decimate=decimate)
+            self.assertEqual(listener.decimate, decimate)
+            broadcaster = RawBroadcaster(self.Message.connection)
+            data = list()
+            listener.subscribe(lambda item: data.append(item['payload']))
+
+            # Publish a burst of data.
+            for i in range(9):
+                broadcaster.publish(i)
+            time.sleep(0.75)
+            listener.close()
+            broadcaster.close()
+
+            # Ensure only the decimated data was issued.
+            self.assertEqual(data, received)
+            self.assertEqual(listener.stats['decimation'],
+                             {'received': 9, 'forwarded': len(received)})
+
+    # --------------------------------------------------------------------------
+    #                         SharedListener()
+    # --------------------------------------------------------------------------
+
+    def test_sharedlistener_init(self):
+        """Test %s SharedListener() initialisation."""
+
+        # Instantiate SharedListener() using connection object.
+        for obj in [self.Message.connection, self.Message]:
+            listener = SharedListener(obj, topics=TOPICS)
+            self.assertEqual(listener.connection, self.Message.connection)
+            self.assertEqual(listener.topics, TOPICS)
+            self.assertTrue(listener.is_open)
+            self.assertFalse(listener._open())
+            self.assertTrue(listener.close())
+            self.assertFalse(listener.is_open)
+            self.assertFalse(listener.close())
+
+        # Ensure errors are propagated.
+        with self.assertRaises(IOError):
+            SharedListener(self.BadMessage)
+
+        # Ensure instantiation fails if the input is not a MCL connection.
+        # object.
+        with self.assertRaises(TypeError):
+            SharedListener('connection')
+        with self.assertRaises(TypeError):
+            SharedListener(dict)
+
+        # Ensure instantiation fails if the topic input is not a string or list
+        # of strings.
+        with self.assertRaises(TypeError):
+            SharedListener(self.Message, topics=5)
+
+    def test_sharedlistener_receive(self):
+        """Test %s SharedListener() shares one listener per connection."""
+
+        # Ensure listeners of the connection share one network listener.
+        connection = self.Message.connection
+        listeners = [SharedListener(self.Message),
+                     SharedListener(self.Message, topics=TOPIC),
+                     SharedListener(connection)]
+        receivers = [receiver for key, receiver in _RECEIVERS.items()
+                     if key[2] == connection]
+        self.assertEqual(len(receivers), 1)
+        self.assertEqual(len(receivers[0].subscribers), 3)
+
+        # Catch messages.
+        data = [list() for listener in listeners]
+        for listener, buf in zip(listeners, data):
+            listener.subscribe(lambda item, buf=buf: buf.append(item))
+
+        # Send messages with and without a topic.
+        broadcaster = MessageBroadcaster(self.Message)
+        message = self.Message(A=1, B=2)
+        broadcaster.publish(message, topic=TOPIC)
+        broadcaster.publish(message)
+        time.sleep(DELAY)
+
+        # Ensure the network listener is closed with the last listener.
+        broadcaster.close()
+        listeners[0].close()
+        self.assertTrue(receivers[0].listener.is_open)
+        for listener in listeners:
+            listener.close()
+        self.assertFalse(receivers[0].listener.is_open)
+        self.assertNotIn(receivers[0], _RECEIVERS.values())
+
+        # Ensure topics were filtered and each message was converted once.
+        self.assertEqual([len(buf) for buf in data], [2, 1, 2])
+        self.assertEqual(data[0][0]['topic'], TOPIC)
+        self.assertIsInstance(data[0][0]['payload'], self.Message)
+        self.assertIs(data[0][0]['payload'], data[1][0]['payload'])
+        self.assertEqual(data[0][1]['payload'], message)
+        self.assertNotIsInstance(data[2][0]['payload'], self.Message)
+        self.assertEqual(data[2][0]['payload'], message)
+
+    def test_sharedlistener_topics(self):
+        """Test %s SharedListener() receives the union of topics."""
+
+        # Ensure the network listener receives the topics of the listeners.
+        connection = self.Message.connection
+        listeners = [SharedListener(self.Message, topics=TOPIC),
+                     SharedListener(connection, topics=TOPICS + [TOPIC])]
+        receiver = [receiver for key, receiver in _RECEIVERS.items()
+                    if key[2] == connection][0]
+        self.assertEqual(receiver.topics, frozenset(TOPICS + [TOPIC]))
+        self.assertEqual(sorted(receiver.listener.topics),
+                         sorted(TOPICS + [TOPIC]))
+
+        # Ensure listeners of all topics widen the union.
+        listener = SharedListener(connection)
+        self.assertEqual(receiver.topics, None)
+        self.assertEqual(receiver.listener.topics, None)
+        listener.close()
+        self.assertEqual(receiver.topics, frozenset(TOPICS + [TOPIC]))
+
+        # Catch messages.
+        data = [list() for listener in listeners]
+        for listener, buf in zip(listeners, data):
+            listener.subscribe(lambda item, buf=buf: buf.append(item))
+
+        # Send data which cannot be converted into a message.
+        broadcaster = RawBroadcaster(connection)
+        broadcaster.publish('invalid', topic=TOPIC)
+        broadcaster.publish(self.Message(A=1, B=2), topic=TOPIC)
+        time.sleep(DELAY)
+        broadcaster.close()
+        for listener in listeners:
+            listener.close()
+
+        # Ensure invalid data are skipped by message listeners.
+        self.assertEqual(receiver.invalid, 1)
+        self.assertEqual(len(data[0]), 1)
+        self.assertIsInstance(data[0][0]['payload'], self.Message)
+        self.assertEqual(data[1][0]['payload'], 'invalid')
+
 
 # -----------------------------------------------------------------------------
 #                               Publish-Subscribe
@@ -690,6 +930,7 @@ class _PublishSubscribeTestsMeta(type):
 
         # Rename docstrings of unit-tests and copy into new sub-class.
         method_dct = compile_docstring(bases[0], module_name)
+        exclude_tests(dct, method_dct)
         dct.update(method_dct)
 
         return super(_PublishSubscribeTestsMeta, cls).__new__(cls,
@@ -1004,3 +1245,50 @@ class PublishSubscribeTests(object):
         for i, topic in enumerate(listen_topics):
             self.assertEqual(topic_buffer[i]['payload'],
                              messages[send_topics.index(topic)])
+
+    def test_iterate(self):
+        """Test %s by iterating over a listener."""
+
+        # Create broadcaster and listener.
+        broadcaster = self.broadcaster(self.connection)
+        listener = self.listener(self.connection)
+
+        # Buffer received data in an iterator.
+        iterator = iter(listener)
+
+        # Publish data and ensure it is available from the iterator.
+        send_string = 'send/receive test: %1.8f' % time.time()
+        broadcaster.publish(send_string)
+        self.assertEqual(iterator.next()['payload'], send_string)
+
+        # Ensure iteration stops when the listener is closed.
+        broadcaster.close()
+        listener.close()
+        with self.assertRaises(StopIteration):
+            iterator.next()
+
+    def test_iterate_break(self):
+        """Test %s iterators unsubscribe when they are discarded."""
+
+        # Create broadcaster and listener.
+        broadcaster = self.broadcaster(self.connection)
+        listener = self.listener(self.connection)
+        subscriptions = listener.num_subscriptions()
+
+        # Break out of a loop over the listener once data arrives.
+        send_string = 'send/receive test: %1.8f' % time.time()
+        timer = threading.Timer(DELAY, broadcaster.publish, (send_string,))
+        timer.start()
+        for data in listener:
+            break
+        timer.join()
+        self.assertEqual(data['payload'], send_string)
+        self.assertEqual(listener.num_subscriptions(), subscriptions)
+
+        # Ensure iterators unsubscribe when used as context managers.
+        with iter(listener) as iterator:
+            self.assertEqual(listener.num_subscriptions(), subscriptions + 1)
+        self.assertEqual(listener.num_subscriptions(), subscriptions)
+
+        broadcaster.close()
+        listener.close()
@@ -2,6 +2,7 @@ import unittest
 from mcl.network.abstract import Connection as AbstractConnection
 from mcl.network.abstract import RawBroadcaster as AbstractRawBroadcaster
 from mcl.network.abstract import RawListener as AbstractRawListener
+from mcl.network.abstract import _TopicTrie
 
 
 # Define Connection() for testing object.
@@ -341,3 +342,84 @@ class RawListenerTests(unittest.TestCase):
         # Ensure topics is a string.
         with self.assertRaises(TypeError):
             TestRawListener(TestConnection(A='A', B='B'), topics=['A', 5])
+
+    def test_topic_subscriptions(self):
+        """Test abstract.RawListener() topic and prefix subscriptions."""
+
+        class TestRawListener(AbstractRawListener):
+            def is_open(self): pass
+            def _open(self): pass
+            def close(self): pass
+
+        listener = TestRawListener(TestConnection(A='A', B='B'))
+        data = dict()
+
+        def callback(name):
+            data[name] = list()
+            return lambda item: data[name].append(item['topic'])
+
+        # Subscribe callbacks to all topics, topics and prefixes.
+        callbacks = [(callback('all'), None),
+                     (callback('A'), 'A'),
+                     (callback('A/b'), 'A/b'),
+                     (callback('A/*'), 'A/*'),
+                     (callback('*'), '*')]
+        for function, topic in callbacks:
+            self.assertTrue(listener.subscribe(function, topic=topic))
+            self.assertFalse(listener.subscribe(function, topic=topic))
+            self.assertTrue(listener.is_subscribed(function, topic=topic))
+        self.assertFalse(listener.is_subscribed(callbacks[1][0]))
+        self.assertFalse(listener.is_subscribed(callbacks[0][0], topic='A'))
+        self.assertEqual(listener.num_subscriptions(), 5)
+
+        # Ensure data is issued to callbacks of its topic and prefixes.
+        for topic in ['A', 'A/b', 'A/c', 'B', None]:
+            listener.__trigger__({'topic': topic, 'payload': None})
+        self.assertEqual(data, {'all': ['A', 'A/b', 'A/c', 'B', None],
+                                'A': ['A'],
+                                'A/b': ['A/b'],
+                                'A/*': ['A/b', 'A/c'],
+                                '*': ['A', 'A/b', 'A/c', 'B']})
+
+        # Unsubscribe callbacks.
+        for function, topic in callbacks:
+            self.assertTrue(listener.unsubscribe(function, topic=topic))
+            self.assertFalse(listener.unsubscribe(function, topic=topic))
+        self.assertEqual(listener.num_subscriptions(), 0)
+
+        # Ensure bad subscriptions are caught.
+        with self.assertRaises(TypeError):
+            listener.subscribe(callbacks[0][0], topic=5)
+        with self.assertRaises(TypeError):
+            listener.subscribe('callback', topic='A')
+        self.assertEqual(listener.num_subscriptions(), 0)
+
+
+class TopicTrieTests(unittest.TestCase):
+
+    def test_trie(self):
+        """Test abstract._TopicTrie() stores and matches prefixes."""
+
+        # Ensure events are created on request.
+        trie = _TopicTrie()
+        self.assertEqual(trie.get('ab'), None)
+        events = dict((prefix, trie.get(prefix, create=True))
+                      for prefix in ['', 'a', 'abc', 'b'])
+        self.assertEqual(len(trie), 4)
+        self.assertIs(trie.get('abc'), events['abc'])
+        self.assertEqual(trie.get('ab'), None)
+        self.assertEqual(len(trie.events()), 4)
+
+        # Ensure the prefixes of a topic are matched, shortest first.
+        self.assertEqual(trie.match('abcd'),
+                         [events[''], events['a'], events['abc']])
+        self.assertEqual(trie.match('c'), [events['']])
+
+        # Ensure removed prefixes are no longer matched and unused nodes are
+        # pruned.
+        trie.remove('abc')
+        trie.remove('abc')
+        trie.remove('x')
+        self.assertEqual(len(trie), 3)
+        self.assertEqual(trie.match('abcd'), [events[''], events['a']])
+        self.assertEqual(trie._TopicTrie__root[1]['a'][1], dict())
@@ -0,0 +1,274 @@
+import time
+import unittest
+import threading
+import multiprocessing
+
+import mcl.messages.messages
+from mcl.network.network import QueuedListener
+from mcl.network.network import MessageListener
+from mcl.network.network import MessageBroadcaster
+
+from mcl.network.inproc import COPY_POLICIES
+from mcl.network.inproc import Connection
+from mcl.network.inproc import RawBroadcaster
+from mcl.network.inproc import RawListener
+
+from mcl.network.test.common import DELAY
+from mcl.network.test.common import TIMEOUT
+from mcl.network.test.common import ListenerTests
+from mcl.network.test.common import BroadcasterTests
+from mcl.network.test.common import PublishSubscribeTests
+
+# Disable pylint errors:
+#     W0221 - Arguments number differ from overridden method
+#     C0301 - Line too long
+#     R0904 - Too many public methods
+#
+# Notes:
+#
+#     - See test_udp.py.
+#
+#     - In-process connections with an empty name fail to connect.
+#
+#     - The standard listener unit-tests expect raw listeners to receive
+#       serialised data. The listener unit-tests use the 'serialise' copy
+#       policy.
+#
+#     - QueuedListener() listens on another process and does not receive data
+#       published in this process. The standard QueuedListener() send-receive
+#       unit-tests are excluded from TestListener() and replaced by the tests
+#       below.
+
+# pylint: disable=W0221
+# pylint: disable=C0301
+# pylint: disable=R0904
+
+NAME = 'test-inproc'
+BAD_NAME = ''
+
+
+# -----------------------------------------------------------------------------
+#                                 Connection()
+# -----------------------------------------------------------------------------
+
+class ConnectionTests(unittest.TestCase):
+
+    def test_init_name(self):
+        """Test inproc.Connection() 'name' parameter at initialisation."""
+
+        # Ensure a connection object can be initialised.
+        connection = Connection(NAME)
+        self.assertEqual(connection.name, NAME)
+
+        # Test instantiation fails if 'name' is not a string.
+        with self.assertRaises(TypeError):
+            Connection(101)
+
+    def test_init_copy(self):
+        """Test inproc.Connection() 'copy' parameter at initialisation."""
+
+        # Test default policy.
+        connection = Connection(NAME)
+        self.assertEqual(connection.copy, None)
+
+        # Test instantiation passes with valid policies.
+        for policy in COPY_POLICIES:
+            connection = Connection(NAME, copy=policy)
+            self.assertEqual(connection.copy, policy)
+
+        # Test instantiation fails with an unknown policy.
+        with self.assertRaises(TypeError):
+            Connection(NAME, copy='freeze')
+
+
+# -----------------------------------------------------------------------------
+#                                 Broadcaster()
+# -----------------------------------------------------------------------------
+
+class TestBroadcaster(BroadcasterTests):
+    broadcaster = RawBroadcaster
+    connection = Connection(NAME)
+    bad_connection = Connection(BAD_NAME)
+
+
+# -----------------------------------------------------------------------------
+#                                  Listener()
+# -----------------------------------------------------------------------------
+
+class TestListener(ListenerTests):
+    listener = RawListener
+    connection = Connection(NAME, copy='serialise')
+    bad_connection = Connection(BAD_NAME)
+    excluded_tests = ('test_raw_receive',
+                      'test_message_receive',
+                      'test_queuedlistener_decimate')
+
+    def queued_no_receive(self, listener, broadcaster, test_data):
+        """Method for testing QueuedListener does not receive data."""
+
+        data_buffer = list()
+        listener.subscribe(lambda data: data_buffer.append(data))
+        broadcaster.publish(test_data)
+        time.sleep(DELAY)
+        listener.close()
+        broadcaster.close()
+
+        # Ensure the listener process did not receive the data.
+        self.assertEqual(data_buffer, list())
+
+    def test_queuedlistener_raw(self):
+        """Test inproc QueuedListener() does not receive raw-data."""
+
+        listener = QueuedListener(self.Message.connection)
+        broadcaster = RawBroadcaster(self.Message.connection)
+        self.queued_no_receive(listener, broadcaster, 'test')
+
+    def test_queuedlistener_message(self):
+        """Test inproc QueuedListener() does not receive messages."""
+
+        listener = QueuedListener(self.Message)
+        broadcaster = MessageBroadcaster(self.Message)
+        self.queued_no_receive(listener, broadcaster, self.Message(A=1, B=2))
+
+    def test_queuedlistener_enqueue_decimate(self):
+        """Test inproc QueuedListener() decimates data before it is queued."""
+
+        # Run the listening service of QueuedListener() on a thread of this
+        # process (see test_queuedlistener_enqueue).
+        fcn = QueuedListener._QueuedListener__enqueue
+        queue = multiprocessing.Queue()
+        stats_queue = multiprocessing.Queue(maxsize=1)
+        run_event = threading.Event()
+        run_event.set()
+        thread = threading.Thread(target=fcn,
+                                  args=('QueuedListener',
+                                        run_event,
+                                        self.Message.connection,
+                                        None,
+                                        queue,
+                                        stats_queue,
+                                        ('every', 3)))
+        thread.daemon = True
+        thread.start()
+        time.sleep(DELAY)
+
+        # Publish a burst of data.
+        broadcaster = RawBroadcaster(self.Message.connection)
+        for i in range(9):
+            broadcaster.publish(i)
+        run_event.clear()
+        thread.join(TIMEOUT)
+        broadcaster.close()
+
+        # Ensure only the decimated data was queued.
+        data = list()
+        while not queue.empty():
+            data.append(queue.get()['payload'])
+        self.assertEqual(data, [0, 3, 6])
+
+        # Drain the statistics queue before closing it.
+        while not stats_queue.empty():
+            stats_queue.get()
+        stats_queue.close()
+        stats_queue.join_thread()
+
+
+# -----------------------------------------------------------------------------
+#                            Broadcaster/Listener()
+# -----------------------------------------------------------------------------
+
+class TestBroadcasterListener(unittest.TestCase):
+
+    def test_names(self):
+        """Test inproc listeners only receive data from the same name."""
+
+        broadcaster = RawBroadcaster(Connection(NAME))
+        listener = RawListener(Connection(NAME))
+        other = RawListener(Connection(NAME + ' other'))
+        data = list()
+        other_data = list()
+        listener.subscribe(lambda message: data.append(message))
+        other.subscribe(lambda message: other_data.append(message))
+
+        # Ensure data is delivered before publish() returns.
+        broadcaster.publish('data', topic='topic')
+        self.assertEqual(data, [{'topic': 'topic', 'payload': 'data'}])
+        self.assertEqual(other_data, list())
+
+        # Ensure closed listeners do not receive data.
+        listener.close()
+        broadcaster.publish('data')
+        self.assertEqual(len(data), 1)
+        broadcaster.close()
+        other.close()
+
+    def test_copy(self):
+        """Test inproc copy policies."""
+
+        payload = {'list': [1, 2], 'tuple': (3, 4)}
+        for policy in COPY_POLICIES:
+            connection = Connection(NAME, copy=policy)
+            broadcaster = RawBroadcaster(connection)
+            listeners = [RawListener(connection) for i in range(2)]
+            data = list()
+            for listener in listeners:
+                listener.subscribe(lambda message: data.append(message))
+
+            broadcaster.publish(payload)
+            broadcaster.close()
+            for listener in listeners:
+                listener.close()
+
+            # Ensure each listener receives the object or a copy of the object
+            # of the expected depth.
+            first, second = [message['payload'] for message in data]
+            if policy is None:
+                self.assertIs(first, payload)
+                self.assertIs(second, payload)
+            elif policy == 'shallow':
+                self.assertEqual(first, payload)
+                self.assertIsNot(first, payload)
+                self.assertIsNot(first, second)
+                self.assertIs(first['list'], payload['list'])
+            elif policy == 'deep':
+                self.assertEqual(first, payload)
+                self.assertIsNot(first, second)
+                self.assertIsNot(first['list'], payload['list'])
+            else:
+                self.assertEqual(first, {'list': [1, 2], 'tuple': [3, 4]})
+                self.assertIsNot(first, second)
+
+    def test_messages(self):
+        """Test inproc with MessageBroadcaster/Listener() objects."""
+
+        # WARNING: this should not be deployed in production code. It is an
+        #          abuse that has been used for the purposes of unit-testing.
+        mcl.messages.messages._MESSAGES = list()
+
+        class UnitTestMessage(mcl.messages.messages.Message):
+            mandatory = ('text',)
+            connection = Connection(NAME)
+
+        broadcaster = MessageBroadcaster(UnitTestMessage)
+        listener = MessageListener(UnitTestMessage)
+        data = list()
+        listener.subscribe(lambda message: data.append(message['payload']))
+
+        # Ensure messages are received as messages.
+        message = UnitTestMessage(text='hello')
+        broadcaster.publish(message)
+        broadcaster.close()
+        listener.close()
+        mcl.messages.messages._MESSAGES = list()
+        self.assertEqual(data, [message])
+        self.assertIsInstance(data[0], UnitTestMessage)
+
+
+# -----------------------------------------------------------------------------
+#                              Publish-Subscribe
+# -----------------------------------------------------------------------------
+
+class TestPublishSubscribe(PublishSubscribeTests):
+    broadcaster = RawBroadcaster
+    listener = RawListener
+    connection = Connection(NAME)
@@ -0,0 +1,168 @@
+import time
+import ctypes
+import socket
+import unittest
+import threading
+
+import mcl.network.linux
+from mcl.network.linux import BatchSender
+from mcl.network.linux import BatchReceiver
+
+# Address used for testing.
+HOST = '::1'
+
+
+# -----------------------------------------------------------------------------
+#                          BatchSender/BatchReceiver()
+# -----------------------------------------------------------------------------
+
+@unittest.skipUnless(mcl.network.linux.HAS_MMSG, 'sendmmsg() not available.')
+class BatchTests(unittest.TestCase):
+
+    def setUp(self):
+        """Create a pair of sockets for testing."""
+
+        self.receiver = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+        self.receiver.setblocking(False)
+        self.receiver.bind((HOST, 0))
+        self.sender = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+        self.sender.bind((HOST, 0))
+
+    def tearDown(self):
+        """Close sockets after testing."""
+
+        self.receiver.close()
+        self.sender.close()
+
+    def test_send_receive(self):
+        """Test linux BatchSender/BatchReceiver() send-receive."""
+
+        # Create batched interfaces. Use a small batch size so that the data
+        # spans several system calls.
+        batch = 4
+        sockaddr = self.receiver.getsockname()
+        sender = BatchSender(self.sender, sockaddr, batch)
+        receiver = BatchReceiver(self.receiver, batch, 1024)
+        self.assertEqual(sender.batch, batch)
+        self.assertEqual(receiver.batch, batch)
+        self.assertEqual(receiver.size, 1024)
+
+        # Ensure no data is available on an empty socket.
+        self.assertEqual(receiver.recv(), list())
+
+        # Send data.
+        datagrams = ['datagram %i' % i for i in range(10)]
+        sender.send(datagrams)
+
+        # Read datagrams in batches. Views of the data are only valid until
+        # the next call to recv().
+        received = list()
+        while True:
+            batch_data = receiver.recv()
+            self.assertLessEqual(len(batch_data), batch)
+            for data, address in batch_data:
+                self.assertEqual(address[:2], self.sender.getsockname()[:2])
+                received.append(str(data))
+            if len(batch_data) < batch:
+                break
+
+        # Ensure all datagrams were received in order.
+        self.assertEqual(received, datagrams)
+
+    def test_ancillary(self):
+        """Test linux BatchReceiver() reception times and drop counters."""
+
+        # Enable ancillary data and shrink the receive buffer so that the
+        # kernel drops datagrams.
+        for option in (mcl.network.linux.SO_TIMESTAMPNS,
+                       mcl.network.linux.SO_RXQ_OVFL):
+            self.receiver.setsockopt(socket.SOL_SOCKET, option, 1)
+        self.receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        receiver = BatchReceiver(self.receiver, 64, 1024, ancillary=True)
+        sockaddr = self.receiver.getsockname()
+
+        # Overflow the receive buffer and drain the socket.
+        start_time = time.time()
+        for i in range(64):
+            self.sender.sendto('x' * 512, sockaddr)
+        while len(receiver.recv()) == 64:
+            pass                                             # pragma: no cover
+
+        # Datagrams queued after the overflow report the drops.
+        self.sender.sendto('datagram', sockaddr)
+        received = receiver.recv()
+        self.assertEqual(len(received), 1)
+        data, address, timestamp, dropped = received[0]
+        self.assertEqual(str(data), 'datagram')
+        self.assertTrue(start_time <= timestamp <= time.time())
+        self.assertGreater(dropped, 0)
+
+    def test_segmentation(self):
+        """Test linux BatchSender/BatchReceiver() segmentation offload."""
+
+        # Enable segmentation offload on both sockets.
+        try:
+            self.sender.setsockopt(mcl.network.linux.SOL_UDP,
+                                   mcl.network.linux.UDP_SEGMENT, 100)
+            self.receiver.setsockopt(mcl.network.linux.SOL_UDP,
+                                     mcl.network.linux.UDP_GRO, 1)
+        except socket.error:                                 # pragma: no cover
+            self.skipTest('UDP segmentation offload not available.')
+
+        # Send one buffer of three segments gathered from several vectors.
+        sockaddr = self.receiver.getsockname()
+        sender = BatchSender(self.sender, sockaddr, 1, vectors=8)
+        receiver = BatchReceiver(self.receiver, 4, 65536, gro=True)
+        self.assertEqual(sender.vectors, 8)
+        self.assertTrue(receiver.gro)
+        segments = ['a' * 100, 'b' * 100, 'c' * 50]
+        data = ''.join(segments)
+        address = mcl.network.linux.address_of(data)
+        sender.sendv([[(address, 60), (address + 60, 190)]])
+
+        # Ensure the segments are received as separate datagrams, whether or
+        # not the kernel coalesced them.
+        received = list()
+        while len(received) < len(segments):
+            batch_data = receiver.recv()
+            if not batch_data:
+                time.sleep(0.01)                             # pragma: no cover
+            received.extend(str(datagram) for datagram, address in batch_data)
+        self.assertEqual(received, segments)
+
+
+# -----------------------------------------------------------------------------
+#                           futex_wait/futex_wake()
+# -----------------------------------------------------------------------------
+
+@unittest.skipUnless(mcl.network.linux.HAS_FUTEX, 'futex() not available.')
+class FutexTests(unittest.TestCase):
+
+    def test_wait_wake(self):
+        """Test linux futex_wait/futex_wake()."""
+
+        word = ctypes.c_uint32(0)
+        address = ctypes.addressof(word)
+
+        # Ensure waiting times out if the word is not changed.
+        start_time = time.time()
+        mcl.network.linux.futex_wait(address, 0, 0.05)
+        self.assertGreaterEqual(time.time() - start_time, 0.04)
+
+        # Ensure waiting returns immediately if the word has changed.
+        start_time = time.time()
+        mcl.network.linux.futex_wait(address, 1, 1.0)
+        self.assertLess(time.time() - start_time, 0.5)
+
+        # Ensure waiting threads are woken.
+        def wake():
+            time.sleep(0.05)
+            word.value = 1
+            mcl.network.linux.futex_wake(address)
+
+        thread = threading.Thread(target=wake)
+        thread.start()
+        start_time = time.time()
+        mcl.network.linux.futex_wait(address, 0, 5.0)
+        self.assertLess(time.time() - start_time, 2.5)
+        thread.join()
@@ -0,0 +1,307 @@
+import os
+import time
+import shutil
+import struct
+import tempfile
+import unittest
+import multiprocessing
+
+from mcl.network.shm import RING_SIZE
+from mcl.network.shm import RING_SIZE_MIN
+import mcl.network.shm
+from mcl.network.shm import RECORD
+from mcl.network.shm import RECORD_PADDING
+from mcl.network.shm import _Ring
+
+from mcl.network.shm import Connection
+from mcl.network.shm import RawBroadcaster
+from mcl.network.shm import RawListener
+from mcl.network.network import QueuedListener
+
+from mcl.network.test.common import BroadcasterTests
+from mcl.network.test.common import ListenerTests
+from mcl.network.test.common import PublishSubscribeTests
+
+# Disable pylint errors:
+#     W0221 - Arguments number differ from overridden method
+#     C0301 - Line too long
+#     R0904 - Too many public methods
+#
+# Notes:
+#
+#     - See test_udp.py.
+
+# pylint: disable=W0221
+# pylint: disable=C0301
+# pylint: disable=R0904
+
+NAME = 'test-shm'
+BAD_DIRECTORY = '/this/is/invalid'
+
+
+# -----------------------------------------------------------------------------
+#                                 Connection()
+# -----------------------------------------------------------------------------
+
+class ConnectionTests(unittest.TestCase):
+
+    def test_init_name(self):
+        """Test shm.Connection() 'name' parameter at initialisation."""
+
+        # Ensure a connection object can be initialised.
+        connection = Connection(NAME)
+        self.assertEqual(connection.name, NAME)
+
+        # Test instantiation fails if 'name' is not a file name.
+        for name in (101, '', '.', '..', 'a/b'):
+            with self.assertRaises(TypeError):
+                Connection(name)
+
+    def test_init_size(self):
+        """Test shm.Connection() 'size' parameter at initialisation."""
+
+        # Test default size.
+        connection = Connection(NAME)
+        self.assertEqual(connection.size, RING_SIZE)
+
+        # Test instantiation passes with a valid 'size'.
+        connection = Connection(NAME, size=RING_SIZE_MIN)
+        self.assertEqual(connection.size, RING_SIZE_MIN)
+
+        # Test instantiation fails if 'size' is not an integer or is out of
+        # range.
+        for size in ('size', True, 1.0, RING_SIZE_MIN - 1):
+            with self.assertRaises(TypeError):
+                Connection(NAME, size=size)
+
+    def test_init_directory(self):
+        """Test shm.Connection() 'directory' parameter at initialisation."""
+
+        # Test default directory.
+        connection = Connection(NAME)
+        self.assertEqual(connection.directory, None)
+
+        # Test instantiation passes with a valid 'directory'.
+        connection = Connection(NAME, directory='/tmp')
+        self.assertEqual(connection.directory, '/tmp')
+
+        # Test instantiation fails if 'directory' is not a string.
+        with self.assertRaises(TypeError):
+            Connection(NAME, directory=101)
+
+
+# -----------------------------------------------------------------------------
+#                                   _Ring()
+# -----------------------------------------------------------------------------
+
+class RingTests(unittest.TestCase):
+
+    def setUp(self):
+        """Create a directory for ring buffers."""
+
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'ring')
+
+    def tearDown(self):
+        """Remove ring buffers after testing."""
+
+        shutil.rmtree(self.directory)
+
+    def test_init(self):
+        """Test shm _Ring() initialisation."""
+
+        # Ensure the size of the ring buffer is set by the first process.
+        ring = _Ring(self.path, 4096)
+        other = _Ring(self.path, 8192)
+        self.assertEqual(ring.capacity, 4096)
+        self.assertEqual(other.capacity, 4096)
+        ring.close()
+        other.close()
+
+        # Ensure files which are not ring buffers are rejected.
+        with open(self.path, 'wb') as f:
+            f.write('x' * 128)
+        with self.assertRaises(IOError):
+            _Ring(self.path, 4096)
+
+    def test_wrap(self):
+        """Test shm _Ring() records wrap around the ring buffer."""
+
+        writer = _Ring(self.path, 4096)
+        reader = _Ring(self.path, 4096)
+        cursor = reader.cursor
+
+        # Write records of varying length so that records are split at
+        # different offsets from the end of the ring buffer.
+        for i in range(200):
+            packets = ['%i' % j + 'x' * (j % 300) for j in range(i, i + 3)]
+            for packet in packets:
+                writer.write(packet, i)
+            records, cursor, overwritten = reader.read(cursor)
+            self.assertFalse(overwritten)
+            self.assertEqual(records, [(i, packet) for packet in packets])
+
+        # Ensure no records are returned after the last record.
+        self.assertEqual(reader.read(cursor), ([], cursor, False))
+        writer.close()
+        reader.close()
+
+    def test_overwritten(self):
+        """Test shm _Ring() detects overwritten records."""
+
+        writer = _Ring(self.path, 4096)
+        reader = _Ring(self.path, 4096)
+        cursor = reader.cursor
+
+        # Overwrite the records before they are read.
+        for i in range(100):
+            writer.write('x' * 100, 0)
+        records, cursor, overwritten = reader.read(cursor)
+        self.assertEqual(records, list())
+        self.assertTrue(overwritten)
+
+        # Ensure reading resumes at the most recent record.
+        writer.write('y', 0)
+        self.assertEqual(reader.read(cursor), ([(0, 'y')], writer.cursor,
+                                               False))
+
+        # Ensure records larger than the ring buffer are rejected.
+        with self.assertRaises(ValueError):
+            writer.write('x' * (4096 - RECORD.size + 1), 0)
+        writer.close()
+        reader.close()
+
+    def test_reserve_padding(self):
+        """Test shm _Ring() reserves space before padding is written."""
+
+        writer = _Ring(self.path, 4096)
+        reserved = list()
+
+        # Record the reserved position when padding is written.
+        class Record(struct.Struct):
+            def pack_into(self, buf, offset, length, topic_hash):
+                if length == RECORD_PADDING:
+                    reserved.append(writer._Ring__header.reserved)
+                struct.Struct.pack_into(self, buf, offset, length, topic_hash)
+
+        # Write records until a record does not fit at the end of the ring
+        # buffer.
+        mcl.network.shm.RECORD = Record(RECORD.format)
+        try:
+            while not reserved:
+                writer.write('x' * 1000, 0)
+        finally:
+            mcl.network.shm.RECORD = RECORD
+
+        # Ensure readers can detect the padding overwriting records.
+        self.assertEqual(reserved, [writer.cursor])
+        writer.close()
+
+    def test_wait(self):
+        """Test shm _Ring() wait for records."""
+
+        writer = _Ring(self.path, 4096)
+        reader = _Ring(self.path, 4096)
+
+        # Ensure waiting returns immediately if a record was written after the
+        # counter was read.
+        notify = reader.notify
+        writer.write('x', 0)
+        start_time = time.time()
+        reader.wait(notify, 1.0)
+        self.assertLess(time.time() - start_time, 0.5)
+
+        # Ensure waiting times out without records.
+        start_time = time.time()
+        reader.wait(reader.notify, 0.05)
+        self.assertGreaterEqual(time.time() - start_time, 0.04)
+        writer.close()
+        reader.close()
+
+
+# -----------------------------------------------------------------------------
+#                                 Broadcaster()
+# -----------------------------------------------------------------------------
+
+class TestBroadcaster(BroadcasterTests):
+    broadcaster = RawBroadcaster
+    connection = Connection(NAME)
+    bad_connection = Connection(NAME, directory=BAD_DIRECTORY)
+
+
+# -----------------------------------------------------------------------------
+#                                  Listener()
+# -----------------------------------------------------------------------------
+
+class TestListener(ListenerTests):
+    listener = RawListener
+    connection = Connection(NAME)
+    bad_connection = Connection(NAME, directory=BAD_DIRECTORY)
+
+
+# -----------------------------------------------------------------------------
+#                              Publish-Subscribe
+# -----------------------------------------------------------------------------
+
+def _publish(connection, messages):
+    """Publish messages from another process."""
+
+    broadcaster = RawBroadcaster(connection)
+    for i in range(messages):
+        broadcaster.publish(i, topic='process')
+    broadcaster.close()
+
+
+class TestPublishSubscribe(PublishSubscribeTests):
+    broadcaster = RawBroadcaster
+    listener = RawListener
+    connection = Connection(NAME)
+
+    def test_large(self):
+        """Test shm send-receive of messages larger than the UDP MTU."""
+
+        listener = self.listener(self.connection)
+        data = list()
+        listener.subscribe(lambda message: data.append(message['payload']))
+        broadcaster = self.broadcaster(self.connection)
+
+        # Publish messages larger than the ring buffer can hold at once.
+        messages = ['%i' % i * 500000 for i in range(20)]
+        for message in messages:
+            broadcaster.publish(message)
+            time.sleep(0.02)
+        time.sleep(0.1)
+
+        # Ensure messages larger than the ring buffer are rejected.
+        with self.assertRaises(ValueError):
+            broadcaster.publish('x' * RING_SIZE)
+        broadcaster.close()
+        listener.close()
+
+        self.assertEqual(data, messages)
+        self.assertEqual(listener.stats['received'], len(messages))
+        self.assertEqual(listener.stats['overwritten'], 0)
+
+    def test_process(self):
+        """Test shm send-receive between processes."""
+
+        # Receive messages in this process and in a QueuedListener process.
+        listener = self.listener(self.connection)
+        data = list()
+        listener.subscribe(lambda message: data.append(message['payload']))
+        queued = QueuedListener(self.connection)
+        queued_data = list()
+        queued.subscribe(lambda msg: queued_data.append(msg['payload']))
+        time.sleep(0.25)
+
+        # Publish messages from another process.
+        process = multiprocessing.Process(target=_publish,
+                                          args=(self.connection, 100))
+        process.start()
+        process.join()
+        time.sleep(0.25)
+        listener.close()
+        queued.close()
+
+        self.assertEqual(data, range(100))
+        self.assertEqual(queued_data, range(100))
@@ -0,0 +1,411 @@
+import time
+import socket
+import unittest
+import threading
+
+from mcl.network.tcp import TCP_PORT
+from mcl.network.tcp import SEND_QUEUE
+from mcl.network.tcp import FRAME
+from mcl.network.tcp import FRAME_MAX
+from mcl.network.tcp import FRAME_LIMIT
+from mcl.network.tcp import CONNECT_TIMEOUT
+from mcl.network.tcp import RECONNECT_INTERVAL
+from mcl.network.tcp import _recv_frame
+from mcl.network.tcp import _send_frame
+
+from mcl.network.tcp import Connection
+from mcl.network.tcp import RawBroadcaster
+from mcl.network.tcp import RawListener
+from mcl.network.network import QueuedListener
+
+from mcl.network.test.common import BroadcasterTests
+from mcl.network.test.common import PublishSubscribeTests
+
+# Disable pylint errors:
+#     W0221 - Arguments number differ from overridden method
+#     C0301 - Line too long
+#     R0904 - Too many public methods
+#
+# Notes:
+#
+#     - See test_udp.py.
+#
+#     - TCP listeners do not receive messages published before they connect.
+#       The standard listener unit-tests publish immediately after opening a
+#       broadcaster and are replaced by the tests below.
+
+# pylint: disable=W0221
+# pylint: disable=C0301
+# pylint: disable=R0904
+
+HOST = '::1'
+PORT = 26400
+BAD_HOST = 'this::is::invalid'
+
+
+# -----------------------------------------------------------------------------
+#                                 Connection()
+# -----------------------------------------------------------------------------
+
+class ConnectionTests(unittest.TestCase):
+
+    def test_init(self):
+        """Test tcp.Connection() parameters at initialisation."""
+
+        # Test defaults.
+        connection = Connection(HOST)
+        self.assertEqual(connection.host, HOST)
+        self.assertEqual(connection.port, TCP_PORT)
+        self.assertEqual(connection.send_queue, SEND_QUEUE)
+        self.assertEqual(connection.overflow, 'block')
+        self.assertEqual(connection.max_frame, FRAME_LIMIT)
+
+        # Test instantiation passes with valid parameters.
+        connection = Connection(HOST, port=PORT, send_queue=4,
+                                overflow='drop_old', max_frame=1000)
+        self.assertEqual(connection.port, PORT)
+        self.assertEqual(connection.send_queue, 4)
+        self.assertEqual(connection.overflow, 'drop_old')
+        self.assertEqual(connection.max_frame, 1000)
+
+        # Test instantiation fails with invalid parameters.
+        with self.assertRaises(TypeError):
+            Connection(101)
+        for port in ('port', 1023, 65536):
+            with self.assertRaises(TypeError):
+                Connection(HOST, port=port)
+        for send_queue in ('queue', True, 0):
+            with self.assertRaises(TypeError):
+                Connection(HOST, send_queue=send_queue)
+        with self.assertRaises(TypeError):
+            Connection(HOST, overflow='overflow')
+        for max_frame in ('frame', 0, FRAME_MAX + 1):
+            with self.assertRaises(TypeError):
+                Connection(HOST, max_frame=max_frame)
+
+
+# -----------------------------------------------------------------------------
+#                                   Framing
+# -----------------------------------------------------------------------------
+
+class FrameTests(unittest.TestCase):
+
+    def test_frames(self):
+        """Test tcp frames are received whole."""
+
+        sender, receiver = socket.socketpair()
+        receiver.settimeout(1.0)
+
+        # Send small and large frames, and a prefix split from its frame.
+        frames = ['', 'small', 'x' * 1000000]
+
+        def send():
+            for frame in frames:
+                _send_frame(sender, frame)
+            sender.sendall(FRAME.pack(5)[:2])
+
+        thread = threading.Thread(target=send)
+        thread.start()
+        for frame in frames:
+            self.assertEqual(_recv_frame(receiver), frame)
+        thread.join()
+
+        # Ensure frames larger than the maximum are rejected before their
+        # contents are received.
+        sender.sendall(FRAME.pack(5)[2:])
+        with self.assertRaises(ValueError):
+            _recv_frame(receiver, maximum=4)
+
+        # Ensure a closed connection is detected.
+        sender.close()
+        self.assertEqual(_recv_frame(receiver), None)
+        receiver.close()
+
+    def test_timeout(self):
+        """Test tcp frames time out without a stop event."""
+
+        sender, receiver = socket.socketpair()
+        receiver.settimeout(0.05)
+
+        # Ensure timeouts are raised if there is no stop event.
+        with self.assertRaises(socket.timeout):
+            _recv_frame(receiver)
+
+        # Ensure frames are not received after the deadline, even if data is
+        # received before each timeout.
+        receiver.settimeout(None)
+        start = time.time()
+        sender.sendall(FRAME.pack(5) + 'ab')
+        with self.assertRaises(socket.timeout):
+            _recv_frame(receiver, deadline=start + 0.1)
+        self.assertLess(time.time() - start, 0.5)
+
+        # Ensure timeouts are ignored until the stop event is set.
+        stop_event = threading.Event()
+        timer = threading.Timer(0.1, stop_event.set)
+        timer.start()
+        receiver.settimeout(0.05)
+        self.assertEqual(_recv_frame(receiver, stop_event), None)
+        timer.join()
+        sender.close()
+        receiver.close()
+
+
+# -----------------------------------------------------------------------------
+#                                 Broadcaster()
+# -----------------------------------------------------------------------------
+
+class TestBroadcaster(BroadcasterTests):
+    broadcaster = RawBroadcaster
+    connection = Connection(HOST, port=PORT)
+    bad_connection = Connection(BAD_HOST, port=PORT)
+
+    def test_silent_subscriber(self):
+        """Test tcp RawBroadcaster() closes clients which do not subscribe."""
+
+        # Connect clients which never subscribe.
+        threads = threading.active_count()
+        broadcaster = RawBroadcaster(Connection(HOST, port=PORT + 4))
+        clients = [socket.create_connection((HOST, PORT + 4))
+                   for i in range(2)]
+        time.sleep(0.1)
+        self.assertEqual(threading.active_count(), threads + 3)
+
+        # Ensure the connections are closed after the subscription deadline.
+        time.sleep(CONNECT_TIMEOUT + 0.25)
+        self.assertEqual(threading.active_count(), threads + 1)
+        for client in clients:
+            self.assertEqual(client.recv(1), '')
+            client.close()
+
+        # Ensure connections without subscriptions are closed with the
+        # broadcaster.
+        client = socket.create_connection((HOST, PORT + 4))
+        time.sleep(0.1)
+        self.assertEqual(threading.active_count(), threads + 2)
+        start = time.time()
+        broadcaster.close()
+        self.assertLess(time.time() - start, CONNECT_TIMEOUT / 2)
+        self.assertEqual(threading.active_count(), threads)
+        client.close()
+
+
+# -----------------------------------------------------------------------------
+#                                  Listener()
+# -----------------------------------------------------------------------------
+
+class TestListener(unittest.TestCase):
+
+    def test_init(self):
+        """Test tcp RawListener() can be initialised and closed."""
+
+        # Ensure listeners open without a broadcaster.
+        connection = Connection(HOST, port=PORT + 1)
+        listener = RawListener(connection, topics='topic')
+        self.assertTrue(listener.is_open)
+        self.assertFalse(listener.is_connected)
+        self.assertEqual(listener.topics, 'topic')
+        self.assertTrue(listener.close())
+        self.assertFalse(listener.is_open)
+        self.assertFalse(listener.close())
+
+        # Test instantiation fails with bad inputs.
+        with self.assertRaises(TypeError):
+            RawListener(Connection)
+        with self.assertRaises(TypeError):
+            RawListener(connection, topics=100)
+        with self.assertRaises(IOError):
+            RawListener(Connection(BAD_HOST, port=PORT + 1))
+
+    def test_reconnect(self):
+        """Test tcp RawListener() reconnects to the broadcaster."""
+
+        # Open a listener before the broadcaster.
+        connection = Connection(HOST, port=PORT + 1)
+        listener = RawListener(connection)
+        data = list()
+        listener.subscribe(lambda message: data.append(message['payload']))
+        broadcaster = RawBroadcaster(connection)
+        time.sleep(5 * RECONNECT_INTERVAL)
+        self.assertTrue(listener.is_connected)
+        broadcaster.publish('first')
+
+        # Restart the broadcaster.
+        broadcaster.close()
+        time.sleep(RECONNECT_INTERVAL)
+        broadcaster = RawBroadcaster(connection)
+        time.sleep(5 * RECONNECT_INTERVAL)
+        self.assertTrue(listener.is_connected)
+        broadcaster.publish('second')
+        time.sleep(0.1)
+
+        broadcaster.close()
+        listener.close()
+        self.assertEqual(data, ['first', 'second'])
+        self.assertEqual(listener.stats['connected'], 2)
+
+    def test_unacknowledged(self):
+        """Test tcp RawListener() times out unacknowledged subscriptions."""
+
+        # Accept connections without acknowledging subscriptions.
+        server = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((HOST, PORT + 5))
+        server.listen(4)
+
+        # Ensure the listener opens without connecting.
+        start = time.time()
+        listener = RawListener(Connection(HOST, port=PORT + 5))
+        self.assertLess(time.time() - start, 2 * CONNECT_TIMEOUT)
+        self.assertTrue(listener.is_open)
+        self.assertFalse(listener.is_connected)
+        self.assertEqual(listener.stats['connected'], 0)
+        listener.close()
+        server.close()
+
+    def test_max_frame(self):
+        """Test tcp RawListener() closes connections sending large frames."""
+
+        connection = Connection(HOST, port=PORT + 3, max_frame=100)
+        broadcaster = RawBroadcaster(connection)
+        listener = RawListener(connection)
+        data = list()
+        listener.subscribe(lambda message: data.append(message['payload']))
+
+        # Ensure the listener reconnects after rejecting a large message.
+        broadcaster.publish('x' * 1000)
+        time.sleep(5 * RECONNECT_INTERVAL)
+        self.assertTrue(listener.is_connected)
+        broadcaster.publish('small')
+        time.sleep(0.1)
+
+        broadcaster.close()
+        listener.close()
+        self.assertEqual(data, ['small'])
+        self.assertEqual(listener.stats['oversized'], 1)
+        self.assertEqual(listener.stats['connected'], 2)
+
+    def test_queuedlistener(self):
+        """Test tcp QueuedListener() send-receive functionality."""
+
+        # Open the listener first so that the listener process does not
+        # inherit the socket of the broadcaster.
+        connection = Connection(HOST, port=PORT + 1)
+        listener = QueuedListener(connection)
+        broadcaster = RawBroadcaster(connection)
+        data = list()
+        listener.subscribe(lambda message: data.append(message['payload']))
+
+        # Wait for the listener process to subscribe.
+        start_time = time.time()
+        while broadcaster.stats['subscribers'] == 0:
+            time.sleep(0.05)
+            if time.time() - start_time > 5.0:
+                break                                        # pragma: no cover
+        broadcaster.publish('data')
+        time.sleep(0.25)
+
+        broadcaster.close()
+        listener.close()
+        self.assertEqual(data, ['data'])
+
+    def test_queuedlistener_subscribers(self):
+        """Test tcp QueuedListener() subscribes once to a broadcaster."""
+
+        # The QueuedListener tests whether its connection can be opened in
+        # this process before subscribing from the listener process. Ensure
+        # the test listener is closed. Broadcasters detect closed subscribers
+        # when sending fails.
+        connection = Connection(HOST, port=PORT + 2)
+        broadcaster = RawBroadcaster(connection)
+        listener = QueuedListener(connection)
+        data = list()
+        listener.subscribe(lambda message: data.append(message['payload']))
+        for i in range(3):
+            broadcaster.publish(i)
+            time.sleep(0.1)
+        subscribers = broadcaster.stats['subscribers']
+
+        listener.close()
+        broadcaster.close()
+        self.assertEqual(subscribers, 1)
+        self.assertEqual(data, range(3))
+
+
+# -----------------------------------------------------------------------------
+#                              Publish-Subscribe
+# -----------------------------------------------------------------------------
+
+class TestPublishSubscribe(PublishSubscribeTests):
+    broadcaster = RawBroadcaster
+    listener = RawListener
+    connection = Connection(HOST, port=PORT)
+
+    def test_subscribers(self):
+        """Test tcp broadcasters only send subscribed topics."""
+
+        broadcaster = self.broadcaster(self.connection)
+        listeners = [self.listener(self.connection),
+                     self.listener(self.connection, topics=['A', 'B']),
+                     self.listener(self.connection, topics='C')]
+        data = [list() for listener in listeners]
+        for listener, buf in zip(listeners, data):
+            listener.subscribe(lambda message, buf=buf: buf.append(message))
+        self.assertEqual(broadcaster.stats['subscribers'], 3)
+
+        # Publish messages on several topics.
+        for topic in ['A', 'B', 'C', 'D']:
+            broadcaster.publish(topic, topic=topic)
+        time.sleep(0.25)
+        stats = broadcaster.stats
+
+        for listener in listeners:
+            listener.close()
+        broadcaster.close()
+
+        # Ensure messages were only sent to subscribers of the topic.
+        payloads = [[message['payload'] for message in buf] for buf in data]
+        self.assertEqual(payloads, [['A', 'B', 'C', 'D'], ['A', 'B'], ['C']])
+        self.assertEqual(stats['sent'], 7)
+
+    def test_large(self):
+        """Test tcp send-receive of large messages."""
+
+        broadcaster = self.broadcaster(self.connection)
+        listener = self.listener(self.connection)
+        data = list()
+        listener.subscribe(lambda message: data.append(message['payload']))
+
+        # Ensure large messages are received whole and in order.
+        messages = ['%i' % i * 1000000 for i in range(5)]
+        for message in messages:
+            broadcaster.publish(message)
+
+        # Ensure queued messages are sent before the broadcaster closes.
+        broadcaster.close()
+        time.sleep(0.25)
+        listener.close()
+        self.assertEqual(data, messages)
+
+    def test_overflow(self):
+        """Test tcp subscriber queue overflow policies."""
+
+        for overflow in ('drop_new', 'drop_old'):
+            connection = Connection(HOST, port=PORT, send_queue=1,
+                                    overflow=overflow)
+            broadcaster = self.broadcaster(connection)
+
+            # Connect a subscriber which does not read messages.
+            sock = socket.create_connection((HOST, PORT))
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            _send_frame(sock, '\x93\xa4MCLT\x01\xc0')
+            sock.settimeout(1.0)
+            self.assertEqual(_recv_frame(sock), '')
+
+            # Fill the socket buffers and the queue.
+            for i in range(100):
+                broadcaster.publish('x' * 100000)
+            stats = broadcaster.stats
+            sock.close()
+            broadcaster.close()
+            self.assertGreater(stats['dropped'], 0)
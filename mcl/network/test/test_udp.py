@@ -1,11 +1,50 @@
+import os
+import time
+import random
+import socket
+import struct
+import datetime
+import msgpack
 import unittest
+import multiprocessing
 
 from mcl.network.udp import MTU
+from mcl.network.udp import RECEIVE_BUFFER
+from mcl.network.udp import ALLOWED_MULTICAST_HOPS
 from mcl.network.udp import UDP_PORT
+from mcl.network.udp import HEADER
+from mcl.network.udp import HEADER_MAGIC
+from mcl.network.udp import HEADER_VERSION
+from mcl.network.udp import FLAG_FIXED
+from mcl.network.udp import FLAG_COALESCED
+from mcl.network.udp import RECORD
+from mcl.network.udp import PARITY_SHIFT
+from mcl.network.udp import FLAG_RELIABLE
+from mcl.network.udp import FLAG_CONTROL
+from mcl.network.udp import NACK_DELAY
+from mcl.network.udp import NACK_INTERVAL
+from mcl.network.udp import NACK_RETRIES
+from mcl.network.udp import RETRANSMIT_LIMIT
+from mcl.network.udp import TOPIC_GROUPS_MAX
+from mcl.network.udp import _topic_hash
+from mcl.network.udp import _topic_group
+from mcl.network.udp import _fragments
+from mcl.network.udp import _fixed_fragment_range
+from mcl.network.udp import _parity
+from mcl.network.udp import _parity_size
+from mcl.network.udp import _recover
+from mcl.network.udp import _fragment_size
+from mcl.network.udp import _ReassemblyBuffer
+from mcl.network.udp import _SequenceTracker
+from mcl.network.udp import _NackTracker
+from mcl.network.udp import _TokenBucket
+from mcl.network.udp import _SOCKETS
 
 from mcl.network.udp import Connection
 from mcl.network.udp import RawBroadcaster
 from mcl.network.udp import RawListener
+from mcl.network.udp import ShardedListener
+from mcl.network.network import QueuedListener
 
 from mcl.network.test.common import BroadcasterTests
 from mcl.network.test.common import ListenerTests
@@ -82,6 +121,654 @@ class ConnectionTests(unittest.TestCase):
         with self.assertRaises(TypeError):
             Connection(URL, port=65536)
 
+    def test_init_timestamps(self):
+        """Test udp.Connection() 'timestamps' parameter at initialisation."""
+
+        # Test default.
+        connection = Connection(URL)
+        self.assertFalse(connection.timestamps)
+
+        # Test instantiation passes with a valid 'timestamps'.
+        connection = Connection(URL, timestamps=True)
+        self.assertTrue(connection.timestamps)
+        self.assertEqual(connection.port, UDP_PORT)
+
+        # Test instantiation fails if 'timestamps' is not a boolean.
+        with self.assertRaises(TypeError):
+            Connection(URL, timestamps='timestamps')
+
+    def test_init_offload(self):
+        """Test udp.Connection() 'offload' parameter at initialisation."""
+
+        # Test default.
+        connection = Connection(URL)
+        self.assertFalse(connection.offload)
+
+        # Test instantiation passes with a valid 'offload'.
+        connection = Connection(URL, offload=True)
+        self.assertTrue(connection.offload)
+
+        # Test instantiation fails if 'offload' is not a boolean.
+        with self.assertRaises(TypeError):
+            Connection(URL, offload=1)
+
+    def test_init_coalesce(self):
+        """Test udp.Connection() 'coalesce' parameter at initialisation."""
+
+        # Test default.
+        connection = Connection(URL)
+        self.assertEqual(connection.coalesce, None)
+
+        # Test instantiation passes with a valid 'coalesce'.
+        connection = Connection(URL, coalesce=0.001)
+        self.assertEqual(connection.coalesce, 0.001)
+
+        # Test instantiation fails if 'coalesce' is not a positive number.
+        with self.assertRaises(TypeError):
+            Connection(URL, coalesce='0.001')
+        with self.assertRaises(TypeError):
+            Connection(URL, coalesce=0)
+
+    def test_init_send_queue(self):
+        """Test udp.Connection() send queue parameters at initialisation."""
+
+        # Test defaults.
+        connection = Connection(URL)
+        self.assertEqual(connection.send_queue, None)
+        self.assertEqual(connection.overflow, 'block')
+
+        # Test instantiation passes with valid parameters.
+        connection = Connection(URL, send_queue=10, overflow='drop_old')
+        self.assertEqual(connection.send_queue, 10)
+        self.assertEqual(connection.overflow, 'drop_old')
+
+        # Test instantiation fails with invalid parameters.
+        with self.assertRaises(TypeError):
+            Connection(URL, send_queue=0)
+        with self.assertRaises(TypeError):
+            Connection(URL, overflow='overflow')
+
+    def test_init_pacing(self):
+        """Test udp.Connection() pacing parameters at initialisation."""
+
+        # Test defaults.
+        connection = Connection(URL)
+        self.assertEqual(connection.rate, None)
+
+        # Test instantiation passes with valid parameters.
+        connection = Connection(URL, rate=10000000, burst=1500)
+        self.assertEqual(connection.rate, 10000000)
+        self.assertEqual(connection.burst, 1500)
+
+        # Test instantiation fails with invalid parameters.
+        with self.assertRaises(TypeError):
+            Connection(URL, rate=0)
+        with self.assertRaises(TypeError):
+            Connection(URL, rate=1.5)
+        with self.assertRaises(TypeError):
+            Connection(URL, burst=0)
+
+    def test_init_parity(self):
+        """Test udp.Connection() 'parity' parameter at initialisation."""
+
+        # Test default.
+        connection = Connection(URL)
+        self.assertEqual(connection.parity, None)
+
+        # Test instantiation passes with a valid 'parity'.
+        connection = Connection(URL, parity=2)
+        self.assertEqual(connection.parity, 2)
+
+        # Test instantiation fails with an invalid 'parity'.
+        with self.assertRaises(TypeError):
+            Connection(URL, parity=0)
+        with self.assertRaises(TypeError):
+            Connection(URL, parity=16)
+
+    def test_init_reliable(self):
+        """Test udp.Connection() 'reliable' parameter at initialisation."""
+
+        # Test default.
+        connection = Connection(URL)
+        self.assertFalse(connection.reliable)
+
+        # Test instantiation passes with a valid 'reliable'.
+        connection = Connection(URL, reliable=True)
+        self.assertTrue(connection.reliable)
+
+        # Test instantiation fails if 'reliable' is not a boolean.
+        with self.assertRaises(TypeError):
+            Connection(URL, reliable=1)
+
+    def test_init_topic_groups(self):
+        """Test udp.Connection() 'topic_groups' parameter at initialisation."""
+
+        # Test default.
+        connection = Connection(URL)
+        self.assertEqual(connection.topic_groups, None)
+
+        # Test instantiation passes with a valid 'topic_groups'.
+        connection = Connection(URL, topic_groups=16)
+        self.assertEqual(connection.topic_groups, 16)
+
+        # Test instantiation fails with an invalid 'topic_groups'.
+        for topic_groups in ('groups', True, 0, TOPIC_GROUPS_MAX + 1):
+            with self.assertRaises(TypeError):
+                Connection(URL, topic_groups=topic_groups)
+
+    def test_init_socket_options(self):
+        """Test udp.Connection() socket options at initialisation."""
+
+        # Test defaults.
+        connection = Connection(URL)
+        self.assertEqual(connection.rcvbuf, RECEIVE_BUFFER)
+        self.assertEqual(connection.hops, ALLOWED_MULTICAST_HOPS)
+        for option in ['sndbuf', 'fragment_size', 'tclass', 'busy_poll']:
+            self.assertEqual(getattr(connection, option), None)
+
+        # Test instantiation passes with valid options.
+        options = {'rcvbuf': 1024 * 1024,
+                   'sndbuf': 1024 * 1024,
+                   'hops': 1,
+                   'fragment_size': 1400,
+                   'tclass': 0xb8,
+                   'busy_poll': 50}
+        connection = Connection(URL, **options)
+        for option, value in options.iteritems():
+            self.assertEqual(getattr(connection, option), value)
+
+        # Test instantiation fails if options are not integers or out of
+        # range.
+        for option in options:
+            with self.assertRaises(TypeError):
+                Connection(URL, **{option: 'option'})
+            with self.assertRaises(TypeError):
+                Connection(URL, **{option: -1})
+        with self.assertRaises(TypeError):
+            Connection(URL, fragment_size=HEADER.size)
+        with self.assertRaises(TypeError):
+            Connection(URL, hops=256)
+
+
+# -----------------------------------------------------------------------------
+#                                 Topic groups
+# -----------------------------------------------------------------------------
+
+class TopicGroupTests(unittest.TestCase):
+
+    def test_topic_group(self):
+        """Test udp topics are mapped onto groups after the base address."""
+
+        # Ensure frames without a topic, or without groups, are sent to the
+        # base address.
+        self.assertEqual(_topic_group(URL, 0, 16), URL)
+        self.assertEqual(_topic_group(URL, _topic_hash('A'), None), URL)
+
+        # Ensure topics are mapped onto the groups after the base address.
+        self.assertEqual(_topic_group(URL, 16, 16), 'ff15::c75d:ce41:ea8e:b')
+        self.assertEqual(_topic_group(URL, 1, 16), 'ff15::c75d:ce41:ea8e:c')
+        self.assertEqual(_topic_group(URL, 15, 16), 'ff15::c75d:ce41:ea8e:1a')
+        groups = set(_topic_group(URL, _topic_hash('topic %i' % i), 4)
+                     for i in range(100))
+        self.assertEqual(len(groups), 4)
+        self.assertNotIn(URL, groups)
+
+        # Ensure the group ID wraps within the lower 32 bits.
+        self.assertEqual(_topic_group('ff15::ffff:ffff', 1, 1), 'ff15::')
+
+
+# -----------------------------------------------------------------------------
+#                                 Fragmentation
+# -----------------------------------------------------------------------------
+
+class FragmentTests(unittest.TestCase):
+
+    def test_fragments(self):
+        """Test udp messages are split into contiguous fragments."""
+
+        size = 10
+        for length in [1, 9, 10, 11, 19, 20, 21, 99, 100, 101, 1000]:
+            ranges = _fragments(length, size)
+
+            # Ensure the minimum number of fragments is used. Messages which
+            # are an exact multiple of the fragment size must not produce an
+            # empty fragment.
+            self.assertEqual(len(ranges), (length + size - 1) // size)
+
+            # Ensure the fragments are contiguous, non-empty and no larger
+            # than the fragment size.
+            self.assertEqual(ranges[0][0], 0)
+            self.assertEqual(ranges[-1][1], length)
+            for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(end, next_start)
+            for start, end in ranges:
+                self.assertTrue(0 < end - start <= size)
+
+    def test_fixed_fragments(self):
+        """Test udp fixed size fragments are located from their length."""
+
+        size = 10
+        for length in [11, 19, 20, 21, 99, 100, 101, 1000]:
+            count = (length + size - 1) // size
+            last = length - (count - 1) * size
+
+            # Ensure every fragment except the last is located from its own
+            # length and the fragments are contiguous.
+            ranges = [_fixed_fragment_range(length, count, i, size)
+                      for i in range(count - 1)]
+            ranges.append(_fixed_fragment_range(length, count, count - 1,
+                                                last))
+            self.assertEqual(ranges[0][0], 0)
+            self.assertEqual(ranges[-1][1], length)
+            for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(end, next_start)
+
+
+    def test_parity(self):
+        """Test udp lost fragments are recovered from parity fragments."""
+
+        data = os.urandom(1000)
+        count = 10
+        groups = 3
+        size = _parity_size(len(data), count)
+        parity = _parity(data, count, groups)
+        self.assertEqual(len(parity), groups * size)
+
+        def lose(indices):
+            message = bytearray(data + parity)
+            received = [True] * (count + groups)
+            for index in indices:
+                received[index] = False
+                message[index * size:(index + 1) * size] = '\0' * size
+            return message, received
+
+        # Ensure one lost fragment in each group can be recovered (including
+        # the last, shorter, fragment). Parity fragments of groups without
+        # lost fragments are not needed.
+        for indices in [[], [0], [9], [0, 1, 2], [3, 7, count + 2]]:
+            message, received = lose(indices)
+            self.assertTrue(_recover(message, received, len(data), groups))
+            self.assertEqual(str(message[:len(data)]), data)
+
+        # Two lost fragments in the same group cannot be recovered.
+        message, received = lose([0, 3])
+        self.assertFalse(_recover(message, received, len(data), groups))
+
+        # A lost fragment cannot be recovered without its parity fragment.
+        message, received = lose([1, count + 1])
+        self.assertFalse(_recover(message, received, len(data), groups))
+
+
+class ReassemblyTests(unittest.TestCase):
+
+    def test_reassemble(self):
+        """Test fragments are reassembled out of order."""
+
+        fragments = ['abc', 'def', 'gh']
+        buf = _ReassemblyBuffer(4, 1024, 1.0)
+        self.assertEqual(buf.insert(('a', 0), 2, 3, 8, 6, fragments[2]), None)
+        self.assertEqual(buf.insert(('a', 0), 0, 3, 8, 0, fragments[0]), None)
+        self.assertEqual(buf.stats['pending'], 1)
+        self.assertEqual(buf.stats['pending_bytes'], 8)
+        message = buf.insert(('a', 0), 1, 3, 8, 3, fragments[1])
+        self.assertEqual(str(message), 'abcdefgh')
+        self.assertEqual(buf.stats['completed'], 1)
+        self.assertEqual(buf.stats['pending'], 0)
+        self.assertEqual(buf.stats['pending_bytes'], 0)
+
+    def test_bounds(self):
+        """Test the reassembly buffer discards the oldest messages."""
+
+        # Exceed number of messages.
+        buf = _ReassemblyBuffer(2, 1024, 1.0)
+        for i in range(3):
+            buf.insert(('a', i), 0, 2, 10, 0, 'x')
+        self.assertEqual(buf.stats['pending'], 2)
+        self.assertEqual(buf.stats['incomplete'], 1)
+
+        # The oldest message was discarded.
+        message = buf.insert(('a', 1), 1, 2, 10, 5, 'y')
+        self.assertEqual(str(message), 'x\0\0\0\0y')
+        self.assertEqual(buf.insert(('a', 0), 1, 2, 10, 5, 'y'), None)
+
+        # Exceed number of bytes.
+        buf = _ReassemblyBuffer(8, 100, 1.0)
+        buf.insert(('a', 0), 0, 2, 60, 0, 'x')
+        buf.insert(('a', 1), 0, 2, 60, 0, 'x')
+        self.assertEqual(buf.stats['pending'], 1)
+        self.assertEqual(buf.stats['pending_bytes'], 60)
+        self.assertEqual(buf.stats['incomplete'], 1)
+
+        # Ensure messages larger than the buffer are dropped without
+        # allocating space or discarding other messages.
+        self.assertEqual(buf.insert(('a', 2), 0, 2, 101, 0, 'x'), None)
+        self.assertEqual(buf.stats['dropped'], 1)
+        self.assertEqual(buf.stats['pending'], 1)
+        self.assertEqual(buf.stats['pending_bytes'], 60)
+
+    def test_expire(self):
+        """Test the reassembly buffer discards stale messages."""
+
+        buf = _ReassemblyBuffer(8, 1024, 0.05)
+        buf.insert(('a', 0), 0, 2, 10, 0, 'x')
+        buf.expire()
+        self.assertEqual(buf.stats['pending'], 1)
+        buf.expire(time.time() + 0.1)
+        self.assertEqual(buf.stats['pending'], 0)
+        self.assertEqual(buf.stats['expired'], 1)
+
+        # Messages which receive fragments are not discarded.
+        buf = _ReassemblyBuffer(8, 1024, 0.1)
+        buf.insert(('a', 0), 0, 3, 10, 0, 'x')
+        time.sleep(0.08)
+        buf.insert(('a', 0), 1, 3, 10, 5, 'y')
+        buf.expire(time.time() + 0.05)
+        self.assertEqual(buf.stats['pending'], 1)
+        buf.expire(time.time() + 0.2)
+        self.assertEqual(buf.stats['expired'], 1)
+
+    def test_parity(self):
+        """Test udp reassembly recovers messages with parity fragments."""
+
+        data = 'abcdefghij'
+        count = 5
+        groups = 2
+        size = _parity_size(len(data), count)
+        message = data + _parity(data, count, groups)
+        fragments = [message[i * size:(i + 1) * size]
+                     for i in range(count + groups)]
+
+        # Lose fragment 2. The message is returned once the parity fragment
+        # of its group (fragment 5) arrives.
+        buf = _ReassemblyBuffer(4, 1000, 1.0)
+        for index in [0, 1, 3, 4]:
+            self.assertEqual(buf.insert('id', index, count + groups,
+                                        len(message), index * size,
+                                        fragments[index],
+                                        parity=(len(data), groups)), None)
+        recovered = buf.insert('id', 5, count + groups, len(message),
+                               5 * size, fragments[5],
+                               parity=(len(data), groups))
+        self.assertEqual(str(recovered), data)
+        self.assertEqual(buf.stats['recovered'], 1)
+        self.assertEqual(buf.stats['pending'], 0)
+
+        # Fragments arriving after the message was returned are ignored.
+        for index in [6, 2]:
+            self.assertEqual(buf.insert('id', index, count + groups,
+                                        len(message), index * size,
+                                        fragments[index],
+                                        parity=(len(data), groups)), None)
+        self.assertEqual(buf.stats['pending'], 0)
+        self.assertEqual(buf.stats['completed'], 1)
+
+    def test_missing(self):
+        """Test udp reassembly reports missing fragments."""
+
+        buf = _ReassemblyBuffer(4, 1000, 1.0)
+        self.assertEqual(buf.missing('id'), None)
+        buf.insert('id', 1, 4, 4, 1, 'b')
+        buf.insert('id', 3, 4, 4, 3, 'd')
+        self.assertEqual(buf.missing('id'), [0, 2])
+        buf.insert('id', 0, 4, 4, 0, 'a')
+        buf.insert('id', 2, 4, 4, 2, 'c')
+        self.assertEqual(buf.missing('id'), None)
+
+    def test_clobber(self):
+        """Test repeated fragments clobber stale messages."""
+
+        buf = _ReassemblyBuffer(8, 1024, 1.0)
+        buf.insert(('a', 0), 0, 2, 2, 0, 'x')
+        buf.insert(('a', 0), 0, 2, 2, 0, 'y')
+        self.assertEqual(buf.stats['clobbered'], 1)
+        message = buf.insert(('a', 0), 1, 2, 2, 1, 'z')
+        self.assertEqual(str(message), 'yz')
+
+        # Repeated fragments are ignored if clobbering is disabled.
+        buf.insert(('a', 1), 0, 2, 2, 0, 'x', clobber=False)
+        buf.insert(('a', 1), 0, 2, 2, 0, 'y', clobber=False)
+        self.assertEqual(buf.stats['repeated'], 1)
+        message = buf.insert(('a', 1), 1, 2, 2, 1, 'z', clobber=False)
+        self.assertEqual(str(message), 'xz')
+
+    def test_inconsistent(self):
+        """Test fragments inconsistent with their message are ignored."""
+
+        # Ensure fragments outside the message are ignored.
+        buf = _ReassemblyBuffer(8, 1024, 1.0)
+        self.assertEqual(buf.insert(('a', 0), 2, 2, 4, 0, 'xx'), None)
+        self.assertEqual(buf.insert(('a', 0), 1, 2, 4, 3, 'yy'), None)
+        self.assertEqual(buf.insert(('a', 0), 1, 2, 4, -1, 'y'), None)
+        self.assertEqual(buf.stats['inconsistent'], 3)
+        self.assertEqual(buf.stats['pending'], 0)
+
+        # Ensure fragments with a different count, size or parity layout do
+        # not join or resize the message.
+        buf.insert(('a', 0), 0, 2, 4, 0, 'xx')
+        self.assertEqual(buf.insert(('a', 0), 1, 3, 4, 2, 'yy'), None)
+        self.assertEqual(buf.insert(('a', 0), 1, 2, 6, 2, 'yyyy'), None)
+        self.assertEqual(buf.insert(('a', 0), 1, 2, 4, 2, 'yy',
+                                    parity=(2, 1)), None)
+        stats = buf.stats
+        self.assertEqual(stats['inconsistent'], 6)
+        self.assertEqual(stats['clobbered'], 0)
+        self.assertEqual(stats['pending_bytes'], 4)
+
+        # Ensure the message is completed by consistent fragments.
+        message = buf.insert(('a', 0), 1, 2, 4, 2, 'zz')
+        self.assertEqual(str(message), 'xxzz')
+
+
+class TokenBucketTests(unittest.TestCase):
+
+    def test_pacing(self):
+        """Test udp token bucket limits the rate data is sent."""
+
+        rate = 1000000
+        bucket = _TokenBucket(rate, 10000)
+
+        # Ensure the burst is sent without waiting.
+        start_time = time.time()
+        bucket.consume(10000)
+        self.assertEqual(bucket.stats['waits'], 0)
+
+        # Ensure data beyond the burst is paced at the rate.
+        for i in range(10):
+            bucket.consume(10000)
+        elapsed = time.time() - start_time
+        self.assertGreaterEqual(elapsed, 0.1)
+        self.assertLess(elapsed, 0.2)
+
+        # Ensure statistics were recorded.
+        stats = bucket.stats
+        self.assertEqual(stats['bytes'], 110000)
+        self.assertEqual(stats['waits'], 10)
+        self.assertGreaterEqual(stats['oversleep'], 0)
+
+        # Time slept in excess of a wait is credited to the next wait, so the
+        # requested and excess time add up to (at least) the paced time.
+        slept = stats['wait_time'] + stats['oversleep']
+        self.assertGreaterEqual(slept, 0.095)
+        self.assertLessEqual(slept, elapsed)
+        self.assertLessEqual(stats['throughput'], 1.1 * 110000 / 0.1)
+
+
+class SequenceTests(unittest.TestCase):
+
+    def update(self, sequences, stream='topic'):
+        """Record sequence numbers and return the statistics."""
+
+        tracker = _SequenceTracker()
+        for sequence in sequences:
+            tracker.update('sender', stream, sequence)
+
+        stats = tracker.stats
+        self.assertEqual(stats['senders']['sender']['received'],
+                         stats['received'])
+        return stats
+
+    def test_sequence(self):
+        """Test sequence numbers count lost, duplicate and reordered data."""
+
+        # In order.
+        stats = self.update(range(10))
+        self.assertEqual(stats['received'], 10)
+        self.assertEqual(stats['lost'], 0)
+
+        # Lost.
+        stats = self.update([0, 1, 4, 5, 9])
+        self.assertEqual(stats['lost'], 5)
+
+        # Duplicates.
+        stats = self.update([0, 1, 1, 2, 0])
+        self.assertEqual(stats['duplicate'], 2)
+        self.assertEqual(stats['lost'], 0)
+
+        # Reordered.
+        stats = self.update([0, 3, 1, 2, 5])
+        self.assertEqual(stats['reordered'], 2)
+        self.assertEqual(stats['lost'], 1)
+
+        # Wrap around.
+        stats = self.update([0xFFFFFFFE, 0xFFFFFFFF, 1, 0])
+        self.assertEqual(stats['reordered'], 1)
+        self.assertEqual(stats['lost'], 0)
+
+        # Sender restarted.
+        stats = self.update([1000, 1001, 0, 1])
+        self.assertEqual(stats['reset'], 1)
+        self.assertEqual(stats['lost'], 0)
+
+    def test_streams(self):
+        """Test sequence numbers are tracked for each stream."""
+
+        tracker = _SequenceTracker()
+        for sequence in range(3):
+            tracker.update('sender', 'A', sequence)
+            tracker.update('sender', 'B', sequence)
+            tracker.update('other', 'A', sequence)
+
+        stats = tracker.stats
+        self.assertEqual(stats['received'], 9)
+        self.assertEqual(stats['lost'], 0)
+        self.assertEqual(stats['duplicate'], 0)
+        self.assertEqual(stats['senders']['sender']['received'], 6)
+        self.assertEqual(stats['senders']['other']['received'], 3)
+
+
+class NackTests(unittest.TestCase):
+
+    def test_gaps(self):
+        """Test NACKs are scheduled for lost messages."""
+
+        tracker = _NackTracker()
+        sender = ('host', 1000, 0, 0)
+        for sequence in [0, 3]:
+            self.assertTrue(tracker.receive(sender, 'A', sequence, now=0.0))
+            tracker.deliver(sender, 'A', sequence)
+        self.assertTrue(tracker.pending)
+
+        # Lost messages are requested after a delay.
+        self.assertEqual(tracker.requests(None, now=0.0), [])
+        nacks = tracker.requests(None, now=NACK_DELAY)
+        self.assertEqual(sorted(nacks), [(sender, 'A', 1, ()),
+                                         (sender, 'A', 2, ())])
+
+        # Requests are repeated after an interval.
+        self.assertEqual(tracker.requests(None, now=2 * NACK_DELAY), [])
+        nacks = tracker.requests(None, now=NACK_DELAY + NACK_INTERVAL)
+        self.assertEqual(len(nacks), 2)
+
+        # Retransmitted messages are delivered once.
+        self.assertTrue(tracker.receive(sender, 'A', 1, now=1.0))
+        tracker.deliver(sender, 'A', 1)
+        self.assertFalse(tracker.receive(sender, 'A', 1, now=1.0))
+        self.assertFalse(tracker.receive(sender, 'A', 3, now=1.0))
+
+        # Messages are abandoned after the maximum number of requests.
+        now = 1.0
+        for i in range(NACK_RETRIES):
+            now += NACK_INTERVAL
+            tracker.requests(None, now=now)
+        self.assertFalse(tracker.pending)
+
+        stats = tracker.stats
+        self.assertEqual(stats['missing'], 2)
+        self.assertEqual(stats['duplicate'], 2)
+        self.assertEqual(stats['abandoned'], 1)
+        self.assertEqual(stats['nacks'], 2 + NACK_RETRIES)
+
+    def test_heartbeat(self):
+        """Test heartbeats reveal lost messages."""
+
+        tracker = _NackTracker()
+        sender = ('host', 1000, 0, 0)
+
+        # The first heartbeat requests the announced message.
+        tracker.heartbeat(sender, 'A', 5, now=0.0)
+        self.assertEqual(tracker.requests(None, now=1.0),
+                         [(sender, 'A', 5, ())])
+
+        # Later heartbeats request the messages after the most recent
+        # message.
+        tracker.receive(sender, 'A', 5, now=1.0)
+        tracker.deliver(sender, 'A', 5)
+        tracker.heartbeat(sender, 'A', 5, now=1.0)
+        self.assertFalse(tracker.pending)
+        tracker.heartbeat(sender, 'A', 7, now=1.0)
+        self.assertEqual(sorted(tracker.requests(None, now=2.0)),
+                         [(sender, 'A', 6, ()), (sender, 'A', 7, ())])
+
+    def test_fragments(self):
+        """Test NACKs request the missing fragments of messages."""
+
+        tracker = _NackTracker()
+        sender = ('host', 1000, 0, 0)
+        tracker.receive(sender, 'A', 0, now=0.0)
+        tracker.fragment(sender, 'A', 0, now=0.0)
+
+        # Missing fragments are requested.
+        missing = {(sender[:2], 'A', 0): [1, 3]}
+        self.assertEqual(tracker.requests(missing.get, now=1.0),
+                         [(sender, 'A', 0, [1, 3])])
+
+        # Messages discarded before delivery are requested in full.
+        missing = dict()
+        self.assertEqual(tracker.requests(missing.get, now=1.0), [])
+        self.assertEqual(tracker.requests(missing.get, now=2.0),
+                         [(sender, 'A', 0, ())])
+
+        # Delivered messages are not requested.
+        tracker.deliver(sender, 'A', 0)
+        self.assertFalse(tracker.pending)
+
+    def test_progress(self):
+        """Test NACKs which recover fragments are not counted as retries."""
+
+        tracker = _NackTracker()
+        sender = ('host', 1000, 0, 0)
+        tracker.receive(sender, 'A', 0, now=0.0)
+        tracker.fragment(sender, 'A', 0, now=0.0)
+
+        # A message recovering one fragment per request is not abandoned.
+        indices = range(2 * NACK_RETRIES)
+        now = 0.0
+        while indices:
+            now += 1.0
+            missing = {(sender[:2], 'A', 0): indices}
+            nacks = tracker.requests(missing.get, now=now)
+            self.assertEqual(nacks, [(sender, 'A', 0, indices)])
+            indices = indices[1:]
+        self.assertEqual(tracker.stats['abandoned'], 0)
+
+        # A message which does not make progress is abandoned.
+        missing = {(sender[:2], 'A', 0): [0]}
+        for i in range(NACK_RETRIES + 1):
+            now += 1.0
+            tracker.requests(missing.get, now=now)
+        self.assertFalse(tracker.pending)
+        self.assertEqual(tracker.stats['abandoned'], 1)
+
 
 # -----------------------------------------------------------------------------
 #                                 Broadcaster()
@@ -178,3 +865,1010 @@ class TestPublishSubscribe(PublishSubscribeTests):
 
         # Only ONE message was published, ensure the data was received.
         self.assertEqual(send_string, received_buffer[0]['payload'])
+
+    def test_fragment_boundary(self):
+        """Test udp send/receive with data a multiple of the fragment size."""
+
+        # Create a message which serialises to exactly two fragments. Strings
+        # larger than 65535 bytes are serialised with a five byte header. The
+        # serialised tuple adds two bytes (array header and 'None' topic).
+        fragment_size = MTU - HEADER.size
+        send_string = 'x' * (2 * fragment_size - 7)
+        self.assertEqual(len(msgpack.dumps((None, send_string))),
+                         2 * fragment_size)
+
+        # Create broadcaster and listener.
+        connection = Connection(self.connection.url, fragment_size=MTU)
+        broadcaster = self.broadcaster(connection)
+        listener = self.listener(connection)
+
+        # Test publish-subscribe functionality on the message.
+        received_buffer = self.publish(broadcaster,
+                                       listener,
+                                       send_string)
+
+        # Close connections.
+        broadcaster.close()
+        listener.close()
+
+        # Ensure the message was received.
+        self.assertEqual(len(received_buffer), 1)
+        self.assertEqual(send_string, received_buffer[0]['payload'])
+
+    def test_offload(self):
+        """Test udp send/receive with segmentation offload."""
+
+        # Offload is used where the kernel supports it. Otherwise fragments
+        # are sent and received individually.
+        connection = Connection(self.connection.url,
+                                fragment_size=1400,
+                                offload=True)
+        broadcaster = self.broadcaster(connection)
+        listener = self.listener(connection)
+        self.assertIn('offload', broadcaster.socket_options)
+        self.assertIn('offload', listener.socket_options)
+
+        # Test publish-subscribe functionality on a message spanning several
+        # offload buffers.
+        send_string = os.urandom(200000)
+        received_buffer = self.publish(broadcaster,
+                                       listener,
+                                       send_string)
+
+        # Close connections.
+        broadcaster.close()
+        listener.close()
+
+        # Ensure the message was received.
+        self.assertEqual(len(received_buffer), 1)
+        self.assertEqual(send_string, received_buffer[0]['payload'])
+
+    def test_coalesce(self):
+        """Test udp send/receive of coalesced messages."""
+
+        # Create broadcaster and listener coalescing small messages.
+        connection = Connection(self.connection.url, coalesce=0.05)
+        broadcaster = self.broadcaster(connection)
+        listener = self.listener(connection)
+        received_buffer = list()
+        listener.subscribe(lambda data: received_buffer.append(data))
+
+        # Publish small messages which fit in one datagram. Ensure messages
+        # are delayed no longer than the maximum delay.
+        messages = [('topic %i' % (i % 3), i) for i in range(20)]
+        for topic, data in messages:
+            broadcaster.publish(data, topic=topic)
+        time.sleep(0.02)
+        self.assertEqual(len(received_buffer), 0)
+        time.sleep(0.2)
+        self.assertEqual(len(received_buffer), 20)
+
+        # Messages which do not fit in the pending datagram and large
+        # messages are sent immediately (after pending messages).
+        small = [('topic', 'y' * 100)] * 100
+        for topic, data in small + [('large', 'x' * 100000)]:
+            broadcaster.publish(data, topic=topic)
+        messages += small + [('large', 'x' * 100000)]
+        start_time = time.time()
+        while (time.time() - start_time) < 0.5:
+            if len(received_buffer) == len(messages):
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(received_buffer), len(messages))
+
+        # Messages published before closing are sent.
+        broadcaster.publish('closed', topic='closed')
+        messages.append(('closed', 'closed'))
+        broadcaster.close()
+        time.sleep(0.1)
+        listener.close()
+
+        # Ensure messages were received in order.
+        self.assertEqual([(data['topic'], data['payload'])
+                          for data in received_buffer], messages)
+        self.assertEqual(listener.stats['sequence']['lost'], 0)
+
+    def test_flush(self):
+        """Test udp coalesced messages are sent on flush()."""
+
+        # Create broadcaster and listener with a long delay.
+        connection = Connection(self.connection.url, coalesce=10.0)
+        broadcaster = self.broadcaster(connection)
+        listener = self.listener(connection)
+        received_buffer = list()
+        listener.subscribe(lambda data: received_buffer.append(data))
+
+        # Ensure pending messages are sent on flush.
+        broadcaster.publish('first')
+        broadcaster.publish('second')
+        time.sleep(0.1)
+        self.assertEqual(len(received_buffer), 0)
+        broadcaster.flush()
+        time.sleep(0.1)
+        broadcaster.close()
+        listener.close()
+        self.assertEqual([data['payload'] for data in received_buffer],
+                         ['first', 'second'])
+
+    def test_send_queue(self):
+        """Test udp send/receive with a send queue."""
+
+        # Create broadcaster sending from a queue.
+        connection = Connection(self.connection.url, send_queue=4)
+        broadcaster = self.broadcaster(connection)
+        listener = self.listener(connection)
+        received_buffer = list()
+        listener.subscribe(lambda data: received_buffer.append(data))
+
+        # Publish large and small messages. Ensure the queue is empty once
+        # flushed.
+        messages = ['x' * 200000, 'small', 'y' * 100000, 'last']
+        for data in messages:
+            broadcaster.publish(data)
+        broadcaster.flush()
+        stats = broadcaster.stats
+        self.assertEqual(stats['queued'], 0)
+        self.assertEqual(stats['sent'], len(messages))
+        self.assertEqual(stats['dropped'], 0)
+        self.assertGreater(stats['latency_max'], 0)
+        self.assertLessEqual(stats['latency_mean'], stats['latency_max'])
+
+        # Close connections.
+        time.sleep(0.1)
+        broadcaster.close()
+        listener.close()
+
+        # Ensure messages were received in order.
+        self.assertEqual([data['payload'] for data in received_buffer],
+                         messages)
+
+    def test_send_queue_errors(self):
+        """Test udp send queue continues after errors."""
+
+        connection = Connection(self.connection.url, send_queue=4)
+        broadcaster = self.broadcaster(connection)
+        listener = self.listener(connection)
+        received_buffer = list()
+        listener.subscribe(lambda data: received_buffer.append(data))
+
+        # Abuse intention of 'private' mangling to make the first send fail.
+        send = broadcaster._RawBroadcaster__send
+        calls = list()
+
+        def fail(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise RuntimeError('send failed')
+            send(*args)
+
+        broadcaster._RawBroadcaster__send = fail
+
+        # Ensure the queue is flushed and the failed message counted.
+        broadcaster.publish('first')
+        broadcaster.publish('second')
+        broadcaster.flush()
+        stats = broadcaster.stats
+        time.sleep(0.1)
+        broadcaster.close()
+        listener.close()
+        self.assertEqual((stats['sent'], stats['errors']), (1, 1))
+        self.assertEqual([data['payload'] for data in received_buffer],
+                         ['second'])
+
+    def test_overflow(self):
+        """Test udp send queue overflow policies."""
+
+        data = 'x' * 200000
+        for overflow in ['drop_new', 'drop_old']:
+            connection = Connection(self.connection.url,
+                                    send_queue=1,
+                                    overflow=overflow)
+            broadcaster = self.broadcaster(connection)
+            listener = self.listener(connection)
+            received_buffer = list()
+            listener.subscribe(lambda data: received_buffer.append(data))
+
+            # Publish messages faster than they can be sent.
+            for i in range(20):
+                broadcaster.publish((i, data))
+            broadcaster.flush()
+            stats = broadcaster.stats
+            time.sleep(0.1)
+            broadcaster.close()
+            listener.close()
+
+            # Ensure every message was sent or dropped.
+            self.assertGreater(stats['dropped'], 0)
+            self.assertEqual(stats['sent'] + stats['dropped'], 20)
+            received = [data['payload'][0] for data in received_buffer]
+
+            # The first message is sent when dropping new messages. The last
+            # message is sent when dropping old messages.
+            if overflow == 'drop_new':
+                self.assertEqual(received[0], 0)
+            else:
+                self.assertEqual(received[-1], 19)
+
+    def test_pacing(self):
+        """Test udp send/receive with paced fragments."""
+
+        # Create broadcaster pacing data.
+        rate = 10 * 1024 * 1024
+        connection = Connection(self.connection.url, rate=rate)
+        broadcaster = self.broadcaster(connection)
+        listener = self.listener(connection)
+        received_buffer = list()
+        listener.subscribe(lambda data: received_buffer.append(data))
+
+        # Ensure the message is sent no faster than the rate.
+        send_string = 'x' * (2 * 1024 * 1024)
+        start_time = time.time()
+        broadcaster.publish(send_string)
+        elapsed = time.time() - start_time
+        stats = broadcaster.stats['pacing']
+        time.sleep(0.1)
+        broadcaster.close()
+        listener.close()
+
+        self.assertGreater(stats['waits'], 0)
+        self.assertGreaterEqual(elapsed,
+                                (stats['bytes'] - 64 * 1024) / float(rate))
+        self.assertEqual(len(received_buffer), 1)
+        self.assertEqual(send_string, received_buffer[0]['payload'])
+
+    def test_send_parity(self):
+        """Test udp send/receive of messages with parity fragments."""
+
+        # Create broadcaster sending parity fragments.
+        connection = Connection(self.connection.url, parity=4)
+        broadcaster = self.broadcaster(connection)
+        listener = self.listener(connection)
+
+        # Test publish-subscribe functionality on the message.
+        send_string = os.urandom(100000)
+        received_buffer = self.publish(broadcaster,
+                                       listener,
+                                       send_string)
+
+        # Close connections.
+        broadcaster.close()
+        listener.close()
+
+        # Ensure the message was received once.
+        self.assertEqual(len(received_buffer), 1)
+        self.assertEqual(send_string, received_buffer[0]['payload'])
+
+    def test_send_reliable(self):
+        """Test udp send/receive of reliable messages."""
+
+        # Create reliable broadcaster.
+        connection = Connection(self.connection.url, reliable=True)
+        broadcaster = self.broadcaster(connection)
+        listener = self.listener(connection)
+
+        # Test publish-subscribe functionality on the message.
+        send_string = os.urandom(100000)
+        received_buffer = self.publish(broadcaster,
+                                       listener,
+                                       send_string)
+
+        # Ensure the message was kept for retransmission.
+        stats = broadcaster.stats['reliable']
+        self.assertEqual(stats['history'], 1)
+        self.assertEqual(broadcaster.socket_options['offload'], False)
+
+        # Close connections.
+        broadcaster.close()
+        listener.close()
+
+        # Ensure the message was received once.
+        self.assertEqual(len(received_buffer), 1)
+        self.assertEqual(send_string, received_buffer[0]['payload'])
+
+    def test_retransmit(self):
+        """Test udp broadcaster retransmits messages requested by NACKs."""
+
+        # Receive datagrams sent to the group.
+        connection = Connection(self.connection.url, port=26030,
+                                fragment_size=1000, reliable=True)
+        sock = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        group = socket.inet_pton(socket.AF_INET6, connection.url)
+        sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_JOIN_GROUP,
+                        group + '\0' * 4)
+        sock.bind((connection.url, connection.port))
+        sock.settimeout(1.0)
+
+        def nack(sequence, indices=()):
+            frame = HEADER.pack(HEADER_MAGIC, HEADER_VERSION, FLAG_CONTROL,
+                                _topic_hash('topic'), sequence, len(indices),
+                                0, 1)
+            frame += struct.pack('!%iH' % len(indices), *indices)
+            sock.sendto(frame, address)
+
+        def receive():
+            frame, sender = sock.recvfrom(2000)
+            return HEADER.unpack_from(frame), sender
+
+        # Publish a small and a fragmented message.
+        broadcaster = self.broadcaster(connection)
+        broadcaster.publish('small', topic='topic')
+        broadcaster.publish('x' * 5000, topic='topic')
+        header, address = receive()
+        self.assertEqual(header[2], FLAG_RELIABLE)
+        count = 1
+        while count < 1 + 6:
+            header, sender = receive()
+            count += 1
+        self.assertEqual(header[6:], (5, 6))
+
+        # Request the small message and two fragments of the large message.
+        nack(0)
+        header, sender = receive()
+        length = len(msgpack.dumps(('topic', 'small')))
+        self.assertEqual(header[4:], (0, length, 0, 1))
+        nack(1, [2, 4])
+        self.assertEqual(receive()[0][6:], (2, 6))
+        self.assertEqual(receive()[0][6:], (4, 6))
+
+        # Repeated requests are suppressed. Unknown messages are ignored.
+        nack(1, [2])
+        nack(5)
+
+        # Idle topics are announced by heartbeats.
+        header, sender = receive()
+        self.assertEqual(header[2], FLAG_RELIABLE | FLAG_CONTROL)
+        self.assertEqual(header[4], 1)
+
+        stats = broadcaster.stats['reliable']
+        broadcaster.close()
+        sock.close()
+        self.assertEqual(stats['nacks'], 4)
+        self.assertEqual(stats['retransmitted'], 3)
+        self.assertEqual(stats['suppressed'], 1)
+        self.assertEqual(stats['unavailable'], 1)
+        self.assertEqual(stats['history'], 2)
+
+    def test_retransmit_limit(self):
+        """Test udp broadcaster limits the fragments retransmitted."""
+
+        # Receive datagrams sent to the group.
+        connection = Connection(self.connection.url, port=26032,
+                                fragment_size=1000, reliable=True)
+        sock = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        group = socket.inet_pton(socket.AF_INET6, connection.url)
+        sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_JOIN_GROUP,
+                        group + '\0' * 4)
+        sock.bind((connection.url, connection.port))
+        sock.settimeout(1.0)
+
+        # Publish a message with more fragments than can be retransmitted at
+        # once.
+        broadcaster = self.broadcaster(connection)
+        broadcaster.publish('x' * (RETRANSMIT_LIMIT + 100) * 1000)
+        frame, address = sock.recvfrom(2000)
+        count = HEADER.unpack_from(frame)[7]
+        self.assertGreater(count, RETRANSMIT_LIMIT)
+
+        # Request the entire message.
+        sock.sendto(HEADER.pack(HEADER_MAGIC, HEADER_VERSION, FLAG_CONTROL,
+                                0, 0, 0, 0, 1), address)
+        start_time = time.time()
+        while broadcaster.stats['reliable']['retransmitted'] < 1 and \
+              (time.time() - start_time) < 1.0:
+            time.sleep(0.01)
+
+        stats = broadcaster.stats['reliable']
+        broadcaster.close()
+        sock.close()
+        self.assertEqual(stats['retransmitted'], RETRANSMIT_LIMIT)
+        self.assertEqual(stats['limited'], count - RETRANSMIT_LIMIT)
+
+    def test_topic_groups(self):
+        """Test udp topics are sent to the groups of their topics."""
+
+        # Receive datagrams sent to the base group.
+        connection = Connection(self.connection.url, port=26031,
+                                fragment_size=1000, topic_groups=8)
+        sock = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        group = socket.inet_pton(socket.AF_INET6, connection.url)
+        sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_JOIN_GROUP,
+                        group + '\0' * 4)
+        sock.bind((connection.url, connection.port))
+        sock.settimeout(0.25)
+
+        # Ensure listeners join the groups of their topics.
+        broadcaster = self.broadcaster(connection)
+        listeners = [self.listener(connection),
+                     self.listener(connection, topics='A')]
+        self.assertEqual(listeners[0].socket_options['groups'], 9)
+        self.assertEqual(listeners[1].socket_options['groups'], 2)
+        data = [list() for listener in listeners]
+        for listener, buf in zip(listeners, data):
+            listener.subscribe(lambda message, buf=buf:
+                               buf.append(message['payload']))
+
+        # Publish small and fragmented messages on several topics.
+        messages = [('a', 'A'), ('b', 'B'), ('x' * 5000, 'A'), ('none', None)]
+        for message, topic in messages:
+            broadcaster.publish(message, topic=topic)
+        time.sleep(0.25)
+
+        # Ensure only frames without a topic are sent to the base group.
+        frames = list()
+        try:
+            while True:
+                frames.append(sock.recv(2000))
+        except socket.timeout:
+            pass
+
+        broadcaster.close()
+        for listener in listeners:
+            listener.close()
+        sock.close()
+
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(HEADER.unpack_from(frames[0])[3], 0)
+        self.assertEqual(data[0], [message for message, topic in messages])
+        self.assertEqual(data[1], ['a', 'x' * 5000])
+
+    def test_shared_sockets(self):
+        """Test udp broadcasters share sockets with the same options."""
+
+        # Ensure broadcasters with the same options share a socket. Reliable
+        # broadcasters use a private socket.
+        stats = _SOCKETS.stats
+        connection = Connection(self.connection.url, fragment_size=1000,
+                                tclass=0x20)
+        broadcasters = [self.broadcaster(connection),
+                        self.broadcaster(connection),
+                        self.broadcaster(Connection(connection.url, hops=1,
+                                                    tclass=0x20)),
+                        self.broadcaster(Connection(connection.url,
+                                                    tclass=0x20,
+                                                    reliable=True))]
+        self.assertEqual(_SOCKETS.stats,
+                         {'sockets': stats['sockets'] + 2,
+                          'references': stats['references'] + 3})
+
+        # Ensure messages of broadcasters sharing a socket are numbered in one
+        # sequence.
+        listener = self.listener(connection)
+        data = list()
+        listener.subscribe(lambda message: data.append(message['payload']))
+        messages = ['%i' % i * 3000 for i in range(10)]
+        for i, message in enumerate(messages):
+            broadcasters[i % 2].publish(message, topic='topic')
+        time.sleep(0.25)
+
+        # Ensure the socket remains open until the last broadcaster is
+        # closed.
+        broadcasters[0].close()
+        broadcasters[1].publish('last', topic='topic')
+        time.sleep(0.1)
+        for broadcaster in broadcasters:
+            broadcaster.close()
+        listener.close()
+        self.assertEqual(_SOCKETS.stats, stats)
+
+        sequence = listener.stats['sequence']
+        self.assertEqual(data, messages + ['last'])
+        self.assertEqual((sequence['lost'], sequence['duplicate']), (0, 0))
+
+    def test_shared_sequences(self):
+        """Test udp broadcasters sharing a socket number each destination."""
+
+        # Ensure broadcasters to different ports share a socket but do not
+        # share sequence numbers.
+        connections = [Connection(self.connection.url, port=26033),
+                       Connection(self.connection.url, port=26034)]
+        broadcasters = [self.broadcaster(connection)
+                        for connection in connections]
+        self.assertIs(broadcasters[0]._RawBroadcaster__socket,
+                      broadcasters[1]._RawBroadcaster__socket)
+
+        listener = self.listener(connections[0])
+        data = list()
+        listener.subscribe(lambda message: data.append(message['payload']))
+        for i in range(10):
+            for broadcaster in broadcasters:
+                broadcaster.publish(i, topic='topic')
+        time.sleep(0.25)
+        for broadcaster in broadcasters:
+            broadcaster.close()
+        listener.close()
+
+        sequence = listener.stats['sequence']
+        self.assertEqual(data, range(10))
+        self.assertEqual((sequence['lost'], sequence['duplicate']), (0, 0))
+
+    def test_fragment_size(self):
+        """Test udp default fragment size avoids IP fragmentation."""
+
+        # The fragment size is limited by the MTU.
+        broadcaster = self.broadcaster(self.connection)
+        fragment_size = broadcaster.socket_options['fragment_size']
+        broadcaster.close()
+        self.assertGreater(fragment_size, HEADER.size)
+        self.assertLessEqual(fragment_size, MTU)
+
+        # Fragment size is derived from the path MTU. The path MTU of the
+        # loopback interface is large.
+        sockaddr = (self.connection.url, self.connection.port)
+        self.assertEqual(_fragment_size(socket.AF_INET6, sockaddr),
+                         fragment_size)
+        self.assertEqual(_fragment_size(socket.AF_INET6, ('::1', UDP_PORT)),
+                         MTU)
+
+    def test_stats(self):
+        """Test udp listeners record sequence statistics."""
+
+        # Create broadcaster and listeners.
+        broadcaster = self.broadcaster(self.connection)
+        listener = self.listener(self.connection)
+        queued = QueuedListener(self.connection)
+        time.sleep(0.25)
+
+        # Publish messages on two topics.
+        for i in range(5):
+            broadcaster.publish(i, topic='A')
+            broadcaster.publish(i, topic='B')
+        time.sleep(0.5)
+
+        # Close connections.
+        broadcaster.close()
+        listener.close()
+        queued.close()
+
+        for stats in [listener.stats, queued.stats]:
+            self.assertEqual(stats['sequence']['received'], 10)
+            self.assertEqual(stats['sequence']['lost'], 0)
+            self.assertEqual(stats['sequence']['duplicate'], 0)
+            self.assertEqual(stats['sequence']['reordered'], 0)
+            self.assertEqual(len(stats['sequence']['senders']), 1)
+
+    def test_timestamps(self):
+        """Test udp listeners record kernel reception times."""
+
+        # Create broadcaster and listeners.
+        connection = Connection(self.connection.url, timestamps=True)
+        broadcaster = self.broadcaster(connection)
+        listener = self.listener(connection)
+        queued = QueuedListener(connection)
+        received_buffer = list()
+        queued_buffer = list()
+        listener.subscribe(lambda data: received_buffer.append(data))
+        queued.subscribe(lambda data: queued_buffer.append(data))
+        time.sleep(0.25)
+
+        # Publish message.
+        start_time = datetime.datetime.utcnow()
+        broadcaster.publish('timestamp')
+        time.sleep(0.5)
+
+        # Close connections.
+        broadcaster.close()
+        listener.close()
+        queued.close()
+
+        # Ensure the kernel reception time was propagated.
+        for data in [received_buffer, queued_buffer]:
+            self.assertEqual(len(data), 1)
+            self.assertEqual(data[0]['payload'], 'timestamp')
+            self.assertIn(data[0]['dropped'], (0, None))
+            self.assertTrue(start_time <= data[0]['time_received'] <=
+                            start_time + datetime.timedelta(seconds=0.5))
+
+    def test_socket_options(self):
+        """Test udp socket options are applied and reported."""
+
+        # Create connection with tuned socket options.
+        connection = Connection(self.connection.url,
+                                rcvbuf=256 * 1024,
+                                sndbuf=256 * 1024,
+                                hops=1,
+                                fragment_size=1400,
+                                tclass=0xb8)
+        broadcaster = self.broadcaster(connection)
+        listener = self.listener(connection)
+
+        # Ensure options were granted. Note that linux doubles the requested
+        # buffer sizes to allow for book-keeping overhead.
+        for options in [broadcaster.socket_options, listener.socket_options]:
+            self.assertGreaterEqual(options['rcvbuf'], 256 * 1024)
+            self.assertGreaterEqual(options['sndbuf'], 256 * 1024)
+            self.assertEqual(options['hops'], 1)
+            self.assertEqual(options['tclass'], 0xb8)
+        self.assertEqual(broadcaster.socket_options['fragment_size'], 1400)
+
+        # Ensure messages are fragmented using the fragment size.
+        send_string = 'x' * 10000
+        received_buffer = self.publish(broadcaster,
+                                       listener,
+                                       send_string)
+        broadcaster.close()
+        listener.close()
+        self.assertEqual(len(received_buffer), 1)
+        self.assertEqual(send_string, received_buffer[0]['payload'])
+        self.assertEqual(listener.stats['reassembly']['completed'], 1)
+
+    def test_shard(self):
+        """Test udp listeners receive shards of messages."""
+
+        # Create broadcaster and sharded listeners.
+        broadcaster = self.broadcaster(self.connection)
+        listeners = [self.listener(self.connection, shard=(i, 3, False))
+                     for i in range(3)]
+        buffers = [list() for listener in listeners]
+        for listener, received_buffer in zip(listeners, buffers):
+            listener.subscribe(lambda data, buf=received_buffer:
+                               buf.append(data['payload']))
+
+        # Publish messages.
+        for i in range(30):
+            broadcaster.publish(i, topic='topic')
+        time.sleep(0.5)
+
+        # Close connections.
+        broadcaster.close()
+        for listener in listeners:
+            listener.close()
+
+        # Ensure messages were distributed evenly without loss or duplication.
+        self.assertEqual(sorted(sum(buffers, [])), range(30))
+        for received_buffer in buffers:
+            self.assertEqual(len(received_buffer), 10)
+
+        # Each shard records consecutive sequence numbers.
+        for listener in listeners:
+            self.assertEqual(listener.stats['sequence']['lost'], 0)
+
+        # Test instantiation fails if 'shard' is ill-specified.
+        with self.assertRaises(TypeError):
+            self.listener(self.connection, shard=(3, 3, False))
+        with self.assertRaises(TypeError):
+            self.listener(self.connection, shard=3)
+
+    def test_sharded_listener(self):
+        """Test udp ShardedListener() send-receive functionality."""
+
+        queue = multiprocessing.Queue()
+
+        def callback(data):
+            queue.put((os.getpid(), data['topic'], data['payload']))
+
+        broadcaster = self.broadcaster(self.connection)
+        topics = ['topic %i' % i for i in range(4)]
+        for affinity in [False, True]:
+            listener = ShardedListener(self.connection, callback, workers=2,
+                                       affinity=affinity)
+            self.assertTrue(listener.is_open)
+            self.assertEqual(listener.workers, 2)
+            self.assertEqual(listener.affinity, affinity)
+
+            # Publish messages.
+            for i in range(20):
+                broadcaster.publish(i, topic=topics[i % len(topics)])
+            time.sleep(0.5)
+            self.assertTrue(listener.close())
+            self.assertFalse(listener.is_open)
+
+            # Ensure all messages were received once.
+            received = list()
+            while not queue.empty():
+                received.append(queue.get())
+            self.assertEqual(sorted(item[2] for item in received), range(20))
+
+            # Ensure each topic was handled by a single worker.
+            if affinity:
+                for topic in topics:
+                    pids = set(item[0] for item in received
+                               if item[1] == topic)
+                    self.assertEqual(len(pids), 1)
+
+            # Ensure statistics are available from each worker.
+            stats = listener.stats
+            self.assertEqual(len(stats), 2)
+            self.assertEqual(sum(s['sequence']['received'] for s in stats),
+                             20)
+
+        broadcaster.close()
+
+        # Test instantiation fails if inputs are ill-specified.
+        with self.assertRaises(TypeError):
+            ShardedListener(self.connection, 'callback')
+        with self.assertRaises(TypeError):
+            ShardedListener(self.connection, callback, workers=0)
+
+    def send_raw(self, frames, topics=None):
+        """Send raw frames to a listener and return the received data."""
+
+        # Send frames to the listener.
+        received_buffer = list()
+        listener = self.listener(self.connection, topics=topics)
+        listener.subscribe(lambda data: received_buffer.append(data))
+        sock = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+        for frame in frames:
+            sock.sendto(frame, (self.connection.url, self.connection.port))
+
+        # Wait for messages.
+        start_time = time.time()
+        while (time.time() - start_time) < 0.5:
+            time.sleep(0.05)
+
+        # Close connections.
+        sock.close()
+        listener.close()
+
+        return received_buffer
+
+    def test_header(self):
+        """Test udp receive rejects frames from the header."""
+
+        def frame(topic, data, topic_hash=None, version=HEADER_VERSION):
+            data = msgpack.dumps((topic, data))
+            if topic_hash is None:
+                topic_hash = _topic_hash(topic)
+            return HEADER.pack(HEADER_MAGIC, version, 0, topic_hash, 0,
+                               len(data), 0, 1) + data
+
+        # Frames with a matching topic hash are decoded. Frames with unknown
+        # versions or unwanted topic hashes are rejected before decoding, even
+        # if the (encoded) topic would match.
+        frames = [frame('topic', 'valid'),
+                  frame('topic', 'version', version=HEADER_VERSION + 1),
+                  frame('topic', 'hash', topic_hash=_topic_hash('other')),
+                  frame('other', 'other'),
+                  frame('topic', 'valid')[:-1]]
+
+        received_buffer = self.send_raw(frames, topics='topic')
+        self.assertEqual(len(received_buffer), 1)
+        self.assertEqual(received_buffer[0]['topic'], 'topic')
+        self.assertEqual(received_buffer[0]['payload'], 'valid')
+
+    def test_coalesced_records(self):
+        """Test udp receive filters records in coalesced frames."""
+
+        def record(topic, data, sequence=0):
+            data = msgpack.dumps((topic, data))
+            return RECORD.pack(_topic_hash(topic), sequence, len(data)) + data
+
+        def frame(*records):
+            body = ''.join(records)
+            return HEADER.pack(HEADER_MAGIC, HEADER_VERSION, FLAG_COALESCED,
+                               0, 0, len(body), 0, 1) + body
+
+        # Records with unwanted topic hashes are rejected. Truncated records
+        # are discarded.
+        frames = [frame(record('topic', 'first'),
+                        record('other', 'other'),
+                        record('topic', 'second', 1)),
+                  frame(record('topic', 'third', 2),
+                        record('topic', 'truncated', 3)[:-1])]
+
+        received_buffer = self.send_raw(frames, topics='topic')
+        self.assertEqual([data['payload'] for data in received_buffer],
+                         ['first', 'second', 'third'])
+
+    def test_parity_frames(self):
+        """Test udp receive rebuilds messages with lost fragments."""
+
+        # Create fragments of a message with parity.
+        data = msgpack.dumps((None, os.urandom(20000)))
+        count = 20
+        groups = 4
+        size = _parity_size(len(data), count)
+        message = data + _parity(data, count, groups)
+        frames = [HEADER.pack(HEADER_MAGIC, HEADER_VERSION,
+                              groups << PARITY_SHIFT, 0, 0, len(data), i,
+                              count + groups) +
+                  message[i * size:min(len(data), (i + 1) * size)]
+                  if i < count else
+                  HEADER.pack(HEADER_MAGIC, HEADER_VERSION,
+                              groups << PARITY_SHIFT, 0, 0, len(data), i,
+                              count + groups) +
+                  message[len(data) + (i - count) * size:
+                          len(data) + (i - count + 1) * size]
+                  for i in range(count + groups)]
+
+        # Lose one data fragment from each parity group.
+        for i in [1, 6, 11, 16]:
+            frames[i] = None
+        received_buffer = self.send_raw([frame for frame in frames if frame])
+        self.assertEqual(len(received_buffer), 1)
+        self.assertEqual(received_buffer[0]['payload'],
+                         msgpack.loads(data)[1])
+
+    def test_fixed_frames(self):
+        """Test udp receive rejects fixed size fragments with bad lengths."""
+
+        def frame(length, index, count, fragment):
+            return HEADER.pack(HEADER_MAGIC, HEADER_VERSION, FLAG_FIXED, 0, 0,
+                               length, index, count) + fragment
+
+        data = msgpack.dumps((None, 'x' * 150))
+        size = 100
+
+        # Frames claiming lengths which are too large to reassemble or which
+        # are inconsistent with their fragment size must not be buffered.
+        listener = self.listener(self.connection)
+        received_buffer = list()
+        listener.subscribe(lambda data: received_buffer.append(data))
+        sock = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+        address = (self.connection.url, self.connection.port)
+        for bad in [frame(0xF0000000, 0, 2, 'x' * size),
+                    frame(3 * size, 0, 2, 'x' * size),
+                    frame(size, 0, 2, 'x' * size),
+                    frame(size, 1, 2, 'x' * size)]:
+            sock.sendto(bad, address)
+
+        # Ensure a valid message is still reassembled.
+        sock.sendto(frame(len(data), 1, 2, data[size:]), address)
+        sock.sendto(frame(len(data), 0, 2, data[:size]), address)
+        start_time = time.time()
+        while not received_buffer and (time.time() - start_time) < 0.5:
+            time.sleep(0.01)
+
+        stats = listener.stats['reassembly']
+        sock.close()
+        listener.close()
+        self.assertEqual(len(received_buffer), 1)
+        self.assertEqual(received_buffer[0]['payload'], 'x' * 150)
+        self.assertEqual(stats['pending'], 0)
+        self.assertEqual(stats['completed'], 1)
+
+    def test_reliable_frames(self):
+        """Test udp receive requests lost messages of reliable streams."""
+
+        def frame(sequence, data):
+            data = msgpack.dumps((None, data))
+            return HEADER.pack(HEADER_MAGIC, HEADER_VERSION, FLAG_RELIABLE, 0,
+                               sequence, len(data), 0, 1) + data
+
+        # Send messages with a gap in the sequence numbers.
+        received_buffer = list()
+        listener = self.listener(self.connection)
+        listener.subscribe(lambda data: received_buffer.append(data))
+        sock = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+        sock.settimeout(1.0)
+        address = (self.connection.url, self.connection.port)
+        sock.sendto(frame(0, 'first'), address)
+        sock.sendto(frame(2, 'third'), address)
+
+        # Ensure the lost message is requested from the sender.
+        nack = sock.recv(100)
+        self.assertEqual(HEADER.unpack_from(nack)[2:6],
+                         (FLAG_CONTROL, 0, 1, 0))
+
+        # Ensure retransmitted messages are delivered once.
+        for sequence, data in [(1, 'second'), (1, 'second'), (2, 'third')]:
+            sock.sendto(frame(sequence, data), address)
+
+        start_time = time.time()
+        while len(received_buffer) < 3 and (time.time() - start_time) < 0.5:
+            time.sleep(0.01)
+        time.sleep(0.05)
+
+        stats = listener.stats
+        sock.close()
+        listener.close()
+        self.assertEqual([data['payload'] for data in received_buffer],
+                         ['first', 'third', 'second'])
+        self.assertEqual(stats['nack']['duplicate'], 2)
+        self.assertEqual(stats['sequence']['lost'], 0)
+
+    def test_reliable_loss(self):
+        """Test udp receive recovers large reliable messages under loss."""
+
+        # Create the fragments of several large messages.
+        size = 1000
+        payloads = [os.urandom(100 * size) for i in range(3)]
+        messages = list()
+        for sequence, payload in enumerate(payloads):
+            data = msgpack.dumps((None, payload))
+            ranges = _fragments(len(data), size)
+            messages.append([HEADER.pack(HEADER_MAGIC, HEADER_VERSION,
+                                         FLAG_RELIABLE, 0, sequence,
+                                         len(data), index, len(ranges)) +
+                             data[start:end]
+                             for index, (start, end) in enumerate(ranges)])
+
+        received_buffer = list()
+        listener = self.listener(self.connection)
+        listener.subscribe(lambda data: received_buffer.append(data))
+        sock = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+        sock.settimeout(0.1)
+        address = (self.connection.url, self.connection.port)
+
+        # Lose a quarter of the fragments, including retransmissions. Answer
+        # each NACK twice (as if requested by several listeners).
+        lossy = random.Random(0)
+        for frames in messages:
+            for frame in frames:
+                if lossy.random() > 0.25:
+                    sock.sendto(frame, address)
+
+        start_time = time.time()
+        while len(received_buffer) < len(payloads) and \
+              (time.time() - start_time) < 5.0:
+            try:
+                nack = sock.recv(MTU)
+            except socket.timeout:
+                continue
+            header = HEADER.unpack_from(nack)
+            frames = messages[header[4]]
+            indices = struct.unpack_from('!%iH' % header[5], nack,
+                                         HEADER.size)
+            for index in 2 * list(indices or range(len(frames))):
+                if lossy.random() > 0.25:
+                    sock.sendto(frames[index], address)
+
+        stats = listener.stats
+        sock.close()
+        listener.close()
+
+        # Ensure every message was delivered once.
+        self.assertEqual(sorted(data['payload'] for data in received_buffer),
+                         sorted(payloads))
+        self.assertEqual(stats['nack']['abandoned'], 0)
+        self.assertEqual(stats['reassembly']['clobbered'], 0)
+
+    def test_reliable_large(self):
+        """Test udp reliable send/receive of a burst of large messages."""
+
+        # Publish a burst of 10 MB messages within the bounds of the history
+        # and reassembly buffer. Fragments lost by the receive buffer must be
+        # recovered.
+        connection = Connection(self.connection.url, port=26035,
+                                reliable=True)
+        broadcaster = self.broadcaster(connection)
+        listener = self.listener(connection)
+        received_buffer = list()
+        listener.subscribe(lambda data: received_buffer.append(data))
+        for i in range(5):
+            broadcaster.publish((i, 'x' * 10000000))
+
+        start_time = time.time()
+        while len(received_buffer) < 5 and (time.time() - start_time) < 10.0:
+            time.sleep(0.05)
+        stats = listener.stats
+        reliable = broadcaster.stats['reliable']
+        broadcaster.close()
+        listener.close()
+
+        # Ensure every message was delivered once.
+        self.assertEqual(sorted(data['payload'][0]
+                                for data in received_buffer), range(5))
+        self.assertEqual(stats['nack']['abandoned'], 0)
+        self.assertEqual(stats['reassembly']['incomplete'], 0)
+        self.assertEqual(reliable['unavailable'], 0)
+
+    def test_legacy(self):
+        """Test udp receive of frames in the legacy format."""
+
+        frames = [msgpack.dumps(('topic', 'legacy'))]
+        received_buffer = self.send_raw(frames)
+        self.assertEqual(len(received_buffer), 1)
+        self.assertEqual(received_buffer[0]['topic'], 'topic')
+        self.assertEqual(received_buffer[0]['payload'], 'legacy')
+
+    def test_legacy_fragments(self):
+        """Test udp receive of fragments in the legacy format."""
+
+        # Create legacy fragments: (topic, packet, packets, payload). All
+        # fragments except the last are MTU sized.
+        send_string = 'legacy test: %1.8f' % time.time()
+        send_string += 'x' * (MTU - len(send_string) + 100)
+        data = msgpack.dumps(send_string)
+        fragments = [msgpack.dumps(('topic', 2, 2, data[MTU:])),
+                     msgpack.dumps(('topic', 1, 2, data[:MTU]))]
+
+        # Send legacy fragments (out of order) to the listener.
+        received_buffer = self.send_raw(fragments)
+
+        # Ensure the message was received.
+        self.assertEqual(len(received_buffer), 1)
+        self.assertEqual(received_buffer[0]['topic'], 'topic')
+        self.assertEqual(received_buffer[0]['payload'], send_string)
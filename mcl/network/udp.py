@@ -6,12 +6,14 @@ main objects responsible for transmitting data over UDP sockets are:
     - :class:`~.udp.Connection`
     - :class:`~.udp.RawBroadcaster`
     - :class:`~.udp.RawListener`
+    - :class:`~.udp.ShardedListener`
 
 Data are transmitted using IPv6 `multicasts
 <http://en.wikipedia.org/wiki/Multicast>`_. Note that this module inherits the
 advantages and disadvantages of UDP. That is; UDP allows connectionless,
 low-latency broadcasts with no guarantee of delivery, ordering, or duplicate
-protection.
+protection. Broadcasters can optionally retransmit lost messages on request
+(see the ``reliable`` option of :class:`~.udp.Connection`).
 
 Example usage:
 
@@ -59,23 +61,31 @@ Example usage:
 
 .. note::
 
-    It is advised to increase the UDP kernel buffer size:
+    Socket options can be tuned for each connection using the optional
+    parameters of :class:`~.udp.Connection` (buffer sizes, hop limit, fragment
+    size, traffic class, busy polling and segmentation offload). The values
+    granted by the kernel
+    are reported by the ``socket_options`` attribute of broadcasters and
+    listeners.
+
+    By default, listeners request a receive buffer of
+    :data:`.RECEIVE_BUFFER` bytes. The kernel limits the size of the buffer
+    to ``net.core.rmem_max``:
 
         http://lcm.googlecode.com/svn/www/reference/lcm/multicast.html
 
     In linux, a temporary method (does not persist across reboots) of
-    increasing the UDP kernel buffer size to 2MB can be achieved by issuing:
+    increasing the maximum UDP kernel buffer size to 2MB can be achieved by
+    issuing:
 
     .. code-block:: bash
 
         sudo sysctl -w net.core.rmem_max=2097152
-        sudo sysctl -w net.core.rmem_default=2097152
 
-    A permanent solution is to add the following lines to
+    A permanent solution is to add the following line to
     ``/etc/sysctl.conf``::
 
         net.core.rmem_max=2097152
-        net.core.rmem_default=2097152
 
 .. warning::
 
@@ -92,26 +102,1189 @@ Example usage:
 
 """
 
+import os
+import zlib
 import time
+import errno
+import Queue
 import select
+import datetime
 import socket
 import struct
+import numpy
 import msgpack
+import itertools
 import threading
+import collections
+import multiprocessing
+import mcl.network.linux
 import mcl.network.abstract
 
 
 # Use a fixed port number for all UDP messages. Specify maximum transmission
-# unit (MTU) to determine transmission fragmentation.
+# unit (MTU) to determine transmission fragmentation. These are the defaults
+# for the optional parameters of Connection(). By default, the fragment size is
+# the path MTU of the outgoing interface (less the IPv6 and UDP headers) so
+# that datagrams are not fragmented at the IP level. MTU is an upper limit on
+# the default fragment size.
 UDP_PORT = 26000
 ALLOWED_MULTICAST_HOPS = 3
 MTU = 60000
 MTU_MAX = 65000
 
+# Size of IPv6 and UDP headers in bytes.
+IPV6_HEADER = 40
+UDP_HEADER = 8
+
+# Default size of socket receive buffers in bytes. The kernel limits the size
+# to 'net.core.rmem_max'.
+RECEIVE_BUFFER = 2 * 1024 * 1024
+
 # Time in milliseconds to break out of I/O loop. This number determines the
 # responsiveness of RawListeners to stop signals.
 READ_TIMEOUT = 200
 
+# Time to wait for the worker processes of a ShardedListener to start/stop.
+WORKER_TIMEOUT = 10
+
+# On Linux, batch datagrams into single recvmmsg()/sendmmsg() system calls. If
+# the system calls are unavailable, the standard socket interface is used.
+USE_MMSG = True
+MMSG_BATCH = 32
+
+# Share send sockets between broadcasters with the same socket options (see
+# _SocketPool). Reliable broadcasters and broadcasters requesting segmentation
+# offload always use a private socket.
+SHARE_SOCKETS = True
+
+# Fixed size binary header prepended to each datagram. The header contains:
+#
+#     - a magic string identifying the frame (HEADER_MAGIC)
+#     - the version of the header (HEADER_VERSION)
+#     - flags describing the frame (see FLAG_FIXED, FLAG_COALESCED,
+#       PARITY_SHIFT, FLAG_RELIABLE and FLAG_CONTROL)
+#     - a hash of the topic associated with the message (see _topic_hash)
+#     - a sequence number identifying the message
+#     - the total length of the serialised message in bytes
+#     - the index of the fragment in the message (zero-based)
+#     - the number of fragments in the message
+#
+HEADER_MAGIC = 'MC'
+HEADER_VERSION = 1
+HEADER = struct.Struct('!2sBBIIIHH')
+
+# Header flag set on fragments of fixed size. By default, messages are split
+# into fragments of (almost) equal size. If the flag is set, every fragment
+# except the last contains the same number of bytes - the layout required by
+# UDP segmentation offload.
+FLAG_FIXED = 0x01
+
+# Header flag set on datagrams containing several small messages. The header is
+# followed by a sequence of records, each a fixed size binary record header
+# (RECORD) followed by a serialised message. The record header contains the
+# topic hash, the sequence number and the length of the message. The topic
+# hash and sequence number of the frame header are zero.
+FLAG_COALESCED = 0x02
+RECORD = struct.Struct('!III')
+
+# The upper four bits of the header flags contain the number of parity
+# fragments appended to a fragmented message (see _parity). Messages with
+# parity are split into 'count' data fragments of equal size (except the last)
+# followed by the parity fragments.
+PARITY_SHIFT = 4
+PARITY_MAX = 15
+
+# Policies for handling messages published to a full send queue:
+#
+#     - 'block': wait until there is space in the queue
+#     - 'drop_new': discard the published message
+#     - 'drop_old': discard the oldest message in the queue
+#
+OVERFLOW_POLICIES = ('block', 'drop_new', 'drop_old')
+
+# Default burst allowance in bytes of broadcasters pacing data (see
+# Connection).
+PACING_BURST = 64 * 1024
+
+# Socket option setting the IPv6 traffic class (DSCP and ECN bits) and the
+# socket option reporting the path MTU of a connected socket.
+IPV6_TCLASS = getattr(socket, 'IPV6_TCLASS', 67)
+IPV6_MTU = getattr(socket, 'IPV6_MTU', 24)
+
+# Socket option allowing multiple sockets to bind to the same address and port
+# (Linux value if not exposed by the socket module).
+SO_REUSEPORT = getattr(socket, 'SO_REUSEPORT', 15)
+
+# Limits on the buffer used by RawListeners to reassemble fragmented
+# messages. Incomplete messages are discarded (oldest first) if the number of
+# messages or the number of bytes in the buffer exceeds these limits. Messages
+# which receive no fragments for REASSEMBLY_TIMEOUT seconds are discarded.
+REASSEMBLY_MESSAGES = 16
+REASSEMBLY_BYTES = 64 * 1024 * 1024
+REASSEMBLY_TIMEOUT = 2.0
+
+# Number of sequence numbers, behind the most recent sequence number, for
+# which RawListeners record whether a message was received. Messages older
+# than this window are assumed to come from a broadcaster which restarted.
+SEQUENCE_WINDOW = 64
+
+# Header flags of reliable streams (see Connection). Frames sent by reliable
+# broadcasters are marked with FLAG_RELIABLE. Control frames (FLAG_CONTROL)
+# are not delivered to callbacks:
+#
+#     - heartbeats (FLAG_RELIABLE and FLAG_CONTROL) are multicast by
+#       broadcasters and contain the most recent sequence number of a topic
+#     - negative acknowledgements (NACKs, FLAG_CONTROL) are sent by listeners
+#       to a broadcaster and request the retransmission of a message. The
+#       header length is the number of unsigned 16-bit fragment indices
+#       following the header. If there are no indices, the entire message is
+#       requested.
+#
+FLAG_RELIABLE = 0x04
+FLAG_CONTROL = 0x08
+
+# Number of recent messages and bytes reliable broadcasters keep to answer
+# NACKs. Messages evicted from the history can no longer be recovered.
+# Repeated requests for the same fragment (e.g. from several listeners) within
+# RETRANSMIT_HOLDOFF seconds are answered once. At most RETRANSMIT_LIMIT
+# fragments of each message are retransmitted every RETRANSMIT_INTERVAL
+# seconds, bounding the traffic a host can cause by sending NACKs.
+RELIABLE_HISTORY = 1024
+RELIABLE_HISTORY_BYTES = 64 * 1024 * 1024
+RETRANSMIT_HOLDOFF = 0.02
+RETRANSMIT_LIMIT = 1024
+RETRANSMIT_INTERVAL = 0.05
+
+# Number of sequence numbers, behind the most recent sequence number, for
+# which listeners of reliable streams record delivered messages (to reject
+# retransmitted duplicates) and request lost messages.
+RELIABLE_WINDOW = 1024
+
+# Listeners wait NACK_DELAY seconds before requesting a lost message (allowing
+# reordered datagrams to arrive) and NACK_INTERVAL seconds between requests
+# for the same message. Messages which have not arrived after NACK_RETRIES
+# requests are abandoned. Each NACK lists at most NACK_INDICES fragments.
+NACK_DELAY = 0.005
+NACK_INTERVAL = 0.05
+NACK_RETRIES = 20
+NACK_INDICES = 512
+
+# Reliable broadcasters send a heartbeat every HEARTBEAT_INTERVAL seconds for
+# each topic which has been idle for at least one interval and for at most
+# HEARTBEAT_LINGER seconds. Heartbeats allow listeners to detect the loss of
+# the last message published on a topic.
+HEARTBEAT_INTERVAL = 0.1
+HEARTBEAT_LINGER = 2.0
+
+# Maximum number of multicast groups topics can be mapped onto (see
+# Connection). Each listener joins one group per subscribed topic, or every
+# group if it subscribes to all topics.
+TOPIC_GROUPS_MAX = 256
+
+
+def _topic_hash(topic):
+    """Return the 32-bit hash of a topic transmitted in the frame header.
+
+    Listeners use the hash to reject unwanted topics without decoding the
+    frame. Hash collisions are resolved by comparing topics after the frame has
+    been decoded.
+
+    Args:
+        topic (str): Topic associated with a message. If :data:`None`, the
+            hash is zero.
+
+    Returns:
+        int: Unsigned 32-bit hash of the topic.
+
+    """
+
+    if topic is None:
+        return 0
+    else:
+        return zlib.crc32(topic) & 0xFFFFFFFF
+
+
+def _topic_group(address, topic_hash, groups):
+    """Return the multicast group a topic is sent to.
+
+    Topics are mapped onto the ``groups`` addresses which follow the base
+    address of a connection, by incrementing the lower 32 bits (the group ID)
+    of the base address. Frames without a topic are sent to the base address.
+
+    Args:
+        address (str): IPv6 base address of the connection.
+        topic_hash (int): Hash of the topic (see :func:`._topic_hash`).
+        groups (int): Number of groups topics are mapped onto. If
+            :data:`None`, all topics are sent to the base address.
+
+    Returns:
+        str: IPv6 address of the multicast group.
+
+    """
+
+    if not groups or not topic_hash:
+        return address
+
+    prefix, group_id = struct.unpack('!12sI', socket.inet_pton(socket.AF_INET6,
+                                                               address))
+    group_id = (group_id + 1 + topic_hash % groups) & 0xFFFFFFFF
+    return socket.inet_ntop(socket.AF_INET6, struct.pack('!12sI', prefix,
+                                                         group_id))
+
+
+def _configure_socket(sock, connection):
+    """Apply the socket options of a connection to a socket.
+
+    Options set to :data:`None` are left at the system default. Options which
+    the kernel refuses (e.g. insufficient privileges or an unsupported
+    platform) are ignored. The values granted by the kernel are read back
+    from the socket and returned.
+
+    Args:
+        sock (:class:`socket.socket`): Socket to configure.
+        connection (:class:`.Connection`): Connection object.
+
+    Returns:
+        dict: The value of each option as reported by the kernel. If an option
+            could not be read, its value is :data:`None`.
+
+    """
+
+    options = (('rcvbuf', socket.SOL_SOCKET, socket.SO_RCVBUF),
+               ('sndbuf', socket.SOL_SOCKET, socket.SO_SNDBUF),
+               ('hops', socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_HOPS),
+               ('tclass', socket.IPPROTO_IPV6, IPV6_TCLASS),
+               ('busy_poll', socket.SOL_SOCKET,
+                mcl.network.linux.SO_BUSY_POLL))
+
+    granted = dict()
+    for name, level, option in options:
+        value = getattr(connection, name)
+        if value is not None:
+            try:
+                sock.setsockopt(level, option, value)
+            except socket.error:
+                pass
+
+        try:
+            granted[name] = sock.getsockopt(level, option)
+        except socket.error:
+            granted[name] = None
+
+    return granted
+
+
+def _fragment_size(family, sockaddr):
+    """Return the default fragment size for datagrams sent to an address.
+
+    The fragment size is the path MTU of the interface used to reach the
+    address, less the IPv6 and UDP headers, so that datagrams are not
+    fragmented at the IP level. If one IP fragment is lost, the entire
+    datagram is lost. The fragment size is limited to :data:`.MTU`. If the
+    path MTU cannot be determined, :data:`.MTU` is returned.
+
+    Args:
+        family (int): Address family of the socket.
+        sockaddr (tuple): Destination socket address.
+
+    Returns:
+        int: Maximum size of each datagram in bytes (including the frame
+            header).
+
+    """
+
+    # Connecting a datagram socket selects a route to the address (no data
+    # is sent). The path MTU of the route can then be queried.
+    sock = socket.socket(family, socket.SOCK_DGRAM)
+    try:
+        sock.connect(sockaddr)
+        mtu = sock.getsockopt(socket.IPPROTO_IPV6, IPV6_MTU)
+        size = mtu - IPV6_HEADER - UDP_HEADER
+        if size > HEADER.size:
+            return min(size, MTU)
+        else:
+            return MTU                                       # pragma: no cover
+    except socket.error:                                     # pragma: no cover
+        return MTU
+    finally:
+        sock.close()
+
+
+def _fragments(length, size):
+    """Return the byte ranges used to split a message into fragments.
+
+    Messages are split into the smallest number of fragments containing at most
+    ``size`` bytes. Data is distributed evenly over the fragments so that the
+    byte range of any fragment can be recovered from the message length, the
+    number of fragments and the fragment index (see :func:`._fragment_range`).
+
+    Args:
+        length (int): Length of the message in bytes.
+        size (int): Maximum number of bytes in a fragment.
+
+    Returns:
+        list: List of ``(start, end)`` byte ranges, one for each fragment.
+
+    """
+
+    count = max(1, (length + size - 1) // size)
+    return [_fragment_range(length, count, i) for i in range(count)]
+
+
+def _fragment_range(length, count, index):
+    """Return the byte range of a fragment within a message."""
+
+    return (index * length // count, (index + 1) * length // count)
+
+
+def _fixed_fragment_range(length, count, index, size):
+    """Return the byte range of a fixed size fragment within a message.
+
+    Every fragment except the last contains ``size`` bytes. The last fragment
+    contains the remainder of the message.
+
+    """
+
+    if index < count - 1:
+        return (index * size, (index + 1) * size)
+    else:
+        return (length - size, length)
+
+
+def _parity_size(length, count):
+    """Return the size of the data fragments of a message with parity."""
+
+    return (length + count - 1) // count
+
+
+def _parity(data, count, groups):
+    """Return XOR parity fragments for a message.
+
+    The message is split into ``count`` data fragments of
+    :func:`._parity_size` bytes (the last fragment is zero padded). Data
+    fragment ``i`` is assigned to parity group ``i % groups``. Each parity
+    fragment is the XOR of the data fragments in its group, so that one lost
+    data fragment in each group can be recovered (see :func:`._recover`).
+
+    Args:
+        data (str): Serialised message.
+        count (int): Number of data fragments.
+        groups (int): Number of parity fragments.
+
+    Returns:
+        str: The parity fragments, concatenated.
+
+    """
+
+    size = _parity_size(len(data), count)
+    rows = numpy.zeros(count * size, dtype=numpy.uint8)
+    rows[:len(data)] = numpy.frombuffer(data, dtype=numpy.uint8)
+    rows = rows.reshape(count, size)
+    parity = numpy.empty((groups, size), dtype=numpy.uint8)
+    for group in range(groups):
+        parity[group] = numpy.bitwise_xor.reduce(rows[group::groups], axis=0)
+
+    return parity.tostring()
+
+
+def _recover(message, received, length, groups):
+    """Rebuild lost data fragments of a message from parity fragments.
+
+    Args:
+        message (bytearray): Buffer containing the data fragments followed by
+            the parity fragments. Recovered fragments are written in place.
+        received (list): Flags indicating which fragments (data then parity)
+            have been received.
+        length (int): Length of the message in bytes.
+        groups (int): Number of parity fragments.
+
+    Returns:
+        bool: :data:`True` if all data fragments were received or recovered.
+
+    """
+
+    count = len(received) - groups
+    size = _parity_size(length, count)
+
+    # Each parity group can recover at most one lost data fragment.
+    missing = [i for i in range(count) if not received[i]]
+    lost = [i % groups for i in missing]
+    if len(set(lost)) != len(lost) or \
+       not all(received[count + group] for group in lost):
+        return False
+
+    # XOR the parity fragment with the received fragments in its group.
+    data = numpy.frombuffer(message, dtype=numpy.uint8)
+    for index, group in zip(missing, lost):
+        start = length + group * size
+        fragment = data[start:start + size].copy()
+        for i in range(group, count, groups):
+            if i != index:
+                start, end = i * size, min(length, (i + 1) * size)
+                fragment[:end - start] ^= data[start:end]
+
+        start, end = index * size, min(length, (index + 1) * size)
+        data[start:end] = fragment[:end - start]
+
+    return True
+
+
+class _ReassemblyBuffer(object):
+    """Bounded buffer for reassembling fragmented messages.
+
+    Fragments of a message are copied directly into a message buffer which is
+    allocated when the first fragment of the message arrives. Once all
+    fragments of a message have been received, a view of the message is
+    returned. Note that fragments can be received out of order.
+
+    The buffer is bounded by the number of incomplete messages, the number of
+    bytes allocated to incomplete messages and the time since incomplete
+    messages last received a fragment. When a bound is exceeded, the oldest
+    incomplete messages are discarded. This prevents lost fragments from
+    accumulating a large history of incomplete messages (memory leak).
+
+    Messages with parity fragments are returned as soon as the lost data
+    fragments can be recovered (see :func:`._recover`). Fragments of these
+    messages which arrive after the message was returned are ignored.
+
+    Args:
+        max_messages (int): Maximum number of incomplete messages.
+        max_bytes (int): Maximum number of bytes allocated to incomplete
+            messages.
+        timeout (float): Time in seconds without receiving a fragment after
+            which an incomplete message is discarded.
+
+    Attributes:
+        stats (dict): Counters recording the number of messages which were:
+            ``completed``, discarded while ``incomplete`` because a bound was
+            exceeded, discarded because they ``expired`` and discarded because
+            they were ``clobbered`` by a message with the same identifier and
+            the number of messages ``recovered`` from parity fragments. The
+            number of fragments ``dropped`` because their message is larger
+            than ``max_bytes``, the number of ``repeated`` fragments ignored,
+            the number of ``inconsistent`` fragments ignored because they do
+            not fit in their message or disagree with the fragments already
+            received, the number of ``pending`` messages and
+            ``pending_bytes`` are also reported.
+
+    """
+
+    def __init__(self, max_messages, max_bytes, timeout):
+        """Document the __init__ method at the class level."""
+
+        self.__max_messages = max_messages
+        self.__max_bytes = max_bytes
+        self.__timeout = timeout
+
+        # Messages are stored in the order they were queued. Each entry is a
+        # list containing the time the message was queued, the message
+        # buffer, flags indicating which fragments have been received, the
+        # number of fragments received, the length of the message received
+        # so far, the parity parameters and the time the last fragment was
+        # received. Messages are re-queued when they reach the head of the
+        # queue after receiving fragments (see expire).
+        self.__messages = collections.OrderedDict()
+        self.__bytes = 0
+        self.__stats = {'completed': 0,
+                        'incomplete': 0,
+                        'expired': 0,
+                        'clobbered': 0,
+                        'recovered': 0,
+                        'dropped': 0,
+                        'repeated': 0,
+                        'inconsistent': 0}
+
+        # Identifiers of recently completed messages with parity fragments.
+        # The remaining fragments of these messages are ignored.
+        self.__completed = collections.OrderedDict()
+
+    @property
+    def stats(self):
+        stats = dict(self.__stats)
+        stats['pending'] = len(self.__messages)
+        stats['pending_bytes'] = self.__bytes
+        return stats
+
+    def __discard(self, identifier, reason):
+        """Discard an incomplete message."""
+
+        entry = self.__messages.pop(identifier)
+        self.__bytes -= len(entry[1])
+        self.__stats[reason] += 1
+
+    def expire(self, now=None):
+        """Discard messages which have been incomplete for too long.
+
+        Args:
+            now (float): Current time. If :data:`None`, :func:`time.time` is
+                used.
+
+        """
+
+        now = time.time() if now is None else now
+        while self.__messages:
+            identifier, entry = next(self.__messages.iteritems())
+
+            # Messages behind the head were queued later and received their
+            # last fragment after they were queued.
+            if now - entry[0] <= self.__timeout:
+                break
+
+            # Messages which are still receiving fragments (e.g. large
+            # messages recovering lost fragments) are moved to the back.
+            elif now - entry[6] > self.__timeout:
+                self.__discard(identifier, 'expired')
+            else:
+                del self.__messages[identifier]
+                entry[0] = entry[6]
+                self.__messages[identifier] = entry
+
+    def missing(self, identifier):
+        """Return the indices of the fragments of a message not received.
+
+        Args:
+            identifier (tuple): Hashable identifier unique to the message.
+
+        Returns:
+            list: Indices of the fragments which have not been received. If
+                the message is not in the buffer (it has not been started,
+                was completed or was discarded), :data:`None` is returned.
+
+        """
+
+        entry = self.__messages.get(identifier)
+        if entry is None:
+            return None
+        else:
+            return [i for i, received in enumerate(entry[2]) if not received]
+
+    def insert(self, identifier, index, count, size, start, fragment,
+               parity=None, clobber=True):
+        """Copy a fragment into the buffer.
+
+        Args:
+            identifier (tuple): Hashable identifier unique to the message.
+            index (int): Index of the fragment in the message (zero-based).
+            count (int): Number of fragments in the message.
+            size (int): Number of bytes to allocate for the message.
+            start (int): Position of the fragment in the message.
+            fragment (buffer): Fragment data.
+            parity (tuple): If the message has parity fragments, a tuple
+                ``(length, groups)`` containing the length of the message and
+                the number of parity fragments (the last fragments of the
+                message).
+            clobber (bool): If :data:`False`, a fragment which has already
+                been received is ignored instead of discarding the message
+                (e.g. retransmissions of messages with unique identifiers).
+
+        Returns:
+            :class:`buffer`: A view of the reassembled message if all
+                fragments of the message have been received. Otherwise
+                :data:`None` is returned.
+
+        """
+
+        now = time.time()
+        entry = self.__messages.get(identifier)
+        end = start + len(fragment)
+
+        # The message has already been recovered from parity fragments.
+        if parity and identifier in self.__completed:
+            return None
+
+        # Ignore fragments which do not fit in the message or which describe
+        # a different message layout than the fragments already received
+        # (e.g. a corrupt header or a reused identifier).
+        if not 0 <= index < count or start < 0 or end > size:
+            self.__stats['inconsistent'] += 1
+            return None
+        elif entry is not None and (len(entry[2]) != count or
+                                    len(entry[1]) != size or
+                                    entry[5] != parity):
+            self.__stats['inconsistent'] += 1
+            return None
+
+        # A fragment which has already been received is clobbering cached
+        # data. The identifier is not unique (e.g. the identifier has wrapped
+        # or the sender restarted). Clobber the 'stale' message.
+        if entry is not None and entry[2][index]:
+            if not clobber:
+                self.__stats['repeated'] += 1
+                return None
+            self.__discard(identifier, 'clobbered')
+            entry = None
+
+        # The message does not exist in the buffer. Allocate space for the
+        # complete message.
+        if entry is None:
+            self.expire(now)
+
+            # A single message larger than the buffer can never be stored.
+            if size > self.__max_bytes:
+                self.__stats['dropped'] += 1
+                return None
+
+            # Make room for the new message by discarding the oldest
+            # incomplete messages.
+            while self.__messages and \
+                  ((len(self.__messages) >= self.__max_messages) or
+                   (self.__bytes + size > self.__max_bytes)):
+                self.__discard(next(iter(self.__messages)), 'incomplete')
+
+            entry = [now, bytearray(size), [False] * count, 0, 0, parity,
+                     now]
+            self.__messages[identifier] = entry
+            self.__bytes += size
+
+        # Store fragment.
+        entry[1][start:end] = fragment
+        entry[2][index] = True
+        entry[3] += 1
+        entry[4] = max(entry[4], end)
+        entry[6] = now
+
+        # Enough fragments have been received to recover a message with
+        # parity. Once all data fragments have been received, parity is not
+        # needed. Free space in buffer.
+        if parity and entry[3] >= count - parity[1]:
+            length, groups = parity
+            if not _recover(entry[1], entry[2], length, groups):
+                return None
+            if not all(entry[2][:count - groups]):
+                self.__stats['recovered'] += 1
+
+            del self.__messages[identifier]
+            self.__bytes -= len(entry[1])
+            self.__stats['completed'] += 1
+            self.__completed[identifier] = True
+            if len(self.__completed) > 4 * self.__max_messages:
+                self.__completed.popitem(last=False)
+            return buffer(entry[1], 0, length)
+
+        # All fragments have been received. Free space in buffer.
+        elif entry[3] == count:
+            del self.__messages[identifier]
+            self.__bytes -= len(entry[1])
+            self.__stats['completed'] += 1
+            return buffer(entry[1], 0, entry[4])
+
+        else:
+            return None
+
+
+class _TokenBucket(object):
+    """Limit the rate at which data is sent.
+
+    The bucket fills with tokens (bytes) at a constant rate, up to the burst
+    size. Sending data consumes tokens. If there are not enough tokens, the
+    bucket goes into debt and the caller sleeps until the debt is repaid. Data
+    larger than the burst size can be sent, but the average rate never
+    exceeds the configured rate.
+
+    Args:
+        rate (int): Rate in bytes per second.
+        burst (int): Maximum number of bytes sent without pacing.
+
+    Attributes:
+        rate (int): Rate in bytes per second.
+        burst (int): Maximum number of bytes sent without pacing.
+        stats (dict): Number of ``bytes`` sent, number of ``waits``, the total
+            time in seconds requested by waits (``wait_time``), the total time
+            slept in excess of the requested time (``oversleep``) and the
+            average ``throughput`` in bytes per second since the first send.
+
+    """
+
+    def __init__(self, rate, burst):
+        """Document the __init__ method at the class level."""
+
+        self.__rate = float(rate)
+        self.__burst = burst
+        self.__tokens = float(burst)
+        self.__time = None
+        self.__start = None
+        self.__lock = threading.Lock()
+        self.__stats = {'bytes': 0,
+                        'waits': 0,
+                        'wait_time': 0.0,
+                        'oversleep': 0.0}
+
+    @property
+    def rate(self):
+        return self.__rate
+
+    @property
+    def burst(self):
+        return self.__burst
+
+    @property
+    def stats(self):
+        stats = dict(self.__stats)
+        elapsed = (self.__time - self.__start) if self.__start else 0.0
+        stats['throughput'] = stats['bytes'] / elapsed if elapsed > 0 else 0.0
+        return stats
+
+    def consume(self, length):
+        """Consume tokens, sleeping if the bucket is in debt.
+
+        The lock is held while sleeping so that concurrent senders are paced
+        together.
+
+        Args:
+            length (int): Number of bytes to send.
+
+        """
+
+        with self.__lock:
+            now = time.time()
+            if self.__start is None:
+                self.__start = now
+            else:
+                self.__tokens = min(self.__burst, self.__tokens +
+                                    (now - self.__time) * self.__rate)
+
+            self.__tokens -= length
+            self.__stats['bytes'] += length
+
+            # Wait until the debt has been repaid.
+            if self.__tokens < 0:
+                delay = -self.__tokens / self.__rate
+                time.sleep(delay)
+                slept = time.time() - now
+                self.__stats['waits'] += 1
+                self.__stats['wait_time'] += delay
+                self.__stats['oversleep'] += max(0.0, slept - delay)
+                self.__tokens += slept * self.__rate
+                now += slept
+
+            self.__time = now
+
+
+class _SequenceTracker(object):
+    """Count lost, duplicate and reordered messages from sequence numbers.
+
+    Broadcasters stamp each message with a sequence number which increments
+    with each message published on a topic. The tracker records the most
+    recent sequence number received on each ``(sender, topic)`` stream and a
+    bit mask of the messages received in the preceding
+    :data:`.SEQUENCE_WINDOW` sequence numbers. From this state:
+
+        - a jump forward in sequence numbers is counted as lost messages
+        - a message filling a gap in the window is counted as reordered and
+          is no longer counted as lost
+        - a message already received in the window is counted as a duplicate
+        - a message older than the window resets the stream (the broadcaster
+          is assumed to have restarted)
+
+    Sequence numbers are unsigned 32-bit integers and may wrap around.
+
+    Attributes:
+        stats (dict): Number of messages ``received``, ``lost``,
+            ``duplicate``, ``reordered`` and the number of stream ``reset``
+            events. Counts for each sender are reported in ``senders``.
+
+    """
+
+    COUNTERS = ('received', 'lost', 'duplicate', 'reordered', 'reset')
+
+    def __init__(self):
+        """Document the __init__ method at the class level."""
+
+        # Each stream is a list containing the most recent sequence number and
+        # the bit mask of received sequence numbers. Bit 'n' of the mask
+        # records whether the sequence number 'n' behind the most recent
+        # sequence number was received.
+        self.__streams = dict()
+        self.__senders = dict()
+        self.__mask = (1 << SEQUENCE_WINDOW) - 1
+
+    @property
+    def stats(self):
+        senders = dict()
+        for sender, counts in self.__senders.items():
+            senders[sender] = dict(zip(self.COUNTERS, counts))
+
+        stats = dict((name, sum(counts[i] for counts in
+                                self.__senders.itervalues()))
+                     for i, name in enumerate(self.COUNTERS))
+        stats['senders'] = senders
+        return stats
+
+    def update(self, sender, stream, sequence):
+        """Record a sequence number received from a sender.
+
+        Args:
+            sender (tuple): Address of the sender.
+            stream (obj): Hashable identifier of the stream (topic) on which
+                the message was sent.
+            sequence (int): Sequence number of the message.
+
+        """
+
+        counts = self.__senders.get(sender)
+        if counts is None:
+            counts = [0] * len(self.COUNTERS)
+            self.__senders[sender] = counts
+        counts[0] += 1
+
+        state = self.__streams.get((sender, stream))
+        if state is None:
+            self.__streams[(sender, stream)] = [sequence, 1]
+            return
+
+        # Find signed distance from the most recent sequence number.
+        delta = (sequence - state[0]) & 0xFFFFFFFF
+        if delta >= 0x80000000:
+            delta -= 0x100000000
+
+        # New message. Count skipped sequence numbers as lost.
+        if delta > 0:
+            counts[1] += delta - 1
+            state[0] = sequence
+            state[1] = ((state[1] << delta) | 1) & self.__mask
+
+        # Old message within the window.
+        elif -delta < SEQUENCE_WINDOW:
+            bit = 1 << -delta
+            if state[1] & bit:
+                counts[2] += 1
+            else:
+                state[1] |= bit
+                counts[1] -= 1
+                counts[3] += 1
+
+        # Old message outside the window. Restart stream.
+        else:
+            counts[4] += 1
+            state[0] = sequence
+            state[1] = 1
+
+
+class _NackTracker(object):
+    """Detect lost messages on reliable streams and schedule NACKs.
+
+    The tracker records the most recent sequence number received on each
+    ``(sender, topic)`` stream, a bit mask of the messages delivered in the
+    preceding :data:`.RELIABLE_WINDOW` sequence numbers and the messages
+    which are missing:
+
+        - a jump forward in sequence numbers, or a heartbeat announcing a
+          sequence number which has not been received, marks the skipped
+          messages as missing
+        - a fragment of a missing message removes the message from the
+          missing set. Incomplete fragmented messages are tracked until
+          they are delivered or discarded by the reassembly buffer
+        - a message which has already been delivered (e.g. a retransmission
+          requested by another listener) is rejected as a duplicate
+
+    The first heartbeat received from a stream marks the announced message as
+    missing, so that listeners which join late receive the most recent
+    message.
+
+    Missing messages are requested :data:`.NACK_DELAY` seconds after they
+    were detected and every :data:`.NACK_INTERVAL` seconds thereafter, up to
+    :data:`.NACK_RETRIES` times. Requests for incomplete messages which
+    received fragments since the previous request are not counted, so that
+    large messages missing more than :data:`.NACK_INDICES` fragments are not
+    abandoned while they are being recovered.
+
+    Attributes:
+        pending (bool): Whether any messages are missing.
+        stats (dict): Number of messages detected as ``missing``, the number
+            of ``nacks`` requested, the number of ``duplicate`` messages
+            rejected and the number of messages ``abandoned`` after
+            :data:`.NACK_RETRIES` requests.
+
+    """
+
+    def __init__(self):
+        """Document the __init__ method at the class level."""
+
+        # Each stream is a list containing the full address of the sender,
+        # the most recent sequence number, the bit mask of delivered sequence
+        # numbers and a dictionary of missing sequence numbers. Each missing
+        # message and each incomplete fragmented message is a list containing
+        # the time it was detected, the time it was last requested, the
+        # number of requests and the number of fragments missing when it was
+        # last requested.
+        self.__streams = dict()
+        self.__fragments = dict()
+        self.__mask = (1 << RELIABLE_WINDOW) - 1
+        self.__stats = {'missing': 0,
+                        'nacks': 0,
+                        'duplicate': 0,
+                        'abandoned': 0}
+
+    @property
+    def pending(self):
+        return bool(self.__fragments) or \
+            any(state[3] for state in self.__streams.itervalues())
+
+    @property
+    def stats(self):
+        return dict(self.__stats)
+
+    def __advance(self, state, sequence, now):
+        """Move a stream to a newer sequence number, marking skipped messages.
+
+        Returns the signed distance from the most recent sequence number.
+
+        """
+
+        delta = (sequence - state[1]) & 0xFFFFFFFF
+        if delta >= 0x80000000:
+            delta -= 0x100000000
+
+        if delta > 0:
+            for i in range(max(1, delta - RELIABLE_WINDOW), delta):
+                skipped = (state[1] + i) & 0xFFFFFFFF
+                state[3][skipped] = [now, None, 0, None]
+                self.__stats['missing'] += 1
+            state[1] = sequence
+            state[2] = (state[2] << delta) & self.__mask
+
+        return delta
+
+    def receive(self, sender, stream, sequence, now=None):
+        """Record a frame received on a reliable stream.
+
+        Args:
+            sender (tuple): Address of the sender.
+            stream (int): Topic hash of the stream.
+            sequence (int): Sequence number of the message.
+            now (float): Current time. If :data:`None`, :func:`time.time` is
+                used.
+
+        Returns:
+            bool: :data:`False` if the message has already been delivered.
+
+        """
+
+        now = time.time() if now is None else now
+        key = (sender[:2], stream)
+        state = self.__streams.get(key)
+        if state is None:
+            self.__streams[key] = [sender, sequence, 0, dict()]
+            return True
+
+        state[0] = sender
+        delta = self.__advance(state, sequence, now)
+
+        # Old message within the window.
+        if -RELIABLE_WINDOW < delta <= 0:
+            state[3].pop(sequence, None)
+            if (state[2] >> -delta) & 1:
+                self.__stats['duplicate'] += 1
+                return False
+
+        # Old message outside the window. Restart stream.
+        elif delta <= 0:
+            state[1:] = [sequence, 0, dict()]
+
+        return True
+
+    def heartbeat(self, sender, stream, sequence, now=None):
+        """Record the most recent sequence number announced by a heartbeat."""
+
+        now = time.time() if now is None else now
+        key = (sender[:2], stream)
+        state = self.__streams.get(key)
+        if state is None:
+            self.__streams[key] = [sender, sequence, 0,
+                                   {sequence: [now, None, 0, None]}]
+            self.__stats['missing'] += 1
+        else:
+            state[0] = sender
+            delta = self.__advance(state, sequence, now)
+
+            # The announced message is missing as well.
+            if delta > 0:
+                state[3][sequence] = [now, None, 0, None]
+                self.__stats['missing'] += 1
+
+    def fragment(self, sender, stream, sequence, now=None):
+        """Record an incomplete fragmented message."""
+
+        key = (sender[:2], stream, sequence)
+        if key not in self.__fragments:
+            now = time.time() if now is None else now
+            self.__fragments[key] = [now, None, 0, None]
+
+    def deliver(self, sender, stream, sequence):
+        """Record a delivered message."""
+
+        self.__fragments.pop((sender[:2], stream, sequence), None)
+        state = self.__streams.get((sender[:2], stream))
+        if state is not None:
+            delta = (state[1] - sequence) & 0xFFFFFFFF
+            if delta < RELIABLE_WINDOW:
+                state[2] |= 1 << delta
+                state[3].pop(sequence, None)
+
+    def __due(self, entry, now):
+        """Return whether a missing message should be requested now."""
+
+        if now - entry[0] < NACK_DELAY or \
+           (entry[1] is not None and now - entry[1] < NACK_INTERVAL):
+            return False
+        else:
+            entry[1] = now
+            entry[2] += 1
+            return True
+
+    def requests(self, missing, now=None):
+        """Return the NACKs due.
+
+        Args:
+            missing (callable): Function returning the indices of the missing
+                fragments of an incomplete message from its identifier
+                ``(sender, stream, sequence)`` (see
+                :meth:`._ReassemblyBuffer.missing`). If the message is no
+                longer incomplete, the function returns :data:`None`.
+            now (float): Current time. If :data:`None`, :func:`time.time` is
+                used.
+
+        Returns:
+            list: List of ``(address, stream, sequence, indices)`` tuples.
+                The address is the full address of the sender. If
+                ``indices`` is empty, the entire message is requested.
+
+        """
+
+        now = time.time() if now is None else now
+        nacks = list()
+
+        # Incomplete messages. Messages discarded by the reassembly buffer
+        # before they were delivered are requested in full.
+        for key, entry in self.__fragments.items():
+            state = self.__streams[key[:2]]
+            indices = missing(key)
+            if indices is None:
+                del self.__fragments[key]
+                delta = (state[1] - key[2]) & 0xFFFFFFFF
+                if delta < RELIABLE_WINDOW and not (state[2] >> delta) & 1:
+                    state[3][key[2]] = entry
+            elif self.__due(entry, now):
+                if entry[3] is not None and len(indices) < entry[3]:
+                    entry[2] = 1
+                entry[3] = len(indices)
+                if entry[2] > NACK_RETRIES:
+                    del self.__fragments[key]
+                    self.__stats['abandoned'] += 1
+                else:
+                    nacks.append((state[0], key[1], key[2],
+                                  indices[:NACK_INDICES]))
+
+        # Missing messages.
+        for key, state in self.__streams.iteritems():
+            for sequence, entry in state[3].items():
+                if self.__due(entry, now):
+                    if entry[2] > NACK_RETRIES:
+                        del state[3][sequence]
+                        self.__stats['abandoned'] += 1
+                    else:
+                        nacks.append((state[0], key[1], sequence, ()))
+
+        self.__stats['nacks'] += len(nacks)
+        return nacks
+
+
+class _SocketPool(object):
+    """Reference-counted pool of sockets shared by broadcasters.
+
+    Broadcasters which request the same address family and socket options
+    share one send socket. The socket is closed when the last broadcaster
+    using it releases it. Listeners identify the messages of a sender by the
+    source address of the socket, so broadcasters sharing a socket also share
+    the sequence numbers of each destination address and topic (a
+    ``defaultdict`` of counters).
+
+    Sockets are not shared across processes: a process created by ``fork``
+    opens new sockets.
+
+    Attributes:
+        stats (dict): Number of open ``sockets`` and the number of
+            ``references`` held by broadcasters.
+
+    """
+
+    def __init__(self):
+        """Document the __init__ method at the class level."""
+
+        # Each entry is a list containing the socket, the socket options
+        # granted by the kernel, the sequence counters and the number of
+        # references.
+        self.__entries = dict()
+        self.__lock = threading.Lock()
+
+    @property
+    def stats(self):
+        with self.__lock:
+            return {'sockets': len(self.__entries),
+                    'references': sum(entry[3] for entry in
+                                      self.__entries.itervalues())}
+
+    @staticmethod
+    def __key(family, connection):
+        """Return the key of the socket used by a connection."""
+
+        return (os.getpid(), family, connection.rcvbuf, connection.sndbuf,
+                connection.hops, connection.tclass, connection.busy_poll)
+
+    def acquire(self, family, connection):
+        """Return a send socket configured for a connection.
+
+        Args:
+            family (int): Address family of the socket.
+            connection (:class:`.Connection`): Connection object.
+
+        Returns:
+            tuple: The socket, a copy of the socket options granted by the
+                kernel (see :func:`._configure_socket`) and the sequence
+                counters shared by users of the socket.
+
+        """
+
+        key = self.__key(family, connection)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                sock = socket.socket(family, socket.SOCK_DGRAM)
+                try:
+                    options = _configure_socket(sock, connection)
+                except:
+                    sock.close()                             # pragma: no cover
+                    raise                                    # pragma: no cover
+                entry = [sock, options,
+                         collections.defaultdict(itertools.count), 0]
+                self.__entries[key] = entry
+
+            entry[3] += 1
+            return entry[0], dict(entry[1]), entry[2]
+
+    def release(self, sock):
+        """Release a socket returned by :meth:`.acquire`.
+
+        The socket is closed when it is no longer used.
+
+        Args:
+            sock (:class:`socket.socket`): Socket to release.
+
+        """
+
+        with self.__lock:
+            for key, entry in self.__entries.items():
+                if entry[0] is sock:
+                    entry[3] -= 1
+                    if entry[3] == 0:
+                        del self.__entries[key]
+                        sock.close()
+                    return
+
+
+# Send sockets shared by the broadcasters of this process.
+_SOCKETS = _SocketPool()
+
 
 class RawBroadcaster(mcl.network.abstract.RawBroadcaster):
     """Send data over the network using a UDP socket.
@@ -119,7 +1292,53 @@ class RawBroadcaster(mcl.network.abstract.RawBroadcaster):
     The :class:`~.udp.RawBroadcaster` object allows data to be published over a
     UDP socket. The object marshalls broadcasts and ensures large items will be
     fragmented into smaller sub-packets which obey the network maximum
-    transmission unit (MTU) constraints.
+    transmission unit (MTU) constraints. By default, the fragment size is
+    determined from the path MTU of the outgoing interface so that datagrams
+    are not fragmented at the IP level.
+
+    If segmentation offload is requested (see :class:`.Connection`) and
+    supported by the kernel, the fragments of a message are passed to the
+    kernel in buffers of up to :data:`~.linux.UDP_MAX_SEGMENTS` fragments
+    which the kernel splits into datagrams. If the kernel rejects a buffer,
+    offload is disabled and fragments are sent individually.
+
+    If coalescing is requested (see :class:`.Connection`), small messages are
+    not sent immediately. Messages are packed into one datagram until the
+    datagram would exceed the fragment size or the oldest message has been
+    delayed for the maximum delay. Large messages are sent immediately, after
+    any pending messages. Call :meth:`.flush` to send pending messages
+    immediately.
+
+    If a send queue is requested (see :class:`.Connection`), :meth:`.publish`
+    does not block while data is sent. Messages are serialised on the calling
+    thread and sent by a background thread. If the queue is full, messages are
+    handled according to the overflow policy (see
+    :data:`.OVERFLOW_POLICIES`). Call :meth:`.flush` to wait until queued
+    messages have been sent.
+
+    If a rate is requested (see :class:`.Connection`), datagrams are paced by
+    a token bucket so that bursts of fragments do not overrun the buffers of
+    receivers and switches. Up to ``burst`` bytes are sent back-to-back.
+
+    If parity is requested (see :class:`.Connection`), XOR parity fragments are
+    appended to fragmented messages so that listeners can rebuild messages
+    with lost fragments. Segmentation offload is not used for messages with
+    parity.
+
+    If reliable delivery is requested (see :class:`.Connection`), the most
+    recent messages are kept in a bounded history (see
+    :data:`.RELIABLE_HISTORY`). A background thread answers negative
+    acknowledgements (NACKs) sent by listeners by retransmitting the requested
+    fragments and multicasts heartbeats announcing the most recent sequence
+    number of recently idle topics. Segmentation offload is not used by
+    reliable broadcasters.
+
+    Broadcasters in the same process with the same socket options share a
+    reference-counted send socket (see :data:`.SHARE_SOCKETS`), so that
+    processes publishing many message types do not open a socket per type.
+    The socket is closed when the last broadcaster using it is closed.
+    Reliable broadcasters and broadcasters requesting segmentation offload
+    use a private socket.
 
     Args:
         connection (:class:`.Connection`): Connection object.
@@ -129,6 +1348,23 @@ class RawBroadcaster(mcl.network.abstract.RawBroadcaster):
         connection (:class:`.Connection`): Connection object.
         topic (str): Default topic associated with the IPv6 interface.
         is_open (bool): Return whether the UDP socket is open.
+        socket_options (dict): Socket options granted by the kernel when the
+            socket was opened, the ``fragment_size`` used to fragment data
+            and whether segmentation ``offload`` is enabled (see
+            :class:`.Connection`).
+        stats (dict): Send statistics. The number of messages ``queued``,
+            ``sent``, ``dropped`` by the overflow policy and which could not
+            be sent due to ``errors``. The mean and maximum time in
+            seconds from publishing a message to passing it to the kernel
+            (``latency_mean`` and ``latency_max``). If a rate is requested,
+            the ``pacing`` item records the bytes paced, the number of waits,
+            the requested and excess wait time and the achieved throughput
+            (otherwise :data:`None`). If reliable delivery is requested, the
+            ``reliable`` item records the number of ``nacks`` received,
+            fragments ``retransmitted``, repeated requests ``suppressed``,
+            requested fragments ``limited`` by :data:`.RETRANSMIT_LIMIT`,
+            requests for messages ``unavailable`` in the history and the
+            number of messages in the ``history`` (otherwise :data:`None`).
 
     Raises:
         TypeError: If any of the inputs are ill-specified.
@@ -154,8 +1390,61 @@ class RawBroadcaster(mcl.network.abstract.RawBroadcaster):
         # Create objects for handling UDP broadcasts.
         self.__socket = None
         self.__sockaddr = None
+        self.__sender = None
+        self.__senders = dict()
+        self.__destinations = dict()
+        self.__vectors = 0
+        self.__shared = False
+        self.__sequences = collections.defaultdict(itertools.count)
+        self.__socket_options = dict()
+        self.__fragment_size = MTU
+        self.__segments = 0
         self.__is_open = False
 
+        # Create objects for coalescing small messages.
+        self.__pending = list()
+        self.__pending_bytes = 0
+        self.__pending_sockaddr = None
+        self.__deadline = None
+        self.__condition = threading.Condition()
+        self.__flush_thread = None
+
+        # Create objects for pacing sent data.
+        self.__bucket = None
+        if connection.rate is not None:
+            burst = connection.burst
+            self.__bucket = _TokenBucket(connection.rate,
+                                         burst if burst else PACING_BURST)
+
+        # Create objects for sending messages in the background.
+        self.__queue = None
+        self.__send_thread = None
+
+        # Create objects for retransmitting messages to listeners.
+        self.__flags = FLAG_RELIABLE if connection.reliable else 0
+        self.__history = collections.OrderedDict()
+        self.__history_bytes = 0
+        self.__history_lock = threading.Lock()
+        self.__latest = dict()
+        self.__retransmitted = dict()
+        self.__budgets = dict()
+        self.__control_thread = None
+        self.__reliable = {'nacks': 0,
+                           'retransmitted': 0,
+                           'suppressed': 0,
+                           'limited': 0,
+                           'unavailable': 0}
+
+        # Counters are updated by the publishing (or send) thread and the
+        # control thread.
+        self.__stats_lock = threading.Lock()
+
+        self.__stats = {'sent': 0,
+                        'dropped': 0,
+                        'errors': 0,
+                        'latency_total': 0.0,
+                        'latency_max': 0.0}
+
         # Attempt to connect to UDP interface.
         success = self._open()
         if not success:
@@ -166,6 +1455,25 @@ class RawBroadcaster(mcl.network.abstract.RawBroadcaster):
     def is_open(self):
         return self.__is_open
 
+    @property
+    def socket_options(self):
+        return self.__socket_options
+
+    @property
+    def stats(self):
+        with self.__stats_lock:
+            stats = dict(self.__stats)
+            reliable = dict(self.__reliable)
+        total = stats.pop('latency_total')
+        stats['latency_mean'] = total / stats['sent'] if stats['sent'] else 0.0
+        stats['queued'] = self.__queue.qsize() if self.__queue else 0
+        stats['pacing'] = self.__bucket.stats if self.__bucket else None
+        stats['reliable'] = None
+        if self.__flags & FLAG_RELIABLE:
+            stats['reliable'] = reliable
+            stats['reliable']['history'] = len(self.__history)
+        return stats
+
     def _open(self):
         """Open connection to UDP broadcast interface.
 
@@ -182,20 +1490,127 @@ class RawBroadcaster(mcl.network.abstract.RawBroadcaster):
             addrinfo = socket.getaddrinfo(self.connection.url, None)[0]
             self.__sockaddr = (addrinfo[4][0], self.connection.port)
 
-            # Number of hops to allow.
-            self.__socket = socket.socket(addrinfo[0], socket.SOCK_DGRAM)
+            # Create socket and set buffer sizes, number of hops to allow
+            # (time-to-live) and traffic class. Sockets are shared with other
+            # broadcasters unless NACKs are received on the socket or the
+            # segmentation offload option is set on the socket.
+            self.__shared = SHARE_SOCKETS and not self.connection.reliable \
+                and not self.connection.offload
+            if self.__shared:
+                self.__socket, options, self.__sequences = \
+                    _SOCKETS.acquire(addrinfo[0], self.connection)
+            else:
+                self.__socket = socket.socket(addrinfo[0], socket.SOCK_DGRAM)
+                options = _configure_socket(self.__socket, self.connection)
 
-            # Set Time-to-live (optional).
-            ttl_message = struct.pack('@i', ALLOWED_MULTICAST_HOPS)
-            self.__socket.setsockopt(socket.IPPROTO_IPV6,
-                                     socket.IPV6_MULTICAST_HOPS,
-                                     ttl_message)
+            # Set maximum size of datagrams. By default, avoid IP level
+            # fragmentation.
+            if self.connection.fragment_size is not None:
+                self.__fragment_size = self.connection.fragment_size
+            else:
+                self.__fragment_size = _fragment_size(addrinfo[0],
+                                                      self.__sockaddr)
+            options['fragment_size'] = self.__fragment_size
+            self.__socket_options = options
+
+            # Pass several fragments to the kernel in each buffer where
+            # segmentation offload is requested and supported. Each fragment
+            # is gathered from a header and a slice of the message. Parity
+            # and retransmissions require the default fragment layout.
+            self.__segments = 0
+            if USE_MMSG and mcl.network.linux.HAS_MMSG and \
+               self.connection.offload and not self.connection.parity and \
+               not self.connection.reliable:
+                self.__segments = self.__enable_offload()
+            options['offload'] = self.__segments > 0
+
+            # Send fragments in batches where supported. Batches sent to the
+            # groups of topics (see Connection) are created when first used.
+            self.__destinations = dict()
+            self.__senders = dict()
+            if USE_MMSG and mcl.network.linux.HAS_MMSG:
+                self.__vectors = max(mcl.network.linux.BatchSender.MAX_VECTORS,
+                                     2 * self.__segments)
+                self.__sender = self.__batch_sender(self.__sockaddr)
 
             self.__is_open = True
+
+            # Send coalesced messages once the maximum delay has elapsed.
+            if self.connection.coalesce is not None:
+                thread = threading.Thread(target=self.__flush_loop)
+                thread.daemon = True
+                self.__flush_thread = thread
+                self.__flush_thread.start()
+
+            # Send messages from a queue in the background.
+            if self.connection.send_queue is not None:
+                self.__queue = Queue.Queue(self.connection.send_queue)
+                self.__send_thread = threading.Thread(target=self.__send_loop)
+                self.__send_thread.daemon = True
+                self.__send_thread.start()
+
+            # Answer NACKs and send heartbeats in the background.
+            if self.connection.reliable:
+                thread = threading.Thread(target=self.__control_loop)
+                thread.daemon = True
+                self.__control_thread = thread
+                self.__control_thread.start()
+
             return True
         else:
             return False
 
+    def __enable_offload(self):
+        """Enable segmentation offload and return the segments per buffer."""
+
+        # Offload is only useful if several fragments fit in one buffer.
+        segments = min(mcl.network.linux.UDP_MAX_SEGMENTS,
+                       MTU_MAX // self.__fragment_size)
+        if segments < 2:
+            return 0
+
+        try:
+            self.__socket.setsockopt(mcl.network.linux.SOL_UDP,
+                                     mcl.network.linux.UDP_SEGMENT,
+                                     self.__fragment_size)
+            return segments
+        except socket.error:
+            return 0
+
+    def __disable_offload(self):
+        """Disable segmentation offload."""
+
+        self.__segments = 0
+        self.__socket_options['offload'] = False
+        try:
+            self.__socket.setsockopt(mcl.network.linux.SOL_UDP,
+                                     mcl.network.linux.UDP_SEGMENT, 0)
+        except socket.error:                                 # pragma: no cover
+            pass
+
+    def __destination(self, topic_hash):
+        """Return the socket address frames of a topic are sent to."""
+
+        sockaddr = self.__destinations.get(topic_hash)
+        if sockaddr is None:
+            group = _topic_group(self.__sockaddr[0], topic_hash,
+                                 self.connection.topic_groups)
+            sockaddr = (group, self.__sockaddr[1])
+            self.__destinations[topic_hash] = sockaddr
+        return sockaddr
+
+    def __batch_sender(self, sockaddr):
+        """Return the batch sender of a socket address."""
+
+        sender = self.__senders.get(sockaddr)
+        if sender is None:
+            sender = mcl.network.linux.BatchSender(self.__socket,
+                                                   sockaddr,
+                                                   MMSG_BATCH,
+                                                   self.__vectors)
+            self.__senders[sockaddr] = sender
+        return sender
+
     def publish(self, data, topic=None):
         """Send data over UDP interface.
 
@@ -211,8 +1626,7 @@ class RawBroadcaster(mcl.network.abstract.RawBroadcaster):
 
         # Note:
         #
-        #     Data is published as a msgpack-serialised tuple using the
-        #     following protocol::
+        #     Data is serialised as a msgpack tuple:
         #
         #         (topic, payload)
         #
@@ -223,23 +1637,42 @@ class RawBroadcaster(mcl.network.abstract.RawBroadcaster):
         #           broadcasts.
         #         - Payload is the transmitted data.
         #
-        #     If the msgpack-serialised tuple is larger than the MTU, the
-        #     payload is serialised using msgpacked and split into multiple
-        #     fragments. The payload is then transmitted by publishing several
-        #     msgpack-serialised tuples using the following protocol::
+        #     If the header and serialised tuple are larger than the fragment
+        #     size (by default the MTU), the serialised tuple is split into
+        #     multiple fragments. Each datagram is transmitted as a fixed size
+        #     binary header (HEADER) followed by the serialised tuple or a
+        #     slice of the serialised tuple::
         #
-        #         (topic, packet number, total packets, payload)
+        #         [magic | version | flags | topic hash | sequence |
+        #          length | index | count] [fragment]
         #
         #     where:
         #
-        #         - Packet number is an integer indicating that the current
-        #           packet is the Nth packet out of M packets in a sequence.
-        #         - Total packets is an integer indicating that the current
-        #           packet is a member of a sequence of M packets.
+        #         - Magic is the string HEADER_MAGIC.
+        #         - Version is the header version HEADER_VERSION.
+        #         - Flags describe the layout of the fragments. If FLAG_FIXED
+        #           is set, every fragment except the last is the same size.
+        #           Otherwise data is distributed evenly over the fragments.
+        #           If FLAG_COALESCED is set, the datagram contains several
+        #           small messages, each preceded by a record header (RECORD).
+        #           The upper four bits contain the number of parity
+        #           fragments sent after the data fragments (see _parity).
+        #           FLAG_RELIABLE marks messages which can be retransmitted
+        #           and FLAG_CONTROL marks heartbeats and NACKs.
+        #         - Topic hash is the CRC-32 of the topic (zero if the topic
+        #           is None). Listeners use the hash to reject unwanted topics
+        #           before decoding the frame.
+        #         - Sequence is a number identifying the message. The sequence
+        #           number increments with each message published by the
+        #           broadcaster on the topic. Listeners use sequence numbers
+        #           to count lost, duplicate and reordered messages.
+        #         - Length is the total length of the serialised tuple.
+        #         - Index is the position of the fragment in the sequence of
+        #           fragments (zero-based).
+        #         - Count is the number of fragments in the sequence.
         #
-        #     Note that 'payload' is a fragment of the serialised data. To
-        #     remarshall the payload, the fragments must be joined in the
-        #     correct order and unpacked.
+        #     To remarshall the payload, the fragments must be joined in the
+        #     correct order and unpacked. The data is only serialised once.
         #
         if self.is_open:
 
@@ -251,40 +1684,467 @@ class RawBroadcaster(mcl.network.abstract.RawBroadcaster):
             except:
                 raise
 
-            # Optimise for 'small' messages - assume data can be sent in a
-            # single packet.
+            # Serialise data once, on the calling thread, so that the caller
+            # can modify the data once this method returns.
             packet = msgpack.dumps((topic, data))
-
-            # Send data in single packet.
-            if len(packet) <= MTU:
-                self.__socket.sendto(packet, self.__sockaddr)
-
-            # Fragment data into multiple packets.
+            topic_hash = _topic_hash(topic)
+            key = (self.__destination(topic_hash), topic_hash)
+            sequence = next(self.__sequences[key]) & 0xFFFFFFFF
+            message = (packet, topic_hash, sequence, time.time())
+
+            # Send data on the background thread or the calling thread.
+            if self.__queue:
+                self.__enqueue(message)
             else:
-                # Accept inefficiency of double-encoding for 'large' messages.
-                data = msgpack.dumps(data)
-
-                # Calculate number of MTU-sized packets required to send input
-                # data over the network.
-                #
-                # Note: Integer math is used to calculate the number of
-                #       packets. This calculation does not account for the
-                #       corner case the data is the same length as the MTU.
-                data_len = len(data)
-                packets = (data_len / MTU) + 1
-
-                for packet in range(packets):
-                    start_ptr = packet * MTU
-                    end_ptr = min(data_len, (packet + 1) * MTU)
-                    fragment = msgpack.dumps((topic,
-                                              packet + 1,
-                                              packets,
-                                              data[start_ptr:end_ptr]))
-                    self.__socket.sendto(fragment, self.__sockaddr)
+                self.__dispatch(*message)
+
         else:
             msg = 'Connection must be opened before publishing.'
             raise IOError(msg)
 
+    def __enqueue(self, message):
+        """Add a serialised message to the send queue."""
+
+        overflow = self.connection.overflow
+        if overflow == 'block':
+            self.__queue.put(message)
+            return
+
+        try:
+            self.__queue.put_nowait(message)
+        except Queue.Full:
+            self.__count(self.__stats, 'dropped')
+
+            # Make room for the message by discarding the oldest message.
+            if overflow == 'drop_old':
+                try:
+                    self.__queue.get_nowait()
+                    self.__queue.task_done()
+                except Queue.Empty:                          # pragma: no cover
+                    pass
+                try:
+                    self.__queue.put_nowait(message)
+                except Queue.Full:                           # pragma: no cover
+                    self.__count(self.__stats, 'dropped')
+
+    def __send_loop(self):
+        """Send messages from the send queue until closed."""
+
+        # Messages which cannot be sent are counted as errors. The thread
+        # must keep draining the queue, otherwise flush() and close() wait
+        # forever.
+        while True:
+            message = self.__queue.get()
+            try:
+                if message is None:
+                    return
+                self.__dispatch(*message)
+            except Exception:
+                self.__count(self.__stats, 'errors')
+            finally:
+                self.__queue.task_done()
+
+    def __dispatch(self, packet, topic_hash, sequence, published):
+        """Send a serialised message and record the send latency."""
+
+        self.__send(packet, topic_hash, sequence)
+        latency = time.time() - published
+        with self.__stats_lock:
+            self.__stats['sent'] += 1
+            self.__stats['latency_total'] += latency
+            self.__stats['latency_max'] = max(latency,
+                                              self.__stats['latency_max'])
+
+    def __send(self, packet, topic_hash, sequence):
+        """Send a serialised message."""
+
+        # Keep the message so that it can be retransmitted.
+        if self.__flags & FLAG_RELIABLE:
+            self.__remember(packet, topic_hash, sequence)
+
+        # Delay small messages so they can be sent with other messages.
+        if self.__flush_thread and \
+           HEADER.size + RECORD.size + len(packet) <= self.__fragment_size:
+            self.__coalesce(packet, topic_hash, sequence)
+            return
+
+        # Preserve the order of messages.
+        if self.__pending:
+            with self.__condition:
+                self.__send_pending()
+
+        # Send data in single packet.
+        if HEADER.size + len(packet) <= self.__fragment_size:
+            self.__send_datagram(packet, topic_hash, sequence)
+
+        # Fragment data into multiple packets. If the kernel cannot segment
+        # the data, fall back to sending each fragment.
+        elif self.__segments:
+            try:
+                self.__send_segments(packet, topic_hash, sequence)
+            except socket.error as e:
+                if e.errno not in (errno.EIO, errno.EINVAL,
+                                   errno.EMSGSIZE, errno.EOPNOTSUPP):
+                    raise                                    # pragma: no cover
+                self.__disable_offload()
+                self.__send_fragments(packet, topic_hash, sequence)
+
+        else:
+            self.__send_fragments(packet, topic_hash, sequence)
+
+    def __send_datagram(self, packet, topic_hash, sequence):
+        """Send a serialised message in a single datagram."""
+
+        header = HEADER.pack(HEADER_MAGIC, HEADER_VERSION, self.__flags,
+                             topic_hash, sequence, len(packet), 0, 1)
+        self.__pace(HEADER.size + len(packet))
+        self.__socket.sendto(header + packet, self.__destination(topic_hash))
+
+    def __send_fragments(self, packet, topic_hash, sequence, indices=None):
+        """Send a serialised message as multiple fragments.
+
+        If ``indices`` is specified, only the fragments with these indices
+        are sent, from the calling thread.
+
+        """
+
+        # Split the message into fragments which (including the header) fit
+        # within the fragment size.
+        length = len(packet)
+        ranges = _fragments(length, self.__fragment_size - HEADER.size)
+        count = len(ranges)
+        flags = self.__flags
+
+        # Append parity fragments to the message. Data fragments are of equal
+        # size (except the last). The parity fragments are sent after the
+        # data fragments.
+        groups = min(self.connection.parity or 0, count)
+        if groups:
+            size = _parity_size(length, count)
+            ranges = [(i * size, min(length, (i + 1) * size))
+                      for i in range(count)]
+            ranges += [(length + i * size, length + (i + 1) * size)
+                       for i in range(groups)]
+            packet += _parity(packet, count, groups)
+            flags |= groups << PARITY_SHIFT
+            count += groups
+
+        headers = ''.join(HEADER.pack(HEADER_MAGIC,
+                                      HEADER_VERSION,
+                                      flags,
+                                      topic_hash,
+                                      sequence,
+                                      length,
+                                      index,
+                                      count)
+                          for index in range(count))
+
+        # Gather the header and a slice of the serialised message into each
+        # datagram without copying data in user-space. The batch sender is
+        # not shared with the thread retransmitting fragments.
+        sockaddr = self.__destination(topic_hash)
+        if self.__sender and indices is None:
+            header_ptr = mcl.network.linux.address_of(headers)
+            packet_ptr = mcl.network.linux.address_of(packet)
+            size = HEADER.size
+            self.__sendv([[(header_ptr + index * size, size),
+                           (packet_ptr + start, end - start)]
+                          for index, (start, end) in enumerate(ranges)],
+                         sockaddr)
+
+        # Copy each fragment into a buffer, reused for all fragments in the
+        # message, before sending.
+        else:
+            size = HEADER.size
+            fragment = bytearray(self.__fragment_size)
+            if indices is None:
+                indices = range(count)
+            for index in indices:
+                start, end = ranges[index]
+                length = size + end - start
+                fragment[:size] = headers[index * size:(index + 1) * size]
+                fragment[size:length] = buffer(packet, start, end - start)
+                self.__pace(length)
+                self.__socket.sendto(buffer(fragment, 0, length), sockaddr)
+
+    def __pace(self, length):
+        """Wait until 'length' bytes can be sent at the requested rate."""
+
+        if self.__bucket:
+            self.__bucket.consume(length)
+
+    def __sendv(self, datagrams, sockaddr):
+        """Send gathered datagrams, pacing batches of datagrams."""
+
+        sender = self.__batch_sender(sockaddr)
+        if not self.__bucket:
+            sender.sendv(datagrams)
+            return
+
+        # Send datagrams in chunks no larger than the burst size (at least one
+        # datagram per chunk).
+        chunk = list()
+        chunk_bytes = 0
+        for regions in datagrams:
+            length = sum(size for address, size in regions)
+            if chunk and chunk_bytes + length > self.__bucket.burst:
+                self.__pace(chunk_bytes)
+                sender.sendv(chunk)
+                chunk = list()
+                chunk_bytes = 0
+            chunk.append(regions)
+            chunk_bytes += length
+
+        self.__pace(chunk_bytes)
+        sender.sendv(chunk)
+
+    def __coalesce(self, packet, topic_hash, sequence):
+        """Add a serialised message to the pending datagram."""
+
+        record = RECORD.pack(topic_hash, sequence, len(packet)) + packet
+        sockaddr = self.__destination(topic_hash)
+        with self.__condition:
+
+            # Send pending messages if the record does not fit in the
+            # datagram or is sent to another group.
+            if HEADER.size + self.__pending_bytes + len(record) > \
+               self.__fragment_size or sockaddr != self.__pending_sockaddr:
+                self.__send_pending()
+
+            # The first message in a datagram sets the time it must be sent.
+            if not self.__pending:
+                self.__deadline = time.time() + self.connection.coalesce
+                self.__condition.notify()
+
+            self.__pending.append(record)
+            self.__pending_bytes += len(record)
+            self.__pending_sockaddr = sockaddr
+
+    def __send_pending(self):
+        """Send pending messages in one datagram. Must hold the lock."""
+
+        if self.__pending:
+            body = ''.join(self.__pending)
+            header = HEADER.pack(HEADER_MAGIC, HEADER_VERSION,
+                                 FLAG_COALESCED | self.__flags,
+                                 0, 0, len(body), 0, 1)
+            self.__pending = list()
+            self.__pending_bytes = 0
+            self.__deadline = None
+            self.__pace(len(header) + len(body))
+            self.__socket.sendto(header + body, self.__pending_sockaddr)
+
+    def __flush_loop(self):
+        """Send pending messages when the maximum delay has elapsed."""
+
+        with self.__condition:
+            while self.__is_open:
+                if not self.__pending:
+                    self.__condition.wait()
+                    continue
+
+                remaining = self.__deadline - time.time()
+                if remaining > 0:
+                    self.__condition.wait(remaining)
+                else:
+                    try:
+                        self.__send_pending()
+                    except socket.error:                     # pragma: no cover
+                        pass
+
+    def flush(self):
+        """Send queued and coalesced messages immediately.
+
+        Blocks until all messages in the send queue have been sent. If neither
+        a send queue nor coalescing is enabled, the request is ignored.
+
+        """
+
+        if self.__queue:
+            self.__queue.join()
+
+        with self.__condition:
+            self.__send_pending()
+
+    def __send_segments(self, packet, topic_hash, sequence):
+        """Send a serialised message as fixed size fragments.
+
+        The kernel splits each buffer passed to it into datagrams of the
+        fragment size. Every fragment except the last must fill a datagram.
+
+        """
+
+        length = len(packet)
+        size = self.__fragment_size - HEADER.size
+        count = (length + size - 1) // size
+        headers = ''.join(HEADER.pack(HEADER_MAGIC,
+                                      HEADER_VERSION,
+                                      FLAG_FIXED,
+                                      topic_hash,
+                                      sequence,
+                                      length,
+                                      index,
+                                      count)
+                          for index in range(count))
+
+        # Gather the header and a slice of the serialised message of each
+        # fragment into buffers of several fragments.
+        header_ptr = mcl.network.linux.address_of(headers)
+        packet_ptr = mcl.network.linux.address_of(packet)
+        regions = list()
+        for index in range(count):
+            start = index * size
+            regions.append((header_ptr + index * HEADER.size, HEADER.size))
+            regions.append((packet_ptr + start, min(size, length - start)))
+
+        step = 2 * self.__segments
+        self.__sendv([regions[i:i + step]
+                      for i in range(0, len(regions), step)],
+                     self.__destination(topic_hash))
+
+    def __remember(self, packet, topic_hash, sequence):
+        """Add a serialised message to the bounded history."""
+
+        with self.__history_lock:
+            key = (topic_hash, sequence)
+            if key in self.__history:
+                self.__history_bytes -= len(self.__history.pop(key))
+            self.__history[key] = packet
+            self.__history_bytes += len(packet)
+            self.__latest[topic_hash] = (sequence, time.time())
+
+            # Discard the oldest messages. The most recent message is always
+            # kept.
+            while len(self.__history) > RELIABLE_HISTORY or \
+                  (len(self.__history) > 1 and
+                   self.__history_bytes > RELIABLE_HISTORY_BYTES):
+                key, old = self.__history.popitem(last=False)
+                self.__history_bytes -= len(old)
+
+    def __control_loop(self):
+        """Answer NACKs and send heartbeats until closed."""
+
+        poller = select.poll()
+        poller.register(self.__socket, select.POLLIN)
+        frame = bytearray(MTU_MAX)
+        heartbeat = time.time()
+        while self.__is_open:
+            poller.poll(int(1000 * HEARTBEAT_INTERVAL))
+
+            # NACKs are sent by listeners to the address of the socket.
+            while self.__is_open:
+                try:
+                    length = self.__socket.recv_into(frame, 0,
+                                                     socket.MSG_DONTWAIT)
+                except socket.error:
+                    break
+                try:
+                    self.__answer(buffer(frame, 0, length))
+                except socket.error:                         # pragma: no cover
+                    self.__count(self.__stats, 'errors')
+
+            now = time.time()
+            if self.__is_open and now - heartbeat >= HEARTBEAT_INTERVAL:
+                heartbeat = now
+                try:
+                    self.__heartbeat(now)
+                except socket.error:                         # pragma: no cover
+                    self.__count(self.__stats, 'errors')
+
+    def __count(self, counters, key, value=1):
+        """Increment a counter shared with other threads."""
+
+        with self.__stats_lock:
+            counters[key] += value
+
+    def __answer(self, frame):
+        """Retransmit the fragments requested by a NACK."""
+
+        try:
+            magic, version, flags, topic_hash, sequence, length, index, count \
+                = HEADER.unpack_from(frame)
+            indices = struct.unpack_from('!%iH' % length, frame, HEADER.size)
+        except struct.error:
+            return
+
+        if magic != HEADER_MAGIC or version != HEADER_VERSION or \
+           not flags & FLAG_CONTROL:
+            return
+
+        self.__count(self.__reliable, 'nacks')
+        with self.__history_lock:
+            packet = self.__history.get((topic_hash, sequence))
+        if packet is None:
+            self.__count(self.__reliable, 'unavailable')
+            return
+
+        # Find the fragments of the message. The layout of the fragments is
+        # determined by the length of the message.
+        if HEADER.size + len(packet) <= self.__fragment_size:
+            count = 1
+        else:
+            size = self.__fragment_size - HEADER.size
+            count = (len(packet) + size - 1) // size
+            count += min(self.connection.parity or 0, count)
+
+        # Limit the number of fragments of the message retransmitted in
+        # each interval, regardless of the number of hosts requesting it.
+        now = time.time()
+        budget = self.__budgets.get((topic_hash, sequence))
+        if budget is None or now - budget[0] >= RETRANSMIT_INTERVAL:
+            budget = [now, RETRANSMIT_LIMIT]
+            self.__budgets[(topic_hash, sequence)] = budget
+
+        # Fragments lost by several listeners are requested by each
+        # listener. Retransmit each fragment once.
+        requested = [i for i in (indices or range(count)) if i < count]
+        indices = list()
+        suppressed = 0
+        for index in requested:
+            key = (topic_hash, sequence, index)
+            if now - self.__retransmitted.get(key, 0.0) < RETRANSMIT_HOLDOFF:
+                suppressed += 1
+            elif len(indices) < budget[1]:
+                self.__retransmitted[key] = now
+                indices.append(index)
+        budget[1] -= len(indices)
+
+        with self.__stats_lock:
+            self.__reliable['suppressed'] += suppressed
+            self.__reliable['limited'] += \
+                len(requested) - suppressed - len(indices)
+            self.__reliable['retransmitted'] += len(indices)
+
+        if not indices:
+            return
+        elif count == 1:
+            self.__send_datagram(packet, topic_hash, sequence)
+        else:
+            self.__send_fragments(packet, topic_hash, sequence, indices)
+
+    def __heartbeat(self, now):
+        """Announce the most recent sequence number of idle topics."""
+
+        with self.__history_lock:
+            streams = [(topic_hash, sequence) for topic_hash, (sequence, sent)
+                       in self.__latest.iteritems()
+                       if HEARTBEAT_INTERVAL <= now - sent < HEARTBEAT_LINGER]
+
+        for topic_hash, sequence in streams:
+            header = HEADER.pack(HEADER_MAGIC, HEADER_VERSION,
+                                 FLAG_RELIABLE | FLAG_CONTROL,
+                                 topic_hash, sequence, 0, 0, 1)
+            self.__socket.sendto(header, self.__destination(topic_hash))
+
+        # Forget fragments retransmitted before the hold-off and expired
+        # retransmission budgets.
+        self.__retransmitted = dict((key, sent) for key, sent
+                                    in self.__retransmitted.iteritems()
+                                    if now - sent < RETRANSMIT_HOLDOFF)
+        self.__budgets = dict((key, budget) for key, budget
+                              in self.__budgets.iteritems()
+                              if now - budget[0] < RETRANSMIT_INTERVAL)
+
     def close(self):
         """Close connection to UDP broadcast interface.
 
@@ -296,8 +2156,33 @@ class RawBroadcaster(mcl.network.abstract.RawBroadcaster):
         """
 
         if self.is_open:
-            self.__socket.close()
-            self.__is_open = False
+
+            # Send queued messages and stop the send thread.
+            if self.__send_thread:
+                self.__queue.put(None)
+                self.__send_thread.join()
+                self.__send_thread = None
+
+            # Send pending messages and stop the flush thread.
+            with self.__condition:
+                self.__send_pending()
+                self.__is_open = False
+                self.__condition.notify()
+            if self.__flush_thread:
+                self.__flush_thread.join()
+                self.__flush_thread = None
+
+            # Stop answering NACKs.
+            if self.__control_thread:
+                self.__control_thread.join()
+                self.__control_thread = None
+
+            if self.__shared:
+                _SOCKETS.release(self.__socket)
+            else:
+                self.__socket.close()
+            self.__sender = None
+            self.__senders = dict()
             return True
         else:
             return False
@@ -324,6 +2209,14 @@ class RawListener(mcl.network.abstract.RawListener):
     fragmented packets will be recomposed into a single packet before issuing a
     publish event.
 
+    Messages from reliable broadcasters (see :class:`.Connection`) are
+    delivered at most once. Lost messages and fragments are detected from
+    sequence numbers and heartbeats and requested from the broadcaster with
+    negative acknowledgements (NACKs), sent from a separate socket to the
+    address the broadcaster sends from. Listeners receiving a shard of
+    messages distributed without topic affinity do not request lost messages
+    (sequence numbers of the shard are not consecutive).
+
     .. note::
 
         :class:`~.udp.RawListener` does not interpret the received data in
@@ -336,16 +2229,37 @@ class RawListener(mcl.network.abstract.RawListener):
         connection (:class:`.Connection`): Connection object.
         topics (str or list): Topics associated with the
             :class:`~.udp.RawListener` interface.
+        shard (tuple): Receive a shard of the messages on a multicast
+            connection, specified as a tuple ``(index, count, affinity)``.
+            Messages are split into ``count`` shards and only messages in
+            shard ``index`` are received. If ``affinity`` is :data:`True`,
+            messages are assigned to shards by topic. Otherwise messages are
+            distributed evenly across shards. Used by
+            :class:`~.udp.ShardedListener`.
 
     Attributes:
         connection (:class:`.Connection`): Connection object.
         topics (str or list): Topics associated with the
             :class:`~.udp.RawListener` interface.
+        shard (tuple): Shard of messages received by the listener.
         is_open (bool): Return whether the UDP socket is open.
+        stats (dict): Reception statistics. The ``reassembly`` item counts
+            completed and discarded fragmented messages. The ``sequence`` item
+            counts received, lost, duplicate and reordered messages (in total
+            and for each sender) from the sequence numbers stamped by
+            broadcasters. If timestamps are enabled, the ``dropped`` item
+            records the most recent kernel drop counter (otherwise
+            :data:`None`). The ``nack`` item counts messages of reliable
+            broadcasters detected as missing, NACKs sent, duplicates rejected
+            and messages abandoned (:data:`None` if lost messages are not
+            requested).
+        socket_options (dict): Socket options granted by the kernel when the
+            socket was opened and whether receive ``offload`` is enabled (see
+            :class:`.Connection`).
 
     """
 
-    def __init__(self, connection, topics=None):
+    def __init__(self, connection, topics=None, shard=None):
         """Document the __init__ method at the class level."""
 
         # Ensure the connection object is properly specified.
@@ -361,11 +2275,56 @@ class RawListener(mcl.network.abstract.RawListener):
             except:
                 raise
 
-        # Number of messages to buffer.
-        self.__buffer_size = 5
+        # Ensure the shard is properly specified.
+        if shard is not None:
+            try:
+                index, count, affinity = shard
+                if not (0 <= index < count):
+                    raise ValueError
+            except (TypeError, ValueError):
+                msg = "The argument 'shard' must be a tuple (index, count, "
+                msg += "affinity) where 0 <= index < count."
+                raise TypeError(msg)
+        self.__shard = shard
+
+        # Hash topics to reject unwanted frames from the frame header. Keep a
+        # set of the topics to resolve hash collisions.
+        if not self.topics:
+            self.__topic_set = None
+        elif isinstance(self.topics, basestring):
+            self.__topic_set = frozenset([self.topics])
+        else:
+            self.__topic_set = frozenset(self.topics)
+
+        if self.__topic_set is None:
+            self.__topic_hashes = None
+        else:
+            self.__topic_hashes = frozenset(_topic_hash(topic)
+                                            for topic in self.__topic_set)
+
+        # Create buffer for receiving fragmented data.
+        self.__buffer = _ReassemblyBuffer(REASSEMBLY_MESSAGES,
+                                          REASSEMBLY_BYTES,
+                                          REASSEMBLY_TIMEOUT)
+
+        # Record sequence numbers to count lost messages.
+        self.__sequence = _SequenceTracker()
+
+        # Request lost messages of reliable broadcasters.
+        self.__nacks = None
+        self.__nack_socket = None
+        if not shard or shard[2]:
+            self.__nacks = _NackTracker()
+
+        # Record kernel reception times and drop counters.
+        self.__timestamps = connection.timestamps
+        self.__dropped = None
+        self.__socket_options = dict()
 
         # Create objects for handling received UDP messages.
         self.__socket = None
+        self.__receiver = None
+        self.__pool = None
         self.__stop_event = None
         self.__listen_thread = None
         self.__is_open = False
@@ -380,6 +2339,21 @@ class RawListener(mcl.network.abstract.RawListener):
     def is_open(self):
         return self.__is_open
 
+    @property
+    def shard(self):
+        return self.__shard
+
+    @property
+    def socket_options(self):
+        return self.__socket_options
+
+    @property
+    def stats(self):
+        return {'reassembly': self.__buffer.stats,
+                'sequence': self.__sequence.stats,
+                'nack': self.__nacks.stats if self.__nacks else None,
+                'dropped': self.__dropped}
+
     def _open(self):
         """Open connection to UDP receive interface.
 
@@ -407,21 +2381,100 @@ class RawListener(mcl.network.abstract.RawListener):
                 self.__socket.setsockopt(socket.SOL_SOCKET,
                                          socket.SO_REUSEADDR, 1)
 
-                # Join group.
-                group_name = socket.inet_pton(addrinfo[0], addrinfo[4][0])
-                group_addr = group_name + struct.pack('@I', 0)
-                self.__socket.setsockopt(socket.IPPROTO_IPV6,
-                                         socket.IPV6_JOIN_GROUP,
-                                         group_addr)
+                # Allow sockets of other shards to bind to the same port.
+                if self.__shard:
+                    self.__socket.setsockopt(socket.SOL_SOCKET,
+                                             SO_REUSEPORT, 1)
+
+                # Set buffer sizes and busy polling.
+                self.__socket_options = _configure_socket(self.__socket,
+                                                          self.connection)
+
+                # Join group. If topics are mapped onto groups, join the base
+                # group (frames without a topic) and the group of each topic.
+                # Listeners without topics join every group.
+                address = addrinfo[4][0]
+                groups = self.connection.topic_groups
+                addresses = [address]
+                if groups:
+                    if self.__topic_hashes is None:
+                        hashes = range(1, groups + 1)
+                    else:
+                        hashes = self.__topic_hashes
+                    for topic_hash in hashes:
+                        group = _topic_group(address, topic_hash, groups)
+                        if group not in addresses:
+                            addresses.append(group)
+
+                for group in addresses:
+                    group_name = socket.inet_pton(addrinfo[0], group)
+                    group_addr = group_name + struct.pack('@I', 0)
+                    self.__socket.setsockopt(socket.IPPROTO_IPV6,
+                                             socket.IPV6_JOIN_GROUP,
+                                             group_addr)
+                self.__socket_options['groups'] = len(addresses)
+
+                # Bind socket to the address/port. A socket receiving several
+                # groups is bound to the wildcard address and only receives
+                # datagrams sent to the groups it joined (where supported).
+                if groups:
+                    try:
+                        option = mcl.network.linux.IPV6_MULTICAST_ALL
+                        self.__socket.setsockopt(socket.IPPROTO_IPV6, option,
+                                                 0)
+                    except socket.error:
+                        pass
+                    self.__socket.bind(('::', self.connection.port))
+                else:
+                    self.__socket.bind((self.connection.url,
+                                        self.connection.port))
 
-                # Bind socket to the address/port.
-                self.__socket.bind((self.connection.url, self.connection.port))
+                # NACKs cannot be sent from a socket bound to a multicast
+                # address. Send NACKs from an unbound socket.
+                if self.__nacks:
+                    self.__nack_socket = socket.socket(addrinfo[0],
+                                                       socket.SOCK_DGRAM)
 
                 # Register the socket with the select poller so that incoming
                 # data triggers an event.
                 self.__poller = select.poll()
                 self.__poller.register(self.__socket, select.POLLIN)
 
+                # Receive datagrams in batches where supported. Otherwise
+                # receive datagrams into a pool of preallocated buffers.
+                if USE_MMSG and mcl.network.linux.HAS_MMSG:
+
+                    # Request kernel reception times and drop counters.
+                    if self.__timestamps:
+                        for option in (mcl.network.linux.SO_TIMESTAMPNS,
+                                       mcl.network.linux.SO_RXQ_OVFL):
+                            self.__socket.setsockopt(socket.SOL_SOCKET,
+                                                     option, 1)
+
+                    # Allow the kernel to coalesce datagrams from the same
+                    # sender. Coalesced buffers are split by the receiver.
+                    gro = False
+                    if self.connection.offload:
+                        try:
+                            self.__socket.setsockopt(mcl.network.linux.SOL_UDP,
+                                                     mcl.network.linux.UDP_GRO,
+                                                     1)
+                            gro = True
+                        except socket.error:
+                            pass
+                    self.__socket_options['offload'] = gro
+
+                    receiver = mcl.network.linux.BatchReceiver
+                    self.__receiver = receiver(self.__socket,
+                                               MMSG_BATCH,
+                                               65536 if gro else MTU_MAX,
+                                               self.__timestamps,
+                                               gro)
+                else:
+                    self.__socket_options['offload'] = False
+                    self.__pool = [bytearray(MTU_MAX)
+                                   for i in range(MMSG_BATCH)]
+
             # Could not create socket. Raise return failure.
             except:
                 return False
@@ -443,147 +2496,372 @@ class RawListener(mcl.network.abstract.RawListener):
         else:
             return False
 
+    def __recv(self):
+        """Read a batch of datagrams from the UDP socket.
+
+        Datagrams are read into preallocated buffers and returned as
+        :func:`buffer` views. The views are only valid until the next call to
+        this method. If fewer than ``MMSG_BATCH`` datagrams are returned, the
+        socket has been drained.
+
+        If timestamps are enabled, each datagram is returned with its
+        reception time and the kernel drop counter.
+
+        """
+
+        # Read datagrams using a batched system call.
+        if self.__receiver:
+            return self.__receiver.recv()
+
+        # Read datagrams into the buffer pool. Kernel reception times are not
+        # available, the time the datagram was read is used instead.
+        socket_data = list()
+        for buf in self.__pool:
+            try:
+                length, sender = self.__socket.recvfrom_into(buf)
+                if self.__timestamps:
+                    socket_data.append((buffer(buf, 0, length), sender,
+                                        time.time(), None))
+                else:
+                    socket_data.append((buffer(buf, 0, length), sender))
+            except:
+                break
+
+        return socket_data
+
     def __read(self):
         """Read data from UDP socket."""
 
-        # Create buffer for receiving fragmented data.
-        receive_buffer = dict()
-
         # Poll UDP socket and publish data.
         while not self.__stop_event.is_set():
 
-            # Wait for a data event in the socket.
-            events = self.__poller.poll(READ_TIMEOUT)
+            # Wait for a data event in the socket. Wake up to request lost
+            # messages.
+            timeout = READ_TIMEOUT
+            if self.__nacks and self.__nacks.pending:
+                timeout = int(1000 * NACK_DELAY)
+            events = self.__poller.poll(timeout)
             if events and events[0][1] & select.POLLIN:
 
-                # Read multiple packets from the socket.
-                socket_data = list()
+                # Read batches of packets from the socket until it has been
+                # drained.
                 while True:
                     try:
-                        socket_data.append(self.__socket.recvfrom(MTU_MAX))
+                        socket_data = self.__recv()
                     except:
                         break
 
-                # Remarshal and issue data to callbacks.
-                self.__remarshal(socket_data, receive_buffer)
+                    # Remarshal and issue data to callbacks. The received
+                    # data must be consumed before the next batch is read.
+                    self.__remarshal(socket_data)
+                    if len(socket_data) < MMSG_BATCH:
+                        break
 
-            else:
-                continue
+            # Discard stale fragments.
+            self.__buffer.expire()
+
+            # Request lost messages and fragments from reliable broadcasters.
+            if self.__nacks and self.__nacks.pending:
+                for address, topic_hash, sequence, indices in \
+                        self.__nacks.requests(self.__buffer.missing):
+                    frame = HEADER.pack(HEADER_MAGIC, HEADER_VERSION,
+                                        FLAG_CONTROL, topic_hash, sequence,
+                                        len(indices), 0, 1)
+                    frame += struct.pack('!%iH' % len(indices), *indices)
+                    try:
+                        self.__nack_socket.sendto(frame, address)
+                    except socket.error:                     # pragma: no cover
+                        pass
 
         # Close socket on exiting thread.
         self.__socket.close()
+        if self.__nack_socket:
+            self.__nack_socket.close()
 
-    def __remarshal(self, socket_data, receive_buffer):
+    def __remarshal(self, socket_data):
 
-        for frame, sender in socket_data:
+        for datagram in socket_data:
+            frame = datagram[0]
+            sender = datagram[1]
 
-            # Unpack frame of data.
-            try:
-                frame = msgpack.loads(frame)
+            # Unpack frame of data. Frames which do not start with the header
+            # were sent using the legacy (msgpack only) protocol. Coalesced
+            # frames contain several messages.
+            if frame[:len(HEADER_MAGIC)] == HEADER_MAGIC:
+                messages = self.__unpack(frame, sender)
+            else:
+                message = self.__unpack_legacy(frame, sender)
+                messages = (message,) if message is not None else ()
+
+            # Issue complete messages. Rejected frames and incomplete
+            # messages contain no messages.
+            for topic, payload in messages:
+                self.__issue(topic, payload, datagram)
+
+    def __issue(self, topic, payload, datagram):
+        """Issue a received message to callbacks."""
+
+        # Topic filtering is enabled. Skip data frames with topics not in the
+        # white list of topics.
+        if self.__topic_set is not None and topic not in self.__topic_set:
+            return
+
+        # Add kernel reception time and drop counter of the (last) datagram in
+        # the message.
+        data = {'topic': topic, 'payload': payload}
+        if self.__timestamps:
+            timestamp = datagram[2] or time.time()
+            data['time_received'] = \
+                datetime.datetime.utcfromtimestamp(timestamp)
+            data['dropped'] = datagram[3]
+            self.__dropped = datagram[3]
+
+        # Publish data.
+        try:
+            self.__trigger__(data)
+        except Exception as e:
+            msg = '\nCould not service UDP recieve callback. The '
+            msg += 'following exception was raised:\n\n%s\n'
+            raise Exception(msg % e.message)
+
+    def __accept(self, topic_hash, sequence):
+        """Return the sequence number of a wanted message.
+
+        Messages with an unwanted topic or in another shard are rejected and
+        :data:`None` is returned.
+
+        """
+
+        # Reject unwanted topics before decoding the message.
+        if self.__topic_hashes and topic_hash not in self.__topic_hashes:
+            return None
+
+        # Reject messages in other shards. Fragments of a message share the
+        # same topic and sequence number and are received by the same shard.
+        if self.__shard:
+            shard, shards, affinity = self.__shard
+            if affinity:
+                if topic_hash % shards != shard:
+                    return None
+            elif sequence % shards != shard:
+                return None
+            else:
+                # Shard receives every n-th message of each stream. Record
+                # consecutive sequence numbers.
+                sequence //= shards
+
+        return sequence
+
+    def __unpack(self, frame, sender):
+        """Unpack a frame with a binary header.
+
+        Frames with an unknown version, an unwanted topic or an invalid header
+        are rejected from the header alone. Fragments are stored until all
+        fragments of the message have been received.
+
+        Returns a list of the complete ``(topic, payload)`` messages
+        received in the frame.
+
+        """
 
-                # Data transmitted in single packets.
-                if len(frame) == 2:
-                    complete = True
-                    topic, payload = frame
+        # Unpack and validate header.
+        try:
+            magic, version, flags, topic_hash, sequence, length, index, count \
+                = HEADER.unpack_from(frame)
+        except struct.error:
+            return ()
+
+        if version != HEADER_VERSION or index >= count:
+            return ()
+
+        # Frame is a heartbeat from a reliable broadcaster.
+        reliable = self.__nacks is not None and flags & FLAG_RELIABLE
+        if flags & FLAG_CONTROL:
+            if reliable and self.__accept(topic_hash, sequence) is not None:
+                self.__nacks.heartbeat(sender, topic_hash, sequence)
+            return ()
+
+        # Frame contains several small messages.
+        fragment = buffer(frame, HEADER.size)
+        if flags & FLAG_COALESCED:
+            if len(fragment) != length:
+                return ()
+            return self.__unpack_records(fragment, sender, reliable)
+
+        # Reject unwanted topics and messages in other shards. Reject
+        # messages of reliable broadcasters which have been delivered.
+        sequence = self.__accept(topic_hash, sequence)
+        if sequence is None:
+            return ()
+        elif reliable and not self.__nacks.receive(sender, topic_hash,
+                                                   sequence):
+            return ()
+
+        # Message was transmitted in a single datagram.
+        if count == 1:
+            if len(fragment) != length:
+                return ()
+            message = fragment
+
+        # Message was transmitted in multiple fragments. The sender's socket
+        # address and sequence number identify the message.
+        else:
+            identifier = (sender[:2], topic_hash, sequence)
+
+            # Message was transmitted with parity fragments. The layout of
+            # the fragments is determined by the header.
+            groups = flags >> PARITY_SHIFT
+            if groups:
+                data_count = count - groups
+                if data_count < 1:
+                    return ()
+                size = _parity_size(length, data_count)
+                if (data_count - 1) * size >= length:
+                    return ()
+                if index < data_count:
+                    start = index * size
+                    end = min(length, start + size)
+                else:
+                    start = length + (index - data_count) * size
+                    end = start + size
+                if len(fragment) != end - start:
+                    return ()
 
-                # Data transmitted in multiple packets.
+                message = self.__buffer.insert(identifier, index, count,
+                                               length + groups * size,
+                                               start, fragment,
+                                               parity=(length, groups),
+                                               clobber=not reliable)
+
+            else:
+                if flags & FLAG_FIXED:
+                    # The length of the message is only implied by the
+                    # header. Reject lengths which cannot be reassembled or
+                    # which are inconsistent with the fragment size (every
+                    # fragment except the last is full) before any buffer
+                    # is allocated.
+                    size = len(fragment)
+                    if length > REASSEMBLY_BYTES or not size:
+                        return ()
+                    if index < count - 1:
+                        if (length > count * size or
+                                length <= (count - 1) * size):
+                            return ()
+                    elif length < size + count - 1:
+                        return ()
+
+                    start, end = _fixed_fragment_range(length, count, index,
+                                                       size)
+                    if start < 0 or end > length:
+                        return ()
                 else:
-                    complete = False
-                    topic, packet, packets, payload = frame
+                    start, end = _fragment_range(length, count, index)
+                    if len(fragment) != end - start:
+                        return ()
+
+                # Fragments of reliable messages are retransmitted when they
+                # are requested more than once. Repeated fragments are
+                # ignored instead of clobbering the message.
+                message = self.__buffer.insert(identifier, index, count,
+                                               length, start, fragment,
+                                               clobber=not reliable)
+
+            if message is None:
+                if reliable:
+                    self.__nacks.fragment(sender, topic_hash, sequence)
+                return ()
+
+        # Record sequence number of complete message.
+        self.__sequence.update(sender[:2], topic_hash, sequence)
+        if reliable:
+            self.__nacks.deliver(sender, topic_hash, sequence)
+
+        # Decode message.
+        try:
+            topic, payload = msgpack.loads(message)
+            return ((topic, payload),)
+        except:
+            return ()
+
+    def __unpack_records(self, body, sender, reliable):
+        """Unpack the messages in a coalesced frame.
+
+        Each record is filtered by topic and shard from its record header.
+        Records after a malformed record are discarded. If the frame was sent
+        by a reliable broadcaster, records which have been delivered are
+        rejected.
+
+        """
+
+        messages = list()
+        offset = 0
+        while offset + RECORD.size <= len(body):
+            topic_hash, sequence, length = RECORD.unpack_from(body, offset)
+            start = offset + RECORD.size
+            offset = start + length
+            if offset > len(body):
+                break
+
+            # Reject unwanted topics and messages in other shards.
+            sequence = self.__accept(topic_hash, sequence)
+            if sequence is None:
+                continue
+            elif reliable:
+                if not self.__nacks.receive(sender, topic_hash, sequence):
+                    continue
+                self.__nacks.deliver(sender, topic_hash, sequence)
+
+            # Record sequence number and decode message.
+            self.__sequence.update(sender[:2], topic_hash, sequence)
+            try:
+                topic, payload = msgpack.loads(buffer(body, start, length))
+                messages.append((topic, payload))
             except:
                 continue
 
-            # Topic filtering is enabled.
-            if self.topics:
+        return messages
 
-                # White list of topics is a string which does not match the
-                # current topic. Skip this data frame.
-                if (isinstance(self.topics, basestring) and
-                   (topic != self.topics)):
-                    continue
+    def __unpack_legacy(self, frame, sender):
+        """Unpack a frame transmitted using the legacy protocol.
 
-                # White list of topics must be a list. The list does not
-                # contain the current topic. Skip this data frame.
-                elif topic not in self.topics:
-                    continue
+        Legacy frames are msgpack-serialised ``(topic, payload)`` tuples or,
+        for large messages, ``(topic, packet, packets, payload)`` tuples where
+        the payload is a MTU sized slice of the serialised data.
 
-            # Data fits into one frame. Publish data immediately.
-            if complete:
-                try:
-                    self.__trigger__({'topic': topic,
-                                      'payload': payload})
-                    continue
-                except Exception as e:
-                    msg = '\nCould not service UDP recieve callback. The '
-                    msg += 'following exception was raised:\n\n%s\n'
-                    raise Exception(msg % e.message)
-
-            # Data fits into multiple frames. The code from this point forwards
-            # remarshalls the data frames into a single payload.
-            #
-            # Frames of a single message are stored in a dictionary buffer.
-            # Once all frames for a particular message have been received, they
-            # are recombined and published. Note that the frames can be
-            # received out of order. The process works by:
-            #
-            #     1) Assigning a unique identifier (key) to a message
-            #
-            #     2) If the identifier (key) does NOT exist in the dictionary
-            #        buffer:
-            #
-            #            - If the buffer is full. Drop the oldest incomplete
-            #              message to prevent the buffer from accumulating a
-            #              large history of incomplete messages (memory leak).
-            #
-            #            - An empty list is associated with the new dictionary
-            #              key. The list contains one element for each frame in
-            #              the message.
-            #
-            #            - The frame that was received is populated with data.
-            #
-            #     3) If the identifier DOES exist:
-            #
-            #            - If the frame has not been populated with data, the
-            #              frame that was received is populated with data.
-            #
-            #            - If the frame HAS been populated with data, the
-            #              identifier is not unique and is clobbering cached
-            #              data. Clobber the 'stale' message by re-allocating
-            #              memory and populate the frame that was received with
-            #              data (in theory this should not happen).
-            #
-            #     4) If all frames for the message have been received, the
-            #        frames are recombined and published.
-
-            # Assign a unique identifier to the sender of the data frame.
-            frame_identifier = (sender[0], packets, topic)
-
-            # The unique identifier does not exist in the buffer. Allocate
-            # space in the buffer.
-            if frame_identifier not in receive_buffer:
-                array = [None] * packets
-                receive_buffer[frame_identifier] = array
-
-            # The unique identifier exists in the buffer and new frame is
-            # overwriting an existing fragment. Re-allocate space on the stale
-            # fragment.
-            elif receive_buffer[frame_identifier][packet - 1]:
-                receive_buffer[frame_identifier] = [None] * packets
-
-            # Store fragment.
-            receive_buffer[frame_identifier][packet - 1] = payload
-
-            # Publish data when all fragments have been received.
-            if receive_buffer[frame_identifier].count(None) == 0:
-
-                # Combine fragments into one payload and publish.
-                payload = ''.join(receive_buffer[frame_identifier])
-                payload = msgpack.loads(payload)
-                self.__trigger__({'topic': topic,
-                                  'payload': payload})
-
-                # Free space in buffer.
-                del receive_buffer[frame_identifier]
+        Returns a ``(topic, payload)`` tuple if a complete message was
+        received. Otherwise returns :data:`None`.
+
+        """
+
+        # Legacy frames cannot be sharded. Receive them on the first shard.
+        if self.__shard and self.__shard[0] != 0:
+            return None
+
+        try:
+            frame = msgpack.loads(frame)
+
+            # Data transmitted in single packets.
+            if len(frame) == 2:
+                topic, payload = frame
+
+            # Data transmitted in multiple packets.
+            else:
+                topic, packet, packets, payload = frame
+                identifier = (sender[0], packets, topic)
+                payload = self.__buffer.insert(identifier,
+                                               packet - 1,
+                                               packets,
+                                               packets * MTU,
+                                               (packet - 1) * MTU,
+                                               payload)
+                if payload is None:
+                    return None
+                else:
+                    payload = msgpack.loads(payload)
+
+            return topic, payload
+        except:
+            return None
 
     def close(self):
         """Close connection to UDP receive interface.
@@ -610,29 +2888,374 @@ class RawListener(mcl.network.abstract.RawListener):
             return False
 
 
+class ShardedListener(object):
+    """Receive data on multiple worker processes.
+
+    The :class:`~.udp.ShardedListener` object spreads the work of receiving,
+    decoding and handling data over several worker processes. Each worker
+    opens a :class:`~.udp.RawListener` socket on the connection (using
+    ``SO_REUSEPORT``) and issues ``callback`` for the messages in its shard.
+    Callbacks run on the worker processes, independently of each other and of
+    the process which created the :class:`~.udp.ShardedListener`. This is
+    intended for stateless consumers of high-rate topics which would
+    otherwise be limited to a single core.
+
+    The kernel delivers every multicast datagram to every socket. Workers
+    select the messages in their shard from the frame header alone, before
+    any data is reassembled or decoded:
+
+        - By default, messages are distributed evenly over the workers using
+          the sequence number of each message. The messages on a topic are
+          handled concurrently by all workers. **No ordering is guaranteed**
+          between messages handled by different workers.
+
+        - If ``affinity`` is set to :data:`True`, messages are assigned to
+          workers by a hash of their topic. All messages on a topic are handled
+          by the same worker, in the order they were received. The load is
+          only balanced if there are many more topics than workers.
+
+    Fragments of a message always share a shard. Frames sent by legacy
+    broadcasters (without a frame header) are handled by the first worker.
+
+    Data are passed to ``callback`` in the same format as
+    :class:`~.udp.RawListener`.
+
+    Args:
+        connection (:class:`.Connection`): Connection object.
+        callback (callable): Function called on the worker processes with each
+            message received. The callback must not rely on state shared with
+            other workers.
+        workers (int): Number of worker processes.
+        topics (str or list): Topics associated with the
+            :class:`~.udp.ShardedListener` interface.
+        affinity (bool): Assign messages to workers by topic.
+        open_init (bool): open connection immediately after initialisation.
+
+    Attributes:
+        connection (:class:`.Connection`): Connection object.
+        topics (str or list): Topics associated with the
+            :class:`~.udp.ShardedListener` interface.
+        workers (int): Number of worker processes.
+        affinity (bool): Whether messages are assigned to workers by topic.
+        is_open (bool): Return whether the worker processes are running.
+        stats (list): The most recent reception statistics (see
+            :attr:`.RawListener.stats`) recorded by each worker.
+
+    Raises:
+        TypeError: If any of the inputs are ill-specified.
+        IOError: If the worker processes could not be started.
+
+    """
+
+    def __init__(self, connection, callback, workers=2, topics=None,
+                 affinity=False, open_init=True):
+        """Document the __init__ method at the class level."""
+
+        if not callable(callback):
+            msg = "The argument 'callback' must be callable."
+            raise TypeError(msg)
+
+        if not isinstance(workers, (int, long)) or workers < 1:
+            msg = "The argument 'workers' must be a positive integer."
+            raise TypeError(msg)
+
+        # To catch errors early, test if a listener can be opened on the
+        # connection.
+        RawListener(connection, topics=topics,
+                    shard=(0, workers, affinity)).close()
+
+        self.__connection = connection
+        self.__callback = callback
+        self.__workers = workers
+        self.__topics = topics
+        self.__affinity = bool(affinity)
+        self.__processes = list()
+        self.__stats_queues = list()
+        self.__stats = [dict() for i in range(workers)]
+        self.__run_event = multiprocessing.Event()
+
+        # Attempt to start workers.
+        if open_init and not self.open():
+            msg = "Could not connect to '%s'." % str(connection)
+            raise IOError(msg)                               # pragma: no cover
+
+    @property
+    def connection(self):
+        return self.__connection
+
+    @property
+    def topics(self):
+        return self.__topics
+
+    @property
+    def workers(self):
+        return self.__workers
+
+    @property
+    def affinity(self):
+        return self.__affinity
+
+    @property
+    def is_open(self):
+        return bool(self.__processes)
+
+    @property
+    def stats(self):
+
+        # Fetch latest statistics from workers.
+        for i, queue in enumerate(self.__stats_queues):
+            try:
+                while True:
+                    self.__stats[i] = queue.get_nowait()
+            except Queue.Empty:
+                pass
+
+        return list(self.__stats)
+
+    # Note: This method is implemented as a private static method to
+    #       reinforce the idea that it is executed on a separate process.
+    #
+    @staticmethod
+    def __work(connection, topics, shard, callback, run_event, ready_event,
+               stats_queue):
+        """Receive a shard of the data and issue callbacks."""
+
+        def publish_stats():
+            """Replace statistics in queue with the latest statistics."""
+
+            try:
+                stats_queue.get_nowait()
+            except Queue.Empty:
+                pass
+
+            try:
+                stats_queue.put_nowait(listener.stats)
+            except Queue.Full:                               # pragma: no cover
+                pass
+
+        # Start receiving data. Signal the worker is ready once the socket is
+        # open so that no data is missed.
+        listener = RawListener(connection, topics=topics, shard=shard)
+        listener.subscribe(callback)
+        ready_event.set()
+
+        # Wait for termination signal.
+        while run_event.is_set():
+            try:
+                time.sleep(0.25)
+                publish_stats()
+            except KeyboardInterrupt:                        # pragma: no cover
+                break
+
+        listener.close()
+        publish_stats()
+
+    def open(self):
+        """Start the worker processes.
+
+        Returns:
+            :class:`bool`: Returns :data:`True` if the workers were started. If
+                the workers are already running, the request is ignored and the
+                method returns :data:`False`.
+
+        Raises:
+            IOError: If a worker could not be started.
+
+        """
+
+        if self.is_open:
+            return False
+
+        self.__run_event.set()
+        ready_events = list()
+        for index in range(self.__workers):
+            ready_event = multiprocessing.Event()
+            stats_queue = multiprocessing.Queue(maxsize=1)
+            process = multiprocessing.Process(target=self.__work,
+                                              args=(self.__connection,
+                                                    self.__topics,
+                                                    (index,
+                                                     self.__workers,
+                                                     self.__affinity),
+                                                    self.__callback,
+                                                    self.__run_event,
+                                                    ready_event,
+                                                    stats_queue))
+            process.daemon = True
+            process.start()
+            self.__processes.append(process)
+            self.__stats_queues.append(stats_queue)
+            ready_events.append(ready_event)
+
+        # Wait for workers to open their sockets.
+        for ready_event in ready_events:
+            if not ready_event.wait(WORKER_TIMEOUT):         # pragma: no cover
+                self.close()
+                msg = '%s - timed out waiting for worker to start.'
+                raise IOError(msg % str(self.__connection))
+
+        return True
+
+    def close(self):
+        """Stop the worker processes.
+
+        Returns:
+            :class:`bool`: Returns :data:`True` if the workers were stopped. If
+                the workers were not running, the request is ignored and the
+                method returns :data:`False`.
+
+        """
+
+        if not self.is_open:
+            return False
+
+        # Signal workers to stop and wait for them to terminate.
+        self.__run_event.clear()
+        for process in self.__processes:
+            process.join(WORKER_TIMEOUT)
+            if process.is_alive():                           # pragma: no cover
+                process.terminate()
+
+        # Retain final statistics.
+        self.__stats = self.stats
+        self.__processes = list()
+        self.__stats_queues = list()
+        return True
+
+
 class Connection(mcl.network.abstract.Connection):
     """Object for encapsulating UDP connection parameters.
 
     Args:
         url (str): IPv6 address of connection.
         port (int): Port to use (between 1024 and 65535).
+        timestamps (bool): If set to :data:`True`, listeners add the kernel
+            reception time (``time_received``) and the number of datagrams
+            dropped by the kernel because the socket receive buffer was full
+            (``dropped``) to received data. Kernel reception times and drop
+            counters are only available on Linux.
+        rcvbuf (int): Requested size of the socket receive buffer in bytes
+            (``SO_RCVBUF``).
+        sndbuf (int): Requested size of the socket send buffer in bytes
+            (``SO_SNDBUF``).
+        hops (int): Number of hops multicast datagrams are allowed to travel
+            (``IPV6_MULTICAST_HOPS``).
+        fragment_size (int): Maximum size of each datagram sent, including the
+            frame header. Larger messages are fragmented. If :data:`None`,
+            the path MTU of the outgoing interface, less the IPv6 and UDP
+            headers, is used (limited to :data:`.MTU`).
+        tclass (int): IPv6 traffic class of sent datagrams
+            (``IPV6_TCLASS``). The DSCP code point is the upper six bits.
+        busy_poll (int): Time in microseconds to busy poll the device queue
+            when no data is available (``SO_BUSY_POLL``, Linux only).
+        offload (bool): If set to :data:`True`, broadcasters pass fragmented
+            messages to the kernel in large buffers which are split into
+            datagrams by the kernel (``UDP_SEGMENT``) and listeners allow the
+            kernel to coalesce received datagrams (``UDP_GRO``). Offload is
+            only available on Linux and is disabled if not supported.
+        coalesce (float): Maximum time in seconds broadcasters delay small
+            messages so that several messages can be sent in one datagram.
+            If :data:`None`, each message is sent immediately.
+        send_queue (int): Maximum number of messages queued for sending by a
+            background thread. If :data:`None`, messages are sent on the
+            thread publishing the data.
+        overflow (str): Policy for messages published to a full send queue
+            (see :data:`.OVERFLOW_POLICIES`).
+        rate (int): Maximum rate in bytes per second at which broadcasters
+            send data. If :data:`None`, data is not paced.
+        burst (int): Maximum number of bytes broadcasters send back-to-back
+            when pacing data.
+        parity (int): Number of XOR parity fragments broadcasters append to
+            fragmented messages (up to :data:`.PARITY_MAX`). Data fragments
+            are assigned to parity fragments in turn. Listeners can rebuild a
+            message if at most one fragment assigned to each parity fragment
+            is lost. If :data:`None`, no parity is sent.
+        reliable (bool): If set to :data:`True`, broadcasters keep a history
+            of recent messages and retransmit messages and fragments
+            requested by listeners which detected a loss (see
+            :data:`.RELIABLE_HISTORY`). Listeners deliver each message of a
+            reliable broadcaster at most once. Messages are not delivered in
+            order: a retransmitted message is delivered after the messages
+            which followed it. A lost message can only be recovered while it
+            remains in the broadcaster's history (the latest
+            :data:`.RELIABLE_HISTORY` messages and
+            :data:`.RELIABLE_HISTORY_BYTES` bytes) and, if it is fragmented,
+            in the listener's reassembly buffer (the latest
+            :data:`.REASSEMBLY_MESSAGES` incomplete messages and
+            :data:`.REASSEMBLY_BYTES` bytes). Delivery is therefore bounded:
+            messages are only recovered if no more than these limits (64 MB
+            by default, e.g. six 10 MB messages) are published before their
+            lost fragments are recovered. Publishing large messages faster
+            than the link can carry them exceeds this bound and loses
+            messages.
+        topic_groups (int): Number of multicast groups (up to
+            :data:`.TOPIC_GROUPS_MAX`) topics are mapped onto. Each topic is
+            sent to a group derived from its hash and the base address (see
+            :func:`._topic_group`). Listeners with topics only join the groups
+            of their topics, allowing unwanted topics to be rejected by the
+            kernel or network. If :data:`None`, all topics are sent to the
+            base address.
+
+    Socket options set to :data:`None` are left at the system default.
 
     Attributes:
         url (str): IPv6 address of connection.
         port (int): Port used in connection.
+        timestamps (bool): Whether listeners record kernel reception times and
+            drop counters.
+        rcvbuf (int): Requested size of the socket receive buffer.
+        sndbuf (int): Requested size of the socket send buffer.
+        hops (int): Number of hops multicast datagrams can travel.
+        fragment_size (int): Maximum size of each datagram sent.
+        tclass (int): IPv6 traffic class of sent datagrams.
+        busy_poll (int): Time in microseconds to busy poll.
+        offload (bool): Whether segmentation offload is requested.
+        coalesce (float): Maximum time small messages are delayed.
+        send_queue (int): Maximum number of messages queued for sending.
+        overflow (str): Policy for messages published to a full send queue.
+        rate (int): Maximum rate in bytes per second at which data is sent.
+        burst (int): Maximum number of bytes sent back-to-back when pacing.
+        parity (int): Number of parity fragments appended to messages.
+        reliable (bool): Whether lost messages are retransmitted.
+        topic_groups (int): Number of multicast groups topics are mapped onto.
 
     Raises:
-        TypeError: If ``url`` is not a string or ``port`` is not an integer
-            between 1024 and 65536.
+        TypeError: If ``url`` is not a string, ``port`` is not an integer
+            between 1024 and 65536, ``timestamps``, ``offload`` or
+            ``reliable`` is not a boolean, ``coalesce`` is not a positive
+            number, ``overflow`` is not a known policy or a socket option,
+            pacing, parity or topic group parameter is ill-specified.
 
     """
 
     mandatory = ('url',)
-    optional = {'port': UDP_PORT}
+    optional = collections.OrderedDict([('port', UDP_PORT),
+                                        ('timestamps', False),
+                                        ('rcvbuf', RECEIVE_BUFFER),
+                                        ('sndbuf', None),
+                                        ('hops', ALLOWED_MULTICAST_HOPS),
+                                        ('fragment_size', None),
+                                        ('tclass', None),
+                                        ('busy_poll', None),
+                                        ('offload', False),
+                                        ('coalesce', None),
+                                        ('send_queue', None),
+                                        ('overflow', 'block'),
+                                        ('rate', None),
+                                        ('burst', PACING_BURST),
+                                        ('parity', None),
+                                        ('reliable', False),
+                                        ('topic_groups', None)])
     broadcaster = RawBroadcaster
     listener = RawListener
 
-    def __init__(self, url, port=UDP_PORT):
+    def __init__(self, url, port=UDP_PORT, timestamps=False,
+                 rcvbuf=RECEIVE_BUFFER, sndbuf=None,
+                 hops=ALLOWED_MULTICAST_HOPS, fragment_size=None, tclass=None,
+                 busy_poll=None, offload=False, coalesce=None,
+                 send_queue=None, overflow='block', rate=None,
+                 burst=PACING_BURST, parity=None, reliable=False,
+                 topic_groups=None):
 
         # Check 'url' is a string.
         if not isinstance(url, basestring):
@@ -649,4 +3272,56 @@ class Connection(mcl.network.abstract.Connection):
             msg = 'The port must be a positive integer between 1024 and 65535.'
             raise TypeError(msg)
 
-        super(Connection, self).__init__(url, port)
+        # Check 'timestamps', 'offload' and 'reliable' are booleans.
+        if not isinstance(timestamps, bool):
+            msg = "'timestamps' must be a boolean."
+            raise TypeError(msg)
+        elif not isinstance(offload, bool):
+            msg = "'offload' must be a boolean."
+            raise TypeError(msg)
+        elif not isinstance(reliable, bool):
+            msg = "'reliable' must be a boolean."
+            raise TypeError(msg)
+
+        # Check 'coalesce' is a positive number (or None).
+        if coalesce is not None:
+            if not isinstance(coalesce, (int, long, float)) or \
+               isinstance(coalesce, bool):
+                msg = "'coalesce' must be a number."
+                raise TypeError(msg)
+            elif coalesce <= 0:
+                msg = "'coalesce' must be greater than zero."
+                raise TypeError(msg)
+
+        # Check 'overflow' is a known policy.
+        if overflow not in OVERFLOW_POLICIES:
+            msg = "'overflow' must be one of: %s."
+            raise TypeError(msg % ', '.join(OVERFLOW_POLICIES))
+
+        # Check socket options are integers within range (or None).
+        limits = (('rcvbuf', rcvbuf, 0, 2**31 - 1),
+                  ('sndbuf', sndbuf, 0, 2**31 - 1),
+                  ('hops', hops, 0, 255),
+                  ('fragment_size', fragment_size, HEADER.size + 1, MTU_MAX),
+                  ('tclass', tclass, 0, 255),
+                  ('busy_poll', busy_poll, 0, 2**31 - 1),
+                  ('send_queue', send_queue, 1, 2**31 - 1),
+                  ('rate', rate, 1, 2**63 - 1),
+                  ('burst', burst, 1, 2**31 - 1),
+                  ('parity', parity, 1, PARITY_MAX),
+                  ('topic_groups', topic_groups, 1, TOPIC_GROUPS_MAX))
+        for name, value, minimum, maximum in limits:
+            if value is None:
+                continue
+            elif not isinstance(value, (int, long)) or isinstance(value, bool):
+                msg = "'%s' must be an integer value." % name
+                raise TypeError(msg)
+            elif (value < minimum) or (value > maximum):
+                msg = "'%s' must be an integer between %i and %i."
+                raise TypeError(msg % (name, minimum, maximum))
+
+        super(Connection, self).__init__(url, port, timestamps, rcvbuf, sndbuf,
+                                         hops, fragment_size, tclass,
+                                         busy_poll, offload, coalesce,
+                                         send_queue, overflow, rate, burst,
+                                         parity, reliable, topic_groups)